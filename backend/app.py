@@ -1,17 +1,51 @@
 """EvalSwipe FastAPI Application."""
 
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
 # Import routes
-from routes import traces, annotations, tags, sessions, prompt_improvement, braintrust, export_data
+from middleware import (
+    CompressionMiddleware,
+    MetricsMiddleware,
+    ProfilingMiddleware,
+    ReadinessMiddleware,
+    StateSyncMiddleware
+)
+from routes import (
+    traces, annotations, tags, sessions, prompt_improvement, braintrust, export_data, comparison, admin,
+    session_files, ingest, analytics, live_ingest
+)
+from services import metrics
+from services.event_log import event_log
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Recover state from the event log on startup, flush it on shutdown.
+
+    Recovery runs in the background by default so the server starts accepting
+    connections immediately; API requests get 503 until it has finished.
+    The live ingest queue is flushed before the log is closed.
+    """
+    if os.getenv("EVENT_LOG_RECOVERY", "background").lower() == "blocking":
+        event_log.recover()
+    else:
+        event_log.recover_in_background()
+    live_ingest.queue.start()
+    yield
+    await live_ingest.queue.stop()
+    session_files.close_all()
+    event_log.close()
+
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -19,9 +53,17 @@ app = FastAPI(
     description="API for AI trace review and evaluation",
     version="1.0.0",
     docs_url="/api/docs",
-    redoc_url="/api/redoc"
+    redoc_url="/api/redoc",
+    lifespan=lifespan
 )
 
+# Multi-worker mode: apply other workers' writes before serving API requests
+if event_log.shared:
+    app.add_middleware(StateSyncMiddleware, sync=event_log.sync)
+
+# Hold API requests while state is restored (inside CORS so 503s carry CORS headers)
+app.add_middleware(ReadinessMiddleware, is_ready=lambda: event_log.ready)
+
 # Configure CORS
 allowed_origins = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000").split(",")
 app.add_middleware(
@@ -32,6 +74,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Opt-in sampling profiler (PROFILING_ENABLED / PROFILING_SLOW_THRESHOLD_MS)
+app.add_middleware(ProfilingMiddleware)
+
+# Compress large responses (gzip, or brotli when installed)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.getenv("COMPRESSION_MINIMUM_SIZE", 1024))
+)
+
+# Per-route latency and payload size metrics (outermost, so sizes are as sent)
+app.add_middleware(MetricsMiddleware)
+
 # Include API routes
 app.include_router(traces.router, prefix="/api/traces", tags=["Traces"])
 app.include_router(annotations.router, prefix="/api/annotations", tags=["Annotations"])
@@ -40,6 +94,12 @@ app.include_router(sessions.router, prefix="/api/sessions", tags=["Sessions"])
 app.include_router(prompt_improvement.router, prefix="/api/prompt-improvement", tags=["Prompt Improvement"])
 app.include_router(braintrust.router, prefix="/api/braintrust", tags=["Braintrust"])
 app.include_router(export_data.router, prefix="/api/export", tags=["Export"])
+app.include_router(comparison.router, prefix="/api/compare", tags=["Comparison"])
+app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
+app.include_router(session_files.router, prefix="/api/session-files", tags=["Session Files"])
+app.include_router(ingest.router, prefix="/api/ingest", tags=["Trusted Ingest"])
+app.include_router(live_ingest.router, prefix="/api/ingest/live", tags=["Live Ingest"])
+app.include_router(analytics.router, prefix="/api/analytics", tags=["Analytics"])
 
 # Serve static frontend files
 frontend_path = os.path.join(os.path.dirname(__file__), "..", "frontend")
@@ -52,27 +112,69 @@ async def read_root():
     return FileResponse(os.path.join(frontend_path, "index.html"))
 
 
-@app.get("/health")
-async def health_check():
-    """Health check endpoint."""
+def _health():
+    if event_log.recovering:
+        status = "starting"
+    elif not event_log.ready:
+        status = "unhealthy"
+    else:
+        status = "healthy"
+
     return {
-        "status": "healthy",
+        "status": status,
+        "ready": event_log.ready,
         "version": "1.0.0",
-        "environment": os.getenv("ENV", "development")
+        "environment": os.getenv("ENV", "development"),
+        "recovery": event_log.recovery
     }
 
 
+@app.get("/health")
+async def health_check():
+    """Health check endpoint (liveness; always 200, see 'ready')."""
+    return _health()
+
+
+@app.get("/health/ready")
+async def readiness_check():
+    """Readiness endpoint: 503 until persisted state has been restored."""
+    health = _health()
+    return JSONResponse(health, status_code=200 if health["ready"] else 503)
+
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus metrics endpoint."""
+    metrics.entities.set(len(traces.traces_db), kind="traces")
+    metrics.entities.set(len(sessions.sessions_db), kind="sessions")
+    metrics.entities.set(len(tags.tags_db), kind="tags")
+
+    return PlainTextResponse(
+        metrics.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 if __name__ == "__main__":
     import uvicorn
 
     host = os.getenv("HOST", "0.0.0.0")
     port = int(os.getenv("PORT", 8000))
     debug = os.getenv("DEBUG", "true").lower() == "true"
+    workers = int(os.getenv("WORKERS", 1))
+
+    if workers > 1:
+        # Workers share state through the event log directory
+        if not os.getenv("EVENT_LOG_DIR"):
+            raise SystemExit("WORKERS > 1 requires EVENT_LOG_DIR (shared state directory)")
+        os.environ["EVENT_LOG_SHARED"] = "true"
 
     uvicorn.run(
         "app:app",
         host=host,
         port=port,
-        reload=debug,
+        reload=debug and workers == 1,
+        workers=workers,
         log_level=os.getenv("LOG_LEVEL", "info").lower()
     )
@@ -0,0 +1 @@
+"""Benchmarks for the EvalSwipe API hot paths."""
@@ -0,0 +1,66 @@
+"""Benchmark inter-rater agreement on a double-labeled session.
+
+Builds a session whose traces each carry annotations from several
+reviewers, then times:
+
+- building the agreement sums from the store (first request for a session)
+- reading the report (every later request)
+- updating the sums for one annotation (done by every annotation event)
+
+Usage (from backend/):
+    python -m benchmarks.bench_agreement --traces 50000 --reviewers 3
+"""
+
+import argparse
+import random
+from datetime import datetime
+from benchmarks.bench_serialization import timed
+from benchmarks.generator import GeneratorConfig, generate_traces
+from models import ReviewerAnnotation, Session
+from services import agreement, ingest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--traces", type=int, default=50000)
+    parser.add_argument("--reviewers", type=int, default=3)
+    parser.add_argument("--tags", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    tag_ids = [f"tag_{i}" for i in range(args.tags)]
+    reviewers = [f"reviewer_{i}" for i in range(args.reviewers)]
+    traces = ingest.strict_traces.validate_python(
+        generate_traces(GeneratorConfig(num_traces=args.traces, step_depth=1, reviewed_fraction=0))
+    )
+    for trace in traces:
+        failing = rng.random() < 0.3
+        for reviewer_id in reviewers:
+            # Reviewers agree most of the time
+            fail = failing != (rng.random() < 0.15)
+            trace.reviews[reviewer_id] = ReviewerAnnotation(
+                pass_fail="fail" if fail else "pass",
+                axial_tags=rng.sample(tag_ids, 2) if fail else [],
+                reviewed_at=datetime.now()
+            )
+    store = {trace.id: trace for trace in traces}
+    session = Session(id="session_bench", traces=traces)
+    print(f"{args.traces} traces, {args.reviewers} reviewers each, {args.tags} tags")
+
+    summary, _ = timed("build sums", lambda: agreement.SessionAgreement(session, store), args.repeat)
+    report, _ = timed("report", lambda: summary.report({}), args.repeat)
+    print(f"  fleiss kappa {report['fleiss_kappa']:.3f}, disputed {report['disputed']}")
+
+    def relabel():
+        trace = rng.choice(traces)
+        review = trace.reviews[reviewers[0]]
+        flipped = "pass" if review.pass_fail == "fail" else "fail"
+        trace.reviews = {**trace.reviews, reviewers[0]: review.model_copy(update={"pass_fail": flipped})}
+        summary.update(trace)
+
+    timed("update for 1000 annotations", lambda: [relabel() for _ in range(1000)], args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Benchmark CSV, JSON and Parquet exports for downstream analytics.
+
+For each format, measures export time, peak Python heap allocation during
+the export (tracemalloc), output size, and the time for a consumer to load
+the export back into typed columns: csv.reader plus json.loads of the
+metadata column, json.loads of the whole session, or pyarrow.parquet.
+
+tracemalloc only sees Python allocations; the peak of pyarrow's memory pool
+(which holds the row group being encoded) is printed at the end.
+
+Usage (from backend/):
+    python -m benchmarks.bench_export --traces 20000
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from benchmarks.bench_serialization import make_session
+from services.columnar_export import stream_session
+
+
+def export_csv(session) -> bytes:
+    """Same columns as routes.export_data.export_csv."""
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(["Trace ID", "User Input", "Agent Output", "System Prompt", "Pass/Fail",
+                     "Open Code", "Axial Tags", "Reviewer ID", "Reviewed At", "Metadata"])
+    for trace in session.traces:
+        writer.writerow([
+            trace.id, trace.user_input, trace.agent_output, trace.system_prompt or "",
+            trace.pass_fail or "", trace.open_code or "", ", ".join(trace.axial_tags),
+            trace.reviewer_id or "", trace.reviewed_at.isoformat() if trace.reviewed_at else "",
+            json.dumps(trace.metadata)
+        ])
+    return output.getvalue().encode()
+
+
+def read_csv(path: str):
+    with open(path, newline="") as f:
+        rows = list(csv.reader(f))[1:]
+    return [row[:9] + [json.loads(row[9])] for row in rows]
+
+
+def read_json(path: str):
+    with open(path, "rb") as f:
+        return json.loads(f.read())
+
+
+def read_parquet(path: str):
+    import pyarrow.parquet as pq
+    return pq.read_table(path)
+
+
+def measure(label: str, export, read, path: str):
+    """Export to path (chunks are written as produced), then read it back."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    with open(path, "wb") as f:
+        for chunk in export():
+            f.write(chunk)
+    export_time = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    read(path)
+    read_time = time.perf_counter() - start
+
+    size = os.path.getsize(path)
+    print(f"{label:<22} {export_time * 1000:>10.0f} {peak / 1e6:>12.1f} {size / 1e6:>10.1f} {read_time * 1000:>10.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--traces", type=int, default=20000)
+    parser.add_argument("--steps", type=int, default=5)
+    parser.add_argument("--row-group-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    session = make_session(args.traces, args.steps)
+
+    def parquet(table: str, compression: str):
+        return lambda: stream_session(
+            session, {}, table=table, row_group_size=args.row_group_size, compression=compression
+        )
+
+    header = f"{'format':<22} {'export ms':>10} {'peak heap MB':>12} {'size MB':>10} {'read ms':>10}"
+    print(f"{args.traces} traces, {args.steps} steps each")
+    print(header)
+    print("-" * len(header))
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "export")
+        measure("CSV", lambda: [export_csv(session)], read_csv, path)
+        measure("JSON", lambda: [session.model_dump_json().encode()], read_json, path)
+        measure("Parquet (zstd)", parquet("traces", "zstd"), read_parquet, path)
+        measure("Parquet (snappy)", parquet("traces", "snappy"), read_parquet, path)
+        measure("Parquet steps (zstd)", parquet("steps", "zstd"), read_parquet, path)
+
+    import pyarrow as pa
+    print(f"\nPeak pyarrow memory pool (including reads): {pa.default_memory_pool().max_memory() / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
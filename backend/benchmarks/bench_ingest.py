@@ -0,0 +1,107 @@
+"""Benchmark strict vs trusted trace ingest.
+
+Compares, for the same JSON payload:
+
+- per-trace ``Trace(**data)`` after ``json.loads`` (the previous import path)
+- FastAPI-style body validation (``json.loads`` then a compiled TypeAdapter)
+- validation straight from bytes (``validate_json``), with and without the
+  cyclic GC paused (the trusted ingest path)
+- ``model_construct`` without validation, for reference
+
+and end to end through the API: POST /api/traces/import vs POST
+/api/ingest/traces, and POST /api/sessions/ vs POST /api/ingest/sessions.
+
+Usage (from backend/):
+    python -m benchmarks.bench_ingest --traces 5000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+from pydantic_core import from_json
+from benchmarks.bench_serialization import timed
+from benchmarks.generator import GeneratorConfig, generate_traces
+from models import Trace, TraceStep
+from services import ingest
+
+
+def run_api(payload: bytes, session_payload: bytes, repeat: int):
+    import httpx
+    from app import app
+
+    os.environ.setdefault("TRUSTED_INGEST_TOKEN", "benchmark")
+    trusted = {
+        "Content-Type": "application/json",
+        "X-Ingest-Token": os.environ["TRUSTED_INGEST_TOKEN"],
+        "X-Schema-Fingerprint": ingest.SCHEMA_FINGERPRINT,
+    }
+    strict = {"Content-Type": "application/json"}
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+                cases = [
+                    ("POST /api/traces/import (strict)", "/api/traces/import", payload, strict),
+                    ("POST /api/ingest/traces (trusted)", "/api/ingest/traces", payload, trusted),
+                    ("POST /api/sessions/ (strict)", "/api/sessions/", session_payload, strict),
+                    ("POST /api/ingest/sessions (trusted)", "/api/ingest/sessions", session_payload, trusted),
+                ]
+                for label, url, body, headers in cases:
+                    best = float("inf")
+                    for _ in range(repeat):
+                        loop = asyncio.get_running_loop()
+                        start = loop.time()
+                        response = await client.post(url, content=body, headers=headers)
+                        response.raise_for_status()
+                        best = min(best, loop.time() - start)
+                    print(f"  {label:<38} {best * 1000:9.1f} ms")
+
+    asyncio.run(scenario())
+
+
+def validate_paused(items: bytes):
+    with ingest.gc_paused():
+        return ingest.strict_traces.validate_json(items)
+
+
+def construct(items):
+    return [
+        Trace.model_construct(**{
+            **item,
+            "intermediate_steps": [TraceStep.model_construct(**step) for step in item["intermediate_steps"]]
+        })
+        for item in items
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--traces", type=int, default=5000)
+    parser.add_argument("--steps", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-api", action="store_true", help="Skip the end-to-end API runs")
+    args = parser.parse_args()
+
+    traces = generate_traces(GeneratorConfig(num_traces=args.traces, step_depth=args.steps))
+    payload = json.dumps({"traces": traces}).encode()
+    items = json.dumps(traces).encode()
+    print(f"{args.traces} traces, {args.steps} steps each, {len(payload) / 1e6:.1f} MB")
+
+    print("parse + build:")
+    timed("json.loads + Trace(**data)", lambda: [Trace(**data) for data in json.loads(items)], args.repeat)
+    timed("json.loads + TypeAdapter (FastAPI)", lambda: ingest.strict_traces.validate_python(json.loads(items)),
+          args.repeat)
+    timed("validate_json", lambda: ingest.strict_traces.validate_json(items), args.repeat)
+    timed("validate_json, GC paused (trusted)", lambda: validate_paused(items), args.repeat)
+    timed("from_json + model_construct", lambda: construct(from_json(items)), args.repeat)
+
+    if not args.no_api:
+        print("API:")
+        session_payload = json.dumps({"name": "Ingest benchmark", "traces": traces}).encode()
+        run_api(payload, session_payload, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Benchmark JSON serialization and compression of session payloads.
+
+Compares FastAPI's default encoding (jsonable_encoder + json.dumps) with the
+pydantic-core fast path used by the routes, and reports compressed sizes.
+
+Usage (from backend/):
+    python -m benchmarks.bench_serialization --traces 2000
+"""
+
+import argparse
+import gzip
+import json
+import time
+from fastapi.encoders import jsonable_encoder
+from benchmarks.generator import GeneratorConfig, generate_traces
+from models import Session, Trace
+from services.serialization import dumps
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def make_session(num_traces: int, num_steps: int) -> Session:
+    """Build a session from synthetic traces."""
+    config = GeneratorConfig(num_traces=num_traces, step_depth=num_steps)
+    traces = [Trace(**data) for data in generate_traces(config)]
+    return Session(id="session_bench", name="Benchmark", traces=traces, total_traces=num_traces)
+
+
+def timed(label: str, func, repeat: int):
+    """Run func repeat times and print the best wall time."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    print(f"  {label:<38} {best * 1000:9.1f} ms")
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--traces", type=int, default=2000)
+    parser.add_argument("--steps", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    session = make_session(args.traces, args.steps)
+    payloads = {
+        "get_session (full)": session,
+        "get_session (summary)": session.summary(),
+        "get_traces (summary)": {"traces": [t.summary() for t in session.traces], "count": args.traces},
+    }
+
+    for name, payload in payloads.items():
+        print(f"{name}:")
+        _, baseline = timed(
+            "jsonable_encoder + json.dumps",
+            lambda: json.dumps(jsonable_encoder(payload)).encode(),
+            args.repeat
+        )
+        body, fast = timed("pydantic-core to_json", lambda: dumps(payload), args.repeat)
+        print(f"  {'speedup':<38} {baseline / fast:9.1f} x")
+        print(f"  {'body size':<38} {len(body):9d} bytes")
+        print(f"  {'gzip (level 6)':<38} {len(gzip.compress(body, 6)):9d} bytes")
+        if brotli is not None:
+            print(f"  {'brotli (quality 4)':<38} {len(brotli.compress(body, quality=4)):9d} bytes")
+
+    print("export_json:")
+    _, baseline = timed(
+        "model_dump(mode='json') + json.dumps",
+        lambda: json.dumps(session.model_dump(mode="json")).encode(),
+        args.repeat
+    )
+    _, fast = timed("model_dump_json", session.model_dump_json, args.repeat)
+    print(f"  {'speedup':<38} {baseline / fast:9.1f} x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Benchmark binary session files against JSON session loading.
+
+Writes a synthetic session as JSON and as a session file, then compares the
+time to load the JSON with the time to open the session file, look up traces
+by ID, read a page and compute review counts.
+
+Usage (from backend/):
+    python -m benchmarks.bench_session_file --traces 100000 --steps 2
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from benchmarks.bench_serialization import make_session, timed
+from models import Session
+from services.session_file import SessionFile, write_session_file
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--traces", type=int, default=100000)
+    parser.add_argument("--steps", type=int, default=2)
+    parser.add_argument("--lookups", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    session = make_session(args.traces, args.steps)
+    rng = random.Random(0)
+    lookup_ids = [rng.choice(session.traces).id for _ in range(args.lookups)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        json_path = os.path.join(directory, "session.json")
+        file_path = os.path.join(directory, "session.evsession")
+
+        print("write:")
+        timed("JSON", lambda: open(json_path, "wb").write(session.model_dump_json().encode()), 1)
+        timed("session file", lambda: write_session_file(file_path, session), 1)
+        print(f"  sizes: JSON {os.path.getsize(json_path) / 1e6:.1f} MB, "
+              f"session file {os.path.getsize(file_path) / 1e6:.1f} MB")
+
+        def load_json():
+            with open(json_path, "rb") as f:
+                return Session.model_validate_json(f.read())
+
+        print("load:")
+        timed("JSON (parse whole session)", load_json, args.repeat)
+        timed("session file (open)", lambda: SessionFile(file_path).close(), args.repeat)
+
+        with SessionFile(file_path) as session_file:
+            print(f"access ({args.lookups} lookups):")
+            _, elapsed = timed("find + parse trace by ID",
+                               lambda: [session_file.trace(session_file.find(i)) for i in lookup_ids], args.repeat)
+            print(f"  {'per lookup':<38} {elapsed / args.lookups * 1e6:9.1f} us")
+            timed("page of 100 traces (raw JSON)", lambda: session_file.page_json(args.traces // 2, 100), args.repeat)
+            timed("review counts (columns)", session_file.counts, args.repeat)
+            timed("to_session (full import)", session_file.to_session, 1)
+
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    main()
+    print(f"total {time.perf_counter() - start:.1f}s")
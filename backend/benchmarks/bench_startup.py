@@ -0,0 +1,118 @@
+"""Benchmark cold start: app import, server startup and time to ready.
+
+Each run is a fresh interpreter that imports the app, enters its lifespan and
+waits until persisted state has been restored. Optionally seeds an event log
+with synthetic traces first, to measure recovery in the background and
+blocking modes.
+
+Usage (from backend/):
+    python -m benchmarks.bench_startup --runs 5
+    python -m benchmarks.bench_startup --traces 20000 --snapshot
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+from benchmarks.generator import GeneratorConfig, generate_traces
+from services.event_log import EventLog, Store
+
+# Runs in the child interpreter; times are relative to the first statement
+CHILD = r"""
+import asyncio, json, sys, time
+t0 = time.perf_counter()
+from app import app
+from services.event_log import event_log
+t_import = time.perf_counter()
+
+async def main():
+    async with app.router.lifespan_context(app):
+        t_started = time.perf_counter()
+        while event_log.recovering:
+            await asyncio.sleep(0.001)
+        t_ready = time.perf_counter()
+    print(json.dumps({
+        "import_ms": (t_import - t0) * 1000,
+        "startup_ms": (t_started - t0) * 1000,
+        "ready_ms": (t_ready - t0) * 1000,
+        "traces": len(sys.modules["routes.traces"].traces_db),
+        "heavy_modules": [m for m in ("anthropic", "requests", "reportlab") if m in sys.modules],
+    }))
+
+asyncio.run(main())
+"""
+
+
+def seed_event_log(directory: str, num_traces: int, annotations: int, snapshot: bool):
+    """Write an event log with imported and annotated synthetic traces."""
+    log = EventLog(directory=directory)
+    store = Store()
+    traces = generate_traces(GeneratorConfig(num_traces=num_traces))
+    for offset in range(0, len(traces), 1000):
+        log.commit("trace.import", {"traces": traces[offset:offset + 1000]}, store)
+    for trace in traces[:annotations]:
+        log.commit("annotation.set", {
+            "trace_id": trace["id"],
+            "actor": "bench",
+            "state": {"reviewed": True, "pass_fail": "fail", "axial_tags": []},
+            "previous": {},
+        }, store)
+    if snapshot:
+        log.snapshot(store)
+    log.close()
+
+
+def run_child(env: Dict[str, str]) -> Dict:
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD],
+        env=env, capture_output=True, text=True, check=True
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result["process_ms"] = (time.perf_counter() - start) * 1000
+    return result
+
+
+def report(label: str, results: List[Dict]):
+    def median(key):
+        return statistics.median(r[key] for r in results)
+
+    print(
+        f"  {label:<12} import {median('import_ms'):8.1f} ms   startup {median('startup_ms'):8.1f} ms   "
+        f"ready {median('ready_ms'):8.1f} ms   process {median('process_ms'):8.1f} ms   "
+        f"traces {results[-1]['traces']}"
+    )
+    if results[-1]["heavy_modules"]:
+        print(f"  {'':<12} imported at startup: {', '.join(results[-1]['heavy_modules'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark EvalSwipe cold start")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--traces", type=int, default=0, help="Seed an event log with this many traces")
+    parser.add_argument("--annotations", type=int, default=1000)
+    parser.add_argument("--snapshot", action="store_true", help="Compact the seeded log into a snapshot")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        env = {**os.environ, "PYTHONPATH": os.getcwd()}
+        env.pop("EVENT_LOG_DIR", None)
+
+        if args.traces:
+            seed_event_log(directory, args.traces, args.annotations, args.snapshot)
+            env["EVENT_LOG_DIR"] = directory
+
+        print(f"Cold start, median of {args.runs} runs ({args.traces} persisted traces):")
+        modes = ("background", "blocking") if args.traces else ("background",)
+        for mode in modes:
+            results = [run_child({**env, "EVENT_LOG_RECOVERY": mode}) for _ in range(args.runs)]
+            report(mode, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Benchmark step analytics: building the sketches, updating them and reporting.
+
+Compares the sketch quantiles with exact ones (sorted lists) and reports the
+worst relative error, then times:
+
+- building the statistics from scratch (what the first request pays)
+- re-annotating traces (each moves one trace between cohorts)
+- a report (per tool latency, pass vs fail) against the exact computation
+  over every step
+
+Usage (from backend/):
+    python -m benchmarks.bench_step_analytics --traces 20000 --steps 10
+"""
+
+import argparse
+import random
+from benchmarks.bench_serialization import timed
+from benchmarks.generator import GeneratorConfig, generate_traces
+from models import Trace
+from services import step_analytics
+
+
+def exact_report(traces, quantile):
+    """Per tool, the quantile of step latency in failing and passing traces."""
+    values = {}
+    for trace in traces:
+        if trace.pass_fail not in ("pass", "fail"):
+            continue
+        for grouping, group, measure, value in step_analytics.measurements(trace):
+            if grouping == "tool" and measure == "latency_ms":
+                values.setdefault((group, trace.pass_fail), []).append(value)
+    result = {}
+    for key, found in values.items():
+        found.sort()
+        result[key] = found[int(quantile * (len(found) - 1))]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--traces", type=int, default=20000)
+    parser.add_argument("--steps", type=int, default=10)
+    parser.add_argument("--updates", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    config = GeneratorConfig(num_traces=args.traces, step_depth=args.steps, output_chars=50, step_chars=20)
+    traces = [Trace(**data) for data in generate_traces(config, tag_ids=["tag_a", "tag_b", "tag_c"])]
+    print(f"{args.traces} traces, {args.traces * args.steps} steps")
+
+    analytics, _ = timed("build sketches", lambda: step_analytics.StepAnalytics(traces), 1)
+
+    exact = exact_report(traces, 0.9)
+    worst = 0.0
+    for (tool, cohort), value in exact.items():
+        estimate = analytics.sketch(cohort, "tool", tool, "latency_ms").quantile(0.9)
+        worst = max(worst, abs(estimate - value) / value)
+    print(f"  worst p90 relative error: {worst:.4f} (bound {step_analytics.RELATIVE_ACCURACY})")
+
+    rng = random.Random(7)
+    sample = rng.sample(traces, min(args.updates, len(traces)))
+
+    def reannotate():
+        for trace in sample:
+            trace.pass_fail = "fail" if trace.pass_fail != "fail" else "pass"
+            trace.axial_tags = ["tag_a"] if trace.pass_fail == "fail" else []
+            analytics.add(trace)
+
+    timed(f"re-annotate {len(sample)} traces", reannotate, args.repeat)
+    timed("report (tool latency, fail vs pass)",
+          lambda: analytics.report("tool", "latency_ms", ["all", "pass", "fail"]), args.repeat)
+    timed("exact (sort every step latency)", lambda: exact_report(traces, 0.9), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
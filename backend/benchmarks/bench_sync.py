@@ -0,0 +1,63 @@
+"""Benchmark re-importing an experiment: replace vs incremental sync.
+
+Imports a batch of traces, then re-imports it with a fraction of the traces
+changed, timing:
+
+- a plain import (every trace validated and replaced)
+- the first sync of traces imported without sync (fingerprints adopted)
+- a sync where only the changed traces are validated and stored
+
+A replace also writes every trace to the event log; a sync writes only the
+changed ones.
+
+Usage (from backend/):
+    python -m benchmarks.bench_sync --traces 50000 --changed 0.01
+"""
+
+import argparse
+import copy
+import random
+from benchmarks.bench_serialization import timed
+from benchmarks.generator import GeneratorConfig, generate_traces
+from services import ingest, trace_sync
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--traces", type=int, default=50000)
+    parser.add_argument("--steps", type=int, default=5)
+    parser.add_argument("--changed", type=float, default=0.01, help="Fraction of traces changed")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    raw = generate_traces(GeneratorConfig(num_traces=args.traces, step_depth=args.steps, reviewed_fraction=0.5))
+    stored = {trace.id: trace for trace in ingest.strict_traces.validate_python(raw)}
+
+    rng = random.Random(7)
+    refreshed = copy.deepcopy(raw)
+    for item in rng.sample(refreshed, int(len(refreshed) * args.changed)):
+        item["agent_output"] += " (regenerated)"
+    print(f"{args.traces} traces, {args.steps} steps each, {args.changed:.1%} changed")
+
+    timed("replace (validate everything)", lambda: ingest.strict_traces.validate_python(refreshed), args.repeat)
+    result, _ = timed(
+        "first sync (adopt fingerprints)",
+        lambda: trace_sync.plan(refreshed, stored, ingest.strict_traces.validate_python),
+        1
+    )
+    stored.update({trace.id: trace for trace in result["traces"]})
+    print(f"  adopted {result['adopted']}, updated {result['updated']}, stale {result['stale']}")
+
+    # Next refresh: another set of traces changed
+    for item in rng.sample(refreshed, int(len(refreshed) * args.changed)):
+        item["agent_output"] += " (regenerated again)"
+    result, _ = timed(
+        "sync (delta only)",
+        lambda: trace_sync.plan(refreshed, stored, ingest.strict_traces.validate_python),
+        args.repeat
+    )
+    print(f"  unchanged {result['unchanged']}, updated {result['updated']}")
+
+
+if __name__ == "__main__":
+    main()
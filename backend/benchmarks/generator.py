@@ -0,0 +1,176 @@
+"""Synthetic trace generator for benchmarks.
+
+Produces trace dicts in the same shape as ``frontend/assets/demo-data.json``
+(and ``Trace``), deterministically from a seed.
+
+Usage (from backend/):
+    python -m benchmarks.generator --traces 1000 --out /tmp/traces.json
+"""
+
+import argparse
+import json
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+_WORDS = (
+    "spicy crunchy sweet salty kettle chips pretzels popcorn chocolate "
+    "gummy sour vegan gluten-free organic protein bar trail mix cracker "
+    "cheese dip salsa tortilla jerky nuts almonds cashews seaweed rice "
+    "recommend similar flavor texture brand price budget healthy snack"
+).split()
+
+_STEP_TYPES = ("llm_call", "tool_call", "retrieval", "output")
+_TOOLS = ("search_products", "get_reviews", "check_inventory", "lookup_nutrition")
+_MODELS = ("model-a-v1", "model-a-v2", "model-b-v1")
+_TAG_COLORS = ("#EF4444", "#F59E0B", "#10B981", "#3B82F6", "#8B5CF6", "#EC4899")
+
+
+@dataclass
+class GeneratorConfig:
+    """Knobs for the synthetic data set."""
+
+    num_traces: int = 1000
+    num_tags: int = 10
+    step_depth: int = 5
+    input_chars: int = 200
+    output_chars: int = 1000
+    step_chars: int = 300
+    tag_density: float = 0.3
+    reviewed_fraction: float = 0.5
+    duplicate_rate: float = 0.0
+    seed: int = 42
+
+
+def _text(rng: random.Random, num_chars: int) -> str:
+    """Random word salad of roughly num_chars characters."""
+    words = []
+    length = 0
+    while length < num_chars:
+        word = rng.choice(_WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)[:num_chars]
+
+
+def generate_tags(config: GeneratorConfig) -> List[Dict[str, Any]]:
+    """Generate axial tag definitions (TagCreateRequest shape)."""
+    return [
+        {
+            "name": f"Failure mode {i:02d}",
+            "description": f"Synthetic failure category number {i} used for benchmarking",
+            "color": _TAG_COLORS[i % len(_TAG_COLORS)],
+        }
+        for i in range(config.num_tags)
+    ]
+
+
+def generate_traces(config: GeneratorConfig, tag_ids: List[str] = None) -> List[Dict[str, Any]]:
+    """
+    Generate trace dicts.
+
+    Args:
+        config: Generator configuration
+        tag_ids: IDs to draw axial tags from (tagging is skipped when empty)
+
+    A ``duplicate_rate`` fraction of traces reuse the user input of an earlier
+    trace, to exercise de-duplication and input-based alignment.
+    """
+    rng = random.Random(config.seed)
+    tag_ids = tag_ids or []
+    start = datetime(2025, 1, 1)
+    traces = []
+
+    for i in range(config.num_traces):
+        if traces and rng.random() < config.duplicate_rate:
+            user_input = rng.choice(traces)["user_input"]
+        else:
+            user_input = _text(rng, config.input_chars)
+
+        timestamp = start + timedelta(seconds=i * 37)
+        steps = []
+        for depth in range(config.step_depth):
+            step_type = _STEP_TYPES[depth % len(_STEP_TYPES)]
+            metadata = {"duration_ms": rng.randint(5, 2000)}
+            if step_type == "tool_call":
+                metadata["tool"] = rng.choice(_TOOLS)
+            if step_type == "llm_call":
+                metadata["tokens"] = rng.randint(50, 2000)
+            steps.append({
+                "step_type": step_type,
+                "content": _text(rng, config.step_chars),
+                "metadata": metadata,
+                "timestamp": (timestamp + timedelta(milliseconds=depth * 150)).isoformat(),
+            })
+
+        trace = {
+            "id": f"synthetic_{config.seed}_{i:07d}",
+            "user_input": user_input,
+            "agent_output": _text(rng, config.output_chars),
+            "system_prompt": "You are a helpful snack recommendation assistant.",
+            "intermediate_steps": steps,
+            "metadata": {
+                "model_version": rng.choice(_MODELS),
+                "latency_ms": int(rng.lognormvariate(6.5, 0.5)),
+                "token_count": rng.randint(100, 4000),
+                "timestamp": timestamp.isoformat(),
+                "braintrust_trace_id": f"bt_{config.seed}_{i:07d}",
+            },
+        }
+
+        if rng.random() < config.reviewed_fraction:
+            pass_fail = rng.choices(("pass", "fail", "defer"), weights=(6, 3, 1))[0]
+            trace.update({
+                "reviewed": True,
+                "pass_fail": pass_fail,
+                "reviewer_id": f"reviewer_{rng.randint(1, 3)}",
+                "reviewed_at": (timestamp + timedelta(hours=1)).isoformat(),
+            })
+            if pass_fail == "fail":
+                trace["open_code"] = _text(rng, 80)
+                if tag_ids and rng.random() < config.tag_density:
+                    trace["axial_tags"] = rng.sample(tag_ids, k=min(len(tag_ids), rng.randint(1, 2)))
+
+        traces.append(trace)
+
+    return traces
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic traces")
+    parser.add_argument("--traces", type=int, default=1000)
+    parser.add_argument("--tags", type=int, default=10)
+    parser.add_argument("--steps", type=int, default=5)
+    parser.add_argument("--input-chars", type=int, default=200)
+    parser.add_argument("--output-chars", type=int, default=1000)
+    parser.add_argument("--step-chars", type=int, default=300)
+    parser.add_argument("--tag-density", type=float, default=0.3)
+    parser.add_argument("--duplicate-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default="-", help="Output file ('-' for stdout)")
+    args = parser.parse_args()
+
+    config = GeneratorConfig(
+        num_traces=args.traces,
+        num_tags=args.tags,
+        step_depth=args.steps,
+        input_chars=args.input_chars,
+        output_chars=args.output_chars,
+        step_chars=args.step_chars,
+        tag_density=args.tag_density,
+        duplicate_rate=args.duplicate_rate,
+        seed=args.seed,
+    )
+    tag_ids = [f"tag_{i:03d}" for i in range(config.num_tags)]
+    data = {"traces": generate_traces(config, tag_ids)}
+
+    if args.out == "-":
+        print(json.dumps(data))
+    else:
+        with open(args.out, "w") as f:
+            json.dump(data, f)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""Benchmark harness for the API hot paths.
+
+Drives the ASGI app in-process (no network, no server) with synthetic data
+and reports latency percentiles, throughput and peak RSS per operation.
+
+Usage (from backend/):
+    python -m benchmarks.harness --traces 5000 --steps 5 --json results.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import platform
+import resource
+import sys
+import time
+from typing import Any, Dict, List
+import httpx
+from app import app
+from benchmarks.generator import GeneratorConfig, generate_tags, generate_traces
+from routes.sessions import sessions_db
+from routes.tags import tags_db
+from routes.traces import traces_db
+from services import revisions
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+class Recorder:
+    """Collects per-operation latencies and wall time."""
+
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+        self.latencies: Dict[str, List[float]] = {}
+        self.wall: Dict[str, float] = {}
+        self.rss: Dict[str, float] = {}
+
+    async def call(self, name: str, method: str, url: str, expect: int = 200, **kwargs) -> httpx.Response:
+        """Issue one request and record its latency under name."""
+        start = time.perf_counter()
+        response = await self.client.request(method, url, **kwargs)
+        elapsed = time.perf_counter() - start
+
+        if response.status_code != expect:
+            raise RuntimeError(
+                f"{name}: {method} {url} returned {response.status_code}: {response.text[:200]}"
+            )
+
+        self.latencies.setdefault(name, []).append(elapsed)
+        self.wall[name] = self.wall.get(name, 0.0) + elapsed
+        self.rss[name] = peak_rss_mb()
+        return response
+
+    def summary(self) -> List[Dict[str, Any]]:
+        rows = []
+        for name, values in self.latencies.items():
+            values = sorted(values)
+            rows.append({
+                "operation": name,
+                "count": len(values),
+                "p50_ms": percentile(values, 50) * 1000,
+                "p95_ms": percentile(values, 95) * 1000,
+                "p99_ms": percentile(values, 99) * 1000,
+                "max_ms": values[-1] * 1000,
+                "ops_per_s": len(values) / self.wall[name] if self.wall[name] else 0.0,
+                "peak_rss_mb": self.rss[name],
+            })
+        return rows
+
+
+def reset_state():
+    """Start every run from an empty store."""
+    traces_db.clear()
+    sessions_db.clear()
+    tags_db.clear()
+    revisions.clear_cache()
+
+
+async def run(config: GeneratorConfig, batch_size: int, repeat: int, annotations: int) -> Recorder:
+    reset_state()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        rec = Recorder(client)
+
+        # Tags first so generated traces can reference real tag IDs
+        tag_ids = []
+        for tag in generate_tags(config):
+            response = await rec.call("create_tag", "POST", "/api/tags/", json=tag)
+            tag_ids.append(response.json()["tag"]["id"])
+
+        traces = generate_traces(config, tag_ids)
+
+        for offset in range(0, len(traces), batch_size):
+            await rec.call(
+                "import_traces", "POST", "/api/traces/import",
+                json={"traces": traces[offset:offset + batch_size]}
+            )
+
+        session_id = None
+        for _ in range(repeat):
+            response = await rec.call(
+                "create_session", "POST", "/api/sessions/",
+                json={"name": "Benchmark", "traces": traces, "config": {"source": "benchmark"}}
+            )
+            session_id = response.json()["session"]["id"]
+
+        for _ in range(repeat):
+            await rec.call("get_traces (summary)", "GET", "/api/traces/")
+            await rec.call("get_traces (full)", "GET", "/api/traces/", params={"view": "full"})
+            await rec.call("get_traces (filtered)", "GET", "/api/traces/", params={"pass_fail": "fail"})
+            response = await rec.call("get_session (summary)", "GET", f"/api/sessions/{session_id}")
+            await rec.call(
+                "get_session (304)", "GET", f"/api/sessions/{session_id}", expect=304,
+                headers={"If-None-Match": response.headers["etag"]}
+            )
+            await rec.call("get_session (full)", "GET", f"/api/sessions/{session_id}", params={"view": "full"})
+
+        annotated = [trace["id"] for trace in traces[:annotations]]
+        for trace_id in annotated:
+            body = {
+                "trace_id": trace_id,
+                "pass_fail": "fail",
+                "open_code": "Benchmark annotation",
+                "axial_tags": tag_ids[:1],
+                "reviewer_id": "bench",
+            }
+            await rec.call("create_annotation", "POST", "/api/annotations/", json=body)
+            await rec.call("update_annotation", "PUT", f"/api/annotations/{trace_id}", json={**body, "pass_fail": "pass"})
+        for trace_id in annotated:
+            await rec.call("delete_annotation", "DELETE", f"/api/annotations/{trace_id}")
+
+        full_session = (await client.get(f"/api/sessions/{session_id}", params={"view": "full"})).json()
+        for _ in range(repeat):
+            await rec.call("update_session", "PUT", f"/api/sessions/{session_id}", json=full_session)
+
+        for _ in range(repeat):
+            await rec.call("export_csv", "GET", f"/api/export/csv/{session_id}")
+            await rec.call("export_json", "GET", f"/api/export/json/{session_id}")
+            await rec.call("export_pdf", "GET", f"/api/export/pdf/{session_id}")
+            await rec.call("export_parquet", "GET", f"/api/export/parquet/{session_id}")
+            await rec.call("export_session_file", "GET", f"/api/export/session-file/{session_id}")
+
+        # Merge tags pairwise, then delete what is left
+        remaining = list(tag_ids)
+        while len(remaining) >= 2:
+            source, target = remaining.pop(), remaining[0]
+            await rec.call(
+                "merge_tags", "POST", "/api/tags/merge",
+                json={"source_tag_id": source, "target_tag_id": target}
+            )
+        for tag_id in remaining:
+            await rec.call("delete_tag", "DELETE", f"/api/tags/{tag_id}")
+
+    return rec
+
+
+def print_table(rows: List[Dict[str, Any]]):
+    header = f"{'operation':<24} {'n':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} {'ops/s':>9} {'rss MB':>8}"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        print(
+            f"{row['operation']:<24} {row['count']:>5} {row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f} "
+            f"{row['p99_ms']:>9.2f} {row['max_ms']:>9.2f} {row['ops_per_s']:>9.1f} {row['peak_rss_mb']:>8.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the EvalSwipe API in-process")
+    parser.add_argument("--traces", type=int, default=2000)
+    parser.add_argument("--tags", type=int, default=10)
+    parser.add_argument("--steps", type=int, default=5)
+    parser.add_argument("--input-chars", type=int, default=200)
+    parser.add_argument("--output-chars", type=int, default=1000)
+    parser.add_argument("--step-chars", type=int, default=300)
+    parser.add_argument("--tag-density", type=float, default=0.3)
+    parser.add_argument("--duplicate-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=500, help="Traces per import request")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetitions of bulk operations")
+    parser.add_argument("--annotations", type=int, default=200, help="Traces to annotate")
+    parser.add_argument("--json", dest="json_out", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    config = GeneratorConfig(
+        num_traces=args.traces,
+        num_tags=args.tags,
+        step_depth=args.steps,
+        input_chars=args.input_chars,
+        output_chars=args.output_chars,
+        step_chars=args.step_chars,
+        tag_density=args.tag_density,
+        duplicate_rate=args.duplicate_rate,
+        seed=args.seed,
+    )
+
+    start = time.perf_counter()
+    rec = asyncio.run(run(config, args.batch_size, args.repeat, args.annotations))
+    total = time.perf_counter() - start
+
+    rows = rec.summary()
+    print_table(rows)
+    print(f"\nTotal: {total:.2f}s, peak RSS {peak_rss_mb():.1f} MB")
+
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump({
+                "config": vars(args),
+                "python": platform.python_version(),
+                "total_s": total,
+                "peak_rss_mb": peak_rss_mb(),
+                "results": rows,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""Load test: throughput of a real server with 1..N workers.
+
+Starts ``app.py`` with each requested worker count (sharing state through a
+temporary event log directory), seeds it over HTTP, then drives a mix of
+CPU-heavy reads and writes from concurrent clients for a fixed duration.
+Prints requests per second and latency per worker count, and the speedup
+over the first one.
+
+Usage (from backend/):
+    python -m benchmarks.load_test --workers 1 2 4 --duration 20
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+import httpx
+from benchmarks.generator import GeneratorConfig, generate_tags, generate_traces
+from benchmarks.harness import percentile
+
+
+def start_server(workers: int, port: int, directory: str) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "WORKERS": str(workers),
+        "PORT": str(port),
+        "HOST": "127.0.0.1",
+        "DEBUG": "false",
+        "LOG_LEVEL": "warning",
+        "EVENT_LOG_DIR": directory,
+    }
+    return subprocess.Popen([sys.executable, "app.py"], env=env)
+
+
+def wait_ready(base_url: str, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health/ready").status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"Server at {base_url} did not become ready")
+
+
+async def seed(client: httpx.AsyncClient, config: GeneratorConfig) -> Dict[str, Any]:
+    tag_ids = []
+    for tag in generate_tags(config):
+        response = await client.post("/api/tags/", json=tag)
+        tag_ids.append(response.json()["tag"]["id"])
+
+    traces = generate_traces(config, tag_ids)
+    response = await client.post(
+        "/api/sessions/", json={"name": "Load test", "traces": traces, "config": {"source": "benchmark"}}
+    )
+    return {
+        "session_id": response.json()["session"]["id"],
+        "trace_ids": [trace["id"] for trace in traces],
+        "tag_ids": tag_ids,
+        "import_batch": traces[:200],
+    }
+
+
+def operations(data: Dict[str, Any]):
+    """Cycle through the request mix forever."""
+    session_id = data["session_id"]
+    trace_ids = itertools.cycle(data["trace_ids"])
+    mix = [
+        ("get_session (full)", lambda: ("GET", f"/api/sessions/{session_id}", {"params": {"view": "full"}})),
+        ("get_traces", lambda: ("GET", "/api/traces/", {})),
+        ("export_csv", lambda: ("GET", f"/api/export/csv/{session_id}", {})),
+        ("export_json", lambda: ("GET", f"/api/export/json/{session_id}", {})),
+        ("export_pdf", lambda: ("GET", f"/api/export/pdf/{session_id}", {})),
+        ("import_traces", lambda: ("POST", "/api/traces/import", {"json": {"traces": data["import_batch"]}})),
+        ("annotate", lambda: ("POST", "/api/annotations/", {"json": {
+            "trace_id": next(trace_ids),
+            "pass_fail": "fail",
+            "axial_tags": data["tag_ids"][:1],
+            "reviewer_id": "load",
+        }})),
+    ]
+    return itertools.cycle(mix)
+
+
+async def drive(base_url: str, data: Dict[str, Any], concurrency: int, duration: float) -> Dict[str, Any]:
+    latencies: Dict[str, List[float]] = {}
+    errors = 0
+    deadline = time.perf_counter() + duration
+    mix = operations(data)
+
+    async def client_loop(client: httpx.AsyncClient):
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            name, build = next(mix)
+            method, url, kwargs = build()
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            elapsed = time.perf_counter() - start
+            if response.status_code >= 400:
+                errors += 1
+            latencies.setdefault(name, []).append(elapsed)
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=300, limits=limits) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        wall = time.perf_counter() - start
+
+    all_values = sorted(value for values in latencies.values() for value in values)
+    return {
+        "requests": len(all_values),
+        "errors": errors,
+        "rps": len(all_values) / wall,
+        "p50_ms": percentile(all_values, 50) * 1000,
+        "p95_ms": percentile(all_values, 95) * 1000,
+        "per_operation": {
+            name: {
+                "count": len(values),
+                "p50_ms": percentile(sorted(values), 50) * 1000,
+            }
+            for name, values in latencies.items()
+        },
+    }
+
+
+def run(workers: int, args) -> Dict[str, Any]:
+    base_url = f"http://127.0.0.1:{args.port}"
+    config = GeneratorConfig(num_traces=args.traces, step_depth=args.steps)
+
+    with tempfile.TemporaryDirectory() as directory:
+        server = start_server(workers, args.port, directory)
+        try:
+            wait_ready(base_url)
+
+            async def scenario():
+                async with httpx.AsyncClient(base_url=base_url, timeout=300) as client:
+                    data = await seed(client, config)
+                return await drive(base_url, data, args.concurrency, args.duration)
+
+            return asyncio.run(scenario())
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test EvalSwipe with several worker counts")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per worker count")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--traces", type=int, default=1000)
+    parser.add_argument("--steps", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--json", dest="json_out", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    print(f"CPUs: {os.cpu_count()}, {args.concurrency} clients, {args.duration:.0f}s per run")
+    header = f"{'workers':>7} {'requests':>9} {'errors':>7} {'req/s':>9} {'speedup':>8} {'p50 ms':>9} {'p95 ms':>9}"
+    print(header)
+    print("-" * len(header))
+
+    results = []
+    for workers in args.workers:
+        result = {"workers": workers, **run(workers, args)}
+        results.append(result)
+        speedup = result["rps"] / results[0]["rps"] if results[0]["rps"] else 0.0
+        print(
+            f"{workers:>7} {result['requests']:>9} {result['errors']:>7} {result['rps']:>9.1f} "
+            f"{speedup:>7.2f}x {result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f}"
+        )
+
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump({"config": vars(args), "cpus": os.cpu_count(), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+"""Gunicorn configuration for multi-worker deployments.
+
+Usage (from backend/):
+    EVENT_LOG_DIR=/var/lib/evalswipe gunicorn app:app -c gunicorn.conf.py
+
+Workers share state through the event log in EVENT_LOG_DIR (see
+docs/SETUP.md#multi-worker-deployment).
+"""
+
+import multiprocessing
+import os
+
+if not os.getenv("EVENT_LOG_DIR"):
+    raise RuntimeError("Multi-worker mode requires EVENT_LOG_DIR (shared state directory)")
+
+# Set before workers import the app
+os.environ["EVENT_LOG_SHARED"] = "true"
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', 8000)}"
+workers = int(os.getenv("WORKERS", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+loglevel = os.getenv("LOG_LEVEL", "info").lower()
+
+# Large imports and PDF exports can take a while
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 120))
@@ -0,0 +1,15 @@
+"""ASGI middleware for EvalSwipe."""
+
+from .compression import CompressionMiddleware
+from .metrics import MetricsMiddleware
+from .profiling import ProfilingMiddleware
+from .readiness import ReadinessMiddleware
+from .sync import StateSyncMiddleware
+
+__all__ = [
+    "CompressionMiddleware",
+    "MetricsMiddleware",
+    "ProfilingMiddleware",
+    "ReadinessMiddleware",
+    "StateSyncMiddleware"
+]
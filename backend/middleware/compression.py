@@ -0,0 +1,181 @@
+"""Negotiated gzip/brotli response compression.
+
+Session and export payloads are mostly repetitive text and compress very
+well. Brotli is used when the client accepts it and the optional ``brotli``
+package is installed; gzip is used otherwise.
+"""
+
+import zlib
+from typing import Optional, Tuple
+import anyio.to_thread
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+# Bodies that are already compressed or must not be buffered by a proxy
+EXCLUDED_CONTENT_TYPES = (
+    "application/gzip",
+    "application/zip",
+    "application/pdf",
+    "application/vnd.apache.arrow.file",
+    "application/vnd.apache.arrow.stream",
+    "application/vnd.apache.parquet",
+    "text/event-stream",
+    "image/",
+    "audio/",
+    "video/",
+)
+
+# Chunks larger than this are compressed in a worker thread
+THREAD_MINIMUM_SIZE = 256 * 1024
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick 'br' or 'gzip' from an Accept-Encoding header (None for identity)."""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+
+    wildcard = accepted.get("*", 0.0)
+    candidates = (["br"] if brotli is not None else []) + ["gzip"]
+    best: Tuple[float, Optional[str]] = (0.0, None)
+    for encoding in candidates:
+        quality = accepted.get(encoding, wildcard)
+        if quality > best[0]:
+            best = (quality, encoding)
+    return best[1]
+
+
+class _Compressor:
+    """Streaming compressor with a common interface for gzip and brotli."""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, body: bytes, final: bool) -> bytes:
+        if self.encoding == "br":
+            data = self._brotli.process(body)
+            return data + (self._brotli.finish() if final else self._brotli.flush())
+        data = self._zlib.compress(body)
+        return data + (self._zlib.flush() if final else self._zlib.flush(zlib.Z_SYNC_FLUSH))
+
+
+class CompressionMiddleware:
+    """Compress response bodies above minimum_size with gzip or brotli."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """Per-request state for CompressionMiddleware."""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.inner_send = send
+        self.start_message: Optional[Message] = None
+        self.passthrough = False
+        self.compressor: Optional[_Compressor] = None
+
+    async def _compress(self, body: bytes, final: bool) -> bytes:
+        if len(body) >= THREAD_MINIMUM_SIZE:
+            return await anyio.to_thread.run_sync(self.compressor.compress, body, final)
+        return self.compressor.compress(body, final)
+
+    async def send(self, message: Message) -> None:
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "").lower()
+            self.passthrough = (
+                "content-encoding" in headers
+                or message["status"] in (204, 206, 304)
+                or any(content_type.startswith(t) for t in EXCLUDED_CONTENT_TYPES)
+            )
+            if self.passthrough:
+                await self.inner_send(message)
+            else:
+                # Hold back headers until we know whether we compress
+                self.start_message = message
+            return
+
+        if message_type != "http.response.body" or self.passthrough:
+            await self.inner_send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start_message is not None:
+            start_message = self.start_message
+            self.start_message = None
+            headers = MutableHeaders(raw=start_message["headers"])
+            headers.add_vary_header("Accept-Encoding")
+
+            if not more_body and len(body) < self.middleware.minimum_size:
+                self.passthrough = True
+                await self.inner_send(start_message)
+                await self.inner_send(message)
+                return
+
+            self.compressor = _Compressor(
+                self.encoding, self.middleware.gzip_level, self.middleware.brotli_quality
+            )
+            headers["Content-Encoding"] = self.encoding
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                # A strong ETag must differ per content-coding
+                headers["ETag"] = f'{etag[:-1]}-{self.encoding}"'
+            if more_body:
+                del headers["Content-Length"]
+                body = await self._compress(body, final=False)
+            else:
+                body = await self._compress(body, final=True)
+                headers["Content-Length"] = str(len(body))
+            await self.inner_send(start_message)
+            await self.inner_send({"type": "http.response.body", "body": body, "more_body": more_body})
+            return
+
+        body = await self._compress(body, final=not more_body)
+        await self.inner_send({"type": "http.response.body", "body": body, "more_body": more_body})
@@ -0,0 +1,71 @@
+"""Per-route latency and payload size instrumentation."""
+
+import time
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from services import metrics
+
+
+def route_template(scope: Scope) -> str:
+    """
+    Reconstruct the matched route template (e.g. /api/traces/{trace_id}).
+
+    Path parameter values in the request path are swapped back for their
+    names, which works regardless of how routers were included or mounted.
+    """
+    if scope.get("route") is None and "endpoint" not in scope:
+        return "unmatched"
+
+    path = scope["path"]
+    for name, value in (scope.get("path_params") or {}).items():
+        value = str(value)
+        if not value:
+            continue
+        marker = "/" + value
+        index = path.rfind(marker)
+        end = index + len(marker)
+        if index != -1 and (end == len(path) or path[end] == "/"):
+            path = path[:index + 1] + "{" + name + "}" + path[end:]
+    return path
+
+
+class MetricsMiddleware:
+    """Record request latency, status and payload sizes per route template."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+        request_size = 0
+        response_size = 0
+
+        async def receive_wrapper() -> Message:
+            nonlocal request_size
+            message = await receive()
+            if message["type"] == "http.request":
+                request_size += len(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, response_size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            # Label by route template, not raw path, to keep cardinality bounded
+            route = route_template(scope)
+            method = scope["method"]
+            metrics.http_request_duration.observe(time.perf_counter() - start, method=method, route=route)
+            metrics.http_requests.inc(method=method, route=route, status=str(status))
+            metrics.http_request_size.observe(request_size, method=method, route=route)
+            metrics.http_response_size.observe(response_size, method=method, route=route)
@@ -0,0 +1,43 @@
+"""Per-request and slow-request profiling hooks."""
+
+from urllib.parse import parse_qs
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from services.profiling import profiler
+
+_TRUE_VALUES = ("1", "true", "yes")
+
+
+def _profile_requested(scope: Scope) -> bool:
+    """Whether the request asks to be profiled (X-Profile header or ?profile=1)."""
+    if Headers(scope=scope).get("x-profile", "").lower() in _TRUE_VALUES:
+        return True
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    return query.get("profile", [""])[0].lower() in _TRUE_VALUES
+
+
+class ProfilingMiddleware:
+    """Arm the sampling profiler for opted-in or slow requests."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not profiler.active:
+            await self.app(scope, receive, send)
+            return
+
+        request = profiler.begin(forced=_profile_requested(scope))
+        if request is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and request.forced:
+                MutableHeaders(scope=message)["X-Profile-Id"] = request.id
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.end(request, scope["method"], scope["path"])
@@ -0,0 +1,42 @@
+"""Hold back API requests until startup work has finished."""
+
+from typing import Callable
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class ReadinessMiddleware:
+    """
+    Answer 503 + Retry-After on gated paths while ``is_ready()`` is false.
+
+    Everything else (health checks, metrics, static files) is served as usual,
+    so the process can report readiness while state is still being restored.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        is_ready: Callable[[], bool],
+        gated_prefix: str = "/api/",
+        retry_after: int = 1
+    ):
+        self.app = app
+        self.is_ready = is_ready
+        self.gated_prefix = gated_prefix
+        self.retry_after = retry_after
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or not scope["path"].startswith(self.gated_prefix)
+            or self.is_ready()
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        response = JSONResponse(
+            {"detail": "Server is starting up, state is being restored"},
+            status_code=503,
+            headers={"Retry-After": str(self.retry_after)}
+        )
+        await response(scope, receive, send)
@@ -0,0 +1,24 @@
+"""Bring a worker's replica of the store up to date before API requests."""
+
+from typing import Callable
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class StateSyncMiddleware:
+    """
+    Call ``sync()`` before each request on gated paths.
+
+    In multi-worker mode every worker holds its own copy of the store and
+    applies events written by the others when it next serves a request, so
+    reads always reflect writes already acknowledged by any worker.
+    """
+
+    def __init__(self, app: ASGIApp, sync: Callable[[], int], gated_prefix: str = "/api/"):
+        self.app = app
+        self.sync = sync
+        self.gated_prefix = gated_prefix
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["path"].startswith(self.gated_prefix):
+            self.sync()
+        await self.app(scope, receive, send)
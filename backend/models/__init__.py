@@ -1,7 +1,8 @@
 """Data models for EvalSwipe application."""
 
-from .trace import Trace, TraceStep
+from .trace import ReviewerAnnotation, Trace, TraceStep, TraceSummary
 from .tag import AxialTag
-from .session import Session
+from .sampling import SamplingConfig, SamplingState
+from .session import Session, TraceAnnotation
 
-__all__ = ["Trace", "TraceStep", "AxialTag", "Session"]
+__all__ = ["Trace", "TraceStep", "TraceSummary", "ReviewerAnnotation", "AxialTag", "SamplingConfig", "SamplingState", "Session", "TraceAnnotation"]
@@ -0,0 +1,51 @@
+"""Sampling configuration and state for sampled review sessions."""
+
+from typing import Dict, List, Literal, Optional
+from pydantic import BaseModel, Field
+
+
+class SamplingConfig(BaseModel):
+    """How a session samples traces for review."""
+
+    method: Literal["reservoir", "stratified"] = Field(
+        default="stratified",
+        description="'reservoir': one uniform sample; 'stratified': one sample per stratum"
+    )
+    size: int = Field(..., ge=1, description="Number of traces to review")
+    strata: List[str] = Field(
+        default_factory=list,
+        description="Metadata keys defining strata (nested keys dotted, e.g. 'scores.factuality')"
+    )
+    buckets: Dict[str, List[float]] = Field(
+        default_factory=dict,
+        description="Bucket edges for numeric strata keys (default: quartiles of the first batch)"
+    )
+    allocation: Literal["proportional", "equal"] = Field(
+        default="proportional",
+        description="How the sample size is split across strata"
+    )
+    priority: Literal["balanced", "uncertainty", "random"] = Field(
+        default="balanced",
+        description="Review order: 'balanced' (strata whose estimate is least certain first), "
+                    "'uncertainty' (also within a stratum, by score uncertainty) or 'random'"
+    )
+    uncertainty_key: Optional[str] = Field(
+        default=None,
+        description="Metadata score in [0, 1] for uncertainty priority (default: mean of 'scores.*')"
+    )
+    seed: int = Field(default=0, description="Seed for the sampling hash")
+
+
+class SamplingState(BaseModel):
+    """Sampling configuration plus what the sample was drawn from."""
+
+    config: SamplingConfig
+    population: int = Field(default=0, ge=0, description="Traces seen (sampled or not)")
+    strata: Dict[str, int] = Field(
+        default_factory=dict,
+        description="Traces seen per stratum"
+    )
+    buckets: Dict[str, List[float]] = Field(
+        default_factory=dict,
+        description="Bucket edges in use for numeric strata keys"
+    )
@@ -1,10 +1,29 @@
 """Session model for review sessions."""
 
 from datetime import datetime
-from typing import List, Optional
-from pydantic import BaseModel, Field
-from .trace import Trace
+from typing import Any, Dict, List, Optional, Set, Tuple
+from pydantic import BaseModel, Field, PrivateAttr
+from .trace import ReviewerAnnotation, Trace
 from .tag import AxialTag
+from .sampling import SamplingState
+
+
+class TraceAnnotation(BaseModel):
+    """A fork's own annotation of a trace."""
+
+    reviewed: bool = False
+    pass_fail: Optional[str] = None
+    open_code: Optional[str] = None
+    axial_tags: List[str] = Field(default_factory=list)
+    reviewer_id: Optional[str] = None
+    reviewed_at: Optional[datetime] = None
+    adjudicated: bool = False
+    # Reviewers' own annotations in the fork (see Trace.reviews)
+    reviews: Dict[str, ReviewerAnnotation] = Field(default_factory=dict)
+
+
+# Annotation of a trace nobody has annotated in a fork
+_UNANNOTATED = TraceAnnotation()
 
 
 class Session(BaseModel):
@@ -77,6 +96,23 @@ class Session(BaseModel):
         default="upload",
         description="Source of traces: 'upload', 'braintrust', 'demo'"
     )
+    sampling: Optional[SamplingState] = Field(
+        default=None,
+        description="Sampling configuration and population counts (sampled sessions only)"
+    )
+
+    # Forks (copy-on-write)
+    parent_id: Optional[str] = Field(
+        default=None,
+        description="Session this one was forked from (forks only)"
+    )
+    annotation_overlay: Optional[Dict[str, TraceAnnotation]] = Field(
+        default=None,
+        description="A fork's own annotations by trace ID (forks only); trace content is shared with the parent"
+    )
+
+    # (trace list, IDs of its traces), rebuilt when the list is replaced
+    _trace_ids: Optional[Tuple[List[Trace], Set[str]]] = PrivateAttr(default=None)
 
     class Config:
         json_schema_extra = {
@@ -92,3 +128,40 @@ class Session(BaseModel):
                 "source": "demo"
             }
         }
+
+    @property
+    def is_fork(self) -> bool:
+        return self.annotation_overlay is not None
+
+    def trace_ids(self) -> Set[str]:
+        """
+        IDs of the session's traces.
+
+        Cached until the trace list is replaced (lists are never mutated in
+        place), so membership checks do not scan the session.
+        """
+        cached = self._trace_ids
+        if cached is None or cached[0] is not self.traces:
+            cached = (self.traces, {trace.id for trace in self.traces})
+            self._trace_ids = cached
+        return cached[1]
+
+    def annotated(self, trace: Trace) -> Trace:
+        """
+        A trace as reviewers of this session see it.
+
+        Forks share Trace objects with their parent; their view of a trace
+        is a shallow copy carrying the fork's own annotation (or none).
+        Other sessions see the trace itself.
+        """
+        if self.annotation_overlay is None:
+            return trace
+        annotation = self.annotation_overlay.get(trace.id, _UNANNOTATED)
+        # reviews stays a dict of models (model_copy does not validate)
+        return trace.model_copy(update={**annotation.model_dump(exclude={"reviews"}), "reviews": annotation.reviews})
+
+    def summary(self, preview_chars: int = 500) -> Dict[str, Any]:
+        """Session with light trace summaries instead of full traces."""
+        data = self.model_dump(exclude={"traces", "annotation_overlay"})
+        data["traces"] = [self.annotated(trace).summary(preview_chars) for trace in self.traces]
+        return data
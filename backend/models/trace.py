@@ -23,6 +23,55 @@ class TraceStep(BaseModel):
     )
 
 
+def _preview(text: Optional[str], max_chars: int) -> Optional[str]:
+    """Truncate text to at most max_chars characters."""
+    if text is None or len(text) <= max_chars:
+        return text
+    return text[:max_chars]
+
+
+class ReviewerAnnotation(BaseModel):
+    """One reviewer's own annotation of a trace (see Trace.reviews)."""
+
+    pass_fail: str = Field(..., description="Judgment: 'pass', 'fail', or 'defer'")
+    open_code: Optional[str] = None
+    axial_tags: List[str] = Field(default_factory=list)
+    reviewed_at: Optional[datetime] = None
+
+
+class TraceSummary(BaseModel):
+    """Light view of a trace for list and session responses.
+
+    Heavy parts (full output, system prompt, intermediate steps, metadata) are
+    fetched on demand via /api/traces/{id} and /api/traces/{id}/steps.
+    """
+
+    id: str = Field(..., description="Unique identifier for the trace")
+    user_input: str = Field(..., description="Preview of the user's input")
+    agent_output: str = Field(..., description="Preview of the agent's response")
+    input_truncated: bool = Field(
+        default=False,
+        description="Whether user_input was shortened for the preview"
+    )
+    output_truncated: bool = Field(
+        default=False,
+        description="Whether agent_output was shortened for the preview"
+    )
+    step_count: int = Field(
+        default=0,
+        ge=0,
+        description="Number of intermediate steps available"
+    )
+
+    # Review fields
+    reviewed: bool = False
+    pass_fail: Optional[str] = None
+    open_code: Optional[str] = None
+    axial_tags: List[str] = Field(default_factory=list)
+    reviewer_id: Optional[str] = None
+    reviewed_at: Optional[datetime] = None
+
+
 class Trace(BaseModel):
     """Complete trace of an LLM interaction."""
 
@@ -73,6 +122,14 @@ class Trace(BaseModel):
         default=None,
         description="When the trace was reviewed"
     )
+    adjudicated: bool = Field(
+        default=False,
+        description="Whether the annotation above was decided by adjudicating reviewers' disagreement"
+    )
+    reviews: Dict[str, ReviewerAnnotation] = Field(
+        default_factory=dict,
+        description="Each reviewer's own annotation by reviewer ID; the fields above hold the final one"
+    )
 
     class Config:
         json_schema_extra = {
@@ -85,3 +142,20 @@ class Trace(BaseModel):
                 "pass_fail": "pass"
             }
         }
+
+    def summary(self, preview_chars: int = 500) -> TraceSummary:
+        """Build the light summary view of this trace."""
+        return TraceSummary.model_construct(
+            id=self.id,
+            user_input=_preview(self.user_input, preview_chars),
+            agent_output=_preview(self.agent_output, preview_chars),
+            input_truncated=len(self.user_input) > preview_chars,
+            output_truncated=len(self.agent_output) > preview_chars,
+            step_count=len(self.intermediate_steps),
+            reviewed=self.reviewed,
+            pass_fail=self.pass_fail,
+            open_code=self.open_code,
+            axial_tags=list(self.axial_tags),
+            reviewer_id=self.reviewer_id,
+            reviewed_at=self.reviewed_at
+        )
@@ -7,5 +7,11 @@ __all__ = [
     "sessions",
     "prompt_improvement",
     "braintrust",
-    "export_data"
+    "export_data",
+    "comparison",
+    "admin",
+    "session_files",
+    "ingest",
+    "analytics",
+    "live_ingest"
 ]
@@ -0,0 +1,82 @@
+"""Admin API endpoints (profiling, event log)."""
+
+import hmac
+import os
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+from services.event_log import event_log
+from services.profiling import profiler
+
+router = APIRouter()
+
+
+def _check_token(token: Optional[str]):
+    """Allow a request carrying the admin token (403 otherwise, and always when ADMIN_TOKEN is unset)."""
+    expected = os.getenv("ADMIN_TOKEN")
+    if not expected:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (ADMIN_TOKEN not set)")
+    if not token or not hmac.compare_digest(token.encode(), expected.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@router.get("/profiles")
+async def get_profiles(x_admin_token: Optional[str] = Header(None)):
+    """List captured request profiles (most recent last)."""
+    _check_token(x_admin_token)
+    return {
+        "enabled": profiler.enabled,
+        "slow_threshold_ms": profiler.slow_threshold_ms,
+        "profiles": [profile.summary() for profile in profiler.profiles]
+    }
+
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str, x_admin_token: Optional[str] = Header(None)):
+    """Retrieve a profile with its stack samples and allocation snapshot."""
+    _check_token(x_admin_token)
+    profile = profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} not found")
+
+    return profile.to_dict()
+
+
+@router.get("/profiles/{profile_id}/folded", response_class=PlainTextResponse)
+async def get_profile_folded(profile_id: str, x_admin_token: Optional[str] = Header(None)):
+    """Retrieve a profile as folded stacks (input for flamegraph.pl or speedscope)."""
+    _check_token(x_admin_token)
+    profile = profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} not found")
+
+    return PlainTextResponse(profile.folded())
+
+
+@router.get("/event-log")
+async def get_event_log_status(x_admin_token: Optional[str] = Header(None)):
+    """Event log configuration and position."""
+    _check_token(x_admin_token)
+    return {
+        "persistent": event_log.persistent,
+        "shared": event_log.shared,
+        "directory": event_log.directory,
+        "seq": event_log.seq,
+        "events_since_snapshot": event_log.events_since_snapshot,
+        "snapshot_every": event_log.snapshot_every,
+        "fsync_interval_ms": event_log.fsync_interval_ms
+    }
+
+
+@router.post("/event-log/snapshot")
+async def create_event_log_snapshot(x_admin_token: Optional[str] = Header(None)):
+    """Write a compacted snapshot now (recovery then replays only newer events)."""
+    _check_token(x_admin_token)
+    if not event_log.persistent:
+        raise HTTPException(status_code=400, detail="EVENT_LOG_DIR is not set")
+
+    event_log.snapshot()
+    return {
+        "success": True,
+        "seq": event_log.seq
+    }
@@ -0,0 +1,77 @@
+"""Step and trace latency/token analytics API endpoints."""
+
+from typing import Literal, Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from routes.tags import tags_db
+from routes.traces import traces_db
+from services import metrics, revisions, step_analytics
+
+router = APIRouter()
+
+
+def _parse_quantiles(quantiles: str):
+    try:
+        values = tuple(float(value) for value in quantiles.split(",") if value.strip())
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid quantiles: {quantiles}")
+    if not values or any(not 0 <= value <= 1 for value in values):
+        raise HTTPException(status_code=400, detail="Quantiles must be between 0 and 1")
+    return values
+
+
+@router.get("/steps")
+async def get_step_analytics(
+    request: Request,
+    by: Literal["step_type", "tool", "trace"] = Query("step_type", description="Group steps by step_type or tool, or use whole traces"),
+    measure: Literal["latency_ms", "tokens"] = Query("latency_ms", description="Measure to summarize"),
+    tags: Optional[str] = Query(None, description="Comma-separated tag IDs to add as cohorts"),
+    quantiles: str = Query("0.5,0.9,0.99", description="Comma-separated quantiles"),
+    compare_quantile: float = Query(0.9, ge=0, le=1, description="Quantile at which fail is compared with pass"),
+    min_count: int = Query(1, ge=1, description="Skip groups with fewer measurements")
+):
+    """
+    Latency or token distributions per step type, tool or trace, split by verdict and tag.
+
+    Query Parameters:
+    - by: 'step_type' (default), 'tool' (steps that name a tool) or 'trace'
+    - measure: 'latency_ms' (default) or 'tokens'
+    - tags: Tag IDs whose failures are added as cohorts (tag:<id>)
+    - quantiles: Quantiles reported per cohort (default: 0.5,0.9,0.99)
+    - compare_quantile: Quantile for the fail / pass ratio (default: 0.9)
+    - min_count: Skip groups with fewer measurements (default: 1)
+
+    Groups are sorted by ratio, so the steps that are slowest in failing
+    traces relative to passing ones come first.
+    """
+    quantile_values = _parse_quantiles(quantiles)
+    tag_ids = [tag_id.strip() for tag_id in tags.split(",") if tag_id.strip()] if tags else []
+    cohorts = ["all", *step_analytics.VERDICT_COHORTS, *(f"tag:{tag_id}" for tag_id in tag_ids)]
+
+    def build():
+        with metrics.span("step_analytics"):
+            groups = step_analytics.report(
+                traces_db,
+                by,
+                measure,
+                cohorts,
+                quantiles=quantile_values,
+                compare_quantile=compare_quantile,
+                min_count=min_count
+            )
+
+        return {
+            "by": by,
+            "measure": measure,
+            "relative_accuracy": step_analytics.RELATIVE_ACCURACY,
+            "cohorts": cohorts,
+            "compare": {"target": "fail", "baseline": "pass", "quantile": compare_quantile},
+            "groups": groups,
+            "tag_names": {tag_id: tags_db[tag_id].name for tag_id in tag_ids if tag_id in tags_db}
+        }
+
+    return revisions.conditional_response(
+        request,
+        key=("step_analytics", by, measure, tuple(tag_ids), quantile_values, compare_quantile, min_count),
+        version=(revisions.revision("trace"), revisions.revision("tag")),
+        build=build
+    )
@@ -4,8 +4,11 @@ from datetime import datetime
 from typing import List, Optional
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from models import Trace
+from models import ReviewerAnnotation, Session, Trace
+from routes.sessions import sessions_db
+from routes.tags import tags_db
 from routes.traces import traces_db
+from services.event_log import CLEARED_ANNOTATION, annotation_state, event_log
 
 router = APIRouter()
 
@@ -18,6 +21,132 @@ class AnnotationRequest(BaseModel):
     open_code: Optional[str] = None
     axial_tags: List[str] = []
     reviewer_id: Optional[str] = None
+    session_id: Optional[str] = None
+
+
+class AdjudicationRequest(BaseModel):
+    """Request model for settling reviewers' disagreement on a trace."""
+
+    adjudicator_id: Optional[str] = None
+    from_reviewer: Optional[str] = None
+    pass_fail: Optional[str] = None
+    open_code: Optional[str] = None
+    axial_tags: List[str] = []
+    session_id: Optional[str] = None
+
+
+class UndoRequest(BaseModel):
+    """Request model for undoing the latest annotation change."""
+
+    trace_id: Optional[str] = None
+    reviewer_id: Optional[str] = None
+    session_id: Optional[str] = None
+
+
+def _fork(session_id: Optional[str], trace_id: Optional[str] = None) -> Optional[Session]:
+    """
+    The fork annotations are made in, or None for the shared traces.
+
+    Annotations made in any other session (including one only the client
+    knows) apply to the traces themselves, as if no session_id had been given.
+    """
+    session = sessions_db.get(session_id) if session_id is not None else None
+    if session is None or not session.is_fork:
+        return None
+    if trace_id is not None and trace_id not in session.trace_ids():
+        raise HTTPException(
+            status_code=404,
+            detail=f"Trace {trace_id} not found in session {session_id}"
+        )
+    return session
+
+
+def _view(trace: Trace, fork: Optional[Session]) -> Trace:
+    """A trace as annotated in a fork, or the shared trace."""
+    return fork.annotated(trace) if fork is not None else trace
+
+
+def _review_change(trace: Trace, reviewer_id: Optional[str], state: Optional[dict]) -> Optional[dict]:
+    """Change to a reviewer's own annotation of a trace (or fork view), with its previous value for undo."""
+    previous = trace.reviews.get(reviewer_id) if reviewer_id is not None else None
+    if reviewer_id is None or (state is None and previous is None):
+        return None
+    return {
+        "reviewer_id": reviewer_id,
+        "state": state,
+        "previous": previous.model_dump() if previous is not None else None
+    }
+
+
+def _latest_review_state(trace: Trace, review: dict) -> dict:
+    """Final annotation fields from the latest reviewer annotation once a review change is applied."""
+    reviews = dict(trace.reviews)
+    if review["state"] is None:
+        reviews.pop(review["reviewer_id"], None)
+    else:
+        reviews[review["reviewer_id"]] = ReviewerAnnotation.model_validate(review["state"])
+    if not reviews:
+        return dict(CLEARED_ANNOTATION)
+
+    reviewer_id, latest = max(reviews.items(), key=lambda item: item[1].reviewed_at or datetime.min)
+    return {
+        "reviewed": True,
+        "pass_fail": latest.pass_fail,
+        "open_code": latest.open_code,
+        "axial_tags": [tag_id for tag_id in latest.axial_tags if tag_id in tags_db],
+        "reviewer_id": reviewer_id,
+        "reviewed_at": latest.reviewed_at,
+        "adjudicated": False,
+    }
+
+
+def _commit(
+    event_type: str,
+    trace: Trace,
+    fork: Optional[Session],
+    data: dict,
+    review: Optional[dict] = None
+) -> Trace:
+    """
+    Log an annotation event against a trace, or against a fork's view of it.
+
+    review changes one reviewer's own annotation along with the trace's
+    (see _review_change); in a fork, both are the fork's own.
+    """
+    if review is not None:
+        data = {**data, "review": review}
+    if fork is None:
+        event_log.commit(event_type, {"trace_id": trace.id, **data, "previous": annotation_state(trace)})
+        return trace
+
+    event_log.commit(event_type, {
+        "trace_id": trace.id,
+        "session_id": fork.id,
+        **data,
+        "previous": annotation_state(fork.annotated(trace))
+    })
+    return fork.annotated(trace)
+
+
+def _record_annotation(trace: Trace, annotation: AnnotationRequest) -> Trace:
+    """Log an annotation event for a trace and apply it."""
+    fork = _fork(annotation.session_id, trace.id)
+    state = {
+        "reviewed": True,
+        "pass_fail": annotation.pass_fail,
+        "open_code": annotation.open_code,
+        "axial_tags": list(annotation.axial_tags),
+        "reviewer_id": annotation.reviewer_id,
+        "reviewed_at": datetime.now(),
+        "adjudicated": False,
+    }
+    review = _review_change(_view(trace, fork), annotation.reviewer_id, {
+        "pass_fail": state["pass_fail"],
+        "open_code": state["open_code"],
+        "axial_tags": state["axial_tags"],
+        "reviewed_at": state["reviewed_at"]
+    })
+    return _commit("annotation.set", trace, fork, {"actor": annotation.reviewer_id, "state": state}, review)
 
 
 @router.post("/")
@@ -31,22 +160,147 @@ async def create_annotation(annotation: AnnotationRequest):
     - open_code: Freeform observation text
     - axial_tags: List of tag IDs
     - reviewer_id: ID of the reviewer
+    - session_id: Session the trace is reviewed in (optional); in a forked
+      session the annotation is the fork's own and the trace is unchanged
+
+    With a reviewer_id, the annotation is also kept as that reviewer's own
+    (trace.reviews), so another reviewer's annotation does not replace it;
+    see GET /api/sessions/{session_id}/agreement.
     """
-    if annotation.trace_id not in traces_db:
-        raise HTTPException(
-            status_code=404,
-            detail=f"Trace {annotation.trace_id} not found"
+    with event_log.transaction():
+        if annotation.trace_id not in traces_db:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Trace {annotation.trace_id} not found"
+            )
+
+        trace = _record_annotation(traces_db[annotation.trace_id], annotation)
+
+    return {
+        "success": True,
+        "trace": trace
+    }
+
+
+@router.post("/undo")
+async def undo_annotation(undo_request: UndoRequest):
+    """
+    Undo the most recent annotation change.
+
+    Restores the annotation state from before the change and records the undo
+    as its own event, so history is never rewritten. If the trace has been
+    annotated again since, only the reviewer's own annotation is reverted
+    (409 when the change kept none).
+
+    Request Body:
+    - trace_id: Only consider changes to this trace (optional)
+    - reviewer_id: Only consider changes made by this reviewer (optional)
+    - session_id: Undo changes made in this forked session (optional)
+    """
+    # Checks and write are atomic across workers
+    with event_log.transaction():
+        fork = _fork(undo_request.session_id)
+        event = event_log.last_undoable(
+            undo_request.trace_id,
+            undo_request.reviewer_id,
+            fork.id if fork else None
         )
+        if event is None:
+            raise HTTPException(status_code=404, detail="Nothing to undo")
+
+        trace_id = event["data"]["trace_id"]
+        if trace_id not in traces_db:
+            raise HTTPException(status_code=404, detail=f"Trace {trace_id} not found")
+
+        trace = traces_db[trace_id]
+        superseded = event_log.superseded(event)
+        if superseded and event["data"].get("review") is None:
+            raise HTTPException(
+                status_code=409,
+                detail=f"The annotation of trace {trace_id} has changed since event {event['seq']}"
+            )
+
+        review = None
+        if event["data"].get("review") is not None:
+            previous_review = event["data"]["review"]["previous"]
+            if previous_review is not None:
+                previous_review = dict(previous_review)
+                previous_review["axial_tags"] = [
+                    tag_id for tag_id in previous_review["axial_tags"] if tag_id in tags_db
+                ]
+            review = _review_change(_view(trace, fork), event["data"]["review"]["reviewer_id"], previous_review)
+
+        if not superseded:
+            # Tags deleted or merged away since the change are not restored
+            state = dict(event["data"]["previous"])
+            state["axial_tags"] = [tag_id for tag_id in state["axial_tags"] if tag_id in tags_db]
+        else:
+            # Annotated again since (e.g. by another reviewer): only this
+            # reviewer's own annotation is reverted, and the final one still
+            # comes from the reviewers' latest unless it was this reviewer's
+            state = annotation_state(_view(trace, fork))
+            if review is not None and state["reviewer_id"] == review["reviewer_id"] and not state["adjudicated"]:
+                state = _latest_review_state(_view(trace, fork), review)
+
+        trace = _commit("annotation.undo", trace, fork, {
+            "actor": undo_request.reviewer_id,
+            "undo_of": event["seq"],
+            "state": state
+        }, review)
+
+    return {
+        "success": True,
+        "undone_seq": event["seq"],
+        "trace": trace
+    }
+
+
+@router.post("/{trace_id}/adjudicate")
+async def adjudicate_annotation(trace_id: str, request: AdjudicationRequest):
+    """
+    Settle reviewers' disagreement on a trace with a final annotation.
+
+    The final annotation is marked adjudicated; reviewers' own annotations
+    are kept, so agreement statistics still reflect them.
 
-    trace = traces_db[annotation.trace_id]
+    Request Body:
+    - adjudicator_id: ID of the person adjudicating
+    - from_reviewer: Adopt this reviewer's annotation as the final one, or
+    - pass_fail, open_code, axial_tags: The final annotation
+    - session_id: Forked session to adjudicate in (optional)
+    """
+    with event_log.transaction():
+        if trace_id not in traces_db:
+            raise HTTPException(status_code=404, detail=f"Trace {trace_id} not found")
+
+        trace = traces_db[trace_id]
+        fork = _fork(request.session_id, trace_id)
+        reviews = _view(trace, fork).reviews
+        if request.from_reviewer is not None:
+            if request.from_reviewer not in reviews:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Reviewer {request.from_reviewer} has not annotated trace {trace_id}"
+                )
+            chosen = reviews[request.from_reviewer]
+            pass_fail, open_code, axial_tags = chosen.pass_fail, chosen.open_code, list(chosen.axial_tags)
+        elif request.pass_fail is not None:
+            pass_fail, open_code, axial_tags = request.pass_fail, request.open_code, list(request.axial_tags)
+        else:
+            raise HTTPException(status_code=400, detail="Either from_reviewer or pass_fail is required")
 
-    # Update trace with annotation
-    trace.reviewed = True
-    trace.pass_fail = annotation.pass_fail
-    trace.open_code = annotation.open_code
-    trace.axial_tags = annotation.axial_tags
-    trace.reviewer_id = annotation.reviewer_id
-    trace.reviewed_at = datetime.now()
+        trace = _commit("annotation.set", trace, fork, {
+            "actor": request.adjudicator_id,
+            "state": {
+                "reviewed": True,
+                "pass_fail": pass_fail,
+                "open_code": open_code,
+                "axial_tags": axial_tags,
+                "reviewer_id": request.adjudicator_id,
+                "reviewed_at": datetime.now(),
+                "adjudicated": True,
+            }
+        })
 
     return {
         "success": True,
@@ -54,6 +308,23 @@ async def create_annotation(annotation: AnnotationRequest):
     }
 
 
+@router.get("/{trace_id}/history")
+async def get_annotation_history(trace_id: str):
+    """
+    Audit trail of annotation changes for a trace, oldest first.
+
+    Each entry has the event seq, timestamp, type, the resulting state, the
+    previous state and whether it has been undone.
+    """
+    if trace_id not in traces_db:
+        raise HTTPException(status_code=404, detail=f"Trace {trace_id} not found")
+
+    return {
+        "trace_id": trace_id,
+        "events": event_log.trace_history(trace_id)
+    }
+
+
 @router.put("/{trace_id}")
 async def update_annotation(trace_id: str, annotation: AnnotationRequest):
     """
@@ -61,24 +332,17 @@ async def update_annotation(trace_id: str, annotation: AnnotationRequest):
 
     Same request body as POST /annotations
     """
-    if trace_id not in traces_db:
-        raise HTTPException(status_code=404, detail=f"Trace {trace_id} not found")
+    with event_log.transaction():
+        if trace_id not in traces_db:
+            raise HTTPException(status_code=404, detail=f"Trace {trace_id} not found")
 
-    if annotation.trace_id != trace_id:
-        raise HTTPException(
-            status_code=400,
-            detail="Trace ID in path must match trace_id in request body"
-        )
+        if annotation.trace_id != trace_id:
+            raise HTTPException(
+                status_code=400,
+                detail="Trace ID in path must match trace_id in request body"
+            )
 
-    trace = traces_db[trace_id]
-
-    # Update trace with new annotation
-    trace.reviewed = True
-    trace.pass_fail = annotation.pass_fail
-    trace.open_code = annotation.open_code
-    trace.axial_tags = annotation.axial_tags
-    trace.reviewer_id = annotation.reviewer_id
-    trace.reviewed_at = datetime.now()
+        trace = _record_annotation(traces_db[trace_id], annotation)
 
     return {
         "success": True,
@@ -87,20 +351,29 @@ async def update_annotation(trace_id: str, annotation: AnnotationRequest):
 
 
 @router.delete("/{trace_id}")
-async def delete_annotation(trace_id: str):
-    """Remove annotation from trace."""
-    if trace_id not in traces_db:
-        raise HTTPException(status_code=404, detail=f"Trace {trace_id} not found")
+async def delete_annotation(
+    trace_id: str,
+    reviewer_id: Optional[str] = None,
+    session_id: Optional[str] = None
+):
+    """
+    Remove annotation from trace.
 
-    trace = traces_db[trace_id]
+    Query Parameters:
+    - reviewer_id: Reviewer removing the annotation, recorded for audit
+      (optional); that reviewer's own annotation is removed too
+    - session_id: Remove the annotation of this forked session instead (optional)
+    """
+    with event_log.transaction():
+        if trace_id not in traces_db:
+            raise HTTPException(status_code=404, detail=f"Trace {trace_id} not found")
 
-    # Clear annotation fields
-    trace.reviewed = False
-    trace.pass_fail = None
-    trace.open_code = None
-    trace.axial_tags = []
-    trace.reviewer_id = None
-    trace.reviewed_at = None
+        trace = traces_db[trace_id]
+        fork = _fork(session_id, trace_id)
+        _commit("annotation.clear", trace, fork, {
+            "actor": reviewer_id,
+            "state": dict(CLEARED_ANNOTATION)
+        }, _review_change(_view(trace, fork), reviewer_id, None))
 
     return {
         "success": True,
@@ -3,10 +3,8 @@
 from typing import Optional, List, Dict, Any
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from datetime import datetime
-import requests
 import os
-from models import Trace, TraceStep
+from services import ingest, metrics
 
 router = APIRouter()
 
@@ -18,6 +16,7 @@ class BraintrustImportRequest(BaseModel):
     project_id: str
     experiment_id: str
     filters: Dict[str, Any] = {}
+    sync: bool = False
 
 
 class BraintrustExportRequest(BaseModel):
@@ -26,7 +25,8 @@ class BraintrustExportRequest(BaseModel):
     api_key: Optional[str] = None
     project_id: str
     experiment_id: str
-    trace_ids: List[str]
+    trace_ids: Optional[List[str]] = None
+    query: Optional[str] = None
 
 
 @router.post("/import")
@@ -39,6 +39,8 @@ async def import_from_braintrust(request: BraintrustImportRequest):
     - project_id: Braintrust project ID
     - experiment_id: Braintrust experiment ID
     - filters: Optional filters (start_date, end_date, limit)
+    - sync: Incremental re-import (default: false): skip unchanged traces and
+      keep the annotations of changed ones (see POST /api/traces/import?mode=sync)
     """
     api_key = request.api_key or os.getenv("BRAINTRUST_API_KEY")
     if not api_key:
@@ -47,6 +49,9 @@ async def import_from_braintrust(request: BraintrustImportRequest):
             detail="Braintrust API key not provided and BRAINTRUST_API_KEY not set"
         )
 
+    # Imported on first use to keep it off the startup path
+    import requests
+
     try:
         # Build Braintrust API URL
         url = f"https://api.braintrust.dev/v1/experiment/{request.experiment_id}/fetch"
@@ -65,33 +70,45 @@ async def import_from_braintrust(request: BraintrustImportRequest):
             params["cursor"] = request.filters["cursor"]
 
         # Make API request
-        response = requests.get(url, headers=headers, params=params, timeout=30)
-        response.raise_for_status()
+        with metrics.upstream("braintrust"):
+            response = requests.get(url, headers=headers, params=params, timeout=30)
+            response.raise_for_status()
 
         data = response.json()
 
-        # Convert Braintrust traces to our Trace format
-        traces = []
+        # Convert Braintrust traces to our Trace format (validated in one
+        # call to the compiled validator)
+        converted = []
         for bt_trace in data.get("objects", []):
-            trace = Trace(
-                id=bt_trace.get("id", f"bt_{len(traces)}"),
-                user_input=str(bt_trace.get("input", "")),
-                agent_output=str(bt_trace.get("output", "")),
-                system_prompt=bt_trace.get("metadata", {}).get("system_prompt"),
-                intermediate_steps=[],
-                metadata={
+            converted.append({
+                "id": bt_trace.get("id", f"bt_{len(converted)}"),
+                "user_input": str(bt_trace.get("input", "")),
+                "agent_output": str(bt_trace.get("output", "")),
+                "system_prompt": bt_trace.get("metadata", {}).get("system_prompt"),
+                "intermediate_steps": [],
+                "metadata": {
                     "braintrust_trace_id": bt_trace.get("id"),
                     "timestamp": bt_trace.get("created"),
                     "scores": bt_trace.get("scores", {}),
                     **bt_trace.get("metadata", {})
                 }
-            )
-            traces.append(trace)
+            })
+        if request.sync:
+            from routes.traces import sync_traces
+            counts = sync_traces(converted)
+            return {
+                "success": True,
+                "imported_count": counts["created"] + counts["updated"],
+                **counts,
+                "cursor": data.get("cursor")
+            }
+
+        traces = ingest.strict_traces.validate_python(converted)
 
         # Store traces in traces_db
-        from routes.traces import traces_db
-        for trace in traces:
-            traces_db[trace.id] = trace
+        from services.event_log import event_log
+        with metrics.span("storage"):
+            event_log.commit("trace.import", {"traces": traces})
 
         return {
             "success": True,
@@ -105,6 +122,10 @@ async def import_from_braintrust(request: BraintrustImportRequest):
             status_code=500,
             detail=f"Failed to fetch from Braintrust API: {str(e)}"
         )
+    except ValueError as e:
+        # Invalid traces (pydantic's ValidationError is a ValueError), as
+        # for POST /api/traces/import
+        raise HTTPException(status_code=400, detail=f"Failed to import traces: {str(e)}")
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -122,6 +143,8 @@ async def export_to_braintrust(request: BraintrustExportRequest):
     - project_id: Braintrust project ID
     - experiment_id: Braintrust experiment ID
     - trace_ids: List of trace IDs to export
+    - query: Export the traces matching this query instead (or, with
+      trace_ids, those of trace_ids that match it), e.g. 'reviewed:true tag:"Tone Mismatch"'
     """
     api_key = request.api_key or os.getenv("BRAINTRUST_API_KEY")
     if not api_key:
@@ -130,6 +153,16 @@ async def export_to_braintrust(request: BraintrustExportRequest):
             detail="Braintrust API key not provided and BRAINTRUST_API_KEY not set"
         )
 
+    trace_ids = request.trace_ids
+    if request.query:
+        from routes.traces import query_traces
+        trace_ids = [trace.id for trace in query_traces(request.query, within=trace_ids)]
+    elif trace_ids is None:
+        raise HTTPException(status_code=400, detail="Provide trace_ids or query")
+
+    # Imported on first use to keep it off the startup path
+    import requests
+
     try:
         from routes.traces import traces_db
         from routes.tags import tags_db
@@ -138,7 +171,7 @@ async def export_to_braintrust(request: BraintrustExportRequest):
         feedback_items = []
         failures = []
 
-        for trace_id in request.trace_ids:
+        for trace_id in trace_ids:
             if trace_id not in traces_db:
                 failures.append({
                     "trace_id": trace_id,
@@ -204,8 +237,9 @@ async def export_to_braintrust(request: BraintrustExportRequest):
             "feedback": feedback_items
         }
 
-        response = requests.post(url, headers=headers, json=payload, timeout=30)
-        response.raise_for_status()
+        with metrics.upstream("braintrust"):
+            response = requests.post(url, headers=headers, json=payload, timeout=30)
+            response.raise_for_status()
 
         return {
             "success": True,
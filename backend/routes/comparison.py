@@ -0,0 +1,61 @@
+"""Cross-session comparison API endpoints."""
+
+from typing import List
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+from routes.sessions import resolve_session, sessions_db
+from routes.tags import tags_db
+from services.comparison import compare_sessions
+
+router = APIRouter()
+
+
+class CompareRequest(BaseModel):
+    """Request model for comparing sessions."""
+
+    session_ids: List[str]
+    align_by: str = "braintrust_trace_id"
+    max_examples: int = 100
+
+
+@router.post("/")
+async def compare(request: CompareRequest):
+    """
+    Compare sessions against a baseline.
+
+    Request Body:
+    - session_ids: Sessions to compare; the first one is the baseline
+    - align_by: 'braintrust_trace_id', 'user_input' or 'fuzzy' (normalized, then similar inputs)
+    - max_examples: Maximum flipped judgments listed per comparison
+    """
+    if len(request.session_ids) < 2:
+        raise HTTPException(status_code=400, detail="At least two session IDs are required")
+
+    for session_id in request.session_ids:
+        if session_id not in sessions_db:
+            raise HTTPException(status_code=404, detail=f"Session {session_id} not found")
+
+    # Forks are compared as their reviewers saw them
+    sessions = [resolve_session(sessions_db[session_id]) for session_id in request.session_ids]
+
+    try:
+        comparisons = compare_sessions(sessions, request.align_by, request.max_examples)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Resolve tag names for the tags that changed
+    tag_ids = set()
+    for comparison in comparisons:
+        tag_ids.update(comparison["tags"]["appeared"])
+        tag_ids.update(comparison["tags"]["disappeared"])
+        tag_ids.update(comparison["tags"]["deltas"])
+
+    return {
+        "baseline_session_id": request.session_ids[0],
+        "comparisons": comparisons,
+        "tag_names": {
+            tag_id: tags_db[tag_id].name
+            for tag_id in tag_ids
+            if tag_id in tags_db
+        }
+    }
@@ -1,24 +1,52 @@
-"""Export API endpoints for CSV, JSON, and PDF."""
+"""Export API endpoints for CSV, JSON, PDF, Parquet/Arrow, and binary session files."""
 
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import StreamingResponse, JSONResponse
-from routes.sessions import sessions_db
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import FileResponse, StreamingResponse, Response
+from starlette.background import BackgroundTask
+from routes.sessions import resolve_session, sessions_db
 from routes.tags import tags_db
+from routes.traces import query_traces, traces_db
+from services import metrics, review_stats
+from services.session_file import FILE_EXTENSION, write_session_file
+import anyio.to_thread
 import csv
 import io
 import json
+import os
+import tempfile
 from datetime import datetime
+from typing import Literal, Optional
 
 router = APIRouter()
 
+QUERY_PARAM = Query(None, description="Only export traces matching this query (see /api/traces)")
 
-@router.get("/csv/{session_id}")
-async def export_csv(session_id: str):
-    """Export session as CSV."""
+
+def _export_session(session_id: str, q: Optional[str] = None):
+    """The session to export, narrowed to the traces matching q if given."""
     if session_id not in sessions_db:
         raise HTTPException(status_code=404, detail=f"Session {session_id} not found")
 
     session = sessions_db[session_id]
+    fork = session if session.is_fork else None
+    session = resolve_session(session)
+    if q:
+        matched = {trace.id for trace in query_traces(q, within=[trace.id for trace in session.traces], fork=fork)}
+        session = session.model_copy(update={
+            "traces": [trace for trace in session.traces if trace.id in matched]
+        })
+    return session
+
+
+@router.get("/csv/{session_id}")
+async def export_csv(session_id: str, q: Optional[str] = QUERY_PARAM):
+    """
+    Export session as CSV.
+
+    Query Parameters:
+    - q: Only export traces matching this query
+    """
+    session = _export_session(session_id, q)
 
     # Create CSV in memory
     output = io.StringIO()
@@ -39,26 +67,27 @@ async def export_csv(session_id: str):
     ])
 
     # Write trace data
-    for trace in session.traces:
-        # Get tag names
-        tag_names = [
-            tags_db[tag_id].name
-            for tag_id in trace.axial_tags
-            if tag_id in tags_db
-        ]
+    with metrics.span("export_csv"):
+        for trace in session.traces:
+            # Get tag names
+            tag_names = [
+                tags_db[tag_id].name
+                for tag_id in trace.axial_tags
+                if tag_id in tags_db
+            ]
 
-        writer.writerow([
-            trace.id,
-            trace.user_input,
-            trace.agent_output,
-            trace.system_prompt or "",
-            trace.pass_fail or "",
-            trace.open_code or "",
-            ", ".join(tag_names),
-            trace.reviewer_id or "",
-            trace.reviewed_at.isoformat() if trace.reviewed_at else "",
-            json.dumps(trace.metadata)
-        ])
+            writer.writerow([
+                trace.id,
+                trace.user_input,
+                trace.agent_output,
+                trace.system_prompt or "",
+                trace.pass_fail or "",
+                trace.open_code or "",
+                ", ".join(tag_names),
+                trace.reviewer_id or "",
+                trace.reviewed_at.isoformat() if trace.reviewed_at else "",
+                json.dumps(trace.metadata)
+            ])
 
     # Prepare response
     output.seek(0)
@@ -72,32 +101,164 @@ async def export_csv(session_id: str):
 
 
 @router.get("/json/{session_id}")
-async def export_json(session_id: str):
-    """Export session as JSON."""
-    if session_id not in sessions_db:
-        raise HTTPException(status_code=404, detail=f"Session {session_id} not found")
+async def export_json(
+    session_id: str,
+    include_steps: bool = Query(True, description="Include intermediate steps"),
+    q: Optional[str] = QUERY_PARAM
+):
+    """
+    Export session as JSON.
 
-    session = sessions_db[session_id]
+    Query Parameters:
+    - include_steps: Whether to include intermediate steps (default: true)
+    - q: Only export traces matching this query
+    """
+    session = _export_session(session_id, q)
 
-    # Convert to dict for JSON serialization
-    session_dict = session.model_dump(mode='json')
+    # Serialize straight to bytes (no intermediate dict)
+    exclude = None if include_steps else {"traces": {"__all__": {"intermediate_steps"}}}
+    with metrics.span("serialize"):
+        body = session.model_dump_json(exclude=exclude)
 
     # Prepare response
-    return JSONResponse(
-        content=session_dict,
+    return Response(
+        content=body,
+        media_type="application/json",
         headers={
             "Content-Disposition": f"attachment; filename=session_{session_id}_{datetime.now().strftime('%Y%m%d')}.json"
         }
     )
 
 
+def _columnar_export(
+    session_id: str,
+    table: str,
+    file_format: str,
+    row_group_size: int,
+    compression: Optional[str],
+    q: Optional[str] = None
+) -> StreamingResponse:
+    """Stream a session table as Parquet or Arrow (row group by row group)."""
+    session = _export_session(session_id, q)
+
+    try:
+        from services import columnar_export
+    except ImportError:
+        raise HTTPException(
+            status_code=500,
+            detail="Parquet/Arrow export requires pyarrow library"
+        )
+
+    # Encoded in a worker thread while requests keep running, so copy the
+    # trace list
+    session = session.model_copy(update={"traces": list(session.traces)})
+    tag_names = {tag_id: tag.name for tag_id, tag in tags_db.items()}
+
+    if file_format == "parquet":
+        media_type, extension = columnar_export.PARQUET_MEDIA_TYPE, "parquet"
+    else:
+        media_type, extension = columnar_export.ARROW_STREAM_MEDIA_TYPE, "arrows"
+
+    return StreamingResponse(
+        columnar_export.stream_session(
+            session,
+            tag_names,
+            table=table,
+            file_format=file_format,
+            row_group_size=row_group_size,
+            compression=None if compression == "none" else compression
+        ),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f"attachment; filename=session_{session_id}_{table}_{datetime.now().strftime('%Y%m%d')}.{extension}"
+        }
+    )
+
+
+@router.get("/parquet/{session_id}")
+async def export_parquet(
+    session_id: str,
+    table: Literal["traces", "trace_tags", "steps"] = Query("traces", description="Table to export"),
+    row_group_size: int = Query(10000, ge=1, le=1000000, description="Traces per row group"),
+    compression: Literal["zstd", "snappy", "gzip", "none"] = Query("zstd", description="Parquet compression codec"),
+    q: Optional[str] = QUERY_PARAM
+):
+    """
+    Export a session table as Parquet, streamed one row group at a time.
+
+    Query Parameters:
+    - table: 'traces' (one row per trace, default), 'trace_tags' (one row per
+      trace/tag pair) or 'steps' (one row per intermediate step)
+    - row_group_size: Traces per row group (default: 10000)
+    - compression: 'zstd' (default), 'snappy', 'gzip' or 'none'
+    - q: Only export traces matching this query
+    """
+    return _columnar_export(session_id, table, "parquet", row_group_size, compression, q)
+
+
+@router.get("/arrow/{session_id}")
+async def export_arrow(
+    session_id: str,
+    table: Literal["traces", "trace_tags", "steps"] = Query("traces", description="Table to export"),
+    row_group_size: int = Query(10000, ge=1, le=1000000, description="Traces per record batch"),
+    compression: Literal["zstd", "lz4", "none"] = Query("zstd", description="Arrow IPC buffer compression"),
+    q: Optional[str] = QUERY_PARAM
+):
+    """
+    Export a session table as an Arrow IPC stream (same tables as Parquet).
+
+    Query Parameters:
+    - table: 'traces' (default), 'trace_tags' or 'steps'
+    - row_group_size: Traces per record batch (default: 10000)
+    - compression: 'zstd' (default), 'lz4' or 'none'
+    - q: Only export traces matching this query
+    """
+    return _columnar_export(session_id, table, "arrow", row_group_size, compression, q)
+
+
+@router.get("/session-file/{session_id}")
+async def export_session_file(session_id: str):
+    """
+    Export session as a memory-mappable binary session file (.evsession).
+
+    The file can be re-imported with POST /api/sessions/import-file or served
+    read-only from SESSION_FILES_DIR (see /api/session-files).
+    """
+    if session_id not in sessions_db:
+        raise HTTPException(status_code=404, detail=f"Session {session_id} not found")
+
+    # Written in a worker thread, so copy the trace list; include the current
+    # tag definitions so the file is self-contained
+    session = resolve_session(sessions_db[session_id])
+    session = session.model_copy(update={
+        "traces": list(session.traces),
+        "axial_tags": list(tags_db.values())
+    })
+
+    fd, path = tempfile.mkstemp(suffix=FILE_EXTENSION)
+    os.close(fd)
+    try:
+        with metrics.span("export_session_file"):
+            await anyio.to_thread.run_sync(write_session_file, path, session)
+    except Exception:
+        os.unlink(path)
+        raise
+
+    return FileResponse(
+        path,
+        media_type="application/octet-stream",
+        filename=f"session_{session_id}_{datetime.now().strftime('%Y%m%d')}{FILE_EXTENSION}",
+        background=BackgroundTask(os.unlink, path)
+    )
+
+
 @router.get("/pdf/{session_id}")
 async def export_pdf(session_id: str):
     """Generate PDF report."""
     if session_id not in sessions_db:
         raise HTTPException(status_code=404, detail=f"Session {session_id} not found")
 
-    session = sessions_db[session_id]
+    session = resolve_session(sessions_db[session_id])
 
     try:
         from reportlab.lib.pagesizes import letter
@@ -135,6 +296,24 @@ async def export_pdf(session_id: str):
             ["Pass Rate", f"{(session.passed_count / max(session.reviewed_count, 1) * 100):.1f}%"]
         ]
 
+        # Interval and convergence of the failure rate (pass/fail verdicts only)
+        report = review_stats.session_stats(session, traces_db).report(tags_db)
+        estimate = report["stratified"]
+        if estimate is not None:
+            stopping = report["stopping"]
+            if stopping["converged"]:
+                status = "converged"
+            else:
+                status = f"~{stopping['additional_verdicts']} more verdicts needed"
+            summary_data += [
+                ["Failure Rate (95% CI)",
+                 f"{estimate['failure_rate'] * 100:.1f}% "
+                 f"({estimate['ci_low'] * 100:.1f}-{estimate['ci_high'] * 100:.1f}%)"],
+                ["Precision",
+                 f"±{estimate['margin'] * 100:.1f}% "
+                 f"(target ±{stopping['target_margin'] * 100:.1f}%: {status})"]
+            ]
+
         summary_table = Table(summary_data, colWidths=[2*inch, 2*inch])
         summary_table.setStyle(TableStyle([
             ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#F9FAFB')),
@@ -175,7 +354,8 @@ async def export_pdf(session_id: str):
                 story.append(Paragraph("No failure modes recorded", styles['Normal']))
 
         # Build PDF
-        doc.build(story)
+        with metrics.span("export_pdf"):
+            doc.build(story)
 
         # Prepare response
         buffer.seek(0)
@@ -0,0 +1,117 @@
+"""Trusted bulk ingest endpoints for internal pipelines.
+
+Same effect and request bodies as the public import endpoints, validated
+from the raw request bytes with the cyclic GC paused (see
+services/ingest.py). Requests must carry:
+
+- X-Ingest-Token: the value of TRUSTED_INGEST_TOKEN
+- X-Schema-Fingerprint: the fingerprint from GET /api/ingest/schema that
+  the producer was built against
+"""
+
+from typing import Literal, Optional
+from fastapi import APIRouter, Header, Query, Request
+from models import Session
+from routes.sessions import SessionCreateRequest, _create_session, _session_view, _update_session
+from routes.traces import TraceImportRequest
+from services import ingest, metrics
+from services.event_log import event_log
+from services.serialization import json_response
+
+router = APIRouter()
+
+
+async def _trusted_body(request: Request, token: Optional[str], fingerprint: Optional[str]) -> bytes:
+    """Check the trusted ingest headers, then read the raw body."""
+    ingest.check_trusted(token, fingerprint)
+    return await request.body()
+
+
+@router.get("/schema")
+async def get_schema():
+    """Schema fingerprint and JSON schemas that trusted producers must match."""
+    return {
+        "fingerprint": ingest.SCHEMA_FINGERPRINT,
+        "schemas": {model.__name__: model.model_json_schema() for model in ingest.SCHEMA_MODELS}
+    }
+
+
+@router.post("/traces")
+async def ingest_traces(
+    request: Request,
+    x_ingest_token: Optional[str] = Header(None),
+    x_schema_fingerprint: Optional[str] = Header(None)
+):
+    """
+    Import traces (trusted counterpart of POST /api/traces/import).
+
+    Request Body:
+    - traces: List of Trace objects
+    - session_config: Optional session configuration
+    """
+    body = await _trusted_body(request, x_ingest_token, x_schema_fingerprint)
+
+    with metrics.span("validate"):
+        data = ingest.validate_body(TraceImportRequest, body)
+
+    with metrics.span("storage"):
+        event_log.commit("trace.import", {"traces": data.traces})
+
+    return {
+        "success": True,
+        "imported_count": len(data.traces),
+        "session_id": data.session_config.get("session_id", "default")
+    }
+
+
+@router.post("/sessions")
+async def ingest_session(
+    request: Request,
+    view: Literal["summary", "full"] = Query("summary", description="'summary' (light previews) or 'full'"),
+    preview_chars: int = Query(500, ge=0, description="Preview length for summary view"),
+    x_ingest_token: Optional[str] = Header(None),
+    x_schema_fingerprint: Optional[str] = Header(None)
+):
+    """
+    Create a session (trusted counterpart of POST /api/sessions/).
+
+    Request Body:
+    - name: Optional session name
+    - traces: List of traces
+    - config: Session configuration
+
+    Query Parameters:
+    - view: Shape of the returned session ('summary' or 'full', default: 'summary')
+    - preview_chars: Preview length for summary view (default: 500)
+    """
+    body = await _trusted_body(request, x_ingest_token, x_schema_fingerprint)
+
+    with metrics.span("validate"):
+        session_request = ingest.validate_body(SessionCreateRequest, body)
+
+    session = _create_session(session_request)
+
+    return json_response({
+        "success": True,
+        "session": _session_view(session, view, preview_chars)
+    })
+
+
+@router.put("/sessions/{session_id}")
+async def ingest_session_update(
+    session_id: str,
+    request: Request,
+    x_ingest_token: Optional[str] = Header(None),
+    x_schema_fingerprint: Optional[str] = Header(None)
+):
+    """Update a session (trusted counterpart of PUT /api/sessions/{session_id})."""
+    body = await _trusted_body(request, x_ingest_token, x_schema_fingerprint)
+
+    with metrics.span("validate"):
+        session = ingest.validate_body(Session, body)
+
+    _update_session(session_id, session)
+
+    return {
+        "success": True
+    }
@@ -0,0 +1,195 @@
+"""Live ingest endpoints for production services.
+
+Traces pushed here are queued and stored in micro-batches by a background
+task (see services/live_ingest.py), and appended to a rolling review
+session. When the queue is full, requests get 429 with a Retry-After
+header. Push requests must carry X-Ingest-Token (TRUSTED_INGEST_TOKEN);
+Trace JSON must also carry X-Schema-Fingerprint, as for trusted ingest.
+
+Configuration:
+- LIVE_INGEST_SESSION_ID: ID of the rolling session (default: session_live)
+- LIVE_INGEST_SESSION_MAX_TRACES: traces kept in it; beyond that, the
+  oldest unreviewed traces leave the session (they stay in the store)
+"""
+
+import json
+import os
+from datetime import datetime
+from typing import List, Optional
+from fastapi import APIRouter, Header, HTTPException, Request
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from models import Session, Trace
+from routes.sessions import sessions_db
+from routes.tags import tags_db
+from routes.traces import traces_db
+from services import ingest, live_ingest, metrics, otel_genai
+from services.event_log import event_log
+
+router = APIRouter()
+
+LIVE_SESSION_ID = os.getenv("LIVE_INGEST_SESSION_ID", "session_live")
+LIVE_SESSION_MAX_TRACES = int(os.getenv("LIVE_INGEST_SESSION_MAX_TRACES", 5000))
+
+
+class LiveTracesRequest(BaseModel):
+    """Request model for pushing traces."""
+
+    traces: List[Trace]
+
+
+def _rolling_window(current: List[Trace], new: List[Trace], max_traces: int) -> List[Trace]:
+    """Session traces after adding a batch: replaced in place, else appended, oldest unreviewed dropped."""
+    positions = {trace.id: i for i, trace in enumerate(current)}
+    traces = list(current)
+    for trace in new:
+        if trace.id in positions:
+            traces[positions[trace.id]] = trace
+        else:
+            positions[trace.id] = len(traces)
+            traces.append(trace)
+
+    excess = len(traces) - max_traces
+    if excess <= 0:
+        return traces
+    kept = []
+    for trace in traces:
+        if excess > 0 and not trace.reviewed:
+            excess -= 1
+            continue
+        kept.append(trace)
+    return kept
+
+
+def _store_batch(batch: List[Trace]) -> None:
+    """Sink of the live queue: import a batch and add it to the rolling session."""
+    with event_log.transaction():
+        traces = []
+        for trace in batch:
+            # Spans that arrived after their trace was stored
+            existing = traces_db.get(trace.id)
+            if existing is not None and otel_genai.is_otel_trace(existing) and otel_genai.is_otel_trace(trace):
+                trace = otel_genai.merge(existing, trace)
+            else:
+                trace = trace.model_copy(update={"metadata": {**trace.metadata, "live": True}})
+            traces.append(trace)
+
+        event_log.commit("trace.import", {"traces": traces})
+
+        session = sessions_db.get(LIVE_SESSION_ID)
+        if session is None:
+            session = Session(
+                id=LIVE_SESSION_ID,
+                name="Live traces",
+                axial_tags=list(tags_db.values()),
+                source="live"
+            )
+            event_log.commit("session.create", {"session": session})
+
+        # Only the IDs are logged: the traces are in the import event above
+        current = [traces_db.get(trace.id, trace) for trace in session.traces]
+        window = {trace.id for trace in _rolling_window(current, traces, LIVE_SESSION_MAX_TRACES)}
+        event_log.commit("session.append", {
+            "session_id": LIVE_SESSION_ID,
+            "trace_ids": [trace.id for trace in traces],
+            "evicted_ids": list(dict.fromkeys(
+                trace.id for trace in [*current, *traces] if trace.id not in window
+            )),
+            "updated_at": datetime.now()
+        })
+
+
+queue = live_ingest.LiveIngestQueue(_store_batch, is_ready=lambda: event_log.ready)
+
+
+def _accepted(**counts) -> JSONResponse:
+    return JSONResponse(
+        {"success": True, **counts, "queued": queue.pending, "session_id": LIVE_SESSION_ID},
+        status_code=202
+    )
+
+
+def _offer(offer, items) -> int:
+    """Queue items, translating a full queue to 429 (413 if they can never fit)."""
+    if len(items) > queue.capacity:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Request has {len(items)} items; the live ingest queue holds {queue.capacity}"
+        )
+    try:
+        return offer(items)
+    except live_ingest.QueueFull as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+
+@router.post("/traces", status_code=202)
+async def push_traces(
+    request: Request,
+    x_ingest_token: Optional[str] = Header(None),
+    x_schema_fingerprint: Optional[str] = Header(None)
+):
+    """
+    Queue traces for the store and the rolling session.
+
+    Request Body:
+    - traces: List of Trace objects
+
+    Returns 202 once queued; 429 with Retry-After when the queue is full.
+    """
+    ingest.check_trusted(x_ingest_token, x_schema_fingerprint)
+    body = await request.body()
+
+    with metrics.span("validate"):
+        data = ingest.validate_body(LiveTracesRequest, body)
+
+    _offer(queue.offer_traces, data.traces)
+    return _accepted(accepted_traces=len(data.traces))
+
+
+@router.post("/otel/v1/traces", status_code=202)
+async def push_otel_spans(
+    request: Request,
+    x_ingest_token: Optional[str] = Header(None)
+):
+    """
+    Queue OpenTelemetry GenAI spans (OTLP/HTTP with JSON encoding).
+
+    Request Body:
+    - An ExportTraceServiceRequest: {"resourceSpans": [...]}
+
+    Spans without gen_ai attributes are skipped. Spans are grouped into
+    traces by trace ID; a trace is stored once its root span has arrived.
+    Returns 202 once queued; 429 with Retry-After when the queue is full.
+    """
+    ingest.check_token(x_ingest_token)
+    if "protobuf" in request.headers.get("content-type", ""):
+        raise HTTPException(status_code=415, detail="Only the OTLP JSON encoding is supported")
+
+    try:
+        with metrics.span("validate"):
+            body = json.loads(await request.body())
+            records = otel_genai.records(body)
+    except (ValueError, TypeError, AttributeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid OTLP export: {str(e)}")
+
+    _offer(queue.offer_spans, records)
+    return _accepted(
+        accepted_spans=len(records),
+        skipped_spans=otel_genai.span_count(body) - len(records)
+    )
+
+
+@router.get("/status")
+async def get_status():
+    """Queue depth, throughput counters and the rolling session."""
+    session = sessions_db.get(LIVE_SESSION_ID)
+    return {
+        **queue.status(),
+        "session_id": LIVE_SESSION_ID,
+        "session_traces": session.total_traces if session else 0,
+        "session_max_traces": LIVE_SESSION_MAX_TRACES
+    }
@@ -1,14 +1,54 @@
-"""Prompt improvement API endpoints using Claude."""
+"""Prompt improvement API endpoints using Claude.
 
-from typing import List, Optional
+Each suggestion is generated by its own upstream request, all running
+concurrently (up to PROMPT_SUGGESTION_CONCURRENCY at a time), with its own
+token budget. POST /suggest/stream sends every suggestion to the client as
+a server-sent event as soon as it is complete, plus throttled partial
+events parsed incrementally from the streamed JSON.
+
+POST /replay tests a prompt before it ships: the failing traces tagged with
+the targeted failure modes are re-run under it (see services/replay.py) and
+returned next to their original responses, optionally as a new session to
+review.
+"""
+
+from typing import Any, Awaitable, Callable, List, Optional
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from pydantic_core import from_json
+from services import metrics, replay
+from services.serialization import dumps, json_response
+import asyncio
 import os
-import json
-from anthropic import Anthropic
+import time
 
 router = APIRouter()
 
+SUGGESTION_MODEL = "claude-sonnet-4-20250514"
+
+# Token budget of each suggestion (one improved prompt plus its changes)
+SUGGESTION_MAX_TOKENS = 2048
+
+# Upstream requests in flight across all suggestion requests
+MAX_CONCURRENT_SUGGESTIONS = int(os.getenv("PROMPT_SUGGESTION_CONCURRENCY", 5))
+
+# Minimum seconds between partial events for one suggestion
+PARTIAL_INTERVAL = 0.25
+
+# The approach each variation takes, so concurrent requests don't converge
+VARIATION_APPROACHES = (
+    "Make minimal, targeted edits that address each failure mode directly.",
+    "Restructure the prompt into explicit rules and constraints covering the failure modes.",
+    "Add short worked examples that demonstrate the desired behavior for each failure mode.",
+    "Add a self-check the model performs before answering, aimed at the failure modes.",
+    "Rewrite for clarity and brevity while closing the gaps behind the failure modes.",
+)
+
+_upstream_slots = asyncio.Semaphore(MAX_CONCURRENT_SUGGESTIONS)
+
+Emit = Callable[[str, Any], Awaitable[None]]
+
 
 class PromptImprovementRequest(BaseModel):
     """Request model for prompt improvement suggestions."""
@@ -16,7 +56,23 @@ class PromptImprovementRequest(BaseModel):
     current_prompt: str
     target_failure_modes: List[str]
     additional_context: Optional[str] = None
-    num_suggestions: int = 3
+    num_suggestions: int = Field(default=3, ge=1, le=20)
+
+
+class ReplayRequest(BaseModel):
+    """Request model for replaying failing traces under a prompt."""
+
+    prompt: str
+    target_failure_modes: List[str] = []
+    trace_ids: Optional[List[str]] = None
+    backend: str = "anthropic"
+    model: Optional[str] = None
+    max_traces: int = Field(default=50, ge=1, le=1000)
+    concurrency: int = Field(default=4, ge=1, le=32)
+    requests_per_second: Optional[float] = Field(default=None, gt=0)
+    use_cache: bool = True
+    create_session: bool = False
+    session_name: Optional[str] = None
 
 
 class PromptSuggestion(BaseModel):
@@ -28,57 +84,45 @@ class PromptSuggestion(BaseModel):
     targeted_failures: List[str]
 
 
-@router.post("/suggest")
-async def generate_suggestions(request: PromptImprovementRequest):
-    """
-    Generate prompt improvement suggestions using Claude API.
+def _failure_modes_text(request: PromptImprovementRequest) -> str:
+    """Describe the target failure modes with example open codes."""
+    # Import tags and traces to get failure mode details
+    from routes.tags import tags_db
+    from routes.traces import traces_db
 
-    Request Body:
-    - current_prompt: The existing system prompt
-    - target_failure_modes: List of failure mode tag IDs to address
-    - additional_context: Optional extra guidance
-    - num_suggestions: Number of variations to generate (default: 3)
-    """
-    api_key = os.getenv("ANTHROPIC_API_KEY")
-    if not api_key:
-        raise HTTPException(
-            status_code=500,
-            detail="ANTHROPIC_API_KEY not configured"
-        )
+    failure_modes_text = []
+    for tag_id in request.target_failure_modes:
+        if tag_id in tags_db:
+            tag = tags_db[tag_id]
+            examples = []
 
-    try:
-        # Import tags and traces to get failure mode details
-        from routes.tags import tags_db
-        from routes.traces import traces_db
-
-        # Gather failure mode details
-        failure_modes_text = []
-        for tag_id in request.target_failure_modes:
-            if tag_id in tags_db:
-                tag = tags_db[tag_id]
-                examples = []
-
-                # Find traces with this tag and get their open codes
-                for trace in traces_db.values():
-                    if tag_id in trace.axial_tags and trace.open_code:
-                        examples.append(trace.open_code)
-
-                failure_modes_text.append(
-                    f"**{tag.name}**: {tag.description}\n"
-                    f"Examples:\n" + "\n".join(f"- {ex}" for ex in examples[:3])
-                )
-
-        failure_modes_str = "\n\n".join(failure_modes_text)
-
-        # Build prompt for Claude
-        prompt = f"""You are an expert in prompt engineering for LLM systems. I will provide:
+            # Find traces with this tag and get their open codes
+            for trace in traces_db.values():
+                if tag_id in trace.axial_tags and trace.open_code:
+                    examples.append(trace.open_code)
+                    if len(examples) == 3:
+                        break
+
+            failure_modes_text.append(
+                f"**{tag.name}**: {tag.description}\n"
+                f"Examples:\n" + "\n".join(f"- {ex}" for ex in examples)
+            )
+
+    return "\n\n".join(failure_modes_text)
+
+
+def _suggestion_prompt(request: PromptImprovementRequest, failure_modes: str, version: int) -> str:
+    """Prompt asking for one variation (the reply is prefilled with '{')."""
+    approach = VARIATION_APPROACHES[(version - 1) % len(VARIATION_APPROACHES)]
+
+    return f"""You are an expert in prompt engineering for LLM systems. I will provide:
 1. A current system prompt
 2. A list of observed failure modes with specific examples
 3. Any additional context about the system
 
-Your task: Generate {request.num_suggestions} improved versions of the system prompt that specifically address the identified failure modes while preserving the original intent and functionality.
+Your task: Generate one improved version of the system prompt that specifically addresses the identified failure modes while preserving the original intent and functionality. This is variation {version} of {request.num_suggestions}; other variations are written separately, so follow this approach to make yours distinct: {approach}
 
-For each improved prompt:
+For the improved prompt:
 - Explain what changes you made and why
 - Highlight the specific language or instructions that target each failure mode
 - Maintain the overall structure and tone of the original prompt
@@ -87,68 +131,265 @@ Current System Prompt:
 {request.current_prompt}
 
 Observed Failure Modes and Examples:
-{failure_modes_str}
+{failure_modes}
 
 Additional Context:
 {request.additional_context or "None provided"}
 
-Please provide {request.num_suggestions} improved prompt variations in JSON format:
+Respond with only this JSON object:
 {{
-  "suggestions": [
-    {{
-      "version": 1,
-      "improved_prompt": "...",
-      "changes_made": ["Change 1", "Change 2", ...],
-      "targeted_failures": ["Failure Mode 1", "Failure Mode 2", ...]
-    }},
-    ...
-  ]
+  "version": {version},
+  "improved_prompt": "...",
+  "changes_made": ["Change 1", "Change 2", ...],
+  "targeted_failures": ["Failure Mode 1", "Failure Mode 2", ...]
 }}"""
 
-        # Call Claude API
-        client = Anthropic(api_key=api_key)
-        response = client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=4000,
-            temperature=0.7,
-            messages=[
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ]
-        )
 
-        # Parse response
-        response_text = response.content[0].text
-
-        # Try to extract JSON from response
-        # Look for JSON block between ```json and ``` or just parse the whole thing
-        if "```json" in response_text:
-            json_start = response_text.find("```json") + 7
-            json_end = response_text.find("```", json_start)
-            json_str = response_text[json_start:json_end].strip()
-        elif "```" in response_text:
-            json_start = response_text.find("```") + 3
-            json_end = response_text.find("```", json_start)
-            json_str = response_text[json_start:json_end].strip()
-        else:
-            # Try to find JSON object directly
-            json_start = response_text.find("{")
-            json_end = response_text.rfind("}") + 1
-            json_str = response_text[json_start:json_end]
-
-        result = json.loads(json_str)
-
-        return result
-
-    except json.JSONDecodeError as e:
+def _parse_suggestion(text: str, version: int) -> PromptSuggestion:
+    """Parse a complete reply, ignoring anything after the JSON object."""
+    try:
+        data = from_json(text)
+    except ValueError:
+        data = from_json(text[:text.rfind("}") + 1])
+    return PromptSuggestion(**{**data, "version": version})
+
+
+def _client():
+    api_key = os.getenv("ANTHROPIC_API_KEY")
+    if not api_key:
         raise HTTPException(
             status_code=500,
-            detail=f"Failed to parse Claude response as JSON: {str(e)}\nResponse: {response_text[:500]}"
+            detail="ANTHROPIC_API_KEY not configured"
         )
-    except Exception as e:
+
+    # The SDK is imported on first use; it is slow to import
+    from anthropic import AsyncAnthropic
+    return AsyncAnthropic(api_key=api_key)
+
+
+async def _generate_suggestion(
+    client,
+    request: PromptImprovementRequest,
+    failure_modes: str,
+    version: int,
+    emit: Optional[Emit] = None
+) -> PromptSuggestion:
+    """Stream one suggestion from Claude, emitting partial parses along the way."""
+    text = "{"
+    last_partial = 0.0
+    loop = asyncio.get_running_loop()
+
+    async with _upstream_slots:
+        with metrics.upstream("anthropic"):
+            async with client.messages.stream(
+                model=SUGGESTION_MODEL,
+                max_tokens=SUGGESTION_MAX_TOKENS,
+                temperature=0.7,
+                messages=[
+                    {
+                        "role": "user",
+                        "content": _suggestion_prompt(request, failure_modes, version)
+                    },
+                    {
+                        "role": "assistant",
+                        "content": "{"
+                    }
+                ]
+            ) as stream:
+                async for delta in stream.text_stream:
+                    text += delta
+                    if emit is not None and loop.time() - last_partial >= PARTIAL_INTERVAL:
+                        last_partial = loop.time()
+                        try:
+                            partial = from_json(text, allow_partial="trailing-strings")
+                        except ValueError:
+                            continue
+                        await emit("partial", {"version": version, "suggestion": partial})
+                message = await stream.get_final_message()
+
+    if message.stop_reason == "max_tokens":
+        raise ValueError(f"Suggestion {version} was cut off at {SUGGESTION_MAX_TOKENS} tokens")
+
+    try:
+        return _parse_suggestion(text, version)
+    except ValueError as e:
+        raise ValueError(f"Failed to parse suggestion {version}: {str(e)}")
+
+
+@router.post("/suggest")
+async def generate_suggestions(request: PromptImprovementRequest):
+    """
+    Generate prompt improvement suggestions using Claude API.
+
+    Suggestions are generated concurrently; the response waits for all of
+    them. Use /suggest/stream to receive each one as soon as it is ready.
+
+    Request Body:
+    - current_prompt: The existing system prompt
+    - target_failure_modes: List of failure mode tag IDs to address
+    - additional_context: Optional extra guidance
+    - num_suggestions: Number of variations to generate (default: 3, max: 20)
+    """
+    client = _client()
+    failure_modes = _failure_modes_text(request)
+
+    results = await asyncio.gather(
+        *(
+            _generate_suggestion(client, request, failure_modes, version)
+            for version in range(1, request.num_suggestions + 1)
+        ),
+        return_exceptions=True
+    )
+
+    suggestions = [result for result in results if isinstance(result, PromptSuggestion)]
+    errors = [str(result) for result in results if not isinstance(result, PromptSuggestion)]
+    if not suggestions:
         raise HTTPException(
             status_code=500,
-            detail=f"Failed to generate suggestions: {str(e)}"
+            detail=f"Failed to generate suggestions: {errors[0]}"
         )
+
+    return {
+        "suggestions": suggestions,
+        "errors": errors
+    }
+
+
+def _sse(event: str, data: Any) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + dumps(data) + b"\n\n"
+
+
+@router.post("/suggest/stream")
+async def stream_suggestions(request: PromptImprovementRequest):
+    """
+    Generate prompt improvement suggestions, streamed as server-sent events.
+
+    Events:
+    - start: {"num_suggestions"}
+    - partial: {"version", "suggestion"} with the fields parsed so far
+    - suggestion: a complete PromptSuggestion, as soon as it is ready
+    - error: {"version", "detail"} for a suggestion that failed
+    - done: {"completed", "failed", "duration_ms"}
+
+    Request Body: same as /suggest
+    """
+    client = _client()
+    failure_modes = _failure_modes_text(request)
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def emit(event: str, data: Any) -> None:
+        await queue.put((event, data))
+
+    async def run(version: int) -> None:
+        try:
+            suggestion = await _generate_suggestion(client, request, failure_modes, version, emit)
+            await emit("suggestion", suggestion)
+        except Exception as e:
+            await emit("error", {"version": version, "detail": str(e)})
+
+    async def events():
+        start = time.perf_counter()
+        tasks = [asyncio.create_task(run(version)) for version in range(1, request.num_suggestions + 1)]
+        completed = failed = 0
+        try:
+            yield _sse("start", {"num_suggestions": request.num_suggestions})
+            while completed + failed < len(tasks):
+                event, data = await queue.get()
+                if event == "suggestion":
+                    completed += 1
+                elif event == "error":
+                    failed += 1
+                yield _sse(event, data)
+            yield _sse("done", {
+                "completed": completed,
+                "failed": failed,
+                "duration_ms": (time.perf_counter() - start) * 1000
+            })
+        finally:
+            # Client disconnected (or done): stop any upstream requests still running
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/replay")
+async def replay_prompt(request: ReplayRequest):
+    """
+    Re-run failing traces under a prompt and compare with their original responses.
+
+    Request Body:
+    - prompt: The system prompt to test (e.g. a suggestion's improved_prompt)
+    - target_failure_modes: Tag IDs; failed traces with any of them are replayed
+    - trace_ids: Replay exactly these traces instead
+    - backend: 'anthropic' or 'stub' (deterministic, no network) (default: 'anthropic')
+    - model: Model for the backend (default: the suggestion model)
+    - max_traces: Maximum traces replayed (default: 50)
+    - concurrency: Requests in flight at once (default: 4)
+    - requests_per_second: Optional rate limit across those requests
+    - use_cache: Reuse responses for inputs already replayed under this prompt (default: true)
+    - create_session: Also load the replayed traces as a new, unreviewed session
+    - session_name: Name of that session
+    """
+    from routes.sessions import SessionCreateRequest, _create_session, _sync_point
+    from routes.traces import traces_db
+
+    if request.trace_ids is None and not request.target_failure_modes:
+        raise HTTPException(status_code=400, detail="Provide target_failure_modes or trace_ids")
+
+    try:
+        backend = replay.get_backend(request.backend, request.model)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    traces = replay.select_traces(
+        list(traces_db.values()),
+        request.target_failure_modes,
+        trace_ids=request.trace_ids,
+        limit=request.max_traces
+    )
+    if not traces:
+        raise HTTPException(status_code=404, detail="No failing traces match the target failure modes")
+
+    start = time.perf_counter()
+    with metrics.span("replay"):
+        results = await replay.replay(
+            traces,
+            request.prompt,
+            backend,
+            concurrency=request.concurrency,
+            requests_per_second=request.requests_per_second,
+            cache=replay.response_cache if request.use_cache else None
+        )
+
+    response = {
+        "backend": backend.name,
+        "model": backend.model,
+        "summary": {
+            **replay.summarize(results),
+            "duration_ms": (time.perf_counter() - start) * 1000
+        },
+        "results": results,
+        "session": None
+    }
+
+    if request.create_session:
+        session_traces = replay.session_traces(results, traces_db, request.prompt, backend)
+        if session_traces:
+            session = _create_session(SessionCreateRequest(
+                name=request.session_name or f"Replay: {len(session_traces)} traces ({backend.model})",
+                traces=session_traces,
+                config={"source": "replay"}
+            ))
+            response["session"] = {
+                "id": session.id,
+                "name": session.name,
+                "total_traces": session.total_traces
+            }
+            response.update(_sync_point())
+
+    return json_response(response)
@@ -0,0 +1,157 @@
+"""Read-only access to binary session files in SESSION_FILES_DIR.
+
+Files are memory-mapped on first use and served without loading them into
+memory: pages of traces are slices of the file, and counts come from the
+review columns. Replacing a file on disk is picked up on the next request.
+"""
+
+import os
+from typing import Dict, Literal, Optional, Tuple
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import Response
+from services.serialization import dumps, json_response
+from services.session_file import FILE_EXTENSION, PASS_FAIL_CODES, SessionFile, SessionFileError
+
+router = APIRouter()
+
+# Open files by name, with the (mtime, size) they were opened at
+_open_files: Dict[str, Tuple[Tuple[int, int], SessionFile]] = {}
+
+
+def _directory() -> str:
+    directory = os.getenv("SESSION_FILES_DIR")
+    if not directory:
+        raise HTTPException(status_code=404, detail="SESSION_FILES_DIR is not configured")
+    return directory
+
+
+def _open(name: str) -> SessionFile:
+    """Open (or reuse) a session file by file name."""
+    if os.path.basename(name) != name or not name.endswith(FILE_EXTENSION):
+        raise HTTPException(status_code=404, detail=f"Session file {name} not found")
+
+    path = os.path.join(_directory(), name)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        _close(name)
+        raise HTTPException(status_code=404, detail=f"Session file {name} not found")
+
+    version = (stat.st_mtime_ns, stat.st_size)
+    cached = _open_files.get(name)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    _close(name)
+    try:
+        session_file = SessionFile(path)
+    except SessionFileError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    _open_files[name] = (version, session_file)
+    return session_file
+
+
+def _close(name: str) -> None:
+    cached = _open_files.pop(name, None)
+    if cached is not None:
+        cached[1].close()
+
+
+def close_all() -> None:
+    """Close every open session file (on shutdown)."""
+    for name in list(_open_files):
+        _close(name)
+
+
+@router.get("/")
+async def list_session_files():
+    """List session files in SESSION_FILES_DIR."""
+    directory = _directory()
+    files = []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(FILE_EXTENSION):
+            continue
+        try:
+            session_file = _open(name)
+        except HTTPException:
+            continue
+        files.append({
+            "name": name,
+            "size": os.path.getsize(session_file.path),
+            "session_name": session_file.session_meta.get("name"),
+            "total_traces": len(session_file)
+        })
+
+    return {"files": files}
+
+
+@router.get("/{name}")
+async def get_session_file(name: str):
+    """Session metadata, tags and review counts (from the columns, no trace parsing)."""
+    session_file = _open(name)
+    return json_response({
+        "name": name,
+        "session": {
+            **session_file.session_meta,
+            **session_file.counts()
+        }
+    })
+
+
+@router.get("/{name}/traces")
+async def get_session_file_traces(
+    name: str,
+    offset: int = Query(0, ge=0, description="Index of the first trace"),
+    limit: int = Query(50, ge=1, le=1000, description="Number of traces")
+):
+    """
+    Page of full traces, served as stored.
+
+    Query Parameters:
+    - offset: Index of the first trace (default: 0)
+    - limit: Number of traces, up to 1000 (default: 50)
+    """
+    session_file = _open(name)
+    header = dumps({"total": len(session_file), "offset": offset})
+    body = header[:-1] + b',"traces":' + session_file.page_json(offset, limit) + b"}"
+    return Response(content=body, media_type="application/json")
+
+
+@router.get("/{name}/traces/{trace_id}")
+async def get_session_file_trace(name: str, trace_id: str):
+    """Single trace by ID (hash index lookup)."""
+    session_file = _open(name)
+    position = session_file.find(trace_id)
+    if position is None:
+        raise HTTPException(status_code=404, detail=f"Trace {trace_id} not found")
+
+    return Response(content=bytes(session_file.trace_json(position)), media_type="application/json")
+
+
+@router.get("/{name}/reviews")
+async def get_session_file_reviews(
+    name: str,
+    offset: int = Query(0, ge=0, description="Index of the first match"),
+    limit: int = Query(1000, ge=1, le=10000, description="Number of traces"),
+    pass_fail: Optional[Literal["pass", "fail", "defer"]] = Query(None, description="Only traces with this verdict")
+):
+    """
+    Review state of traces, read from the columns only.
+
+    Query Parameters:
+    - offset: Index of the first trace (or first match when filtering, default: 0)
+    - limit: Number of traces, up to 10000 (default: 1000)
+    - pass_fail: Only return traces with this verdict ('pass', 'fail', 'defer')
+    """
+    session_file = _open(name)
+    if pass_fail is None:
+        positions = range(len(session_file))
+    else:
+        code = PASS_FAIL_CODES[pass_fail]
+        positions = [i for i, value in enumerate(session_file.pass_fail) if value == code]
+
+    return json_response({
+        "total": len(positions),
+        "offset": offset,
+        "reviews": [session_file.review(i) for i in positions[offset:offset + limit]]
+    })
@@ -1,12 +1,21 @@
 """Session management API endpoints."""
 
-from typing import Optional, List
+from typing import Optional, List, Literal
 from datetime import datetime
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from models import Session, Trace
-from routes.traces import traces_db
+from fastapi import APIRouter, File, HTTPException, Query, Request, UploadFile
+from pydantic import BaseModel, ValidationError
+from models import SamplingConfig, Session, Trace, TraceAnnotation
 from routes.tags import tags_db
+from routes.traces import query_traces, session_traces, traces_db
+from services import agreement, metrics, review_stats, revisions, sampling
+from services.event_log import annotation_state, event_log
+from services.serialization import json_response
+from services.session_file import FILE_EXTENSION, SessionFile, SessionFileError
+import anyio.to_thread
+import os
+import random
+import shutil
+import tempfile
 import uuid
 
 router = APIRouter()
@@ -23,35 +32,209 @@ class SessionCreateRequest(BaseModel):
     config: dict = {}
 
 
+class ForkRequest(BaseModel):
+    """Request model for forking a session."""
+
+    name: Optional[str] = None
+    q: Optional[str] = None
+    trace_ids: Optional[List[str]] = None
+    keep_annotations: bool = False
+
+
+class SampleImportRequest(BaseModel):
+    """Request model for streaming traces into a sampled session."""
+
+    traces: List[Trace]
+
+
 @router.get("/")
-async def get_sessions():
+async def get_sessions(request: Request):
     """List all saved sessions."""
+    def build():
+        return {
+            "sessions": [
+                {
+                    "id": session.id,
+                    "name": session.name,
+                    "created_at": session.created_at,
+                    "total_traces": session.total_traces,
+                    "reviewed_count": session.reviewed_count,
+                    "source": session.source,
+                    "parent_id": session.parent_id
+                }
+                for session in sessions_db.values()
+            ]
+        }
+
+    return revisions.conditional_response(
+        request,
+        key=("sessions",),
+        version=(revisions.revision("session"),),
+        build=build
+    )
+
+
+def _session_view(session: Session, view: str, preview_chars: int):
+    """Render a session in the requested view ('summary' or 'full')."""
+    if view == "summary":
+        return session.summary(preview_chars)
+
+    return resolve_session(session)
+
+
+def resolve_session(session: Session) -> Session:
+    """A fork as a plain session, its traces carrying the fork's annotations."""
+    if not session.is_fork:
+        return session
+    return session.model_copy(update={"traces": session_traces(session), "annotation_overlay": None})
+
+
+@router.get("/{session_id}")
+async def get_session(
+    request: Request,
+    session_id: str,
+    view: Literal["summary", "full"] = Query("summary", description="'summary' (light previews) or 'full'"),
+    preview_chars: int = Query(500, ge=0, description="Preview length for summary view")
+):
+    """
+    Load specific session.
+
+    Query Parameters:
+    - view: 'summary' returns trace previews without steps/metadata, 'full' returns whole traces
+    - preview_chars: Preview length for summary view (default: 500)
+    """
+    if session_id not in sessions_db:
+        raise HTTPException(status_code=404, detail=f"Session {session_id} not found")
+
+    session = sessions_db[session_id]
+
+    # Sessions share Trace/AxialTag objects with traces_db/tags_db, so their
+    # bodies also change whenever any trace or tag does
+    return revisions.conditional_response(
+        request,
+        key=("session", session_id, view, preview_chars),
+        version=(
+            revisions.revision("session", session_id),
+            revisions.revision("trace"),
+            revisions.revision("tag")
+        ),
+        build=lambda: _session_view(session, view, preview_chars)
+    )
+
+
+def _sync_point():
+    """Revision and instance to pass to /changes for the next incremental sync."""
     return {
-        "sessions": [
-            {
-                "id": session.id,
-                "name": session.name,
-                "created_at": session.created_at,
-                "total_traces": session.total_traces,
-                "reviewed_count": session.reviewed_count,
-                "source": session.source
-            }
-            for session in sessions_db.values()
-        ]
+        "revision": event_log.seq,
+        "instance": revisions.instance_id()
     }
 
 
-@router.get("/{session_id}")
-async def get_session(session_id: str):
-    """Load specific session."""
+@router.get("/{session_id}/changes")
+async def get_session_changes(
+    session_id: str,
+    since: int = Query(0, ge=0, description="Revision from a previous response"),
+    instance: Optional[str] = Query(None, description="Instance from a previous response"),
+    preview_chars: int = Query(500, ge=0, description="Preview length for trace summaries")
+):
+    """
+    Changes to a session since a revision, for incremental client sync.
+
+    Returns summaries of the session's traces changed after `since`, plus
+    the session fields and trace order if the session itself changed, and
+    the tag list if any tag changed. When the changes since that revision
+    are unknown (other instance, or older than the latest snapshot), the
+    response is a full copy with `full: true`. Pass the returned revision
+    and instance to the next call.
+
+    Query Parameters:
+    - since: Revision the client has (default: 0)
+    - instance: Instance the revision came from
+    - preview_chars: Preview length for trace summaries (default: 500)
+    """
     if session_id not in sessions_db:
         raise HTTPException(status_code=404, detail=f"Session {session_id} not found")
 
-    return sessions_db[session_id]
+    session = sessions_db[session_id]
+    sync_point = _sync_point()
+    full = (
+        instance != sync_point["instance"]
+        or since < revisions.base_revision()
+        or since > sync_point["revision"]
+    )
+
+    session_changed = full or revisions.revision("session", session_id) > since
+    tags_changed = full or revisions.revision("tag") > since
+    traces = [
+        session.annotated(traces_db.get(trace.id, trace))
+        for trace in session.traces
+        if full or revisions.revision("trace", trace.id) > since
+    ]
+
+    return json_response({
+        "session_id": session_id,
+        **sync_point,
+        "full": full,
+        "session": session.model_dump(exclude={"traces", "axial_tags", "annotation_overlay"}) if session_changed else None,
+        "trace_ids": [trace.id for trace in session.traces] if session_changed else None,
+        "traces": [trace.summary(preview_chars) for trace in traces],
+        "tags": list(tags_db.values()) if tags_changed else None
+    })
+
+
+@router.get("/{session_id}/history")
+async def get_session_history(
+    session_id: str,
+    seq: Optional[int] = Query(None, ge=0, description="Reconstruct as of this event sequence number"),
+    at: Optional[datetime] = Query(None, description="Reconstruct as of this time (ISO 8601)"),
+    view: Literal["summary", "full"] = Query("summary", description="'summary' (light previews) or 'full'"),
+    preview_chars: int = Query(500, ge=0, description="Preview length for summary view")
+):
+    """
+    Reconstruct a session as it was at an earlier point, from the event log.
+
+    Requires EVENT_LOG_DIR. Replays from the nearest snapshot without touching
+    live state. Without seq or at, returns the latest logged state.
+
+    Query Parameters:
+    - seq: Event sequence number to stop at (inclusive)
+    - at: Timestamp to stop at (inclusive)
+    - view: 'summary' or 'full' (default: 'summary')
+    - preview_chars: Preview length for summary view (default: 500)
+    """
+    if not event_log.persistent:
+        raise HTTPException(
+            status_code=400,
+            detail="Point-in-time reconstruction requires EVENT_LOG_DIR to be set"
+        )
+
+    with metrics.span("event_log_replay"):
+        store = event_log.reconstruct(seq=seq, at=at)
+
+    session = store.sessions.get(session_id)
+    if session is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Session {session_id} did not exist at that point"
+        )
+
+    # Session traces are shared with the reconstructed traces, so they carry
+    # the annotations as of that point
+    session.traces = [store.traces.get(trace.id, trace) for trace in session.traces]
+
+    return json_response({
+        "seq": seq,
+        "at": at,
+        "session": _session_view(session, view, preview_chars)
+    })
 
 
 @router.post("/")
-async def create_session(request: SessionCreateRequest):
+async def create_session(
+    request: SessionCreateRequest,
+    view: Literal["summary", "full"] = Query("summary", description="'summary' (light previews) or 'full'"),
+    preview_chars: int = Query(500, ge=0, description="Preview length for summary view")
+):
     """
     Create new session.
 
@@ -59,25 +242,53 @@ async def create_session(request: SessionCreateRequest):
     - name: Optional session name
     - traces: List of traces
     - config: Session configuration
+
+    Query Parameters:
+    - view: Shape of the returned session ('summary' or 'full', default: 'summary')
+    - preview_chars: Preview length for summary view (default: 500)
     """
+    session = _create_session(request)
+
+    return json_response({
+        "success": True,
+        "session": _session_view(session, view, preview_chars),
+        **_sync_point()
+    })
+
+
+def _create_session(request: SessionCreateRequest) -> Session:
+    """Build and store a new session (shared with trusted ingest)."""
     session_id = f"session_{uuid.uuid4().hex[:8]}"
 
     # Generate name if not provided
     session_name = request.name or f"Session {datetime.now().strftime('%Y-%m-%d %H:%M')}"
 
+    # Sample (in review order) or shuffle the traces as configured
+    traces = request.traces
+    sampling_state = None
+    if request.config.get("sampling") is not None:
+        try:
+            sampling_config = SamplingConfig.model_validate(request.config["sampling"])
+        except ValidationError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid sampling config: {str(e)}")
+        with metrics.span("sampling"):
+            traces, sampling_state = sampling.create_sample(traces, sampling_config)
+    elif request.config.get("randomize_order", False):
+        traces = random.sample(traces, len(traces))
+
     # Calculate initial counts
-    total_traces = len(request.traces)
-    reviewed_count = sum(1 for t in request.traces if t.reviewed)
-    passed_count = sum(1 for t in request.traces if t.pass_fail == "pass")
-    failed_count = sum(1 for t in request.traces if t.pass_fail == "fail")
-    deferred_count = sum(1 for t in request.traces if t.pass_fail == "defer")
+    total_traces = len(traces)
+    reviewed_count = sum(1 for t in traces if t.reviewed)
+    passed_count = sum(1 for t in traces if t.pass_fail == "pass")
+    failed_count = sum(1 for t in traces if t.pass_fail == "fail")
+    deferred_count = sum(1 for t in traces if t.pass_fail == "defer")
 
     session = Session(
         id=session_id,
         name=session_name,
         created_at=datetime.now(),
         updated_at=datetime.now(),
-        traces=request.traces,
+        traces=traces,
         axial_tags=list(tags_db.values()),
         mode=request.config.get("mode", "combined"),
         total_traces=total_traces,
@@ -86,44 +297,411 @@ async def create_session(request: SessionCreateRequest):
         failed_count=failed_count,
         deferred_count=deferred_count,
         randomize_order=request.config.get("randomize_order", False),
-        source=request.config.get("source", "upload")
+        source=request.config.get("source", "upload"),
+        sampling=sampling_state
     )
 
-    sessions_db[session_id] = session
+    # Stores the session and adds its traces to traces_db
+    with metrics.span("storage"):
+        event_log.commit("session.create", {"session": session})
+
+    return session
+
+
+def _read_session_file(upload: UploadFile) -> Session:
+    """Copy an upload to disk (session files are memory-mapped) and parse it."""
+    fd, path = tempfile.mkstemp(suffix=FILE_EXTENSION)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            shutil.copyfileobj(upload.file, f, 1024 * 1024)
+        with SessionFile(path) as session_file:
+            session = session_file.to_session()
+            session.axial_tags = session_file.axial_tags()
+        return session
+    finally:
+        os.unlink(path)
+
+
+def _rename_tags(trace: Trace, renamed: dict) -> Trace:
+    """Copy of a trace with tag IDs replaced (final and per-reviewer annotations)."""
+    def rename(tag_ids: List[str]) -> List[str]:
+        return list(dict.fromkeys(renamed.get(tag_id, tag_id) for tag_id in tag_ids))
+
+    return trace.model_copy(update={
+        "axial_tags": rename(trace.axial_tags),
+        "reviews": {
+            reviewer_id: review.model_copy(update={"axial_tags": rename(review.axial_tags)})
+            for reviewer_id, review in trace.reviews.items()
+        }
+    })
+
+
+@router.post("/import-file")
+async def import_session_file(
+    file: UploadFile = File(..., description="Session file (.evsession)"),
+    view: Literal["summary", "full"] = Query("summary", description="'summary' (light previews) or 'full'"),
+    preview_chars: int = Query(500, ge=0, description="Preview length for summary view")
+):
+    """
+    Import a binary session file (see GET /api/export/session-file/{session_id}).
+
+    The session gets a new ID. Tags defined in the file are created unless a
+    tag with the same ID or name already exists; traces' references to a
+    file tag whose name exists under another ID are rewritten to that tag.
+
+    Query Parameters:
+    - view: Shape of the returned session ('summary' or 'full', default: 'summary')
+    - preview_chars: Preview length for summary view (default: 500)
+    """
+    try:
+        with metrics.span("parse"):
+            imported = await anyio.to_thread.run_sync(_read_session_file, file)
+    except (SessionFileError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid session file: {str(e)}")
+
+    with event_log.transaction():
+        # File tag ID -> ID of the existing tag with the same name
+        by_name = {tag.name.lower(): tag.id for tag in tags_db.values()}
+        renamed = {}
+        for tag in imported.axial_tags:
+            if tag.id in tags_db:
+                continue
+            if tag.name.lower() in by_name:
+                renamed[tag.id] = by_name[tag.name.lower()]
+            else:
+                event_log.commit("tag.create", {"tag": tag})
+                by_name[tag.name.lower()] = tag.id
+
+        traces = imported.traces
+        if renamed:
+            traces = [_rename_tags(trace, renamed) for trace in traces]
+
+        session = imported.model_copy(update={
+            "id": f"session_{uuid.uuid4().hex[:8]}",
+            "updated_at": datetime.now(),
+            "axial_tags": list(tags_db.values()),
+            "traces": traces
+        })
+
+        with metrics.span("storage"):
+            event_log.commit("session.create", {"session": session})
+
+    return json_response({
+        "success": True,
+        "session": _session_view(session, view, preview_chars)
+    })
+
+
+def _sampled_session(session_id: str) -> Session:
+    if session_id not in sessions_db:
+        raise HTTPException(status_code=404, detail=f"Session {session_id} not found")
 
-    # Add traces to traces_db
-    for trace in request.traces:
-        traces_db[trace.id] = trace
+    session = sessions_db[session_id]
+    if session.sampling is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Session {session_id} was not created with a sampling config"
+        )
+    if session.is_fork:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Session {session_id} is a fork; add traces to session {session.parent_id} instead"
+        )
+    return session
+
+
+def _current_traces(session: Session) -> List[Trace]:
+    """Session traces with their latest annotations."""
+    return session_traces(session)
+
+
+@router.post("/{session_id}/sample")
+async def sample_traces(session_id: str, request: SampleImportRequest):
+    """
+    Stream a batch of traces into a sampled session.
+
+    Every trace counts toward the population; the session keeps a sample
+    of the configured size (per stratum when stratified), so new traces
+    may replace unreviewed ones. Reviewed traces are never dropped.
+
+    Request Body:
+    - traces: List of traces
+    """
+    with event_log.transaction():
+        session = _sampled_session(session_id)
+        current = _current_traces(session)
+
+        with metrics.span("sampling"):
+            traces, state = sampling.extend_sample(current, request.traces, session.sampling)
+
+        current_ids = {trace.id for trace in current}
+        added = [trace for trace in traces if trace.id not in current_ids]
+        evicted = current_ids - {trace.id for trace in traces}
+
+        # Only the new traces and the IDs are logged, not the whole session
+        with metrics.span("storage"):
+            if added:
+                event_log.commit("trace.import", {"traces": added})
+            event_log.commit("session.append", {
+                "session_id": session_id,
+                "trace_ids": [trace.id for trace in added],
+                "evicted_ids": [trace.id for trace in current if trace.id in evicted],
+                "sampling": state,
+                "updated_at": datetime.now()
+            })
 
     return {
         "success": True,
-        "session": session
+        "added": len(added),
+        "evicted": len(evicted),
+        "total_traces": len(traces),
+        "population": state.population
+    }
+
+
+@router.get("/{session_id}/next")
+async def get_next_traces(
+    session_id: str,
+    count: int = Query(10, ge=1, le=1000, description="Number of traces to return"),
+    preview_chars: int = Query(500, ge=0, description="Preview length")
+):
+    """
+    Unreviewed traces of a session, most informative first.
+
+    Sampled sessions use their configured priority; other sessions return
+    unreviewed traces in session order.
+
+    Query Parameters:
+    - count: Number of traces (default: 10, max: 1000)
+    - preview_chars: Preview length (default: 500)
+    """
+    if session_id not in sessions_db:
+        raise HTTPException(status_code=404, detail=f"Session {session_id} not found")
+
+    session = sessions_db[session_id]
+    traces = _current_traces(session)
+    pending = sum(1 for trace in traces if not trace.reviewed)
+
+    if session.sampling is None:
+        ordered = [trace for trace in traces if not trace.reviewed]
+    else:
+        with metrics.span("sampling"):
+            ordered = sampling.review_order(traces, session.sampling)
+
+    return json_response({
+        "session_id": session_id,
+        "remaining": pending,
+        "traces": [
+            {
+                **trace.summary(preview_chars).model_dump(),
+                "stratum": sampling.stratum_of(trace, session.sampling) if session.sampling else None
+            }
+            for trace in ordered[:count]
+        ]
+    })
+
+
+@router.get("/{session_id}/estimates")
+async def get_estimates(
+    session_id: str,
+    confidence: float = Query(0.95, gt=0, lt=1, description="Confidence level for intervals"),
+    target_margin: float = Query(
+        review_stats.DEFAULT_TARGET_MARGIN, gt=0, lt=1,
+        description="Precision at which the failure rate counts as known"
+    )
+):
+    """
+    Failure-rate estimates with confidence intervals, and whether to stop.
+
+    Reports Wilson intervals per stratum and per tag, a stratified estimate
+    for the whole population the sample was drawn from, and a stopping
+    signal once the failure rate is known to ±target_margin. Kept current
+    by annotation events, so it is cheap to poll. Deferred traces are not
+    counted. Sessions without sampling are treated as a single stratum.
+
+    Query Parameters:
+    - confidence: Confidence level (default: 0.95)
+    - target_margin: Half-width of the interval to stop at (default: 0.02)
+    """
+    if session_id not in sessions_db:
+        raise HTTPException(status_code=404, detail=f"Session {session_id} not found")
+
+    stats = review_stats.session_stats(sessions_db[session_id], traces_db)
+
+    return {
+        "session_id": session_id,
+        **stats.report(tags_db, target_margin, sampling.z_score(confidence))
+    }
+
+
+@router.get("/{session_id}/agreement")
+async def get_agreement(
+    session_id: str,
+    disputed_limit: int = Query(100, ge=0, le=10000, description="Maximum open disputes listed")
+):
+    """
+    Inter-rater agreement of the reviewers of a session.
+
+    Reports Cohen's kappa per pair of reviewers, Fleiss' kappa, per-tag
+    agreement, and the traces where reviewers disagree on pass/fail that
+    have not been adjudicated (see POST /api/annotations/{id}/adjudicate).
+    Kept current by annotation events, so it is cheap to poll. Only
+    annotations made with a reviewer_id count; deferrals do not.
+
+    Query Parameters:
+    - disputed_limit: Maximum open disputes listed, in session order (default: 100)
+    """
+    if session_id not in sessions_db:
+        raise HTTPException(status_code=404, detail=f"Session {session_id} not found")
+
+    summary = agreement.session_agreement(sessions_db[session_id], traces_db)
+
+    return {
+        "session_id": session_id,
+        **summary.report(tags_db, disputed_limit)
     }
 
 
 @router.put("/{session_id}")
 async def update_session(session_id: str, session: Session):
     """Update session (auto-save)."""
+    _update_session(session_id, session)
+
+    return {
+        "success": True
+    }
+
+
+def _update_session(session_id: str, session: Session) -> None:
+    """Recalculate counts and store a session (shared with trusted ingest)."""
     if session_id not in sessions_db:
         raise HTTPException(status_code=404, detail=f"Session {session_id} not found")
 
     session.updated_at = datetime.now()
 
+    stored = sessions_db[session_id]
+    if stored.is_fork:
+        # A fork stays a fork: annotations are only changed through
+        # /api/annotations, and traces are the shared ones
+        session.parent_id = stored.parent_id
+        session.annotation_overlay = stored.annotation_overlay
+        session.traces = [traces_db.get(t.id, t) for t in session.traces]
+
     # Recalculate counts
-    session.reviewed_count = sum(1 for t in session.traces if t.reviewed)
-    session.passed_count = sum(1 for t in session.traces if t.pass_fail == "pass")
-    session.failed_count = sum(1 for t in session.traces if t.pass_fail == "fail")
-    session.deferred_count = sum(1 for t in session.traces if t.pass_fail == "defer")
+    traces = [session.annotated(t) for t in session.traces]
+    session.reviewed_count = sum(1 for t in traces if t.reviewed)
+    session.passed_count = sum(1 for t in traces if t.pass_fail == "pass")
+    session.failed_count = sum(1 for t in traces if t.pass_fail == "fail")
+    session.deferred_count = sum(1 for t in traces if t.pass_fail == "defer")
 
-    sessions_db[session_id] = session
+    # Stores the session and updates its traces in traces_db
+    with metrics.span("storage"):
+        event_log.commit("session.update", {"session": session})
 
-    # Update traces in traces_db
-    for trace in session.traces:
-        traces_db[trace.id] = trace
 
-    return {
-        "success": True
-    }
+@router.post("/{session_id}/fork")
+async def fork_session(
+    session_id: str,
+    request: ForkRequest,
+    view: Literal["metadata", "summary", "full"] = Query(
+        "metadata", description="'metadata' (no traces), 'summary' (light previews) or 'full'"
+    ),
+    preview_chars: int = Query(500, ge=0, description="Preview length for summary view")
+):
+    """
+    Fork a session to review its traces again (e.g. a second pass or a
+    what-if relabeling).
+
+    The fork shares the parent's traces instead of copying them; its
+    annotations are its own and leave the traces, and the parent, unchanged.
+    Annotate it by passing its ID as session_id to /api/annotations.
+    Forking the whole session without annotations does not touch its traces.
+
+    Request Body:
+    - name: Name of the fork (default: "<parent name> (fork)")
+    - q: Only fork the traces matching this query (see GET /api/traces)
+    - trace_ids: Only fork these traces
+    - keep_annotations: Start from the parent's annotations (default: start unannotated)
+
+    Query Parameters:
+    - view: Shape of the returned session ('metadata', 'summary' or 'full', default: 'metadata')
+    - preview_chars: Preview length for summary view (default: 500)
+    """
+    with event_log.transaction():
+        if session_id not in sessions_db:
+            raise HTTPException(status_code=404, detail=f"Session {session_id} not found")
+
+        parent = sessions_db[session_id]
+        trace_ids = None
+        if request.q:
+            matches = query_traces(
+                request.q,
+                within=parent.trace_ids(),
+                fork=parent if parent.is_fork else None
+            )
+            trace_ids = {trace.id for trace in matches}
+        if request.trace_ids is not None:
+            wanted = set(request.trace_ids) & parent.trace_ids()
+            trace_ids = wanted if trace_ids is None else trace_ids & wanted
+
+        # Only a filtered fork needs its own list (of the parent's Trace objects)
+        traces = parent.traces
+        if trace_ids is not None:
+            traces = [trace for trace in traces if trace.id in trace_ids]
+
+        overlay = {}
+        if request.keep_annotations:
+            if parent.is_fork:
+                # The parent's annotations without its reviewers' own
+                overlay = {
+                    trace_id: annotation.model_copy(update={"axial_tags": list(annotation.axial_tags), "reviews": {}})
+                    for trace_id, annotation in parent.annotation_overlay.items()
+                    if annotation.reviewed and (trace_ids is None or trace_id in trace_ids)
+                }
+            else:
+                for trace in traces:
+                    current = traces_db.get(trace.id, trace)
+                    if current.reviewed:
+                        overlay[trace.id] = TraceAnnotation.model_validate(annotation_state(current))
+
+        fork = Session(
+            id=f"session_{uuid.uuid4().hex[:8]}",
+            name=request.name or f"{parent.name} (fork)",
+            created_at=datetime.now(),
+            updated_at=datetime.now(),
+            axial_tags=list(tags_db.values()),
+            mode=parent.mode,
+            total_traces=len(traces),
+            reviewed_count=len(overlay),
+            passed_count=sum(1 for a in overlay.values() if a.pass_fail == "pass"),
+            failed_count=sum(1 for a in overlay.values() if a.pass_fail == "fail"),
+            deferred_count=sum(1 for a in overlay.values() if a.pass_fail == "defer"),
+            randomize_order=parent.randomize_order,
+            source=parent.source,
+            # Sampling weights only hold for the whole sample
+            sampling=parent.sampling if trace_ids is None else None,
+            parent_id=parent.id,
+            annotation_overlay=overlay
+        )
+
+        # The event carries trace IDs, not traces: the fork's list is the
+        # parent's (or a filtered copy of it)
+        event_log.commit("session.fork", {
+            "session": fork,
+            "parent_id": parent.id,
+            "trace_ids": [trace.id for trace in traces] if trace_ids is not None else None
+        })
+        fork = sessions_db[fork.id]
+
+    if view == "metadata":
+        session = fork.model_dump(exclude={"traces", "annotation_overlay"})
+    else:
+        session = _session_view(fork, view, preview_chars)
+    return json_response({
+        "success": True,
+        "session": session,
+        **_sync_point()
+    })
 
 
 @router.delete("/{session_id}")
@@ -132,7 +710,7 @@ async def delete_session(session_id: str):
     if session_id not in sessions_db:
         raise HTTPException(status_code=404, detail=f"Session {session_id} not found")
 
-    del sessions_db[session_id]
+    event_log.commit("session.delete", {"session_id": session_id})
 
     return {
         "success": True
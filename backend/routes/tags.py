@@ -2,10 +2,11 @@
 
 from typing import Optional
 from datetime import datetime
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
 from pydantic import BaseModel
 from models import AxialTag
-from routes.traces import traces_db
+from services import revisions
+from services.event_log import event_log
 import uuid
 
 router = APIRouter()
@@ -30,11 +31,14 @@ class TagMergeRequest(BaseModel):
 
 
 @router.get("/")
-async def get_tags():
+async def get_tags(request: Request):
     """Retrieve all axial tags."""
-    return {
-        "tags": list(tags_db.values())
-    }
+    return revisions.conditional_response(
+        request,
+        key=("tags",),
+        version=(revisions.revision("tag"),),
+        build=lambda: {"tags": list(tags_db.values())}
+    )
 
 
 @router.post("/")
@@ -47,23 +51,25 @@ async def create_tag(tag_request: TagCreateRequest):
     - description: Tag description (20-200 characters)
     - color: Hex color code (optional)
     """
-    # Check for duplicate name
-    for existing_tag in tags_db.values():
-        if existing_tag.name.lower() == tag_request.name.lower():
-            raise HTTPException(
-                status_code=400,
-                detail=f"Tag with name '{tag_request.name}' already exists"
-            )
-
-    tag = AxialTag(
-        id=f"tag_{uuid.uuid4().hex[:8]}",
-        name=tag_request.name,
-        description=tag_request.description,
-        color=tag_request.color,
-        created_at=datetime.now()
-    )
+    # Duplicate check and insert are atomic across workers
+    with event_log.transaction():
+        # Check for duplicate name
+        for existing_tag in tags_db.values():
+            if existing_tag.name.lower() == tag_request.name.lower():
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Tag with name '{tag_request.name}' already exists"
+                )
+
+        tag = AxialTag(
+            id=f"tag_{uuid.uuid4().hex[:8]}",
+            name=tag_request.name,
+            description=tag_request.description,
+            color=tag_request.color,
+            created_at=datetime.now()
+        )
 
-    tags_db[tag.id] = tag
+        event_log.commit("tag.create", {"tag": tag})
 
     return {
         "success": True,
@@ -81,23 +87,27 @@ async def update_tag(tag_id: str, tag_request: TagCreateRequest):
     - description: New description
     - color: New color
     """
-    if tag_id not in tags_db:
-        raise HTTPException(status_code=404, detail=f"Tag {tag_id} not found")
-
-    tag = tags_db[tag_id]
-
-    # Check for duplicate name (excluding current tag)
-    for existing_tag in tags_db.values():
-        if (existing_tag.id != tag_id and
-            existing_tag.name.lower() == tag_request.name.lower()):
-            raise HTTPException(
-                status_code=400,
-                detail=f"Tag with name '{tag_request.name}' already exists"
-            )
-
-    tag.name = tag_request.name
-    tag.description = tag_request.description
-    tag.color = tag_request.color
+    with event_log.transaction():
+        if tag_id not in tags_db:
+            raise HTTPException(status_code=404, detail=f"Tag {tag_id} not found")
+
+        tag = tags_db[tag_id]
+
+        # Check for duplicate name (excluding current tag)
+        for existing_tag in tags_db.values():
+            if (existing_tag.id != tag_id and
+                existing_tag.name.lower() == tag_request.name.lower()):
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Tag with name '{tag_request.name}' already exists"
+                )
+
+        event_log.commit("tag.update", {
+            "tag_id": tag_id,
+            "name": tag_request.name,
+            "description": tag_request.description,
+            "color": tag_request.color,
+        })
 
     return {
         "success": True,
@@ -116,18 +126,16 @@ async def delete_tag(
     Query Parameters:
     - untag_traces: Whether to remove tag from all traces (default: true)
     """
-    if tag_id not in tags_db:
-        raise HTTPException(status_code=404, detail=f"Tag {tag_id} not found")
-
-    traces_affected = 0
-
-    if untag_traces:
-        for trace in traces_db.values():
-            if tag_id in trace.axial_tags:
-                trace.axial_tags.remove(tag_id)
-                traces_affected += 1
+    # Retagging every trace must not interleave with other workers' writes
+    with event_log.transaction():
+        if tag_id not in tags_db:
+            raise HTTPException(status_code=404, detail=f"Tag {tag_id} not found")
 
-    del tags_db[tag_id]
+        affected_ids = event_log.commit("tag.delete", {
+            "tag_id": tag_id,
+            "untag_traces": untag_traces,
+        })
+        traces_affected = len(affected_ids)
 
     return {
         "success": True,
@@ -144,36 +152,28 @@ async def merge_tags(merge_request: TagMergeRequest):
     - source_tag_id: Tag to merge from (will be deleted)
     - target_tag_id: Tag to merge into (will be kept)
     """
-    if merge_request.source_tag_id not in tags_db:
-        raise HTTPException(
-            status_code=404,
-            detail=f"Source tag {merge_request.source_tag_id} not found"
-        )
-
-    if merge_request.target_tag_id not in tags_db:
-        raise HTTPException(
-            status_code=404,
-            detail=f"Target tag {merge_request.target_tag_id} not found"
-        )
-
-    source_tag = tags_db[merge_request.source_tag_id]
-    target_tag = tags_db[merge_request.target_tag_id]
+    # Holds the log lock so a delete or merge on another worker cannot interleave
+    with event_log.transaction():
+        if merge_request.source_tag_id not in tags_db:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Source tag {merge_request.source_tag_id} not found"
+            )
 
-    # Update all traces with source tag to have target tag instead
-    traces_affected = 0
-    for trace in traces_db.values():
-        if merge_request.source_tag_id in trace.axial_tags:
-            trace.axial_tags.remove(merge_request.source_tag_id)
-            if merge_request.target_tag_id not in trace.axial_tags:
-                trace.axial_tags.append(merge_request.target_tag_id)
-            traces_affected += 1
+        if merge_request.target_tag_id not in tags_db:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Target tag {merge_request.target_tag_id} not found"
+            )
 
-    # Update target tag usage count and examples
-    target_tag.usage_count += source_tag.usage_count
-    target_tag.examples.extend(source_tag.examples)
+        target_tag = tags_db[merge_request.target_tag_id]
 
-    # Delete source tag
-    del tags_db[merge_request.source_tag_id]
+        # Retag traces, fold usage/examples into the target and delete the source
+        affected_ids = event_log.commit("tag.merge", {
+            "source_tag_id": merge_request.source_tag_id,
+            "target_tag_id": merge_request.target_tag_id,
+        })
+        traces_affected = len(affected_ids)
 
     return {
         "success": True,
@@ -1,8 +1,12 @@
 """Trace management API endpoints."""
 
-from typing import List, Optional
-from fastapi import APIRouter, HTTPException, Query
-from models import Trace
+from typing import Iterable, List, Literal, Optional, Sequence
+from fastapi import APIRouter, HTTPException, Query, Request
+from pydantic import BaseModel
+from models import Session, Trace
+from services import ingest, metrics, revisions, trace_query, trace_sync
+from services.event_log import event_log
+from services.serialization import json_response
 
 router = APIRouter()
 
@@ -10,55 +14,257 @@ router = APIRouter()
 traces_db: dict[str, Trace] = {}
 
 
+class TraceImportRequest(BaseModel):
+    """Request model for importing traces."""
+
+    traces: List[Trace] = []
+    session_config: dict = {}
+
+
+def session_traces(session: Session) -> List[Trace]:
+    """A session's traces as reviewed in it (current annotations, or a fork's own)."""
+    return [session.annotated(traces_db.get(trace.id, trace)) for trace in session.traces]
+
+
+def query_traces(
+    q: Optional[str],
+    within: Optional[Iterable[str]] = None,
+    fork: Optional[Session] = None,
+    filters: Sequence[trace_query.Plan] = ()
+) -> List[Trace]:
+    """
+    Traces matching a query (see services/trace_query.py) and filters; 400 if it is invalid.
+
+    For a forked session, matches its traces with the fork's annotations.
+    """
+    from routes.tags import tags_db
+
+    try:
+        with metrics.span("query"):
+            if fork is not None:
+                return trace_query.select_from(q, session_traces(fork), tags_db, filters=filters)
+            return trace_query.select(q, traces_db, tags_db, within=within, filters=filters)
+    except trace_query.QueryError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid query: {str(e)}")
+
+
 @router.get("/", response_model=dict)
 async def get_traces(
+    request: Request,
+    q: Optional[str] = Query(None, description="Query, e.g. 'tag:\"Tone Mismatch\" AND reviewed_at:>2024-01-01'"),
+    session_id: Optional[str] = Query(None, description="Only traces in this session"),
     reviewed: Optional[bool] = Query(None, description="Filter by review status"),
-    pass_fail: Optional[str] = Query(None, description="Filter by judgment (pass/fail/defer)")
+    pass_fail: Optional[str] = Query(None, description="Filter by judgment (pass/fail/defer)"),
+    view: Literal["summary", "full", "ids"] = Query("summary", description="'summary' (light previews), 'full' or 'ids'"),
+    preview_chars: int = Query(500, ge=0, description="Preview length for summary view"),
+    explain: bool = Query(False, description="Include the query plan")
 ):
     """
-    Retrieve all traces in current session.
+    Retrieve traces, optionally filtered by a query.
 
     Query Parameters:
+    - q: Query over tags, reviewer, verdict, review dates, metadata and text
+      (see docs/API.md#trace-queries)
+    - session_id: Only traces in this session (for a forked session, with
+      the fork's annotations)
     - reviewed: Filter by review status (true/false)
     - pass_fail: Filter by judgment (pass/fail/defer)
+    - view: 'summary' returns previews without steps/metadata, 'full' returns
+      whole traces, 'ids' only trace IDs
+    - preview_chars: Preview length for summary view (default: 500)
+    - explain: Include the query plan, AND operands in evaluation order
     """
-    filtered_traces = list(traces_db.values())
-
+    # The legacy filters are exact index lookups ANDed with the query
+    filters = []
     if reviewed is not None:
-        filtered_traces = [t for t in filtered_traces if t.reviewed == reviewed]
-
+        filters.append(trace_query.Lookup("reviewed", [reviewed], str(reviewed).lower()))
     if pass_fail:
-        filtered_traces = [t for t in filtered_traces if t.pass_fail == pass_fail]
+        filters.append(trace_query.Lookup("pass_fail", [pass_fail], pass_fail))
+
+    within = None
+    fork = None
+    version = (revisions.revision("trace"), revisions.revision("tag"))
+    if session_id is not None:
+        from routes.sessions import sessions_db
+        if session_id not in sessions_db:
+            raise HTTPException(status_code=404, detail=f"Session {session_id} not found")
+        within = [trace.id for trace in sessions_db[session_id].traces]
+        if sessions_db[session_id].is_fork:
+            fork = sessions_db[session_id]
+        version += (revisions.revision("session", session_id),)
+
+    def build():
+        if q or filters:
+            filtered_traces = query_traces(q, within, fork, filters)
+        elif fork is not None:
+            filtered_traces = session_traces(fork)
+        elif within is not None:
+            filtered_traces = [traces_db[trace_id] for trace_id in dict.fromkeys(within) if trace_id in traces_db]
+        else:
+            filtered_traces = list(traces_db.values())
 
-    return {
-        "traces": filtered_traces,
-        "count": len(filtered_traces)
-    }
+        if view == "ids":
+            response = {"trace_ids": [t.id for t in filtered_traces]}
+        elif view == "summary":
+            response = {"traces": [t.summary(preview_chars) for t in filtered_traces]}
+        else:
+            response = {"traces": filtered_traces}
+        response["count"] = len(filtered_traces)
+        if explain and (q or filters):
+            from routes.tags import tags_db
+            response["plan"] = trace_query.explain(q, traces_db, tags_db, filters)
+        return response
+
+    return revisions.conditional_response(
+        request,
+        key=("traces", q, reviewed, pass_fail, session_id, view, preview_chars, explain),
+        version=version,
+        build=build
+    )
 
 
 @router.get("/{trace_id}", response_model=Trace)
-async def get_trace(trace_id: str):
-    """Retrieve single trace by ID."""
+async def get_trace(
+    request: Request,
+    trace_id: str,
+    include_steps: bool = Query(True, description="Include intermediate steps")
+):
+    """
+    Retrieve single trace by ID.
+
+    Query Parameters:
+    - include_steps: Whether to include intermediate steps (default: true).
+      Use /api/traces/{trace_id}/steps to page through large step lists.
+    """
+    if trace_id not in traces_db:
+        raise HTTPException(status_code=404, detail=f"Trace {trace_id} not found")
+
+    trace = traces_db[trace_id]
+
+    def build():
+        if not include_steps:
+            return trace.model_copy(update={"intermediate_steps": []})
+        return trace
+
+    return revisions.conditional_response(
+        request,
+        key=("trace", trace_id, include_steps),
+        version=(revisions.revision("trace", trace_id),),
+        build=build
+    )
+
+
+@router.get("/{trace_id}/steps")
+async def get_trace_steps(
+    trace_id: str,
+    offset: int = Query(0, ge=0, description="Index of the first step to return"),
+    limit: int = Query(50, ge=1, le=1000, description="Maximum number of steps to return"),
+    max_content_chars: Optional[int] = Query(
+        None, ge=0, description="Truncate each step's content to this many characters"
+    )
+):
+    """
+    Retrieve a page of intermediate steps for a trace.
+
+    Query Parameters:
+    - offset: Index of the first step (default: 0)
+    - limit: Page size (default: 50, max: 1000)
+    - max_content_chars: Optional per-step content truncation
+    """
     if trace_id not in traces_db:
         raise HTTPException(status_code=404, detail=f"Trace {trace_id} not found")
 
-    return traces_db[trace_id]
+    all_steps = traces_db[trace_id].intermediate_steps
+    steps = all_steps[offset:offset + limit]
+
+    if max_content_chars is not None:
+        # Shortened steps are flagged; fetch them whole via /steps/{index}
+        steps = [
+            {
+                **step.model_dump(),
+                "content": step.content[:max_content_chars],
+                "content_truncated": True,
+                "content_length": len(step.content)
+            }
+            if len(step.content) > max_content_chars else step
+            for step in steps
+        ]
+
+    return json_response({
+        "trace_id": trace_id,
+        "steps": steps,
+        "offset": offset,
+        "limit": limit,
+        "total": len(all_steps),
+        "has_more": offset + len(steps) < len(all_steps)
+    })
+
+
+@router.get("/{trace_id}/steps/{index}")
+async def get_trace_step(request: Request, trace_id: str, index: int):
+    """Retrieve one intermediate step in full (e.g. one shortened by max_content_chars)."""
+    if trace_id not in traces_db:
+        raise HTTPException(status_code=404, detail=f"Trace {trace_id} not found")
+
+    steps = traces_db[trace_id].intermediate_steps
+    if not 0 <= index < len(steps):
+        raise HTTPException(status_code=404, detail=f"Step {index} not found in trace {trace_id}")
+
+    return revisions.conditional_response(
+        request,
+        key=("trace_step", trace_id, index),
+        version=(revisions.revision("trace", trace_id),),
+        build=lambda: steps[index]
+    )
+
+
+def sync_traces(raw_traces: list) -> dict:
+    """Sync raw traces into the store (see services/trace_sync.py); returns the sync counts."""
+    with event_log.transaction():
+        with metrics.span("sync"):
+            result = trace_sync.plan(raw_traces, traces_db, ingest.strict_traces.validate_python)
+
+        if result["traces"]:
+            with metrics.span("storage"):
+                event_log.commit("trace.import", {"traces": result["traces"]})
+
+    return {key: value for key, value in result.items() if key != "traces"}
 
 
 @router.post("/import")
-async def import_traces(data: dict):
+async def import_traces(
+    data: dict,
+    mode: Literal["replace", "sync"] = Query("replace", description="'replace' or 'sync' (incremental)")
+):
     """
     Import traces from JSON file.
 
     Request Body:
     - traces: List of Trace objects
     - session_config: Optional session configuration
+
+    Query Parameters:
+    - mode: 'replace' (default) stores every trace as given, replacing
+      stored traces and their annotations; 'sync' skips unchanged traces,
+      updates changed ones keeping their annotations, and flags reviewed
+      traces whose output changed as stale
     """
     try:
-        imported_traces = [Trace(**trace_data) for trace_data in data.get("traces", [])]
+        if mode == "sync":
+            counts = sync_traces(data.get("traces", []))
+            return {
+                "success": True,
+                "mode": mode,
+                "imported_count": counts["created"] + counts["updated"],
+                **counts,
+                "session_id": data.get("session_config", {}).get("session_id", "default")
+            }
+
+        with metrics.span("validate"):
+            imported_traces = ingest.strict_traces.validate_python(data.get("traces", []))
 
-        for trace in imported_traces:
-            traces_db[trace.id] = trace
+        with metrics.span("storage"):
+            event_log.commit("trace.import", {"traces": imported_traces})
 
         return {
             "success": True,
@@ -75,5 +281,5 @@ async def delete_trace(trace_id: str):
     if trace_id not in traces_db:
         raise HTTPException(status_code=404, detail=f"Trace {trace_id} not found")
 
-    del traces_db[trace_id]
+    event_log.commit("trace.delete", {"trace_id": trace_id})
     return {"success": True, "message": f"Trace {trace_id} deleted"}
@@ -0,0 +1,21 @@
+"""Service modules for EvalSwipe (engines used by the API routes)."""
+
+__all__ = [
+    "comparison",
+    "serialization",
+    "revisions",
+    "metrics",
+    "profiling",
+    "event_log",
+    "session_file",
+    "ingest",
+    "sampling",
+    "review_stats",
+    "replay",
+    "trace_query",
+    "step_analytics",
+    "otel_genai",
+    "live_ingest",
+    "trace_sync",
+    "agreement"
+]
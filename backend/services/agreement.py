@@ -0,0 +1,326 @@
+"""Inter-rater agreement per session, fed by annotation events.
+
+Every annotation made with a reviewer_id is also kept as that reviewer's
+own annotation of the trace (``Trace.reviews``), so traces labeled by
+several reviewers keep every label; the trace's own fields hold the final
+one (the latest, or an adjudicated one). Only pass/fail judgments are
+ratings; deferrals are not.
+
+For each session this reports:
+
+- Cohen's kappa, observed agreement and the confusion matrix per pair of
+  reviewers, and their mean (Light's kappa)
+- Fleiss' kappa over the traces rated by two or more reviewers (any number
+  of ratings per trace)
+- per tag, how often two reviewers of a trace agree on applying it:
+  positive agreement and a kappa pooled over all pairs of ratings
+- disputed traces (reviewers disagree on pass/fail), and which of them are
+  still waiting for adjudication
+
+All of these are functions of a few sums (per-pair confusion counts, per
+category rating totals, the sum of per-trace agreement, per-tag pair
+counts). They are built from the store the first time a session is asked
+for, then kept current by annotation events: a trace's previous ratings
+are subtracted and its new ones added, in O(its ratings squared, times the
+tags they use). Reading the report costs O(reviewer pairs + tags) however
+many traces are double-labeled. As in services/review_stats.py, events
+that change what a session contains drop its cached sums.
+"""
+
+import threading
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+from models import AxialTag, Session, Trace
+
+# Rating categories (index into the confusion matrix and category totals)
+PASS, FAIL = 0, 1
+CATEGORIES = ("pass", "fail")
+
+# (reviewer ID, category, tags), sorted by reviewer ID
+Rating = Tuple[str, int, FrozenSet[str]]
+Ratings = Tuple[Rating, ...]
+
+
+def _rating(reviewer_id: str, pass_fail: Optional[str], axial_tags: Iterable[str]) -> Optional[Rating]:
+    if pass_fail == "pass":
+        return (reviewer_id, PASS, frozenset())
+    if pass_fail == "fail":
+        return (reviewer_id, FAIL, frozenset(axial_tags))
+    return None
+
+
+def _ratings(trace: Trace) -> Ratings:
+    ratings = (
+        _rating(reviewer_id, review.pass_fail, review.axial_tags)
+        for reviewer_id, review in sorted(trace.reviews.items())
+    )
+    return tuple(rating for rating in ratings if rating is not None)
+
+
+def _bump(counts: Dict[Any, int], key: Any, sign: int) -> None:
+    count = counts.get(key, 0) + sign
+    if count:
+        counts[key] = count
+    else:
+        del counts[key]
+
+
+def cohen_kappa(confusion: List[int]) -> Optional[float]:
+    """Cohen's kappa of a 2x2 confusion matrix [pp, pf, fp, ff] (None if undefined)."""
+    total = sum(confusion)
+    if not total:
+        return None
+    observed = (confusion[0] + confusion[3]) / total
+    first_fail = (confusion[2] + confusion[3]) / total
+    second_fail = (confusion[1] + confusion[3]) / total
+    expected = first_fail * second_fail + (1 - first_fail) * (1 - second_fail)
+    if expected >= 1:
+        return None
+    return (observed - expected) / (1 - expected)
+
+
+def _pooled_kappa(both: int, one: int, pairs: int) -> Optional[float]:
+    """Kappa of a symmetric 2x2 table: both, one (either way) and neither of pairs."""
+    if not pairs:
+        return None
+    observed = (pairs - one) / pairs
+    prevalence = (2 * both + one) / (2 * pairs)
+    expected = prevalence ** 2 + (1 - prevalence) ** 2
+    if expected >= 1:
+        return None
+    return (observed - expected) / (1 - expected)
+
+
+class SessionAgreement:
+    """Running agreement sums for one session."""
+
+    def __init__(self, session: Session, traces: Dict[str, Trace]):
+        self.session_id = session.id
+        # Forks adjudicate in their own annotations, not the shared traces'
+        self.fork = session.is_fork
+        self.position: Dict[str, int] = {}
+        self.ratings: Dict[str, Ratings] = {}
+        self.reviewers: Dict[str, int] = {}
+        # (first reviewer, second reviewer) -> [pp, pf, fp, ff]
+        self.pairs: Dict[Tuple[str, str], List[int]] = {}
+        # Traces with 2+ ratings, sum of their agreement, ratings per category
+        self.items = 0
+        self.item_agreement = 0.0
+        self.category_totals = [0, 0]
+        # Pairs of ratings of a trace, and per tag how many carry it twice / once
+        self.rating_pairs = 0
+        self.tag_both: Dict[str, int] = {}
+        self.tag_one: Dict[str, int] = {}
+        self.disputed: Set[str] = set()
+        self.adjudicated: Set[str] = set()
+
+        for trace in session.traces:
+            trace = session.annotated(traces.get(trace.id, trace))
+            if trace.id in self.position:
+                continue
+            self.position[trace.id] = len(self.position)
+            self.ratings[trace.id] = ()
+            self.set_ratings(trace.id, _ratings(trace))
+            self.set_adjudicated(trace.id, trace.adjudicated)
+
+    def update(self, trace: Trace) -> None:
+        """Replace a trace's contribution with its current ratings."""
+        self.set_ratings(trace.id, _ratings(trace))
+        if not self.fork:
+            self.set_adjudicated(trace.id, trace.adjudicated)
+
+    def set_ratings(self, trace_id: str, ratings: Ratings) -> None:
+        if trace_id not in self.ratings:
+            return
+
+        self._add(trace_id, self.ratings[trace_id], -1)
+        self._add(trace_id, ratings, 1)
+        self.ratings[trace_id] = ratings
+
+    def set_review(self, trace_id: str, review: Dict[str, Any]) -> None:
+        """Apply one reviewer's change (an event's ``review``) to a trace's ratings."""
+        if trace_id not in self.ratings:
+            return
+
+        reviewer_id, state = review["reviewer_id"], review["state"]
+        ratings = [rating for rating in self.ratings[trace_id] if rating[0] != reviewer_id]
+        rating = _rating(reviewer_id, state["pass_fail"], state["axial_tags"]) if state is not None else None
+        if rating is not None:
+            ratings.append(rating)
+        self.set_ratings(trace_id, tuple(sorted(ratings, key=lambda rating: rating[0])))
+
+    def set_adjudicated(self, trace_id: str, adjudicated: bool) -> None:
+        if trace_id not in self.ratings:
+            return
+
+        if adjudicated:
+            self.adjudicated.add(trace_id)
+        else:
+            self.adjudicated.discard(trace_id)
+
+    def _add(self, trace_id: str, ratings: Ratings, sign: int) -> None:
+        for reviewer_id, _, _ in ratings:
+            _bump(self.reviewers, reviewer_id, sign)
+
+        count = len(ratings)
+        if count < 2:
+            return
+
+        failures = sum(category for _, category, _ in ratings)
+        passes = count - failures
+        self.items += sign
+        self.item_agreement += sign * (passes * (passes - 1) + failures * (failures - 1)) / (count * (count - 1))
+        self.category_totals[PASS] += sign * passes
+        self.category_totals[FAIL] += sign * failures
+        if passes and failures:
+            if sign > 0:
+                self.disputed.add(trace_id)
+            else:
+                self.disputed.discard(trace_id)
+
+        for i in range(count):
+            first, first_category, first_tags = ratings[i]
+            for second, second_category, second_tags in ratings[i + 1:]:
+                confusion = self.pairs.setdefault((first, second), [0, 0, 0, 0])
+                confusion[2 * first_category + second_category] += sign
+                if not any(confusion):
+                    del self.pairs[(first, second)]
+                self.rating_pairs += sign
+                for tag_id in first_tags & second_tags:
+                    _bump(self.tag_both, tag_id, sign)
+                for tag_id in first_tags ^ second_tags:
+                    _bump(self.tag_one, tag_id, sign)
+
+    def fleiss_kappa(self) -> Optional[float]:
+        total = sum(self.category_totals)
+        if not self.items or not total:
+            return None
+        mean_agreement = self.item_agreement / self.items
+        expected = sum((category_total / total) ** 2 for category_total in self.category_totals)
+        if expected >= 1:
+            return None
+        return (mean_agreement - expected) / (1 - expected)
+
+    def report(self, tags: Dict[str, AxialTag], disputed_limit: int = 100) -> Dict[str, Any]:
+        pairs = []
+        kappas = []
+        agreeing = 0
+        for (first, second), confusion in sorted(self.pairs.items()):
+            rated = sum(confusion)
+            kappa = cohen_kappa(confusion)
+            if kappa is not None:
+                kappas.append(kappa)
+            agreeing += confusion[0] + confusion[3]
+            pairs.append({
+                "reviewers": [first, second],
+                "traces": rated,
+                "agreement": (confusion[0] + confusion[3]) / rated,
+                "cohen_kappa": kappa,
+                "confusion": {
+                    f"{CATEGORIES[a]}_{CATEGORIES[b]}": confusion[2 * a + b]
+                    for a in (PASS, FAIL) for b in (PASS, FAIL)
+                }
+            })
+
+        tag_rows = []
+        for tag_id in sorted(set(self.tag_both) | set(self.tag_one)):
+            both = self.tag_both.get(tag_id, 0)
+            one = self.tag_one.get(tag_id, 0)
+            tag_rows.append({
+                "tag_id": tag_id,
+                "name": tags[tag_id].name if tag_id in tags else None,
+                "both": both,
+                "one": one,
+                "positive_agreement": 2 * both / (2 * both + one),
+                "kappa": _pooled_kappa(both, one, self.rating_pairs)
+            })
+        tag_rows.sort(key=lambda row: -(row["both"] + row["one"]))
+
+        open_disputes = sorted(self.disputed - self.adjudicated, key=self.position.__getitem__)
+        return {
+            "total_traces": len(self.ratings),
+            "multi_rated_traces": self.items,
+            "reviewers": dict(sorted(self.reviewers.items())),
+            "percent_agreement": agreeing / self.rating_pairs if self.rating_pairs else None,
+            "fleiss_kappa": self.fleiss_kappa(),
+            "mean_cohen_kappa": sum(kappas) / len(kappas) if kappas else None,
+            "pairs": pairs,
+            "tags": tag_rows,
+            "disputed": len(self.disputed),
+            "adjudicated": len(self.disputed & self.adjudicated),
+            "open_disputes": open_disputes[:disputed_limit]
+        }
+
+
+_lock = threading.RLock()
+_sessions: Dict[str, SessionAgreement] = {}
+_trace_sessions: Dict[str, Set[str]] = {}
+
+
+def reset() -> None:
+    """Forget all cached sums (e.g. after the store was reloaded)."""
+    with _lock:
+        _sessions.clear()
+        _trace_sessions.clear()
+
+
+def _drop(session_id: str) -> None:
+    agreement = _sessions.pop(session_id, None)
+    if agreement is None:
+        return
+    for trace_id in agreement.ratings:
+        session_ids = _trace_sessions.get(trace_id)
+        if session_ids is not None:
+            session_ids.discard(session_id)
+            if not session_ids:
+                del _trace_sessions[trace_id]
+
+
+def _drop_traces(trace_ids: Iterable[str]) -> None:
+    session_ids = set()
+    for trace_id in trace_ids:
+        session_ids.update(_trace_sessions.get(trace_id, ()))
+    for session_id in session_ids:
+        _drop(session_id)
+
+
+def apply_event(event: Dict[str, Any], result: Any) -> None:
+    """Update cached sums for an applied event (called by the event log)."""
+    event_type = event["type"]
+    data = event["data"]
+
+    with _lock:
+        if not _sessions:
+            return
+        if event_type.startswith("annotation."):
+            if data.get("session_id") is not None:
+                # A fork's own annotation (and its reviewer's, if any)
+                agreement = _sessions.get(data["session_id"])
+                if agreement is not None:
+                    if data.get("review") is not None:
+                        agreement.set_review(data["trace_id"], data["review"])
+                    agreement.set_adjudicated(data["trace_id"], bool(data["state"].get("adjudicated")))
+            elif result is not None:
+                for session_id in _trace_sessions.get(result.id, ()):
+                    _sessions[session_id].update(result)
+        elif event_type in ("session.create", "session.update", "session.fork"):
+            _drop(result.id)
+        elif event_type in ("session.append", "session.delete"):
+            _drop(data["session_id"])
+        elif event_type == "trace.import":
+            _drop_traces(trace.id for trace in result)
+        elif event_type == "trace.delete":
+            _drop_traces([data["trace_id"]])
+        elif event_type in ("tag.delete", "tag.merge"):
+            _drop_traces(result)
+
+
+def session_agreement(session: Session, traces: Dict[str, Trace]) -> SessionAgreement:
+    """Cached agreement sums for a session, built from the store if needed."""
+    with _lock:
+        agreement = _sessions.get(session.id)
+        if agreement is None:
+            agreement = SessionAgreement(session, traces)
+            _sessions[session.id] = agreement
+            for trace_id in agreement.ratings:
+                _trace_sessions.setdefault(trace_id, set()).add(session.id)
+        return agreement
@@ -0,0 +1,334 @@
+"""Columnar (Parquet / Arrow IPC) export of sessions.
+
+Sessions are converted ``row_group_size`` traces at a time. Each batch is
+written as one Parquet row group (or one Arrow record batch) and the bytes
+produced so far are yielded, so memory use is bounded by the batch size
+rather than the session size.
+
+Tables:
+
+- ``traces``: one row per trace, with typed review columns, ``axial_tags``
+  and ``axial_tag_names`` as lists, and ``metadata`` flattened into
+  ``metadata.<key>`` columns (nested objects joined with ``.``)
+- ``trace_tags``: one row per (trace, tag) pair (exploded tag membership)
+- ``steps``: one row per intermediate step, with step metadata flattened
+  the same way
+
+Metadata column types are inferred from the values in a first pass over
+the session: booleans, integers, floats and strings get their own types;
+anything else (lists, mixed types) is stored as JSON text. Keys beyond
+``MAX_METADATA_COLUMNS`` go into a ``metadata_extra`` JSON column.
+
+Requires the optional ``pyarrow`` package (imported by the export routes
+on first use).
+"""
+
+import json
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import pyarrow as pa
+import pyarrow.parquet as pq
+from models import Session, Trace
+
+TABLES = ("traces", "trace_tags", "steps")
+
+DEFAULT_ROW_GROUP_SIZE = 10000
+MAX_METADATA_COLUMNS = 200
+
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+_PASS_FAIL = pa.dictionary(pa.int8(), pa.string())
+_STRING_LIST = pa.list_(pa.string())
+_TIMESTAMP = pa.timestamp("us")
+
+
+def _naive(value: Optional[datetime]) -> Optional[datetime]:
+    """Timestamps are exported without a time zone (aware values as UTC)."""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def flatten(data: Optional[Dict[str, Any]], prefix: str = "") -> Dict[str, Any]:
+    """Flatten nested objects into dotted keys ({"a": {"b": 1}} -> {"a.b": 1})."""
+    flat = {}
+    for key, value in (data or {}).items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict) and value:
+            flat.update(flatten(value, f"{name}."))
+        else:
+            flat[name] = value
+    return flat
+
+
+def _kind(value: Any) -> str:
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, float):
+        return "float"
+    if isinstance(value, str):
+        return "string"
+    return "json"
+
+
+def _to_json(value: Any) -> Optional[str]:
+    return None if value is None else json.dumps(value, default=str)
+
+
+class MetadataColumns:
+    """Typed columns for flattened metadata keys, inferred from the data."""
+
+    def __init__(self, records: Iterable[Optional[Dict[str, Any]]], prefix: str = "metadata."):
+        kinds: Dict[str, set] = {}
+        frequency: Counter = Counter()
+        for record in records:
+            for key, value in flatten(record).items():
+                frequency[key] += 1
+                key_kinds = kinds.setdefault(key, set())
+                if value is not None:
+                    key_kinds.add(_kind(value))
+
+        self.prefix = prefix
+        self.keys = sorted(key for key, _ in frequency.most_common(MAX_METADATA_COLUMNS))
+        self.has_extra = len(frequency) > len(self.keys)
+        self.kinds = {key: self._resolve(kinds[key]) for key in self.keys}
+
+    @staticmethod
+    def _resolve(kinds: set) -> str:
+        if kinds <= {"int"}:
+            return "int" if kinds else "string"
+        if kinds <= {"int", "float"}:
+            return "float"
+        if len(kinds) == 1:
+            return next(iter(kinds))
+        return "json"
+
+    def fields(self) -> List[pa.Field]:
+        types = {"bool": pa.bool_(), "int": pa.int64(), "float": pa.float64(), "string": pa.string(), "json": pa.string()}
+        fields = [pa.field(f"{self.prefix}{key}", types[self.kinds[key]]) for key in self.keys]
+        if self.has_extra:
+            fields.append(pa.field(f"{self.prefix.rstrip('.')}_extra", pa.string()))
+        return fields
+
+    def columns(self, records: List[Optional[Dict[str, Any]]]) -> List[list]:
+        flat = [flatten(record) for record in records]
+        columns = []
+        for key in self.keys:
+            kind = self.kinds[key]
+            values = [row.get(key) for row in flat]
+            if kind == "json":
+                values = [_to_json(value) for value in values]
+            elif kind == "float":
+                values = [None if value is None else float(value) for value in values]
+            columns.append(values)
+        if self.has_extra:
+            known = set(self.keys)
+            extra = [{key: value for key, value in row.items() if key not in known} for row in flat]
+            columns.append([_to_json(values) if values else None for values in extra])
+        return columns
+
+
+Batches = Iterator[pa.RecordBatch]
+
+
+def _chunks(traces: List[Trace], size: int) -> Iterator[Tuple[int, List[Trace]]]:
+    for start in range(0, len(traces), size):
+        yield start, traces[start:start + size]
+
+
+def _traces_table(session: Session, tag_names: Dict[str, str], row_group_size: int) -> Tuple[pa.Schema, Batches]:
+    traces = session.traces
+    metadata = MetadataColumns(trace.metadata for trace in traces)
+    schema = pa.schema([
+        pa.field("session_id", pa.string()),
+        pa.field("position", pa.int32()),
+        pa.field("id", pa.string()),
+        pa.field("user_input", pa.string()),
+        pa.field("agent_output", pa.string()),
+        pa.field("system_prompt", pa.string()),
+        pa.field("step_count", pa.int32()),
+        pa.field("reviewed", pa.bool_()),
+        pa.field("pass_fail", _PASS_FAIL),
+        pa.field("open_code", pa.string()),
+        pa.field("axial_tags", _STRING_LIST),
+        pa.field("axial_tag_names", _STRING_LIST),
+        pa.field("reviewer_id", pa.string()),
+        pa.field("reviewed_at", _TIMESTAMP),
+        *metadata.fields(),
+    ])
+
+    def batches() -> Batches:
+        for start, chunk in _chunks(traces, row_group_size):
+            columns = [
+                [session.id] * len(chunk),
+                list(range(start, start + len(chunk))),
+                [trace.id for trace in chunk],
+                [trace.user_input for trace in chunk],
+                [trace.agent_output for trace in chunk],
+                [trace.system_prompt for trace in chunk],
+                [len(trace.intermediate_steps) for trace in chunk],
+                [trace.reviewed for trace in chunk],
+                [trace.pass_fail for trace in chunk],
+                [trace.open_code for trace in chunk],
+                [trace.axial_tags for trace in chunk],
+                [[tag_names.get(tag_id, tag_id) for tag_id in trace.axial_tags] for trace in chunk],
+                [trace.reviewer_id for trace in chunk],
+                [_naive(trace.reviewed_at) for trace in chunk],
+                *metadata.columns([trace.metadata for trace in chunk]),
+            ]
+            yield pa.RecordBatch.from_arrays(
+                [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+                schema=schema
+            )
+
+    return schema, batches()
+
+
+def _trace_tags_table(session: Session, tag_names: Dict[str, str], row_group_size: int) -> Tuple[pa.Schema, Batches]:
+    schema = pa.schema([
+        pa.field("session_id", pa.string()),
+        pa.field("trace_id", pa.string()),
+        pa.field("position", pa.int32()),
+        pa.field("tag_id", pa.string()),
+        pa.field("tag_name", pa.string()),
+        pa.field("pass_fail", _PASS_FAIL),
+        pa.field("reviewer_id", pa.string()),
+    ])
+
+    def batches() -> Batches:
+        for start, chunk in _chunks(session.traces, row_group_size):
+            rows = [
+                (session.id, trace.id, start + offset, tag_id, tag_names.get(tag_id), trace.pass_fail, trace.reviewer_id)
+                for offset, trace in enumerate(chunk)
+                for tag_id in trace.axial_tags
+            ]
+            if rows:
+                yield pa.RecordBatch.from_arrays(
+                    [pa.array(list(column), type=field.type) for column, field in zip(zip(*rows), schema)],
+                    schema=schema
+                )
+
+    return schema, batches()
+
+
+def _steps_table(session: Session, tag_names: Dict[str, str], row_group_size: int) -> Tuple[pa.Schema, Batches]:
+    metadata = MetadataColumns(
+        (step.metadata for trace in session.traces for step in trace.intermediate_steps)
+    )
+    schema = pa.schema([
+        pa.field("session_id", pa.string()),
+        pa.field("trace_id", pa.string()),
+        pa.field("step_index", pa.int32()),
+        pa.field("step_type", pa.dictionary(pa.int16(), pa.string())),
+        pa.field("content", pa.string()),
+        pa.field("timestamp", _TIMESTAMP),
+        *metadata.fields(),
+    ])
+
+    def batches() -> Batches:
+        # Row groups hold the steps of row_group_size traces
+        for _, chunk in _chunks(session.traces, row_group_size):
+            steps = [(trace.id, index, step) for trace in chunk for index, step in enumerate(trace.intermediate_steps)]
+            if not steps:
+                continue
+            columns = [
+                [session.id] * len(steps),
+                [trace_id for trace_id, _, _ in steps],
+                [index for _, index, _ in steps],
+                [step.step_type for _, _, step in steps],
+                [step.content for _, _, step in steps],
+                [_naive(step.timestamp) for _, _, step in steps],
+                *metadata.columns([step.metadata for _, _, step in steps]),
+            ]
+            yield pa.RecordBatch.from_arrays(
+                [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+                schema=schema
+            )
+
+    return schema, batches()
+
+
+_BUILDERS: Dict[str, Callable[[Session, Dict[str, str], int], Tuple[pa.Schema, Batches]]] = {
+    "traces": _traces_table,
+    "trace_tags": _trace_tags_table,
+    "steps": _steps_table,
+}
+
+
+class _ChunkSink:
+    """Writable file object that collects output so it can be streamed."""
+
+    closed = False
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def writable(self) -> bool:
+        return True
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_session(
+    session: Session,
+    tag_names: Dict[str, str],
+    table: str = "traces",
+    file_format: str = "parquet",
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+    compression: Optional[str] = "zstd"
+) -> Iterator[bytes]:
+    """
+    Export one table of a session as Parquet or an Arrow IPC stream.
+
+    Yields the file in pieces, one per row group. The session's trace list
+    must not be mutated while iterating (pass a copy).
+
+    Args:
+        session: Session to export
+        tag_names: Tag ID -> name, for the tag name columns
+        table: 'traces', 'trace_tags' or 'steps'
+        file_format: 'parquet' or 'arrow' (IPC stream format)
+        row_group_size: Traces per row group / record batch
+        compression: Parquet codec ('zstd', 'snappy', 'gzip') or Arrow IPC
+            codec ('zstd', 'lz4'); None to disable
+    """
+    schema, batches = _BUILDERS[table](session, tag_names, row_group_size)
+    sink = _ChunkSink()
+    if file_format == "parquet":
+        writer = pq.ParquetWriter(sink, schema, compression=compression or "none")
+    else:
+        options = pa.ipc.IpcWriteOptions(compression=compression)
+        writer = pa.ipc.new_stream(sink, schema, options=options)
+
+    try:
+        for batch in batches:
+            writer.write_batch(batch)
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
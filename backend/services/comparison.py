@@ -0,0 +1,338 @@
+"""Cross-session comparison and regression diff engine.
+
+Traces from two or more sessions are aligned with hash joins: the baseline
+session is indexed once into a dict keyed by the alignment key, and every
+other session is probed against that index. Comparing two sessions is
+therefore O(n + m) rather than O(n * m).
+
+Fuzzy alignment first joins on the normalized user input (case,
+punctuation and spacing ignored), then matches the traces left over on
+both sides by the Jaccard similarity of their 3-byte shingles (at least
+FUZZY_THRESHOLD). That second step is a hash join too: MinHash signatures
+are split into LSH bands, and only traces sharing a band bucket are
+compared, so near-duplicates are found without comparing every pair (a
+few may be missed; see MINHASH_BANDS). Each leftover candidate trace takes
+its most similar unclaimed baseline trace.
+"""
+
+import re
+import sys
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
+from models import Session, Trace
+
+ALIGN_MODES = ("braintrust_trace_id", "user_input", "fuzzy")
+
+_WORD = re.compile(r"\w+")
+
+# Minimum shingle Jaccard similarity of fuzzily aligned inputs
+FUZZY_THRESHOLD = 0.8
+
+SHINGLE_SIZE = 3
+
+# MinHash LSH blocking: traces are compared when all rows of one band of
+# their signatures agree. With 8 bands of 4 rows, inputs 80% similar are
+# compared with probability 0.985, unrelated ones almost never
+MINHASH_BANDS = 8
+MINHASH_ROWS = 4
+
+_EMPTY_BIN = sys.maxsize + 1
+
+
+def _braintrust_key(trace: Trace) -> Optional[str]:
+    """Align by Braintrust trace ID, falling back to our own trace ID."""
+    return (trace.metadata or {}).get("braintrust_trace_id") or trace.id
+
+
+def _input_key(trace: Trace) -> Optional[str]:
+    """Align by exact user input (hashed by the dict itself)."""
+    return trace.user_input
+
+
+def _fuzzy_key(trace: Trace) -> Optional[str]:
+    """Normalized user input (case, punctuation and spacing ignored), joined exactly before the similarity join."""
+    # Runs of word characters, single-spaced: punctuation and spacing ignored
+    return " ".join(_WORD.findall(trace.user_input.lower())) or None
+
+
+def _shingles(key: str) -> FrozenSet[Tuple[int, ...]]:
+    """Byte shingles of a normalized input (the input itself if shorter)."""
+    data = key.encode()
+    if len(data) <= SHINGLE_SIZE:
+        return frozenset([tuple(data)])
+    return frozenset(zip(*(data[i:] for i in range(SHINGLE_SIZE))))
+
+
+def _bands(shingles: FrozenSet[Tuple[int, ...]]) -> List[Tuple[int, Tuple[int, ...]]]:
+    """LSH band keys of a MinHash signature (one-permutation hashing: the minimum hash per bin)."""
+    bins = MINHASH_BANDS * MINHASH_ROWS
+    signature = [_EMPTY_BIN] * bins
+    # Hashes of int tuples are not randomized per process, so alignments are reproducible
+    for value in map(hash, shingles):
+        i = value % bins
+        if value < signature[i]:
+            signature[i] = value
+    return [
+        (band, tuple(signature[band * MINHASH_ROWS:(band + 1) * MINHASH_ROWS]))
+        for band in range(MINHASH_BANDS)
+    ]
+
+
+def similarity_join(
+    baseline: Dict[str, Trace],
+    candidates: List[Tuple[str, Trace]],
+    threshold: float = FUZZY_THRESHOLD
+) -> List[Tuple[str, Trace, Trace, float]]:
+    """
+    Match candidate traces to baseline traces by shingle similarity.
+
+    Args:
+        baseline: Unmatched baseline traces by normalized input
+        candidates: Unmatched (normalized input, trace) pairs, in probe order
+        threshold: Minimum Jaccard similarity of the shingle sets
+
+    Returns (baseline key, baseline trace, candidate trace, similarity) per
+    match; each baseline trace is matched at most once.
+    """
+    baseline_shingles = {key: _shingles(key) for key in baseline}
+    buckets: Dict[Tuple[int, Tuple[int, ...]], List[str]] = {}
+    for key, shingles in baseline_shingles.items():
+        for band in _bands(shingles):
+            buckets.setdefault(band, []).append(key)
+
+    claimed = set()
+    matches = []
+    for candidate_key, trace in candidates:
+        shingles = _shingles(candidate_key)
+        size = len(shingles)
+        seen = set()
+        best: Optional[Tuple[float, str]] = None
+        for band in _bands(shingles):
+            for key in buckets.get(band, ()):
+                if key in seen or key in claimed:
+                    continue
+                seen.add(key)
+                other = baseline_shingles[key]
+                # Sets of too different sizes cannot be similar enough
+                if not threshold * size <= len(other) <= size / threshold:
+                    continue
+                overlap = len(shingles & other)
+                similarity = overlap / (size + len(other) - overlap)
+                if similarity >= threshold and (best is None or similarity > best[0]):
+                    best = (similarity, key)
+        if best is not None:
+            claimed.add(best[1])
+            matches.append((best[1], baseline[best[1]], trace, best[0]))
+    return matches
+
+
+_KEY_FUNCS: Dict[str, Callable[[Trace], Optional[str]]] = {
+    "braintrust_trace_id": _braintrust_key,
+    "user_input": _input_key,
+    "fuzzy": _fuzzy_key,
+}
+
+
+def build_index(
+    traces: List[Trace],
+    key_func: Callable[[Trace], Optional[str]]
+) -> Tuple[Dict[str, Trace], int]:
+    """
+    Build the hash side of the join.
+
+    The first trace seen for a key wins; later ones are counted as duplicates.
+    Returns the index and the number of duplicate keys skipped.
+    """
+    index: Dict[str, Trace] = {}
+    duplicates = 0
+    for trace in traces:
+        key = key_func(trace)
+        if key is None:
+            continue
+        if key in index:
+            duplicates += 1
+            continue
+        index[key] = trace
+    return index, duplicates
+
+
+def summarize(traces: List[Trace]) -> Dict[str, Any]:
+    """Compute review counts, pass rate and tag usage for a list of traces."""
+    reviewed = passed = failed = deferred = 0
+    tag_counts: Dict[str, int] = {}
+
+    for trace in traces:
+        if trace.reviewed:
+            reviewed += 1
+        if trace.pass_fail == "pass":
+            passed += 1
+        elif trace.pass_fail == "fail":
+            failed += 1
+        elif trace.pass_fail == "defer":
+            deferred += 1
+        for tag_id in trace.axial_tags:
+            tag_counts[tag_id] = tag_counts.get(tag_id, 0) + 1
+
+    judged = passed + failed
+    return {
+        "total_traces": len(traces),
+        "reviewed_count": reviewed,
+        "passed_count": passed,
+        "failed_count": failed,
+        "deferred_count": deferred,
+        "pass_rate": passed / judged if judged else None,
+        "tag_counts": tag_counts,
+    }
+
+
+def _rate_delta(baseline: Optional[float], candidate: Optional[float]) -> Optional[float]:
+    if baseline is None or candidate is None:
+        return None
+    return candidate - baseline
+
+
+def compare_pair(
+    baseline: Session,
+    candidate: Session,
+    align_by: str = "braintrust_trace_id",
+    max_examples: int = 100,
+    baseline_index: Optional[Tuple[Dict[str, Trace], int]] = None
+) -> Dict[str, Any]:
+    """
+    Compare a candidate session against a baseline session.
+
+    Args:
+        baseline: Session used as the reference
+        candidate: Session being compared
+        align_by: One of ALIGN_MODES
+        max_examples: Maximum number of flipped judgments to list
+        baseline_index: Pre-built index for the baseline (reused across pairs)
+    """
+    if align_by not in _KEY_FUNCS:
+        raise ValueError(f"Unknown alignment mode '{align_by}', expected one of {ALIGN_MODES}")
+
+    key_func = _KEY_FUNCS[align_by]
+    index, baseline_duplicates = baseline_index or build_index(baseline.traces, key_func)
+
+    # (alignment key, baseline trace, candidate trace)
+    pairs: List[Tuple[str, Trace, Trace]] = []
+    unmatched: List[Tuple[str, Trace]] = []
+    seen_keys = set()
+    candidate_duplicates = 0
+    unmatched_candidate = 0
+
+    # Probe side of the hash join
+    for trace in candidate.traces:
+        key = key_func(trace)
+        if key is None:
+            unmatched_candidate += 1
+            continue
+        if key in seen_keys:
+            candidate_duplicates += 1
+            continue
+        seen_keys.add(key)
+
+        base_trace = index.get(key)
+        if base_trace is None:
+            unmatched.append((key, trace))
+            continue
+        pairs.append((key, base_trace, trace))
+
+    if align_by == "fuzzy" and unmatched and len(pairs) < len(index):
+        matched_keys = {key for key, _, _ in pairs}
+        remaining = {key: trace for key, trace in index.items() if key not in matched_keys}
+        similar = similarity_join(remaining, unmatched)
+        pairs.extend((key, base_trace, trace) for key, base_trace, trace, _ in similar)
+        unmatched_candidate += len(unmatched) - len(similar)
+    else:
+        unmatched_candidate += len(unmatched)
+
+    matched_baseline = [base_trace for _, base_trace, _ in pairs]
+    matched_candidate = [trace for _, _, trace in pairs]
+    flips: List[Dict[str, Any]] = []
+    flip_counts: Dict[str, int] = {}
+
+    for key, base_trace, trace in pairs:
+        if (base_trace.pass_fail and trace.pass_fail and
+                base_trace.pass_fail != trace.pass_fail):
+            transition = f"{base_trace.pass_fail}->{trace.pass_fail}"
+            flip_counts[transition] = flip_counts.get(transition, 0) + 1
+            if len(flips) < max_examples:
+                flips.append({
+                    "key": key,
+                    "baseline_trace_id": base_trace.id,
+                    "candidate_trace_id": trace.id,
+                    "baseline": base_trace.pass_fail,
+                    "candidate": trace.pass_fail,
+                })
+
+    baseline_summary = summarize(baseline.traces)
+    candidate_summary = summarize(candidate.traces)
+    matched_baseline_summary = summarize(matched_baseline)
+    matched_candidate_summary = summarize(matched_candidate)
+
+    baseline_tags = set(baseline_summary["tag_counts"])
+    candidate_tags = set(candidate_summary["tag_counts"])
+
+    tag_deltas = {
+        tag_id: candidate_summary["tag_counts"].get(tag_id, 0)
+        - baseline_summary["tag_counts"].get(tag_id, 0)
+        for tag_id in baseline_tags | candidate_tags
+    }
+
+    return {
+        "baseline_session_id": baseline.id,
+        "candidate_session_id": candidate.id,
+        "align_by": align_by,
+        "alignment": {
+            "matched": len(matched_candidate),
+            "baseline_only": len(index) - len(matched_candidate),
+            "candidate_only": unmatched_candidate,
+            "baseline_duplicates": baseline_duplicates,
+            "candidate_duplicates": candidate_duplicates,
+        },
+        "pass_rate": {
+            "baseline": baseline_summary["pass_rate"],
+            "candidate": candidate_summary["pass_rate"],
+            "delta": _rate_delta(baseline_summary["pass_rate"], candidate_summary["pass_rate"]),
+            "matched_baseline": matched_baseline_summary["pass_rate"],
+            "matched_candidate": matched_candidate_summary["pass_rate"],
+            "matched_delta": _rate_delta(
+                matched_baseline_summary["pass_rate"],
+                matched_candidate_summary["pass_rate"]
+            ),
+        },
+        "tags": {
+            "appeared": sorted(candidate_tags - baseline_tags),
+            "disappeared": sorted(baseline_tags - candidate_tags),
+            "deltas": {tag_id: delta for tag_id, delta in tag_deltas.items() if delta},
+        },
+        "flipped": {
+            "total": sum(flip_counts.values()),
+            "by_transition": flip_counts,
+            "examples": flips,
+        },
+    }
+
+
+def compare_sessions(
+    sessions: List[Session],
+    align_by: str = "braintrust_trace_id",
+    max_examples: int = 100
+) -> List[Dict[str, Any]]:
+    """
+    Compare every session after the first against the first (the baseline).
+
+    The baseline index is built once and shared by all comparisons.
+    """
+    if len(sessions) < 2:
+        raise ValueError("At least two sessions are required for a comparison")
+    if align_by not in _KEY_FUNCS:
+        raise ValueError(f"Unknown alignment mode '{align_by}', expected one of {ALIGN_MODES}")
+
+    baseline = sessions[0]
+    baseline_index = build_index(baseline.traces, _KEY_FUNCS[align_by])
+
+    return [
+        compare_pair(baseline, candidate, align_by, max_examples, baseline_index)
+        for candidate in sessions[1:]
+    ]
@@ -0,0 +1,970 @@
+"""Append-only event log for annotations, tags, traces and sessions.
+
+Every mutation is recorded as an event and applied to the store through the
+same ``apply`` function used for replay, so live state and recovered state
+cannot drift apart. Events are absolute (they carry the resulting values,
+not deltas), which makes replay idempotent.
+
+When ``EVENT_LOG_DIR`` is set, events are appended as JSON lines to segment
+files (``events-<first seq>.jsonl``) and fsync'ed in batches by a background
+thread every ``EVENT_LOG_FSYNC_INTERVAL_MS``. Every ``EVENT_LOG_SNAPSHOT_EVERY``
+events a compacted snapshot of the whole store is written in the background
+(``snapshot-<last seq>.json``). Startup recovery loads the latest snapshot
+and replays the events after it. Segments are retained, so sessions can be
+reconstructed at any earlier point.
+
+With ``EVENT_LOG_SHARED=true`` several worker processes share one directory,
+each replaying the others' events (see ``EventLog``).
+
+Without ``EVENT_LOG_DIR`` the log is memory-only: annotation history, audit
+and undo still work for the lifetime of the process.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+from pydantic import BaseModel
+from pydantic_core import to_json
+from models import AxialTag, ReviewerAnnotation, SamplingState, Session, Trace, TraceAnnotation
+from services import agreement, metrics, review_stats, revisions, step_analytics, trace_query, trace_sync
+
+try:
+    import fcntl
+except ImportError:  # Windows: shared (multi-worker) mode is unavailable
+    fcntl = None
+
+ANNOTATION_FIELDS = ("reviewed", "pass_fail", "open_code", "axial_tags", "reviewer_id", "reviewed_at", "adjudicated")
+ANNOTATION_EVENTS = ("annotation.set", "annotation.clear", "annotation.undo")
+
+CLEARED_ANNOTATION = {
+    "reviewed": False,
+    "pass_fail": None,
+    "open_code": None,
+    "axial_tags": [],
+    "reviewer_id": None,
+    "reviewed_at": None,
+    "adjudicated": False,
+}
+
+
+class Store:
+    """The three in-memory collections events are applied to."""
+
+    def __init__(
+        self,
+        traces: Optional[Dict[str, Trace]] = None,
+        tags: Optional[Dict[str, AxialTag]] = None,
+        sessions: Optional[Dict[str, Session]] = None
+    ):
+        self.traces = {} if traces is None else traces
+        self.tags = {} if tags is None else tags
+        self.sessions = {} if sessions is None else sessions
+
+
+def live_store() -> Store:
+    """The store backing the API routes."""
+    from routes.traces import traces_db
+    from routes.tags import tags_db
+    from routes.sessions import sessions_db
+    return Store(traces_db, tags_db, sessions_db)
+
+
+def annotation_state(trace: Trace) -> Dict[str, Any]:
+    """Copy of a trace's annotation fields."""
+    state = {name: getattr(trace, name) for name in ANNOTATION_FIELDS}
+    state["axial_tags"] = list(trace.axial_tags)
+    return state
+
+
+# Apply functions: (store, data) -> result. Data holds models when applied
+# live and plain JSON values when replayed from disk.
+
+def _as_model(model, value):
+    return value if isinstance(value, model) else model.model_validate(value)
+
+
+def _apply_fork_annotation(store: Store, data: Dict[str, Any]) -> None:
+    """Record an annotation in a fork's overlay (the shared trace is left alone)."""
+    session = store.sessions.get(data["session_id"])
+    if session is None or not session.is_fork:
+        return None
+
+    annotation = TraceAnnotation.model_validate(data["state"])
+    current = session.annotation_overlay.get(data["trace_id"])
+    annotation.reviews = current.reviews if current is not None else {}
+    if data.get("review") is not None:
+        _apply_review(annotation, data["review"])
+    if annotation.reviewed or annotation.reviews:
+        session.annotation_overlay[data["trace_id"]] = annotation
+    else:
+        session.annotation_overlay.pop(data["trace_id"], None)
+
+    overlay = session.annotation_overlay.values()
+    session.reviewed_count = sum(1 for a in overlay if a.reviewed)
+    session.passed_count = sum(1 for a in overlay if a.pass_fail == "pass")
+    session.failed_count = sum(1 for a in overlay if a.pass_fail == "fail")
+    session.deferred_count = sum(1 for a in overlay if a.pass_fail == "defer")
+    # Nothing shared changed, so derived caches of the store have nothing to update
+    return None
+
+
+def _apply_review(trace: Union[Trace, TraceAnnotation], review: Dict[str, Any]) -> None:
+    """Set (or remove, for a None state) one reviewer's annotation of a trace (or in a fork)."""
+    # Replaced rather than mutated: snapshots serialize traces concurrently
+    reviews = dict(trace.reviews)
+    if review["state"] is None:
+        reviews.pop(review["reviewer_id"], None)
+    else:
+        reviews[review["reviewer_id"]] = _as_model(ReviewerAnnotation, review["state"])
+    trace.reviews = reviews
+
+
+def _apply_annotation(store: Store, data: Dict[str, Any]) -> Optional[Trace]:
+    if data.get("session_id") is not None:
+        return _apply_fork_annotation(store, data)
+
+    trace = store.traces.get(data["trace_id"])
+    if trace is None:
+        return None
+
+    state = data["state"]
+    reviewed_at = state.get("reviewed_at")
+    if isinstance(reviewed_at, str):
+        reviewed_at = datetime.fromisoformat(reviewed_at)
+
+    trace.reviewed = state.get("reviewed", False)
+    trace.pass_fail = state.get("pass_fail")
+    trace.open_code = state.get("open_code")
+    trace.axial_tags = list(state.get("axial_tags") or [])
+    trace.reviewer_id = state.get("reviewer_id")
+    trace.reviewed_at = reviewed_at
+    trace.adjudicated = state.get("adjudicated", False)
+    if data.get("review") is not None:
+        _apply_review(trace, data["review"])
+    return trace
+
+
+def _apply_annotation_set(store: Store, data: Dict[str, Any]) -> Optional[Trace]:
+    trace = _apply_annotation(store, data)
+    if trace is not None:
+        # A new annotation is made against the current output
+        trace_sync.clear_stale(trace)
+    return trace
+
+
+def _apply_tag_create(store: Store, data: Dict[str, Any]) -> AxialTag:
+    tag = _as_model(AxialTag, data["tag"])
+    store.tags[tag.id] = tag
+    return tag
+
+
+def _apply_tag_update(store: Store, data: Dict[str, Any]) -> Optional[AxialTag]:
+    tag = store.tags.get(data["tag_id"])
+    if tag is None:
+        return None
+    tag.name = data["name"]
+    tag.description = data["description"]
+    tag.color = data["color"]
+    return tag
+
+
+def _other_annotations(store: Store) -> Iterator[Tuple[str, Any]]:
+    """(trace ID, annotation) of reviewers' annotations and forks' own (and their reviewers')."""
+    for trace in store.traces.values():
+        for annotation in trace.reviews.values():
+            yield trace.id, annotation
+    for session in store.sessions.values():
+        if session.is_fork:
+            for trace_id, annotation in session.annotation_overlay.items():
+                yield trace_id, annotation
+                for review in annotation.reviews.values():
+                    yield trace_id, review
+
+
+def _retagged(tag_ids: List[str], source_id: str, target_id: Optional[str] = None) -> List[str]:
+    """New list of tag IDs with source_id removed (replaced by target_id, if given, unless present)."""
+    retagged = [tag_id for tag_id in tag_ids if tag_id != source_id]
+    if target_id is not None and target_id not in retagged:
+        retagged.append(target_id)
+    return retagged
+
+
+def _apply_tag_delete(store: Store, data: Dict[str, Any]) -> List[str]:
+    tag_id = data["tag_id"]
+    affected_ids = []
+
+    if data.get("untag_traces", True):
+        # Replaced rather than mutated: snapshots serialize traces and
+        # annotations concurrently
+        for trace in store.traces.values():
+            if tag_id in trace.axial_tags:
+                trace.axial_tags = _retagged(trace.axial_tags, tag_id)
+                affected_ids.append(trace.id)
+        for trace_id, annotation in _other_annotations(store):
+            if tag_id in annotation.axial_tags:
+                annotation.axial_tags = _retagged(annotation.axial_tags, tag_id)
+                affected_ids.append(trace_id)
+
+    store.tags.pop(tag_id, None)
+    return affected_ids
+
+
+def _apply_tag_merge(store: Store, data: Dict[str, Any]) -> List[str]:
+    source_id = data["source_tag_id"]
+    target_id = data["target_tag_id"]
+    affected_ids = []
+
+    # Replaced rather than mutated, as in _apply_tag_delete
+    for trace in store.traces.values():
+        if source_id in trace.axial_tags:
+            trace.axial_tags = _retagged(trace.axial_tags, source_id, target_id)
+            affected_ids.append(trace.id)
+    for trace_id, annotation in _other_annotations(store):
+        if source_id in annotation.axial_tags:
+            annotation.axial_tags = _retagged(annotation.axial_tags, source_id, target_id)
+            affected_ids.append(trace_id)
+
+    source_tag = store.tags.pop(source_id, None)
+    target_tag = store.tags.get(target_id)
+    if source_tag is not None and target_tag is not None:
+        target_tag.usage_count += source_tag.usage_count
+        target_tag.examples = [*target_tag.examples, *source_tag.examples]
+    return affected_ids
+
+
+def _apply_trace_import(store: Store, data: Dict[str, Any]) -> List[Trace]:
+    traces = [_as_model(Trace, value) for value in data["traces"]]
+    for trace in traces:
+        store.traces[trace.id] = trace
+    return traces
+
+
+def _apply_trace_delete(store: Store, data: Dict[str, Any]) -> Optional[Trace]:
+    return store.traces.pop(data["trace_id"], None)
+
+
+def _apply_session_put(store: Store, data: Dict[str, Any]) -> Session:
+    session = _as_model(Session, data["session"])
+    store.sessions[session.id] = session
+    if not session.is_fork:
+        for trace in session.traces:
+            store.traces[trace.id] = trace
+    return session
+
+
+def _apply_session_fork(store: Store, data: Dict[str, Any]) -> Session:
+    """Create a fork sharing its parent's traces (the whole list, or the given IDs)."""
+    session = _as_model(Session, data["session"])
+    parent = store.sessions.get(data["parent_id"])
+    traces = parent.traces if parent is not None else []
+    if data.get("trace_ids") is not None:
+        wanted = set(data["trace_ids"])
+        traces = [trace for trace in traces if trace.id in wanted]
+    # Assigned without validation, so an unfiltered fork shares the parent's list
+    session.traces = traces
+    store.sessions[session.id] = session
+    return session
+
+
+def _apply_session_append(store: Store, data: Dict[str, Any]) -> Optional[Session]:
+    """Add traces to a session by ID (refreshing ones it has), drop evicted ones and set its sampling state."""
+    session = store.sessions.get(data["session_id"])
+    if session is None:
+        return None
+
+    present = {trace.id for trace in session.traces}
+    added = [
+        store.traces[trace_id] for trace_id in dict.fromkeys(data["trace_ids"])
+        if trace_id not in present and trace_id in store.traces
+    ]
+    evicted = set(data["evicted_ids"])
+    # Replaced rather than mutated: forks and snapshots may hold the old list
+    session.traces = [
+        store.traces.get(trace.id, trace)
+        for trace in [*session.traces, *added] if trace.id not in evicted
+    ]
+
+    if data.get("sampling") is not None:
+        session.sampling = _as_model(SamplingState, data["sampling"])
+    updated_at = data["updated_at"]
+    session.updated_at = datetime.fromisoformat(updated_at) if isinstance(updated_at, str) else updated_at
+    traces = [session.annotated(trace) for trace in session.traces]
+    session.total_traces = len(traces)
+    session.reviewed_count = sum(1 for t in traces if t.reviewed)
+    session.passed_count = sum(1 for t in traces if t.pass_fail == "pass")
+    session.failed_count = sum(1 for t in traces if t.pass_fail == "fail")
+    session.deferred_count = sum(1 for t in traces if t.pass_fail == "defer")
+    return session
+
+
+def _apply_session_delete(store: Store, data: Dict[str, Any]) -> Optional[Session]:
+    return store.sessions.pop(data["session_id"], None)
+
+
+APPLY: Dict[str, Callable[[Store, Dict[str, Any]], Any]] = {
+    "annotation.set": _apply_annotation_set,
+    "annotation.clear": _apply_annotation,
+    "annotation.undo": _apply_annotation,
+    "tag.create": _apply_tag_create,
+    "tag.update": _apply_tag_update,
+    "tag.delete": _apply_tag_delete,
+    "tag.merge": _apply_tag_merge,
+    "trace.import": _apply_trace_import,
+    "trace.delete": _apply_trace_delete,
+    "session.create": _apply_session_put,
+    "session.update": _apply_session_put,
+    "session.fork": _apply_session_fork,
+    "session.append": _apply_session_append,
+    "session.delete": _apply_session_delete,
+}
+
+
+class _SnapshotSession(BaseModel):
+    session: Session
+    trace_ids: List[str]
+
+
+class _SnapshotBody(BaseModel):
+    """Snapshot payload, validated straight from JSON in one pass on load."""
+
+    traces: List[Trace]
+    tags: List[AxialTag]
+    sessions: List[_SnapshotSession]
+
+
+def _segment_name(first_seq: int) -> str:
+    return f"events-{first_seq:012d}.jsonl"
+
+
+def _snapshot_name(last_seq: int) -> str:
+    return f"snapshot-{last_seq:012d}.json"
+
+
+def _parse_seq(name: str) -> int:
+    return int(name.split("-", 1)[1].split(".", 1)[0])
+
+
+def _bump_revisions(event: Dict[str, Any], result: Any) -> None:
+    """Set the revisions of everything an applied event touched to its seq."""
+    seq = event["seq"]
+    event_type = event["type"]
+    data = event["data"]
+
+    if event_type in ANNOTATION_EVENTS:
+        revisions.bump("trace", data["trace_id"], seq)
+        if data.get("session_id") is not None:
+            revisions.bump("session", data["session_id"], seq)
+    elif event_type == "tag.create":
+        revisions.bump("tag", result.id, seq)
+    elif event_type == "tag.update":
+        revisions.bump("tag", data["tag_id"], seq)
+    elif event_type == "tag.delete":
+        revisions.bump("tag", data["tag_id"], seq)
+        revisions.bump_many("trace", result, seq)
+    elif event_type == "tag.merge":
+        revisions.bump("tag", data["source_tag_id"], seq)
+        revisions.bump("tag", data["target_tag_id"], seq)
+        revisions.bump_many("trace", result, seq)
+    elif event_type == "trace.import":
+        revisions.bump_many("trace", [trace.id for trace in result], seq)
+    elif event_type == "trace.delete":
+        revisions.bump("trace", data["trace_id"], seq)
+    elif event_type in ("session.create", "session.update"):
+        revisions.bump("session", result.id, seq)
+        revisions.bump_many("trace", [trace.id for trace in result.traces], seq)
+    elif event_type == "session.fork":
+        revisions.bump("session", result.id, seq)
+    elif event_type == "session.append":
+        # The traces were imported (and bumped) by their own event
+        revisions.bump("session", data["session_id"], seq)
+    elif event_type == "session.delete":
+        revisions.bump("session", data["session_id"], seq)
+
+
+class EventLog:
+    """
+    Event log with batched fsync, background snapshots and replay.
+
+    In shared mode (``EVENT_LOG_SHARED=true``, for multi-worker deployments)
+    several processes use the same directory. Each keeps its own replica of
+    the store: writers take an exclusive file lock, catch up with the log,
+    apply their event and append it; readers catch up (``sync``) before each
+    API request by tailing the current segment.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        fsync_interval_ms: float = 50,
+        snapshot_every: int = 10000,
+        retain_snapshots: int = 3,
+        shared: bool = False,
+        history_limit: int = 1000
+    ):
+        if shared and not directory:
+            raise ValueError("Shared event log mode requires EVENT_LOG_DIR")
+        if shared and fcntl is None:
+            raise ValueError("Shared event log mode requires POSIX file locks")
+
+        self.directory = directory
+        self.fsync_interval_ms = fsync_interval_ms
+        self.snapshot_every = snapshot_every
+        self.retain_snapshots = retain_snapshots
+        self.shared = shared
+        # Annotation events kept per trace for audit and undo (oldest dropped)
+        self.history_limit = history_limit
+
+        self.seq = 0
+        self.events_since_snapshot = 0
+        self.history: Dict[str, List[Dict[str, Any]]] = {}
+        self.undone: set = set()
+
+        self.recovering = False
+        self.recovery: Dict[str, Any] = {}
+
+        self._lock = threading.Lock()
+        self._file = None
+        self._file_first: Optional[int] = None
+        self._dirty = False
+        self._flusher: Optional[threading.Thread] = None
+        self._snapshotting = False
+
+        # Cross-process lock (shared mode) and position of the tail reader
+        self._lock_file = None
+        self._lock_depth = 0
+        self._tail_first = 0
+        self._tail_offset = 0
+        self._dir_mtime: Optional[int] = None
+
+    @classmethod
+    def from_env(cls) -> "EventLog":
+        return cls(
+            directory=os.getenv("EVENT_LOG_DIR") or None,
+            fsync_interval_ms=float(os.getenv("EVENT_LOG_FSYNC_INTERVAL_MS", 50)),
+            snapshot_every=int(os.getenv("EVENT_LOG_SNAPSHOT_EVERY", 10000)),
+            retain_snapshots=int(os.getenv("EVENT_LOG_RETAIN_SNAPSHOTS", 3)),
+            shared=os.getenv("EVENT_LOG_SHARED", "false").lower() == "true",
+            history_limit=int(os.getenv("EVENT_LOG_HISTORY_LIMIT", 1000)),
+        )
+
+    @property
+    def persistent(self) -> bool:
+        return self.directory is not None
+
+    @property
+    def ready(self) -> bool:
+        """False while recovering, or if recovery failed."""
+        return not self.recovering and self.recovery.get("status") != "failed"
+
+    # Writing
+
+    @contextmanager
+    def transaction(self, store: Optional[Store] = None) -> Iterator[None]:
+        """
+        Make a check-then-commit sequence atomic across workers.
+
+        In shared mode this holds an exclusive lock on the log and catches up
+        with other workers first, so checks see the latest state. Re-entrant;
+        a no-op in single-process mode.
+        """
+        if not self.shared or self._lock_depth:
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+            return
+
+        if self._lock_file is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._lock_file = open(os.path.join(self.directory, "lock"), "a+b")
+
+        with metrics.span("event_log_lock"):
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+        self._lock_depth = 1
+        try:
+            self.sync(store)
+            yield
+        finally:
+            self._lock_depth = 0
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    def commit(self, event_type: str, data: Dict[str, Any], store: Optional[Store] = None) -> Any:
+        """Apply an event to the store and append it to the log."""
+        store = store or live_store()
+        with self.transaction(store):
+            result = APPLY[event_type](store, data)
+
+            self.seq += 1
+            event = {
+                "seq": self.seq,
+                "ts": datetime.now().isoformat(),
+                "type": event_type,
+                "data": data,
+            }
+            self._index(event)
+            _bump_revisions(event, result)
+            review_stats.apply_event(event, result)
+            agreement.apply_event(event, result)
+            trace_query.apply_event(event, result)
+            step_analytics.apply_event(event, result)
+
+            if self.persistent:
+                with metrics.span("event_log"):
+                    self._append(event)
+                self.events_since_snapshot += 1
+                if self.seq % self.snapshot_every == 0 and not self._snapshotting:
+                    self.snapshot(store, background=True)
+
+        return result
+
+    def _index(self, event: Dict[str, Any]) -> None:
+        """Keep annotation events per trace for audit and undo."""
+        if event["type"] not in ANNOTATION_EVENTS:
+            return
+        events = self.history.setdefault(event["data"]["trace_id"], [])
+        events.append(event)
+        undo_of = event["data"].get("undo_of")
+        if undo_of is not None and undo_of >= events[0]["seq"]:
+            self.undone.add(undo_of)
+
+        if len(events) > self.history_limit:
+            dropped = events[:len(events) - self.history_limit]
+            del events[:len(dropped)]
+            self.undone.difference_update(old["seq"] for old in dropped)
+
+    def _close_segment(self) -> None:
+        """Close the current segment; the next append starts a new one."""
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+            self._file_first = None
+            self._dirty = False
+
+    def _open_segment(self, first_seq: int) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        self._file = open(os.path.join(self.directory, _segment_name(first_seq)), "ab")
+        self._file_first = first_seq
+
+    def _append(self, event: Dict[str, Any]) -> None:
+        line = to_json(event) + b"\n"
+        with self._lock:
+            if self.shared:
+                # Append to the newest segment (another worker may have
+                # rotated it); the tail reader found it during sync()
+                path = os.path.join(self.directory, _segment_name(self._tail_first))
+                target = self._tail_first if os.path.exists(path) else event["seq"]
+                if self._file_first != target:
+                    self._close_segment()
+                    self._open_segment(target)
+                    if target != self._tail_first:
+                        self._tail_first, self._tail_offset = target, 0
+                if os.fstat(self._file.fileno()).st_size > self._tail_offset:
+                    # Terminate a torn line left by a crashed worker
+                    self._file.write(b"\n")
+            elif self._file is None:
+                self._open_segment(event["seq"])
+
+            # Flushed to the OS right away (visible to other workers and safe
+            # from a process crash); fsync is batched by the flusher
+            self._file.write(line)
+            self._file.flush()
+            self._dirty = True
+            if self.shared:
+                self._tail_offset = self._file.tell()
+        self._ensure_flusher()
+
+    def _ensure_flusher(self) -> None:
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+        self._flusher = threading.Thread(target=self._flush_loop, name="evalswipe-event-log", daemon=True)
+        self._flusher.start()
+
+    def _flush_loop(self) -> None:
+        while True:
+            time.sleep(self.fsync_interval_ms / 1000)
+            self.flush()
+
+    def flush(self) -> None:
+        """Flush and fsync pending events (group commit)."""
+        with self._lock:
+            if self._file is None or not self._dirty:
+                return
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._dirty = False
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_segment()
+
+    # Snapshots
+
+    def snapshot(self, store: Optional[Store] = None, background: bool = False) -> None:
+        """
+        Write a compacted snapshot of the store and start a new segment.
+
+        Collections are captured on the calling thread; serialization runs in a
+        background thread if requested. Objects may be mutated while they are
+        serialized, so the snapshot reflects at least everything up to
+        ``seq_start`` and possibly some later events. Replay starts after
+        ``seq_start``, which is safe because events are idempotent.
+        """
+        if not self.persistent:
+            return
+
+        store = store or live_store()
+        with self.transaction(store):
+            seq_start = self.seq
+            traces = list(store.traces.values())
+            tags = list(store.tags.values())
+            sessions = [(session, [trace.id for trace in session.traces]) for session in store.sessions.values()]
+            # Fork overlays gain and lose keys in place; serialize a copy
+            sessions = [
+                (session.model_copy(update={"annotation_overlay": dict(session.annotation_overlay)}), trace_ids)
+                if session.is_fork else (session, trace_ids)
+                for session, trace_ids in sessions
+            ]
+
+            with self._lock:
+                self._close_segment()
+                if self.shared:
+                    # Create the next segment now so other workers switch to it
+                    self._open_segment(seq_start + 1)
+                    self._tail_first, self._tail_offset = seq_start + 1, 0
+            self.events_since_snapshot = 0
+            self._snapshotting = True
+
+        def write():
+            try:
+                body = to_json({
+                    "traces": traces,
+                    "tags": tags,
+                    "sessions": [
+                        {"session": session.model_dump(exclude={"traces"}), "trace_ids": trace_ids}
+                        for session, trace_ids in sessions
+                    ],
+                })
+                seq_end = self.seq
+                header = to_json({
+                    "seq_start": seq_start,
+                    "seq_end": seq_end,
+                    "ts_end": datetime.now().isoformat(),
+                })
+                path = os.path.join(self.directory, _snapshot_name(seq_end))
+                with open(path + ".tmp", "wb") as f:
+                    f.write(header + b"\n" + body)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(path + ".tmp", path)
+                self._prune_snapshots()
+            finally:
+                self._snapshotting = False
+
+        if background:
+            threading.Thread(target=write, name="evalswipe-snapshot", daemon=True).start()
+        else:
+            write()
+
+    def _list(self, prefix: str, suffix: str) -> List[Tuple[int, str]]:
+        if not self.directory or not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            (_parse_seq(name), os.path.join(self.directory, name))
+            for name in os.listdir(self.directory)
+            if name.startswith(prefix) and name.endswith(suffix)
+        )
+
+    def _prune_snapshots(self) -> None:
+        snapshots = self._list("snapshot-", ".json")
+        for _, path in snapshots[:-self.retain_snapshots]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # Pruned concurrently by another worker
+                pass
+
+    @staticmethod
+    def _read_snapshot_header(path: str) -> Dict[str, Any]:
+        with open(path, "rb") as f:
+            return json.loads(f.readline())
+
+    @staticmethod
+    def _load_snapshot(path: str, store: Store) -> Dict[str, Any]:
+        with open(path, "rb") as f:
+            header = json.loads(f.readline())
+            body = _SnapshotBody.model_validate_json(f.read())
+
+        store.traces.clear()
+        store.tags.clear()
+        store.sessions.clear()
+        for trace in body.traces:
+            store.traces[trace.id] = trace
+        for tag in body.tags:
+            store.tags[tag.id] = tag
+        for value in body.sessions:
+            session = value.session
+            session.traces = [store.traces[trace_id] for trace_id in value.trace_ids if trace_id in store.traces]
+            store.sessions[session.id] = session
+        return header
+
+    def _log_id(self) -> str:
+        """Stable identity of this log directory (created on first use)."""
+        path = os.path.join(self.directory, "log-id")
+        os.makedirs(self.directory, exist_ok=True)
+        try:
+            with open(path, "x") as f:
+                f.write(uuid.uuid4().hex)
+        except FileExistsError:
+            pass
+        with open(path) as f:
+            return f.read().strip()
+
+    # Reading and replay
+
+    def _read_events(self, after: int = 0) -> Iterator[Dict[str, Any]]:
+        """Yield logged events with seq > after, in order."""
+        segments = self._list("events-", ".jsonl")
+        for index, (first_seq, path) in enumerate(segments):
+            # Snapshots and recovery start a new segment, so a segment that
+            # starts at or before a snapshot point ends before it too
+            if first_seq <= after:
+                continue
+            next_first = segments[index + 1][0] if index + 1 < len(segments) else None
+            if next_first is not None and next_first <= after + 1:
+                continue
+            with open(path, "rb") as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        # Torn write at the tail of a segment after a crash
+                        break
+                    if event["seq"] > after:
+                        yield event
+
+    def _drain_segment(self) -> Iterator[Dict[str, Any]]:
+        """Complete events appended to the tailed segment since the last read."""
+        path = os.path.join(self.directory, _segment_name(self._tail_first))
+        try:
+            size = os.path.getsize(path)
+        except FileNotFoundError:
+            return
+        if size <= self._tail_offset:
+            return
+
+        with open(path, "rb") as f:
+            f.seek(self._tail_offset)
+            chunk = f.read(size - self._tail_offset)
+
+        # Leave a partially written last line for the next read
+        end = chunk.rfind(b"\n") + 1
+        self._tail_offset += end
+        for line in chunk[:end].splitlines():
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # Torn line from a crashed writer, terminated by the next one
+                continue
+
+    def _read_new(self) -> Iterator[Dict[str, Any]]:
+        """Events appended since the last call, following segment rotation."""
+        while True:
+            yield from self._drain_segment()
+
+            # New segments show up as a directory change
+            mtime = os.stat(self.directory).st_mtime_ns
+            if mtime == self._dir_mtime:
+                return
+            self._dir_mtime = mtime
+
+            # Every newer segment in order (each process lifetime and each
+            # snapshot starts one), then check the directory again
+            for first in [first for first, _ in self._list("events-", ".jsonl") if first > self._tail_first]:
+                # Whatever was written to the previous segment before the rotation
+                yield from self._drain_segment()
+                self._tail_first, self._tail_offset = first, 0
+
+    def sync(self, store: Optional[Store] = None) -> int:
+        """
+        Apply events written by other workers (shared mode only).
+
+        Cheap when nothing changed: one stat of the segment and the directory.
+        Returns the number of events applied.
+        """
+        if not self.shared:
+            return 0
+        return self._catch_up(store or live_store())
+
+    def _catch_up(self, store: Store) -> int:
+        applied = 0
+        for event in self._read_new():
+            if event["seq"] <= self.seq:
+                continue
+            result = APPLY[event["type"]](store, event["data"])
+            self._index(event)
+            _bump_revisions(event, result)
+            review_stats.apply_event(event, result)
+            agreement.apply_event(event, result)
+            trace_query.apply_event(event, result)
+            step_analytics.apply_event(event, result)
+            self.seq = event["seq"]
+            self.events_since_snapshot += 1
+            applied += 1
+        return applied
+
+    def recover(self, store: Optional[Store] = None) -> Dict[str, Any]:
+        """Rebuild the store from the latest snapshot plus the events after it."""
+        if not self.persistent:
+            return {"snapshot": None, "replayed": 0}
+
+        store = store or live_store()
+        revisions.set_instance(self._log_id())
+
+        snapshots = self._list("snapshot-", ".json")
+        after = 0
+        snapshot_seq = None
+        if snapshots:
+            header = self._load_snapshot(snapshots[-1][1], store)
+            after = header["seq_start"]
+            snapshot_seq = header["seq_end"]
+
+        # Everything loaded from the snapshot is at revision seq_start
+        self.seq = after
+        revisions.reset(after)
+        review_stats.reset()
+        agreement.reset()
+        trace_query.reset()
+        step_analytics.reset()
+        self._tail_first, self._tail_offset, self._dir_mtime = after, 0, None
+        replayed = self._catch_up(store)
+        self.seq = max(self.seq, snapshot_seq or 0)
+
+        if not self.shared:
+            # New events go to a fresh segment after whatever is on disk
+            with self._lock:
+                self._close_segment()
+        self.events_since_snapshot = replayed
+        return {"snapshot": snapshot_seq, "replayed": replayed}
+
+    def recover_in_background(self, store: Optional[Store] = None) -> threading.Thread:
+        """
+        Run recover() in a thread, with ``recovering`` set until it finishes.
+
+        The outcome (or error) and duration are kept in ``recovery``.
+        """
+        self.recovering = True
+        self.recovery = {"status": "running"}
+        start = time.perf_counter()
+
+        def run():
+            try:
+                with metrics.span("event_log_recovery"):
+                    result = self.recover(store)
+                self.recovery = {"status": "done", **result}
+            except Exception as e:
+                self.recovery = {"status": "failed", "error": str(e)}
+            finally:
+                self.recovery["duration_ms"] = (time.perf_counter() - start) * 1000
+                self.recovering = False
+
+        thread = threading.Thread(target=run, name="evalswipe-recovery", daemon=True)
+        thread.start()
+        return thread
+
+    def reconstruct(self, seq: Optional[int] = None, at: Optional[datetime] = None) -> Store:
+        """
+        Rebuild a private copy of the store as of an event seq or timestamp.
+
+        Uses the newest snapshot that ends before the target (or replays from
+        the first segment) and never touches live state.
+        """
+        if not self.persistent:
+            raise ValueError("Point-in-time reconstruction requires EVENT_LOG_DIR")
+
+        self.flush()
+        store = Store()
+        after = 0
+        for _, path in reversed(self._list("snapshot-", ".json")):
+            header = self._read_snapshot_header(path)
+            if seq is not None and header["seq_end"] > seq:
+                continue
+            if at is not None and datetime.fromisoformat(header["ts_end"]) > at:
+                continue
+            after = self._load_snapshot(path, store)["seq_start"]
+            break
+
+        for event in self._read_events(after):
+            if seq is not None and event["seq"] > seq:
+                break
+            if at is not None and datetime.fromisoformat(event["ts"]) > at:
+                break
+            APPLY[event["type"]](store, event["data"])
+        return store
+
+    # Audit and undo
+
+    def trace_history(self, trace_id: str) -> List[Dict[str, Any]]:
+        """Annotation events for a trace, oldest first."""
+        return [
+            {**event, "undone": event["seq"] in self.undone}
+            for event in self.history.get(trace_id, [])
+        ]
+
+    def last_undoable(
+        self,
+        trace_id: Optional[str] = None,
+        reviewer_id: Optional[str] = None,
+        session_id: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Most recent annotation event matching the filters that can be undone.
+
+        session_id selects the annotations of a fork; without it, only
+        annotations of the shared traces are considered.
+        """
+        if trace_id is not None:
+            candidates = self.history.get(trace_id, [])
+        else:
+            candidates = [event for events in self.history.values() for event in events]
+            candidates.sort(key=lambda event: event["seq"])
+
+        for event in reversed(candidates):
+            if event["type"] == "annotation.undo" or event["seq"] in self.undone:
+                continue
+            if reviewer_id is not None and event["data"].get("actor") != reviewer_id:
+                continue
+            if event["data"].get("session_id") != session_id:
+                continue
+            return event
+        return None
+
+    def superseded(self, event: Dict[str, Any]) -> bool:
+        """
+        Whether a later change in the same scope (shared traces or one fork)
+        has replaced the trace's annotation since an annotation event.
+
+        Changes undone since, and undos of changes after the event, cancel out.
+        """
+        data = event["data"]
+        for later in reversed(self.history.get(data["trace_id"], [])):
+            if later["seq"] <= event["seq"]:
+                break
+            if later["data"].get("session_id") != data.get("session_id"):
+                continue
+            undo_of = later["data"].get("undo_of")
+            if undo_of is None and later["seq"] not in self.undone:
+                return True
+            if undo_of is not None and undo_of < event["seq"]:
+                return True
+        return False
+
+
+event_log = EventLog.from_env()
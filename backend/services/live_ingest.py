@@ -0,0 +1,276 @@
+"""Bounded queue between live trace producers and the store.
+
+Production services push traces (or OpenTelemetry GenAI spans) continuously.
+Committing each request on its own would write one event per request and
+rewrite the rolling review session each time, so requests are only queued
+and a background task flushes them in micro-batches:
+
+- A flush runs when LIVE_INGEST_BATCH_SIZE traces are pending, or every
+  LIVE_INGEST_FLUSH_INTERVAL_MS otherwise; each flush hands at most one
+  batch to the sink (one trace.import event plus one session.append event
+  carrying trace IDs). The sink runs on the event loop, like every other
+  writer and reader of the store, so handlers never see a half-applied
+  batch; the background task yields to them between batches, which
+  bounds how long one flush holds up requests.
+- The queue holds at most LIVE_INGEST_QUEUE_SIZE items (traces, and spans
+  of traces still being assembled). A request that does not fit is
+  rejected as a whole with QueueFull, whose retry_after estimates from the
+  observed drain rate when the backlog will have been flushed, so callers
+  back off instead of the server buffering without bound.
+- OTel spans are held by trace ID until the trace's root span arrives (or
+  LIVE_INGEST_TRACE_TIMEOUT_S has passed since its first span), then
+  assembled into one trace (see services/otel_genai.py). Spans of a
+  recently assembled trace are passed on at the next flush, and merged
+  into the stored trace by the sink.
+
+Nothing is flushed while the event log is recovering; on shutdown, stop()
+flushes what is left.
+"""
+
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+from models import Trace
+from services import metrics, otel_genai
+
+logger = logging.getLogger(__name__)
+
+QUEUE_SIZE = int(os.getenv("LIVE_INGEST_QUEUE_SIZE", 20000))
+BATCH_SIZE = int(os.getenv("LIVE_INGEST_BATCH_SIZE", 500))
+FLUSH_INTERVAL = float(os.getenv("LIVE_INGEST_FLUSH_INTERVAL_MS", 500)) / 1000
+TRACE_TIMEOUT = float(os.getenv("LIVE_INGEST_TRACE_TIMEOUT_S", 30))
+
+# Assembled OTel trace IDs remembered for late spans
+RECENT_TRACES = 10000
+
+# Bounds of the Retry-After hint (seconds)
+MIN_RETRY_AFTER = 1
+MAX_RETRY_AFTER = 60
+
+Sink = Callable[[List[Trace]], None]
+
+
+class QueueFull(Exception):
+    """The queue cannot take the request now; retry after retry_after seconds."""
+
+    def __init__(self, retry_after: int, pending: int):
+        super().__init__(f"Live ingest queue is full ({pending} items pending)")
+        self.retry_after = retry_after
+        self.pending = pending
+
+
+class LiveIngestQueue:
+    """Micro-batching queue in front of a sink that stores traces."""
+
+    def __init__(
+        self,
+        sink: Sink,
+        capacity: int = QUEUE_SIZE,
+        batch_size: int = BATCH_SIZE,
+        flush_interval: float = FLUSH_INTERVAL,
+        trace_timeout: float = TRACE_TIMEOUT,
+        is_ready: Callable[[], bool] = lambda: True
+    ):
+        self.sink = sink
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.trace_timeout = trace_timeout
+        self.is_ready = is_ready
+
+        self._traces: Deque[Trace] = deque()
+        # OTel trace ID -> {"records": {span_id: record}, "first_seen": t, "root": bool}
+        self._open: Dict[str, Dict[str, Any]] = {}
+        self._open_spans = 0
+        self._assembled: "OrderedDict[str, None]" = OrderedDict()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Flushed traces per second (exponentially weighted)
+        self._drain_rate: Optional[float] = None
+        self.stats = {
+            "accepted_traces": 0,
+            "accepted_spans": 0,
+            "rejected_requests": 0,
+            "flushed_traces": 0,
+            "batches": 0,
+            "failed_batches": 0,
+            "last_flush_at": None,
+            "last_error": None
+        }
+
+    @property
+    def pending(self) -> int:
+        return len(self._traces) + self._open_spans
+
+    def _admit(self, count: int) -> None:
+        if self.pending + count > self.capacity:
+            self.stats["rejected_requests"] += 1
+            raise QueueFull(self.retry_after(), self.pending)
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog should have been flushed."""
+        rate = self._drain_rate or self.batch_size / max(self.flush_interval, 1e-3)
+        seconds = math.ceil(self.pending / max(rate, 1e-3))
+        return max(MIN_RETRY_AFTER, min(MAX_RETRY_AFTER, seconds))
+
+    def _notify(self) -> None:
+        metrics.live_ingest_queue_depth.set(self.pending)
+        if self._wakeup is not None and len(self._traces) >= self.batch_size:
+            self._wakeup.set()
+
+    def offer_traces(self, traces: List[Trace]) -> int:
+        """Queue traces (all or none; QueueFull if they do not fit). Returns the queue depth."""
+        try:
+            self._admit(len(traces))
+        except QueueFull:
+            metrics.live_ingest_items.inc(len(traces), kind="trace", outcome="rejected")
+            raise
+        self._traces.extend(traces)
+        self.stats["accepted_traces"] += len(traces)
+        metrics.live_ingest_items.inc(len(traces), kind="trace", outcome="accepted")
+        self._notify()
+        return self.pending
+
+    def offer_spans(self, records: List[Dict[str, Any]]) -> int:
+        """Queue OTel GenAI span records (see offer_traces)."""
+        try:
+            self._admit(len(records))
+        except QueueFull:
+            metrics.live_ingest_items.inc(len(records), kind="span", outcome="rejected")
+            raise
+        now = time.monotonic()
+        for record in records:
+            entry = self._open.setdefault(record["trace_id"], {"records": {}, "first_seen": now, "root": False})
+            if record["span_id"] not in entry["records"]:
+                self._open_spans += 1
+            entry["records"][record["span_id"]] = record
+            entry["root"] = entry["root"] or otel_genai.is_root(record)
+        self.stats["accepted_spans"] += len(records)
+        metrics.live_ingest_items.inc(len(records), kind="span", outcome="accepted")
+        self._notify()
+        return self.pending
+
+    def _assemble(self, force: bool) -> None:
+        """Move finished (or timed out) OTel traces to the trace queue."""
+        now = time.monotonic()
+        for trace_id in list(self._open):
+            entry = self._open[trace_id]
+            late = trace_id in self._assembled
+            if force or late or entry["root"] or now - entry["first_seen"] >= self.trace_timeout:
+                del self._open[trace_id]
+                self._open_spans -= len(entry["records"])
+                self._traces.append(otel_genai.assemble(trace_id, entry["records"].values()))
+                self._assembled[trace_id] = None
+                self._assembled.move_to_end(trace_id)
+                if len(self._assembled) > RECENT_TRACES:
+                    self._assembled.popitem(last=False)
+
+    def _next_batch(self, force: bool) -> List[Trace]:
+        self._assemble(force)
+        count = min(self.batch_size, len(self._traces))
+        return [self._traces.popleft() for _ in range(count)]
+
+    def _sink(self, batch: List[Trace]) -> float:
+        """Store a batch; returns the seconds it took."""
+        start = time.perf_counter()
+        with metrics.span("live_ingest_flush"):
+            self.sink(batch)
+        return time.perf_counter() - start
+
+    def _failed(self, batch: List[Trace], error: Exception) -> None:
+        # Keep the batch (it was already admitted) and retry on the next flush
+        self._traces.extendleft(reversed(batch))
+        self.stats["failed_batches"] += 1
+        self.stats["last_error"] = str(error)
+        metrics.live_ingest_queue_depth.set(self.pending)
+        logger.error("Live ingest flush failed", exc_info=error)
+
+    def flush_once(self, force: bool = False) -> int:
+        """Hand one batch to the sink. Returns the number of traces stored."""
+        batch = self._next_batch(force)
+        if not batch:
+            return 0
+        try:
+            elapsed = self._sink(batch)
+        except Exception as e:
+            self._failed(batch, e)
+            raise
+        return self._flushed(len(batch), elapsed)
+
+    def _flushed(self, count: int, elapsed: float) -> int:
+        metrics.live_ingest_queue_depth.set(self.pending)
+        elapsed = max(elapsed, 1e-6)
+        rate = count / elapsed
+        self._drain_rate = rate if self._drain_rate is None else 0.8 * self._drain_rate + 0.2 * rate
+        self.stats["flushed_traces"] += count
+        self.stats["batches"] += 1
+        self.stats["last_flush_at"] = time.time()
+        metrics.live_ingest_items.inc(count, kind="trace", outcome="flushed")
+        return count
+
+    def flush(self, force: bool = False) -> int:
+        """Flush until the trace queue is empty."""
+        total = 0
+        while True:
+            count = self.flush_once(force)
+            if not count:
+                return total
+            total += count
+
+    async def run(self) -> None:
+        """Flush loop (started by start())."""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if not self.is_ready():
+                continue
+            try:
+                # One batch at a time, yielding to request handlers in between
+                while self.flush_once():
+                    await asyncio.sleep(0)
+            except Exception:
+                await asyncio.sleep(self.flush_interval)
+
+    def start(self) -> None:
+        """Start the flush loop on the running event loop."""
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self) -> None:
+        """Stop the flush loop and flush what is left (including open OTel traces)."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._wakeup = None
+        if self.is_ready() and self.pending:
+            try:
+                self.flush(force=True)
+            except Exception:
+                logger.error("Dropped %d live ingest items at shutdown", self.pending)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None,
+            "pending": self.pending,
+            "pending_traces": len(self._traces),
+            "open_otel_traces": len(self._open),
+            "open_otel_spans": self._open_spans,
+            "capacity": self.capacity,
+            "batch_size": self.batch_size,
+            "flush_interval_ms": self.flush_interval * 1000,
+            "drain_rate": self._drain_rate,
+            **self.stats
+        }
@@ -0,0 +1,237 @@
+"""In-process metrics with Prometheus text exposition.
+
+A deliberately small registry (counters, gauges, fixed-bucket histograms)
+so that recording a sample is a dict lookup and a bisect, with no external
+dependency. Exposed on ``/metrics``.
+"""
+
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+SIZE_BUCKETS = (
+    256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864
+)
+
+_registry: List["_Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    """Base class: a named metric with a fixed set of label names."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        _registry.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing value per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+            for key, value in self._values.items()
+        ]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down per label set."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        self._values[self._key(labels)] = value
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+            for key, value in self._values.items()
+        ]
+
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram per label set."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # Per label set: [bucket counts..., +Inf count], sum
+        self._counts: Dict[Tuple[str, ...], List[int]] = {}
+        self._sums: Dict[Tuple[str, ...], float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        counts = self._counts.get(key)
+        if counts is None:
+            counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+            self._sums[key] = 0.0
+        counts[bisect_left(self.buckets, value)] += 1
+        self._sums[key] += value
+
+    def count(self, **labels: str) -> int:
+        return sum(self._counts.get(self._key(labels), ()))
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for key, counts in self._counts.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            cumulative += counts[-1]
+            labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            plain = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{plain} {self._sums[key]}")
+            lines.append(f"{self.name}_count{plain} {cumulative}")
+        return lines
+
+
+# HTTP layer (recorded by middleware.MetricsMiddleware)
+http_requests = Counter(
+    "evalswipe_http_requests_total",
+    "HTTP requests by route and status code",
+    ("method", "route", "status")
+)
+http_request_duration = Histogram(
+    "evalswipe_http_request_duration_seconds",
+    "HTTP request latency by route",
+    ("method", "route")
+)
+http_request_size = Histogram(
+    "evalswipe_http_request_size_bytes",
+    "HTTP request body size by route",
+    ("method", "route"),
+    SIZE_BUCKETS
+)
+http_response_size = Histogram(
+    "evalswipe_http_response_size_bytes",
+    "HTTP response body size (as sent) by route",
+    ("method", "route"),
+    SIZE_BUCKETS
+)
+
+# Internal spans (storage, serialization, ...)
+span_duration = Histogram(
+    "evalswipe_span_duration_seconds",
+    "Duration of instrumented internal operations",
+    ("span",)
+)
+
+# External calls (Braintrust, Anthropic)
+upstream_requests = Counter(
+    "evalswipe_upstream_requests_total",
+    "Calls to external services by outcome",
+    ("service", "outcome")
+)
+upstream_duration = Histogram(
+    "evalswipe_upstream_duration_seconds",
+    "Latency of calls to external services",
+    ("service",)
+)
+
+# Live ingest queue (services/live_ingest.py)
+live_ingest_items = Counter(
+    "evalswipe_live_ingest_items_total",
+    "Live ingest traces and spans by outcome",
+    ("kind", "outcome")
+)
+live_ingest_queue_depth = Gauge(
+    "evalswipe_live_ingest_queue_depth",
+    "Items waiting in the live ingest queue"
+)
+
+# In-memory store sizes (set at scrape time)
+entities = Gauge(
+    "evalswipe_entities",
+    "Number of entities held in memory",
+    ("kind",)
+)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time an internal operation."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        span_duration.observe(time.perf_counter() - start, span=name)
+
+
+@contextmanager
+def upstream(service: str) -> Iterator[None]:
+    """Time a call to an external service and count its outcome."""
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "success"
+    finally:
+        upstream_duration.observe(time.perf_counter() - start, service=service)
+        upstream_requests.inc(service=service, outcome=outcome)
+
+
+def render() -> str:
+    """All metrics in Prometheus text exposition format (version 0.0.4)."""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
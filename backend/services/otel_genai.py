@@ -0,0 +1,372 @@
+"""Traces from OpenTelemetry GenAI spans.
+
+Converts OTLP/JSON trace exports (``ExportTraceServiceRequest``, as sent by
+OTLP/HTTP exporters with the JSON encoding) into Trace objects, following
+the GenAI semantic conventions:
+
+- Spans without any ``gen_ai.*`` attribute (HTTP, database, ...) are skipped.
+- Each GenAI span becomes an intermediate step: ``chat``/``text_completion``/
+  ``generate_content`` spans are "llm_call" steps holding the model output,
+  ``execute_tool`` spans are "tool_call" steps holding the tool result,
+  ``embeddings`` spans are "embedding" steps, ``invoke_agent``/
+  ``create_agent`` spans are "agent" steps. Step metadata carries latency_ms,
+  token_count, tool and model (see services/step_analytics.py).
+- The trace's user_input is the last user message sent to the first model
+  call, agent_output is the output of the root agent span (or of the last
+  model call) and system_prompt comes from the system instructions.
+
+Message content is read from the current attributes (``gen_ai.input.messages``,
+``gen_ai.output.messages``, ``gen_ai.system_instructions``), the older
+``gen_ai.prompt``/``gen_ai.completion`` attributes (plain or indexed, e.g.
+``gen_ai.prompt.0.content``) and the ``gen_ai.*.message``/``gen_ai.choice``
+span events.
+
+Exporters send spans as they end, so the spans of one trace can arrive in
+several requests, children first. Spans are therefore converted to records
+and grouped by trace ID by the caller (services/live_ingest.py), and spans
+arriving after their trace was stored are merged into it with merge().
+"""
+
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+from models import Trace, TraceStep
+
+SOURCE = "otel"
+
+STEP_TYPES = {
+    "chat": "llm_call",
+    "text_completion": "llm_call",
+    "generate_content": "llm_call",
+    "execute_tool": "tool_call",
+    "embeddings": "embedding",
+    "invoke_agent": "agent",
+    "create_agent": "agent",
+}
+
+
+class OTelError(ValueError):
+    """The body is not an OTLP/JSON trace export."""
+
+
+def _any_value(value: Any) -> Any:
+    """Decode an OTLP/JSON AnyValue."""
+    if not isinstance(value, dict):
+        return value
+    if "stringValue" in value:
+        return value["stringValue"]
+    if "boolValue" in value:
+        return value["boolValue"]
+    if "intValue" in value:
+        return int(value["intValue"])
+    if "doubleValue" in value:
+        return float(value["doubleValue"])
+    if "arrayValue" in value:
+        return [_any_value(item) for item in value["arrayValue"].get("values", [])]
+    if "kvlistValue" in value:
+        return _attributes(value["kvlistValue"].get("values", []))
+    if "bytesValue" in value:
+        return value["bytesValue"]
+    return None
+
+
+def _attributes(items: Any) -> Dict[str, Any]:
+    """OTLP key/value list (or an already flat mapping) to a dict."""
+    if isinstance(items, dict):
+        return dict(items)
+    return {item["key"]: _any_value(item.get("value")) for item in items or () if "key" in item}
+
+
+def _nanos(value: Any) -> Optional[int]:
+    try:
+        return int(value) if value not in (None, "", 0, "0") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _json(value: Any) -> Any:
+    if isinstance(value, str) and value[:1] in ("[", "{"):
+        try:
+            return json.loads(value)
+        except ValueError:
+            pass
+    return value
+
+
+def _text(content: Any) -> str:
+    """Plain text of message content (string, parts list or dict)."""
+    content = _json(content)
+    if content is None:
+        return ""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "\n".join(text for text in (_text(part) for part in content) if text)
+    if isinstance(content, dict):
+        if content.get("type") == "tool_call":
+            return f"{content.get('name', 'tool')}({json.dumps(content.get('arguments'), default=str)})"
+        for key in ("content", "text", "parts", "message", "result", "response"):
+            if key in content:
+                return _text(content[key])
+    return json.dumps(content, default=str)
+
+
+def _messages(value: Any, default_role: str) -> List[Dict[str, Any]]:
+    """Normalize a messages attribute to [{"role", "text"}]."""
+    value = _json(value)
+    if value is None:
+        return []
+    if not isinstance(value, list):
+        value = [value]
+    messages = []
+    for message in value:
+        if isinstance(message, dict):
+            role = message.get("role", default_role)
+            # Choice-shaped entries wrap the message
+            inner = message.get("message")
+            if isinstance(inner, dict):
+                role = inner.get("role", role)
+                message = inner
+        else:
+            role = default_role
+        messages.append({"role": role, "text": _text(message)})
+    return messages
+
+
+def _indexed(attributes: Dict[str, Any], prefix: str) -> List[Dict[str, Any]]:
+    """Messages from indexed attributes (prefix.0.role, prefix.0.content, ...)."""
+    entries: Dict[int, Dict[str, Any]] = {}
+    for key, value in attributes.items():
+        if not key.startswith(prefix):
+            continue
+        index, _, field = key[len(prefix):].partition(".")
+        if index.isdigit() and field:
+            entries.setdefault(int(index), {})[field] = value
+    return [entries[index] for index in sorted(entries)]
+
+
+def _span_messages(attributes: Dict[str, Any], events: List[Dict[str, Any]]):
+    """(input messages, output messages, system instructions) of a span."""
+    inputs = _messages(attributes.get("gen_ai.input.messages"), "user")
+    outputs = _messages(attributes.get("gen_ai.output.messages"), "assistant")
+    system = _text(attributes.get("gen_ai.system_instructions"))
+
+    if not inputs:
+        inputs = _messages(attributes.get("gen_ai.prompt") or _indexed(attributes, "gen_ai.prompt."), "user")
+    if not outputs:
+        outputs = _messages(
+            attributes.get("gen_ai.completion") or _indexed(attributes, "gen_ai.completion."), "assistant"
+        )
+
+    for event in events:
+        name = event.get("name", "")
+        event_attributes = _attributes(event.get("attributes"))
+        body = event.get("body", event_attributes)
+        if name == "gen_ai.choice":
+            outputs.extend(_messages(body, "assistant"))
+        elif name.startswith("gen_ai.") and name.endswith(".message"):
+            inputs.extend(_messages(body, name[len("gen_ai."):-len(".message")]))
+
+    if not system:
+        system = "\n".join(message["text"] for message in inputs if message["role"] == "system")
+    return inputs, outputs, system
+
+
+def _int(value: Any) -> Optional[int]:
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def span_record(span: Dict[str, Any], resource: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """A GenAI span as a flat record (None for spans without gen_ai attributes)."""
+    attributes = _attributes(span.get("attributes"))
+    if not any(key.startswith("gen_ai.") for key in attributes):
+        return None
+    if not span.get("traceId") or not span.get("spanId"):
+        raise OTelError("Spans must have traceId and spanId")
+
+    inputs, outputs, system = _span_messages(attributes, span.get("events") or [])
+    start = _nanos(span.get("startTimeUnixNano"))
+    end = _nanos(span.get("endTimeUnixNano"))
+    input_tokens = _int(attributes.get("gen_ai.usage.input_tokens", attributes.get("gen_ai.usage.prompt_tokens")))
+    output_tokens = _int(
+        attributes.get("gen_ai.usage.output_tokens", attributes.get("gen_ai.usage.completion_tokens"))
+    )
+    tokens = None
+    if input_tokens is not None or output_tokens is not None:
+        tokens = (input_tokens or 0) + (output_tokens or 0)
+    status = span.get("status") or {}
+
+    return {
+        "trace_id": span["traceId"],
+        "span_id": span["spanId"],
+        "parent_span_id": span.get("parentSpanId") or None,
+        "name": span.get("name", ""),
+        "operation": attributes.get("gen_ai.operation.name"),
+        "model": attributes.get("gen_ai.response.model") or attributes.get("gen_ai.request.model"),
+        "provider": attributes.get("gen_ai.provider.name") or attributes.get("gen_ai.system"),
+        "tool": attributes.get("gen_ai.tool.name"),
+        "tool_arguments": attributes.get("gen_ai.tool.call.arguments"),
+        "tool_result": attributes.get("gen_ai.tool.call.result"),
+        "agent": attributes.get("gen_ai.agent.name"),
+        "start": start,
+        "latency_ms": (end - start) / 1e6 if start and end and end >= start else None,
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "token_count": tokens,
+        "error": status.get("code") in (2, "STATUS_CODE_ERROR") or "error.type" in attributes,
+        "inputs": inputs,
+        "outputs": outputs,
+        "system": system,
+        "service": resource.get("service.name"),
+    }
+
+
+def records(body: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """GenAI span records of an OTLP/JSON ExportTraceServiceRequest."""
+    if not isinstance(body, dict) or not isinstance(body.get("resourceSpans"), list):
+        raise OTelError("Expected an OTLP/JSON trace export with a 'resourceSpans' list")
+
+    result = []
+    for resource_spans in body["resourceSpans"]:
+        resource = _attributes((resource_spans.get("resource") or {}).get("attributes"))
+        for scope_spans in resource_spans.get("scopeSpans") or resource_spans.get("instrumentationLibrarySpans") or ():
+            for span in scope_spans.get("spans") or ():
+                record = span_record(span, resource)
+                if record is not None:
+                    result.append(record)
+    return result
+
+
+def span_count(body: Dict[str, Any]) -> int:
+    """Total number of spans in an export (GenAI or not)."""
+    return sum(
+        len(scope_spans.get("spans") or ())
+        for resource_spans in body.get("resourceSpans") or ()
+        for scope_spans in resource_spans.get("scopeSpans") or resource_spans.get("instrumentationLibrarySpans") or ()
+    )
+
+
+def is_root(record: Dict[str, Any]) -> bool:
+    return record["parent_span_id"] is None
+
+
+def _timestamp(nanos: Optional[int]) -> Optional[datetime]:
+    return datetime.fromtimestamp(nanos / 1e9, tz=timezone.utc) if nanos else None
+
+
+def _step(record: Dict[str, Any]) -> TraceStep:
+    step_type = STEP_TYPES.get(record["operation"], record["operation"] or "span")
+    if step_type == "tool_call":
+        content = _text(record["tool_result"]) or _text(record["tool_arguments"])
+    else:
+        content = "\n".join(message["text"] for message in record["outputs"])
+
+    metadata = {
+        key: record[key]
+        for key in (
+            "span_id", "parent_span_id", "name", "operation", "model", "provider", "tool", "agent",
+            "latency_ms", "token_count", "input_tokens", "output_tokens"
+        )
+        if record[key] is not None
+    }
+    if record["tool_arguments"] is not None:
+        metadata["arguments"] = _json(record["tool_arguments"])
+    if record["error"]:
+        metadata["error"] = True
+    return TraceStep(step_type=step_type, content=content, metadata=metadata, timestamp=_timestamp(record["start"]))
+
+
+def _last_user_message(record: Dict[str, Any]) -> str:
+    user = [message["text"] for message in record["inputs"] if message["role"] == "user"]
+    return user[-1] if user else ""
+
+
+def _trace_metadata(steps: List[TraceStep], service: Optional[str], trace_id: str) -> Dict[str, Any]:
+    starts = [step.timestamp for step in steps if step.timestamp is not None]
+    latency = None
+    if starts:
+        ends = [
+            step.timestamp.timestamp() * 1000 + (step.metadata.get("latency_ms") or 0)
+            for step in steps if step.timestamp is not None
+        ]
+        latency = max(ends) - min(starts).timestamp() * 1000
+    models = [step.metadata["model"] for step in steps if step.step_type == "llm_call" and "model" in step.metadata]
+    tokens = [
+        step.metadata["token_count"] for step in steps
+        if step.step_type == "llm_call" and "token_count" in step.metadata
+    ]
+    return {
+        "model_version": models[0] if models else None,
+        "latency_ms": latency,
+        "token_count": sum(tokens) if tokens else None,
+        "timestamp": min(starts).isoformat() if starts else None,
+        "braintrust_trace_id": None,
+        "source": SOURCE,
+        "otel_trace_id": trace_id,
+        "service": service,
+    }
+
+
+def assemble(trace_id: str, span_records: Iterable[Dict[str, Any]]) -> Trace:
+    """Build a trace from the GenAI span records of one OTel trace."""
+    by_span: Dict[str, Dict[str, Any]] = {}
+    for record in span_records:
+        by_span[record["span_id"]] = record
+    ordered = sorted(by_span.values(), key=lambda record: (record["start"] or 0, record["span_id"]))
+
+    calls = [record for record in ordered if STEP_TYPES.get(record["operation"]) == "llm_call" or record["inputs"]]
+    roots = [record for record in ordered if is_root(record) and record["outputs"]]
+
+    user_input = next((text for text in map(_last_user_message, calls) if text), "")
+    if roots:
+        agent_output = "\n".join(message["text"] for message in roots[0]["outputs"])
+    else:
+        with_output = [record for record in calls if record["outputs"]]
+        agent_output = "\n".join(message["text"] for message in with_output[-1]["outputs"]) if with_output else ""
+    system_prompt = next((record["system"] for record in ordered if record["system"]), None)
+
+    steps = [_step(record) for record in ordered]
+    service = next((record["service"] for record in ordered if record["service"]), None)
+
+    return Trace(
+        id=trace_id,
+        user_input=user_input,
+        agent_output=agent_output,
+        system_prompt=system_prompt,
+        intermediate_steps=steps,
+        metadata=_trace_metadata(steps, service, trace_id)
+    )
+
+
+def merge(existing: Trace, late: Trace) -> Trace:
+    """
+    Add the steps of late-arriving spans to a stored OTel trace.
+
+    Review fields are kept; user_input, agent_output and system_prompt are
+    only filled in where the stored trace has none.
+    """
+    steps = {step.metadata.get("span_id"): step for step in existing.intermediate_steps if step.metadata}
+    for step in late.intermediate_steps:
+        steps.setdefault(step.metadata.get("span_id"), step)
+    ordered = sorted(
+        steps.values(),
+        key=lambda step: (step.timestamp.timestamp() if step.timestamp else 0, step.metadata.get("span_id", ""))
+    )
+    metadata = {
+        **existing.metadata,
+        **_trace_metadata(ordered, existing.metadata.get("service") or late.metadata.get("service"), existing.id)
+    }
+    return existing.model_copy(update={
+        "user_input": existing.user_input or late.user_input,
+        "agent_output": existing.agent_output or late.agent_output,
+        "system_prompt": existing.system_prompt or late.system_prompt,
+        "intermediate_steps": ordered,
+        "metadata": metadata
+    })
+
+
+def is_otel_trace(trace: Trace) -> bool:
+    return trace.metadata.get("source") == SOURCE
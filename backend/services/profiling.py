@@ -0,0 +1,276 @@
+"""Opt-in sampling profiler for slow requests.
+
+A single background thread samples the stack of the thread serving each
+armed request every ``interval_ms`` and aggregates the samples into folded
+stacks (``frame;frame;frame count``), ready for flamegraph.pl or speedscope.
+Requests share the event loop thread, so a sample only counts for a request
+when its own asyncio task is the one running; time spent waiting (I/O, or
+work handed to other threads) is not sampled.
+
+Requests are armed explicitly (``X-Profile: 1`` header or ``?profile=1``,
+when profiling is enabled) or automatically once they run longer than
+``slow_threshold_ms``. Explicit requests also get a tracemalloc allocation
+snapshot. tracemalloc is process-wide, so one request at a time is traced
+and its snapshot includes whatever concurrent requests allocated. The last
+``max_profiles`` profiles are kept in memory.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+
+@dataclass
+class Profile:
+    """A captured request profile."""
+
+    id: str
+    method: str
+    path: str
+    trigger: str
+    started_at: datetime
+    duration_ms: float
+    interval_ms: float
+    samples: Dict[str, int]
+    allocations: Optional[List[Dict[str, Any]]] = None
+
+    @property
+    def sample_count(self) -> int:
+        return sum(self.samples.values())
+
+    def folded(self) -> str:
+        """Samples in folded-stack format (one 'a;b;c count' line per stack)."""
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.items()) + "\n"
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "trigger": self.trigger,
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            "sample_count": self.sample_count,
+            "has_allocations": self.allocations is not None,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            **self.summary(),
+            "interval_ms": self.interval_ms,
+            "samples": self.samples,
+            "allocations": self.allocations,
+        }
+
+
+@dataclass
+class _ActiveRequest:
+    """Bookkeeping for a request the sampler may sample."""
+
+    id: str
+    thread_id: int
+    start: float
+    forced: bool
+    # The request's task on its event loop (None outside a loop: sample the thread)
+    loop: Optional[asyncio.AbstractEventLoop] = None
+    task: Optional[asyncio.Task] = None
+    started_at: datetime = field(default_factory=datetime.now)
+    samples: Dict[str, int] = field(default_factory=dict)
+
+
+def _stack_key(frame) -> str:
+    """Folded representation of a frame's stack, root first."""
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+        frame = frame.f_back
+    parts.reverse()
+    return ";".join(parts)
+
+
+class Profiler:
+    """Registry of armed requests plus the sampler thread and profile store."""
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        slow_threshold_ms: Optional[float] = None,
+        interval_ms: float = 5.0,
+        max_profiles: int = 20,
+        allocation_top: int = 25
+    ):
+        self.enabled = enabled
+        self.slow_threshold_ms = slow_threshold_ms
+        self.interval_ms = interval_ms
+        self.allocation_top = allocation_top
+        self.profiles: Deque[Profile] = deque(maxlen=max_profiles)
+
+        self._active: Dict[str, _ActiveRequest] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # Request whose allocations are traced, and whether tracing was started for it
+        self._tracing_request: Optional[str] = None
+        self._started_tracing = False
+
+    @classmethod
+    def from_env(cls) -> "Profiler":
+        threshold = os.getenv("PROFILING_SLOW_THRESHOLD_MS")
+        return cls(
+            enabled=os.getenv("PROFILING_ENABLED", "false").lower() == "true",
+            slow_threshold_ms=float(threshold) if threshold else None,
+            interval_ms=float(os.getenv("PROFILING_INTERVAL_MS", 5)),
+            max_profiles=int(os.getenv("PROFILING_MAX_PROFILES", 20)),
+        )
+
+    @property
+    def active(self) -> bool:
+        """Whether any request can be profiled at all."""
+        return self.enabled or self.slow_threshold_ms is not None
+
+    def begin(self, forced: bool) -> Optional[_ActiveRequest]:
+        """Arm the current request; returns None if it cannot be profiled."""
+        if forced and not self.enabled:
+            forced = False
+        if not forced and self.slow_threshold_ms is None:
+            return None
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        request = _ActiveRequest(
+            id=uuid.uuid4().hex[:12],
+            thread_id=threading.get_ident(),
+            start=time.perf_counter(),
+            forced=forced,
+            loop=loop,
+            task=asyncio.current_task(loop) if loop is not None else None,
+        )
+
+        if forced:
+            with self._lock:
+                if self._tracing_request is None:
+                    self._tracing_request = request.id
+                    # Leave tracing alone if something else started it
+                    self._started_tracing = not tracemalloc.is_tracing()
+                    if self._started_tracing:
+                        tracemalloc.start()
+
+        with self._lock:
+            self._active[request.id] = request
+        self._ensure_thread()
+        self._wakeup.set()
+        return request
+
+    def end(self, request: _ActiveRequest, method: str, path: str) -> Optional[Profile]:
+        """Disarm a request and store its profile if it qualifies."""
+        duration_ms = (time.perf_counter() - request.start) * 1000
+
+        with self._lock:
+            self._active.pop(request.id, None)
+            if not self._active:
+                self._wakeup.clear()
+
+        allocations = None
+        if request.forced and self._tracing_request == request.id:
+            allocations = self._allocation_snapshot()
+            with self._lock:
+                if self._started_tracing:
+                    tracemalloc.stop()
+                self._tracing_request = None
+                self._started_tracing = False
+
+        slow = self.slow_threshold_ms is not None and duration_ms >= self.slow_threshold_ms
+        if not request.forced and not slow:
+            return None
+
+        profile = Profile(
+            id=request.id,
+            method=method,
+            path=path,
+            trigger="request" if request.forced else "slow",
+            started_at=request.started_at,
+            duration_ms=duration_ms,
+            interval_ms=self.interval_ms,
+            samples=dict(request.samples),
+            allocations=allocations,
+        )
+        self.profiles.append(profile)
+        return profile
+
+    def get(self, profile_id: str) -> Optional[Profile]:
+        for profile in self.profiles:
+            if profile.id == profile_id:
+                return profile
+        return None
+
+    def _allocation_snapshot(self) -> Optional[List[Dict[str, Any]]]:
+        if not tracemalloc.is_tracing():
+            return None
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ))
+        return [
+            {
+                "file": stat.traceback[0].filename,
+                "line": stat.traceback[0].lineno,
+                "size_bytes": stat.size,
+                "count": stat.count,
+            }
+            for stat in snapshot.statistics("lineno")[:self.allocation_top]
+        ]
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="evalswipe-profiler", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        interval = self.interval_ms / 1000
+        threshold = (self.slow_threshold_ms or 0) / 1000
+        while True:
+            self._wakeup.wait()
+            time.sleep(interval)
+
+            now = time.perf_counter()
+            with self._lock:
+                due = [
+                    r for r in self._active.values()
+                    if r.forced or now - r.start >= threshold
+                ]
+            if not due:
+                continue
+
+            running = {id(r.loop): asyncio.current_task(r.loop) for r in due if r.loop is not None}
+            frames = sys._current_frames()
+            for request in due:
+                frame = frames.get(request.thread_id)
+                if frame is None:
+                    continue
+                if request.task is not None and (
+                    running[id(request.loop)] is not request.task
+                    or asyncio.current_task(request.loop) is not request.task
+                ):
+                    # The loop was running another request's task (or none)
+                    continue
+                key = _stack_key(frame)
+                request.samples[key] = request.samples.get(key, 0) + 1
+
+
+profiler = Profiler.from_env()
@@ -0,0 +1,323 @@
+"""Offline replay of failing traces against a candidate system prompt.
+
+A suggested prompt is checked by re-running the user inputs of traces that
+failed with the targeted axial tags through a model backend, and putting
+each new response next to the one that was originally reviewed.
+
+- Backends are registered in BACKENDS by name. "anthropic" calls Claude;
+  "stub" is a deterministic local backend (no network) whose response is a
+  function of the prompt and input only, so replays are reproducible.
+- Traces are replayed by a fixed pool of workers pulling from a queue, with
+  an optional requests-per-second limit shared by the pool.
+- Responses are cached by (backend, model, system prompt, user input), so
+  replaying the same prompt again (e.g. with more traces) only pays for the
+  inputs that were not run before.
+"""
+
+import asyncio
+import hashlib
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+from models import Trace, TraceStep
+from services import metrics
+
+DEFAULT_MODEL = "claude-sonnet-4-20250514"
+
+# Token budget of each replayed response
+REPLAY_MAX_TOKENS = 2048
+
+# Cached responses kept across replays (least recently used are evicted)
+CACHE_MAX_ENTRIES = int(os.getenv("REPLAY_CACHE_MAX_ENTRIES", 10000))
+
+Emit = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class ReplayBackend:
+    """A model that answers a user input under a system prompt."""
+
+    name = ""
+
+    def __init__(self, model: Optional[str] = None):
+        self.model = model or DEFAULT_MODEL
+
+    async def complete(self, system_prompt: str, user_input: str) -> str:
+        raise NotImplementedError
+
+
+class StubBackend(ReplayBackend):
+    """Deterministic local backend: the same prompt and input give the same response."""
+
+    name = "stub"
+
+    def __init__(self, model: Optional[str] = None):
+        super().__init__(model or "stub")
+
+    async def complete(self, system_prompt: str, user_input: str) -> str:
+        digest = _digest(self.model, system_prompt, user_input)
+        return f"[{self.model} {digest[:12]}] {user_input}"
+
+
+class AnthropicBackend(ReplayBackend):
+    """Claude via the Messages API (temperature 0, so reruns are comparable)."""
+
+    name = "anthropic"
+
+    def __init__(self, model: Optional[str] = None):
+        super().__init__(model)
+        api_key = os.getenv("ANTHROPIC_API_KEY")
+        if not api_key:
+            raise ValueError("ANTHROPIC_API_KEY not configured")
+
+        # The SDK is imported on first use; it is slow to import
+        from anthropic import AsyncAnthropic
+        self.client = AsyncAnthropic(api_key=api_key)
+
+    async def complete(self, system_prompt: str, user_input: str) -> str:
+        with metrics.upstream("anthropic"):
+            message = await self.client.messages.create(
+                model=self.model,
+                max_tokens=REPLAY_MAX_TOKENS,
+                temperature=0,
+                system=system_prompt,
+                messages=[{"role": "user", "content": user_input}]
+            )
+        return "".join(block.text for block in message.content if block.type == "text")
+
+
+BACKENDS: Dict[str, Callable[[Optional[str]], ReplayBackend]] = {
+    StubBackend.name: StubBackend,
+    AnthropicBackend.name: AnthropicBackend,
+}
+
+
+def get_backend(name: str, model: Optional[str] = None) -> ReplayBackend:
+    """Instantiate a registered backend (ValueError if unknown or not configured)."""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown replay backend '{name}'; expected one of {sorted(BACKENDS)}")
+    return BACKENDS[name](model)
+
+
+def _digest(*parts: str) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        data = part.encode("utf-8")
+        h.update(len(data).to_bytes(8, "little"))
+        h.update(data)
+    return h.hexdigest()
+
+
+class ResponseCache:
+    """Thread-safe LRU of replayed responses, keyed by a digest of the request."""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(backend: ReplayBackend, system_prompt: str, user_input: str) -> str:
+        return _digest(backend.name, backend.model, system_prompt, user_input)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            response = self._entries.get(key)
+            if response is not None:
+                self._entries.move_to_end(key)
+            return response
+
+    def put(self, key: str, response: str) -> None:
+        with self._lock:
+            self._entries[key] = response
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+response_cache = ResponseCache()
+
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart across all workers."""
+
+    def __init__(self, rate: Optional[float]):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            delay = self._next - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next = max(self._next, loop.time()) + self.interval
+
+
+def select_traces(
+    traces: Iterable[Trace],
+    tag_ids: Iterable[str],
+    trace_ids: Optional[Iterable[str]] = None,
+    limit: Optional[int] = None
+) -> List[Trace]:
+    """
+    Traces to replay: failures carrying any of the tags (or the given trace IDs).
+
+    When selecting by tag, each user input is replayed once and later traces
+    with the same input are skipped; explicitly given trace IDs are all kept.
+    """
+    wanted = set(tag_ids)
+    ids = set(trace_ids) if trace_ids is not None else None
+    selected = []
+    seen = set()
+    for trace in traces:
+        if ids is not None:
+            if trace.id not in ids:
+                continue
+        elif trace.pass_fail != "fail" or not wanted.intersection(trace.axial_tags):
+            continue
+        elif trace.user_input in seen:
+            continue
+        seen.add(trace.user_input)
+        selected.append(trace)
+        if limit is not None and len(selected) == limit:
+            break
+    return selected
+
+
+async def replay(
+    traces: List[Trace],
+    system_prompt: str,
+    backend: ReplayBackend,
+    concurrency: int = 4,
+    requests_per_second: Optional[float] = None,
+    cache: Optional[ResponseCache] = response_cache,
+    emit: Optional[Emit] = None
+) -> List[Dict[str, Any]]:
+    """
+    Re-run each trace's user input under system_prompt.
+
+    Returns one result per trace, in input order: trace_id, user_input,
+    baseline_output (the reviewed response), replayed_output, cached,
+    duration_ms and error (None on success). emit, if given, is awaited
+    with each result as soon as it is ready.
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(traces)
+    queue: "asyncio.Queue[Tuple[int, Trace]]" = asyncio.Queue()
+    for item in enumerate(traces):
+        queue.put_nowait(item)
+    limiter = RateLimiter(requests_per_second)
+
+    async def run(trace: Trace) -> Dict[str, Any]:
+        start = time.perf_counter()
+        key = ResponseCache.key(backend, system_prompt, trace.user_input)
+        output = cache.get(key) if cache is not None else None
+        cached = output is not None
+        error = None
+        if not cached:
+            await limiter.wait()
+            try:
+                output = await backend.complete(system_prompt, trace.user_input)
+                if cache is not None:
+                    cache.put(key, output)
+            except Exception as e:
+                error = str(e)
+
+        return {
+            "trace_id": trace.id,
+            "user_input": trace.user_input,
+            "baseline_output": trace.agent_output,
+            "replayed_output": output,
+            "baseline_tags": list(trace.axial_tags),
+            "cached": cached,
+            "duration_ms": (time.perf_counter() - start) * 1000,
+            "error": error
+        }
+
+    async def worker() -> None:
+        while True:
+            try:
+                index, trace = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            results[index] = await run(trace)
+            if emit is not None:
+                await emit(results[index])
+
+    await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, len(traces))))))
+    return results
+
+
+def summarize(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Counts and timing for a replay."""
+    errors = sum(1 for result in results if result["error"] is not None)
+    return {
+        "replayed": len(results),
+        "errors": errors,
+        "cached": sum(1 for result in results if result["cached"]),
+        "changed": sum(
+            1 for result in results
+            if result["error"] is None and result["replayed_output"] != result["baseline_output"]
+        )
+    }
+
+
+def session_traces(
+    results: List[Dict[str, Any]],
+    traces: Dict[str, Trace],
+    system_prompt: str,
+    backend: ReplayBackend,
+    replay_id: Optional[str] = None
+) -> List[Trace]:
+    """
+    Unreviewed traces for a new session, one per successful replay.
+
+    Each holds the replayed response with the original response as an
+    intermediate step (so both can be read side by side while reviewing),
+    and records its source in metadata["replay"].
+    """
+    replay_id = replay_id or uuid.uuid4().hex[:8]
+    now = datetime.now()
+    replayed = []
+    for result in results:
+        if result["error"] is not None:
+            continue
+        source = traces.get(result["trace_id"])
+        metadata = dict(source.metadata) if source else {}
+        metadata["replay"] = {
+            "replay_id": replay_id,
+            "source_trace_id": result["trace_id"],
+            "backend": backend.name,
+            "model": backend.model,
+            "baseline_tags": result["baseline_tags"],
+            "cached": result["cached"],
+            "replayed_at": now.isoformat()
+        }
+        replayed.append(Trace(
+            id=f"{result['trace_id']}-replay-{replay_id}",
+            user_input=result["user_input"],
+            agent_output=result["replayed_output"],
+            system_prompt=system_prompt,
+            intermediate_steps=[
+                TraceStep(
+                    step_type="baseline_output",
+                    content=result["baseline_output"],
+                    metadata={"source_trace_id": result["trace_id"]}
+                )
+            ],
+            metadata=metadata
+        ))
+    return replayed
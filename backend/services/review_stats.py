@@ -0,0 +1,260 @@
+"""Running review statistics per session, fed by annotation events.
+
+The event log passes every applied event to ``apply_event``. Statistics for
+a session are built from the store the first time they are requested, then
+kept current by annotation events at O(1) per event (the trace's previous
+verdict is subtracted and the new one added), so polling them while
+reviewers work costs nothing proportional to the session size. Events that
+change what a session contains (session updates, trace imports and
+deletes, tag deletes and merges) drop the cached statistics, which are
+rebuilt on the next request.
+
+For each session this reports:
+
+- the failure rate overall and per stratum (for sampled sessions), with
+  Wilson intervals and the stratified estimate (see services/sampling.py)
+- per tag, the share of verdicts that are failures carrying the tag
+- a stopping signal: whether the failure rate is known to a target margin
+  (e.g. ±2%), and roughly how many more verdicts that would take
+
+Only pass/fail verdicts count; deferred traces are ignored.
+"""
+
+import math
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+from models import AxialTag, Session, Trace, TraceAnnotation
+from services import sampling
+
+# Default precision at which a session counts as converged (±2 points)
+DEFAULT_TARGET_MARGIN = float(os.getenv("REVIEW_TARGET_MARGIN", 0.02))
+
+# Normal intervals are unreliable below this many verdicts
+MIN_VERDICTS = 30
+
+# Share of the population the reviewed strata must represent to converge
+MIN_COVERAGE = 0.95
+
+# (pass_fail if pass/fail else None, axial tags of a failure, reviewed)
+Verdict = Tuple[Optional[str], Tuple[str, ...], bool]
+
+NO_VERDICT: Verdict = (None, (), False)
+
+
+def _verdict(trace: Union[Trace, TraceAnnotation]) -> Verdict:
+    pass_fail = trace.pass_fail if trace.pass_fail in ("pass", "fail") else None
+    tags = tuple(trace.axial_tags) if pass_fail == "fail" else ()
+    return (pass_fail, tags, trace.reviewed)
+
+
+class SessionStats:
+    """Verdict counts for one session, overall, per stratum and per tag."""
+
+    def __init__(self, session: Session, traces: Dict[str, Trace]):
+        self.session_id = session.id
+        self.state = session.sampling
+        # Forks are updated by their own annotation events only
+        self.fork = session.is_fork
+        self.reviewed = 0
+        self.verdicts: Dict[str, Verdict] = {}
+        self.strata: Dict[str, str] = {}
+        self.sampled: Dict[str, int] = {}
+        self.counts: Dict[str, List[int]] = {}
+        self.tag_failures: Dict[str, int] = {}
+
+        for trace in session.traces:
+            trace = session.annotated(traces.get(trace.id, trace))
+            if trace.id in self.strata:
+                continue
+            label = sampling.stratum_of(trace, self.state) if self.state else sampling.ALL_STRATUM
+            self.strata[trace.id] = label
+            self.sampled[label] = self.sampled.get(label, 0) + 1
+            self.verdicts[trace.id] = NO_VERDICT
+            self.update(trace)
+
+    def update(self, trace: Trace) -> None:
+        """Replace a trace's contribution with its current annotation."""
+        self.set_verdict(trace.id, _verdict(trace))
+
+    def set_verdict(self, trace_id: str, verdict: Verdict) -> None:
+        if trace_id not in self.strata:
+            return
+
+        self._add(trace_id, self.verdicts[trace_id], -1)
+        self._add(trace_id, verdict, 1)
+        self.verdicts[trace_id] = verdict
+
+    def _add(self, trace_id: str, verdict: Verdict, sign: int) -> None:
+        pass_fail, tags, reviewed = verdict
+        self.reviewed += sign * reviewed
+        if pass_fail is None:
+            return
+
+        counts = self.counts.setdefault(self.strata[trace_id], [0, 0])
+        counts[0] += sign
+        counts[1] += sign * (pass_fail == "fail")
+        for tag_id in tags:
+            self.tag_failures[tag_id] = self.tag_failures.get(tag_id, 0) + sign
+
+    def report(
+        self,
+        tags: Dict[str, AxialTag],
+        target_margin: float = DEFAULT_TARGET_MARGIN,
+        z: float = sampling.Z_95
+    ) -> Dict[str, Any]:
+        """Estimates with intervals, per-tag rates and the stopping signal."""
+        total = len(self.strata)
+        populations = self.state.strata if self.state else self.sampled
+        population = self.state.population if self.state else total
+        unbiased = self.state is None or self.state.config.priority != "uncertainty" or self.reviewed == total
+
+        estimates = sampling.estimate(
+            {label: (n, failed) for label, (n, failed) in self.counts.items()},
+            self.sampled,
+            populations,
+            population,
+            unbiased=unbiased,
+            z=z
+        )
+
+        verdicts = estimates["reviewed"]
+        tag_rates = []
+        for tag_id, failures in sorted(self.tag_failures.items(), key=lambda item: (-item[1], item[0])):
+            if failures <= 0:
+                continue
+            low, high = sampling.wilson_interval(failures, verdicts, z)
+            tag = tags.get(tag_id)
+            tag_rates.append({
+                "tag_id": tag_id,
+                "name": tag.name if tag else tag_id,
+                "failures": failures,
+                "rate": failures / verdicts,
+                "ci_low": low,
+                "ci_high": high
+            })
+
+        return {
+            **estimates,
+            "tags": tag_rates,
+            "stopping": stopping_signal(estimates, total - self.reviewed, target_margin, z)
+        }
+
+
+def verdicts_needed(failure_rate: float, population: int, margin: float, z: float = sampling.Z_95) -> int:
+    """Verdicts for a ±margin interval under simple random sampling (finite population corrected)."""
+    n0 = z * z * failure_rate * (1 - failure_rate) / (margin * margin)
+    if population:
+        n0 = n0 / (1 + (n0 - 1) / population)
+        return min(population, max(MIN_VERDICTS, math.ceil(n0)))
+    return max(MIN_VERDICTS, math.ceil(n0))
+
+
+def stopping_signal(
+    estimates: Dict[str, Any],
+    unreviewed: int,
+    target_margin: float,
+    z: float = sampling.Z_95
+) -> Dict[str, Any]:
+    """
+    Whether the failure rate is known to ±target_margin.
+
+    Converged once the stratified interval is within the margin, there are
+    at least MIN_VERDICTS verdicts, and the reviewed strata cover at least
+    MIN_COVERAGE of the population. verdicts_needed is a planning figure from
+    the smoothed failure rate so far; exhausted means the session has no
+    unreviewed traces left without having converged.
+    """
+    n = estimates["reviewed"]
+    overall = estimates["stratified"]
+    margin = overall["margin"] if overall else None
+    converged = (
+        margin is not None
+        and margin <= target_margin
+        and n >= min(MIN_VERDICTS, estimates["population"])
+        and estimates["coverage"] >= MIN_COVERAGE
+    )
+
+    needed = verdicts_needed((estimates["failed"] + 1) / (n + 2), estimates["population"], target_margin, z)
+    return {
+        "target_margin": target_margin,
+        "margin": margin,
+        "converged": converged,
+        "verdicts_needed": needed,
+        "additional_verdicts": 0 if converged else max(0, needed - n),
+        "unreviewed": unreviewed,
+        "exhausted": not converged and unreviewed == 0
+    }
+
+
+_lock = threading.RLock()
+_sessions: Dict[str, SessionStats] = {}
+_trace_sessions: Dict[str, Set[str]] = {}
+
+
+def reset() -> None:
+    """Forget all cached statistics (e.g. after the store was reloaded)."""
+    with _lock:
+        _sessions.clear()
+        _trace_sessions.clear()
+
+
+def _drop(session_id: str) -> None:
+    stats = _sessions.pop(session_id, None)
+    if stats is None:
+        return
+    for trace_id in stats.strata:
+        session_ids = _trace_sessions.get(trace_id)
+        if session_ids is not None:
+            session_ids.discard(session_id)
+            if not session_ids:
+                del _trace_sessions[trace_id]
+
+
+def _drop_traces(trace_ids: Iterable[str]) -> None:
+    session_ids = set()
+    for trace_id in trace_ids:
+        session_ids.update(_trace_sessions.get(trace_id, ()))
+    for session_id in session_ids:
+        _drop(session_id)
+
+
+def apply_event(event: Dict[str, Any], result: Any) -> None:
+    """Update cached statistics for an applied event (called by the event log)."""
+    event_type = event["type"]
+    data = event["data"]
+
+    with _lock:
+        if not _sessions:
+            return
+        if event_type.startswith("annotation."):
+            if data.get("session_id") is not None:
+                stats = _sessions.get(data["session_id"])
+                if stats is not None:
+                    stats.set_verdict(data["trace_id"], _verdict(TraceAnnotation.model_validate(data["state"])))
+            elif result is not None:
+                for session_id in _trace_sessions.get(result.id, ()):
+                    if not _sessions[session_id].fork:
+                        _sessions[session_id].update(result)
+        elif event_type in ("session.create", "session.update"):
+            _drop(result.id)
+        elif event_type in ("session.append", "session.delete"):
+            _drop(data["session_id"])
+        elif event_type == "trace.import":
+            _drop_traces(trace.id for trace in result)
+        elif event_type == "trace.delete":
+            _drop_traces([data["trace_id"]])
+        elif event_type in ("tag.delete", "tag.merge"):
+            _drop_traces(result)
+
+
+def session_stats(session: Session, traces: Dict[str, Trace]) -> SessionStats:
+    """Cached statistics for a session, built from the store if needed."""
+    with _lock:
+        stats = _sessions.get(session.id)
+        if stats is None:
+            stats = SessionStats(session, traces)
+            _sessions[session.id] = stats
+            for trace_id in stats.strata:
+                _trace_sessions.setdefault(trace_id, set()).add(session.id)
+        return stats
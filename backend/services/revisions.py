@@ -0,0 +1,179 @@
+"""Revision counters, strong ETags and a cache of serialized response bodies.
+
+Every event applied by the event log bumps the revision of the entities it
+touched (and of their collections) to the event's sequence number. GET
+endpoints derive a strong ETag from the revisions their body depends on,
+answer ``If-None-Match`` with 304, and reuse the serialized bytes while the
+revisions are unchanged.
+
+Because revisions are event sequence numbers, every process replaying the
+same event log agrees on them. With a persistent log the instance ID is the
+log's ID, so ETags stay valid across workers and restarts.
+"""
+
+import hashlib
+import os
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+from fastapi import Request
+from fastapi.responses import Response
+from services.serialization import dumps
+
+# Identifies the state the revisions refer to. Random per process unless an
+# event log directory provides a stable ID (see set_instance)
+_instance_id = uuid.uuid4().hex
+
+# Revision of anything not bumped since state was loaded from a snapshot
+_base_revision = 0
+_entity_revisions: Dict[Tuple[str, str], int] = {}
+_collection_revisions: Dict[str, int] = {}
+
+MAX_CACHE_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+_body_cache: "OrderedDict[Tuple[Any, ...], Tuple[str, bytes]]" = OrderedDict()
+_cache_bytes = 0
+
+# Suffixes appended to ETags by the compression middleware
+ENCODING_SUFFIXES = ("-gzip", "-br")
+
+
+def set_instance(instance_id: str) -> None:
+    """Tie ETags to a persistent state identity instead of this process."""
+    global _instance_id
+    _instance_id = instance_id
+    clear_cache()
+
+
+def instance_id() -> str:
+    """Identity of the state revisions refer to (changes when they restart)."""
+    return _instance_id
+
+
+def base_revision() -> int:
+    """Revision below which individual changes are no longer known."""
+    return _base_revision
+
+
+def reset(base_revision: int = 0) -> None:
+    """Forget all revisions; everything is at base_revision (e.g. a snapshot's seq)."""
+    global _base_revision
+    _base_revision = base_revision
+    _entity_revisions.clear()
+    _collection_revisions.clear()
+    clear_cache()
+
+
+def bump(kind: str, entity_id: Optional[str], revision: int) -> None:
+    """Record a mutation of one entity (or of the collection as a whole)."""
+    if entity_id is not None:
+        _entity_revisions[(kind, entity_id)] = revision
+    _collection_revisions[kind] = revision
+
+
+def bump_many(kind: str, entity_ids: Iterable[str], revision: int) -> None:
+    """Record a mutation of several entities with a single collection bump."""
+    for entity_id in entity_ids:
+        _entity_revisions[(kind, entity_id)] = revision
+    _collection_revisions[kind] = revision
+
+
+def revision(kind: str, entity_id: Optional[str] = None) -> int:
+    """Current revision of an entity, or of the collection if no ID is given."""
+    if entity_id is None:
+        return _collection_revisions.get(kind, _base_revision)
+    return _entity_revisions.get((kind, entity_id), _base_revision)
+
+
+def make_etag(*parts: Any) -> str:
+    """Build a strong ETag from the parts a representation depends on."""
+    digest = hashlib.blake2b(repr((_instance_id,) + parts).encode(), digest_size=12)
+    return f'"{digest.hexdigest()}"'
+
+
+def match_etag(if_none_match: Optional[str], etag: str) -> Optional[str]:
+    """
+    Check an If-None-Match header against an ETag.
+
+    Encoding suffixes added by the compression middleware are ignored. Returns
+    the matching tag as the client sent it (so a 304 echoes the same
+    validator the client holds), or None if nothing matches.
+    """
+    if not if_none_match:
+        return None
+    if if_none_match.strip() == "*":
+        return etag
+
+    bare = etag.strip('"')
+    for raw in if_none_match.split(","):
+        raw = raw.strip()
+        candidate = raw[2:] if raw.startswith("W/") else raw
+        candidate = candidate.strip('"')
+        for suffix in ENCODING_SUFFIXES:
+            if candidate.endswith(suffix):
+                candidate = candidate[:-len(suffix)]
+                break
+        if candidate == bare:
+            return raw
+    return None
+
+
+def _cache_get(key: Tuple[Any, ...], etag: str) -> Optional[bytes]:
+    entry = _body_cache.get(key)
+    if entry is None or entry[0] != etag:
+        return None
+    _body_cache.move_to_end(key)
+    return entry[1]
+
+
+def _cache_put(key: Tuple[Any, ...], etag: str, body: bytes) -> None:
+    global _cache_bytes
+    if len(body) > MAX_CACHE_BYTES:
+        return
+
+    previous = _body_cache.pop(key, None)
+    if previous is not None:
+        _cache_bytes -= len(previous[1])
+
+    _body_cache[key] = (etag, body)
+    _cache_bytes += len(body)
+
+    while _cache_bytes > MAX_CACHE_BYTES and _body_cache:
+        _, (_, evicted) = _body_cache.popitem(last=False)
+        _cache_bytes -= len(evicted)
+
+
+def clear_cache() -> None:
+    """Drop all cached response bodies."""
+    global _cache_bytes
+    _body_cache.clear()
+    _cache_bytes = 0
+
+
+def conditional_response(
+    request: Request,
+    key: Tuple[Any, ...],
+    version: Tuple[Any, ...],
+    build: Callable[[], Any]
+) -> Response:
+    """
+    Serve a JSON body with a strong ETag, honoring If-None-Match.
+
+    Args:
+        request: Incoming request (for If-None-Match)
+        key: Identifies the representation (endpoint, entity ID, query variant)
+        version: Revisions the representation depends on
+        build: Produces the content to serialize on a cache miss
+    """
+    etag = make_etag(key, version)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    matched = match_etag(request.headers.get("if-none-match"), etag)
+    if matched is not None:
+        return Response(status_code=304, headers={**headers, "ETag": matched})
+
+    body = _cache_get(key, etag)
+    if body is None:
+        body = dumps(build())
+        _cache_put(key, etag, body)
+
+    return Response(content=body, media_type="application/json", headers=headers)
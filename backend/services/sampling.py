@@ -0,0 +1,387 @@
+"""Sampling traces for review and estimating failure rates from the sample.
+
+Samples are drawn with hash-based bottom-k sampling: every trace gets a
+pseudo-random key derived from the session seed and its ID, and a sample of
+size k is the k traces with the smallest keys. That is a reservoir sample
+which does not depend on arrival order, so streaming imports can add batches
+to an existing sample (evicting only traces pushed out by smaller keys), and
+replaying the event log reproduces the same sample.
+
+Stratified samples keep one such reservoir per stratum, a combination of
+metadata values (numeric values are bucketed), with the sample size split
+across the strata seen so far. Reviewed traces are never evicted.
+
+Review order ('balanced' priority) repeatedly picks the stratum whose next
+review most reduces the variance of the stratified failure-rate estimate,
+then the trace with the smallest key in it, so the estimate stays unbiased
+while reviewers see the most informative traces first. 'uncertainty'
+priority also orders traces within a stratum by how close their score is to
+0.5, which reaches borderline cases sooner but biases the estimate toward
+them.
+"""
+
+import bisect
+import hashlib
+import heapq
+import math
+from statistics import NormalDist
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from models import SamplingConfig, SamplingState, Trace
+
+# z for 95% intervals
+Z_95 = 1.959963984540054
+
+# Numeric keys with at most this many distinct values are used as categories
+MAX_CATEGORICAL_NUMBERS = 4
+
+ALL_STRATUM = "all"
+
+
+def sample_key(seed: int, trace_id: str) -> float:
+    """Deterministic pseudo-random key in [0, 1) for a trace."""
+    digest = hashlib.blake2b(f"{seed}:{trace_id}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") / 2 ** 64
+
+
+def metadata_value(trace: Trace, key: str) -> Any:
+    """Look up a (dotted) metadata key, None if missing."""
+    value: Any = trace.metadata
+    for part in key.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and not math.isnan(value)
+
+
+def resolve_buckets(config: SamplingConfig, traces: List[Trace]) -> Dict[str, List[float]]:
+    """Bucket edges per numeric strata key: configured, else quartiles of these traces."""
+    buckets = {key: sorted(edges) for key, edges in config.buckets.items()}
+
+    for key in config.strata:
+        if key in buckets:
+            continue
+        values = sorted(value for value in (metadata_value(t, key) for t in traces) if _is_number(value))
+        if len(set(values)) <= MAX_CATEGORICAL_NUMBERS:
+            continue
+        edges = sorted({values[len(values) * quarter // 4] for quarter in (1, 2, 3)})
+        buckets[key] = [float(edge) for edge in edges]
+
+    return buckets
+
+
+def _label(value: Any, edges: Optional[List[float]]) -> str:
+    if value is None:
+        return "none"
+    if edges and _is_number(value):
+        i = bisect.bisect_right(edges, value)
+        if i == 0:
+            return f"<{edges[0]:g}"
+        if i == len(edges):
+            return f">={edges[-1]:g}"
+        return f"{edges[i - 1]:g}-{edges[i]:g}"
+    return str(value)
+
+
+def stratum_of(trace: Trace, state: SamplingState) -> str:
+    """Stratum label, e.g. 'model_version=v2|latency_ms=500-1000'."""
+    if not state.config.strata:
+        return ALL_STRATUM
+
+    return "|".join(
+        f"{key}={_label(metadata_value(trace, key), state.buckets.get(key))}"
+        for key in state.config.strata
+    )
+
+
+def observe(state: SamplingState, traces: Iterable[Trace]) -> SamplingState:
+    """New state with traces added to the population counts."""
+    strata = dict(state.strata)
+    population = state.population
+    for trace in traces:
+        label = stratum_of(trace, state)
+        strata[label] = strata.get(label, 0) + 1
+        population += 1
+
+    return state.model_copy(update={"population": population, "strata": strata})
+
+
+def allocate(populations: Dict[str, int], size: int, allocation: str) -> Dict[str, int]:
+    """
+    Split a sample size across strata, capped by each stratum's population.
+
+    Every non-empty stratum gets at least one trace when the size allows;
+    the rest is split proportionally to population ('proportional') or
+    evenly ('equal') with largest remainders, and capacity left over by
+    small strata is redistributed to the others.
+    """
+    targets = {label: 0 for label in populations}
+    active = sorted(label for label, n in populations.items() if n > 0)
+    remaining = size
+
+    if remaining >= len(active):
+        for label in active:
+            targets[label] = 1
+        remaining -= len(active)
+        active = [label for label in active if targets[label] < populations[label]]
+
+    while remaining > 0 and active:
+        weights = {label: populations[label] if allocation == "proportional" else 1 for label in active}
+        total = sum(weights.values())
+        shares = {label: remaining * weights[label] / total for label in active}
+        given = {label: int(shares[label]) for label in active}
+        leftover = remaining - sum(given.values())
+        for label in sorted(active, key=lambda label: given[label] - shares[label])[:leftover]:
+            given[label] += 1
+
+        for label in active:
+            give = min(given[label], populations[label] - targets[label])
+            targets[label] += give
+            remaining -= give
+        active = [label for label in active if targets[label] < populations[label]]
+
+    return targets
+
+
+def select(traces: List[Trace], state: SamplingState) -> List[Trace]:
+    """Reviewed traces plus the smallest-key unreviewed traces up to each target (input order kept)."""
+    config = state.config
+    if config.method == "stratified":
+        targets = allocate(state.strata, config.size, config.allocation)
+        group_of = lambda trace: stratum_of(trace, state)
+    else:
+        targets = {ALL_STRATUM: config.size}
+        group_of = lambda trace: ALL_STRATUM
+
+    groups: Dict[str, List[Trace]] = {}
+    for trace in traces:
+        groups.setdefault(group_of(trace), []).append(trace)
+
+    kept = set()
+    for label, group in groups.items():
+        reviewed = [trace for trace in group if trace.reviewed]
+        candidates = sorted(
+            (trace for trace in group if not trace.reviewed),
+            key=lambda trace: sample_key(config.seed, trace.id)
+        )
+        kept.update(id(trace) for trace in reviewed)
+        kept.update(id(trace) for trace in candidates[:max(0, targets.get(label, 0) - len(reviewed))])
+
+    return [trace for trace in traces if id(trace) in kept]
+
+
+def _unique(traces: Iterable[Trace], seen: Optional[set] = None) -> List[Trace]:
+    seen = set() if seen is None else seen
+    unique = []
+    for trace in traces:
+        if trace.id not in seen:
+            seen.add(trace.id)
+            unique.append(trace)
+    return unique
+
+
+def create_sample(traces: List[Trace], config: SamplingConfig) -> Tuple[List[Trace], SamplingState]:
+    """Sample traces for a new session; returns the sample in review order and the state."""
+    traces = _unique(traces)
+    state = SamplingState(config=config, buckets=resolve_buckets(config, traces))
+    state = observe(state, traces)
+
+    sample = select(traces, state)
+    return review_order(sample, state, include_reviewed=True), state
+
+
+def extend_sample(
+    current: List[Trace],
+    incoming: List[Trace],
+    state: SamplingState
+) -> Tuple[List[Trace], SamplingState]:
+    """
+    Add a streaming batch to a sampled session.
+
+    Incoming traces already in the session are ignored; the others count
+    toward the population whether or not they are sampled. Returns the new
+    session trace list (kept traces in their current order, then new ones
+    in review order) and the new state.
+    """
+    incoming = _unique(incoming, {trace.id for trace in current})
+    if not state.buckets and state.population == 0:
+        state = state.model_copy(update={"buckets": resolve_buckets(state.config, incoming)})
+    state = observe(state, incoming)
+
+    sample = select(current + incoming, state)
+    new_ids = {trace.id for trace in incoming}
+    kept = [trace for trace in sample if trace.id not in new_ids]
+    added = review_order([trace for trace in sample if trace.id in new_ids], state, include_reviewed=True)
+    return kept + added, state
+
+
+def uncertainty(trace: Trace, config: SamplingConfig) -> float:
+    """1 at score 0.5, 0 at scores 0 or 1; -1 when the trace has no score."""
+    if config.uncertainty_key:
+        score = metadata_value(trace, config.uncertainty_key)
+    else:
+        scores = trace.metadata.get("scores")
+        values = [value for value in scores.values() if _is_number(value)] if isinstance(scores, dict) else []
+        score = sum(values) / len(values) if values else None
+
+    if not _is_number(score):
+        return -1.0
+    return 1 - abs(2 * min(max(float(score), 0.0), 1.0) - 1)
+
+
+def _variance_gain(weight: float, reviewed: int, failed: int) -> float:
+    """Drop in W^2 p (1 - p) / n from one more review (p smoothed, n shifted to allow n = 0)."""
+    p = (failed + 1) / (reviewed + 2)
+    return weight ** 2 * p * (1 - p) * (1 / (reviewed + 1) - 1 / (reviewed + 2))
+
+
+def review_order(traces: List[Trace], state: SamplingState, include_reviewed: bool = False) -> List[Trace]:
+    """Unreviewed traces in priority order (reviewed ones first if include_reviewed)."""
+    config = state.config
+    reviewed = [trace for trace in traces if trace.reviewed]
+    pending = [trace for trace in traces if not trace.reviewed]
+    head = reviewed if include_reviewed else []
+
+    def key(trace: Trace) -> float:
+        return sample_key(config.seed, trace.id)
+
+    if config.priority == "random":
+        return head + sorted(pending, key=key)
+
+    groups: Dict[str, List[Trace]] = {}
+    for trace in pending:
+        groups.setdefault(stratum_of(trace, state), []).append(trace)
+    for group in groups.values():
+        if config.priority == "uncertainty":
+            group.sort(key=lambda trace: (-uncertainty(trace, config), key(trace)))
+        else:
+            group.sort(key=key)
+
+    counts = _review_counts(reviewed, state)
+    population = state.population or len(traces)
+    heap = []
+    for label in groups:
+        n, failed = counts.get(label, (0, 0))
+        weight = state.strata.get(label, len(groups[label])) / population
+        heapq.heappush(heap, (-_variance_gain(weight, n, failed), label, n, failed, weight))
+
+    ordered = []
+    position = {label: 0 for label in groups}
+    while heap:
+        _, label, n, failed, weight = heapq.heappop(heap)
+        ordered.append(groups[label][position[label]])
+        position[label] += 1
+        if position[label] < len(groups[label]):
+            # Assume the next review fails at the current smoothed rate
+            heapq.heappush(heap, (-_variance_gain(weight, n + 1, failed), label, n + 1, failed, weight))
+
+    return head + ordered
+
+
+def _review_counts(traces: Iterable[Trace], state: SamplingState) -> Dict[str, Tuple[int, int]]:
+    """(pass/fail verdicts, fails) per stratum; deferred traces don't count."""
+    counts: Dict[str, Tuple[int, int]] = {}
+    for trace in traces:
+        if trace.pass_fail not in ("pass", "fail"):
+            continue
+        label = stratum_of(trace, state)
+        n, failed = counts.get(label, (0, 0))
+        counts[label] = (n + 1, failed + (trace.pass_fail == "fail"))
+    return counts
+
+
+def z_score(confidence: float) -> float:
+    """Two-sided normal quantile for a confidence level (1.96 for 0.95)."""
+    return NormalDist().inv_cdf((1 + confidence) / 2)
+
+
+def wilson_interval(successes: int, n: int, z: float = Z_95) -> Tuple[float, float]:
+    """Wilson score interval for a binomial proportion ((0, 1) when n is 0)."""
+    if n == 0:
+        return (0.0, 1.0)
+
+    p = successes / n
+    denominator = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / denominator
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    return (max(0.0, center - half), min(1.0, center + half))
+
+
+def estimate(
+    counts: Dict[str, Tuple[int, int]],
+    sampled: Dict[str, int],
+    populations: Dict[str, int],
+    population: int,
+    unbiased: bool = True,
+    z: float = Z_95
+) -> Dict[str, Any]:
+    """
+    Failure-rate estimates from (verdicts, fails) per stratum.
+
+    Per stratum: Wilson interval of the stratum's failure rate. Overall: the
+    stratified estimate sum(W_h * p_h) over strata with reviews, with a
+    normal interval from sum(W_h^2 * p_h (1 - p_h) / n_h * fpc_h) (p_h
+    smoothed as (f + 1) / (n + 2) so unanimous strata still contribute
+    variance), plus a plain Wilson interval over all reviews. Weights are
+    population shares renormalised over the covered strata; 'coverage' is
+    the share of the population those strata represent.
+    """
+    strata = []
+    for label in sorted(set(populations) | set(sampled)):
+        n, failed = counts.get(label, (0, 0))
+        low, high = wilson_interval(failed, n, z)
+        strata.append({
+            "stratum": label,
+            "population": populations.get(label, sampled.get(label, 0)),
+            "sampled": sampled.get(label, 0),
+            "reviewed": n,
+            "failed": failed,
+            "failure_rate": failed / n if n else None,
+            "ci_low": low,
+            "ci_high": high
+        })
+
+    covered = [stratum for stratum in strata if stratum["reviewed"]]
+    covered_population = sum(stratum["population"] for stratum in covered)
+    total_reviewed = sum(stratum["reviewed"] for stratum in strata)
+    total_failed = sum(stratum["failed"] for stratum in strata)
+
+    stratified = None
+    if covered_population:
+        rate = 0.0
+        variance = 0.0
+        for stratum in covered:
+            weight = stratum["population"] / covered_population
+            n, big_n = stratum["reviewed"], stratum["population"]
+            p = (stratum["failed"] + 1) / (n + 2)
+            fpc = (big_n - n) / (big_n - 1) if big_n > 1 else 0.0
+            rate += weight * stratum["failed"] / n
+            variance += weight ** 2 * p * (1 - p) / n * max(fpc, 0.0)
+        margin = z * math.sqrt(variance)
+        stratified = {
+            "failure_rate": rate,
+            "ci_low": max(0.0, rate - margin),
+            "ci_high": min(1.0, rate + margin),
+            "margin": margin
+        }
+
+    low, high = wilson_interval(total_failed, total_reviewed, z)
+    return {
+        "population": population,
+        "sampled": sum(sampled.values()),
+        "reviewed": total_reviewed,
+        "failed": total_failed,
+        "coverage": covered_population / population if population else 0.0,
+        "unbiased": unbiased,
+        "confidence": round(math.erf(z / math.sqrt(2)), 4),
+        "stratified": stratified,
+        "pooled": {
+            "failure_rate": total_failed / total_reviewed if total_reviewed else None,
+            "ci_low": low,
+            "ci_high": high
+        },
+        "strata": strata
+    }
@@ -0,0 +1,34 @@
+"""Fast-path JSON serialization for API responses.
+
+FastAPI's default path converts models to dicts with ``jsonable_encoder`` and
+then runs ``json.dumps`` over the result. ``pydantic_core.to_json`` serializes
+models (and dicts/lists containing them) straight to bytes in Rust, skipping
+the intermediate dict round-trip.
+"""
+
+from typing import Any, Dict, Optional
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+from services import metrics
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize content (models, dicts, lists, datetimes) to JSON bytes."""
+    with metrics.span("serialize"):
+        return to_json(content)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse that renders with pydantic-core instead of json.dumps."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def json_response(
+    content: Any,
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None
+) -> FastJSONResponse:
+    """Build a FastJSONResponse, bypassing FastAPI's jsonable_encoder."""
+    return FastJSONResponse(content=content, status_code=status_code, headers=headers)
@@ -0,0 +1,382 @@
+"""Memory-mappable binary session format (``.evsession``).
+
+A session file holds a session's metadata (including its tag definitions)
+and its traces in an offset-indexed, column-oriented layout that is read through
+``mmap`` without parsing:
+
+- every trace is stored as its JSON document; ``trace_offsets`` locates
+  trace ``i`` at ``trace_data[offsets[i]:offsets[i + 1]]``, so one trace (or
+  a page of traces) is a zero-copy slice of the file
+- review state is stored as columns (``reviewed``, ``pass_fail``,
+  ``reviewed_at``, and string columns for reviewer IDs, open codes, tags and
+  ISO ``reviewed_at`` values), so counts and filters never touch trace bodies;
+  string columns mark which values are present, so "" and None differ
+- a sorted 64-bit hash index maps trace IDs to positions (binary search)
+
+Opening a file reads only the 64-byte header and a small JSON table of
+contents, so it takes the same time for ten traces or a million.
+
+Layout (little-endian)::
+
+    header   magic(8) version(u32) reserved(u32) count(u64) toc_offset(u64) toc_length(u64) padding
+    sections 8-byte aligned arrays and blobs, in any order
+    toc      JSON: session metadata and {section: [offset, length, typecode]}
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from pydantic_core import to_json
+from models import AxialTag, Session, Trace
+
+MAGIC = b"EVSESS\x00\x01"
+VERSION = 1
+FILE_EXTENSION = ".evsession"
+
+_HEADER = struct.Struct("<8sIIQQQ")
+HEADER_SIZE = 64
+
+PASS_FAIL_CODES = {None: 0, "pass": 1, "fail": 2, "defer": 3}
+PASS_FAIL_VALUES = {code: value for value, code in PASS_FAIL_CODES.items()}
+
+# Separates tag IDs in the axial_tags string column
+_TAG_SEPARATOR = "\x1f"
+
+
+class SessionFileError(ValueError):
+    """Raised for files that are not valid session files."""
+
+
+def _id_hash(trace_id: str) -> int:
+    return int.from_bytes(hashlib.blake2b(trace_id.encode(), digest_size=8).digest(), "little")
+
+
+def _native(values: array) -> array:
+    """Arrays are stored little-endian."""
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+
+class _StringColumn:
+    """Offsets + concatenated UTF-8 data + presence flags, built incrementally."""
+
+    def __init__(self):
+        self.offsets = array("Q", [0])
+        self.data = bytearray()
+        self.present = array("B")
+
+    def append(self, value: Optional[str]) -> None:
+        if value:
+            self.data += value.encode()
+        self.offsets.append(len(self.data))
+        self.present.append(0 if value is None else 1)
+
+
+class _Writer:
+    """Writes aligned sections and records them in the table of contents."""
+
+    def __init__(self, f):
+        self.f = f
+        self.sections: Dict[str, Tuple[int, int, str]] = {}
+
+    def _align(self) -> int:
+        position = self.f.tell()
+        padding = -position % 8
+        if padding:
+            self.f.write(b"\0" * padding)
+        return position + padding
+
+    def begin(self, name: str, typecode: str = "B") -> int:
+        offset = self._align()
+        self.sections[name] = (offset, 0, typecode)
+        return offset
+
+    def end(self, name: str) -> None:
+        offset, _, typecode = self.sections[name]
+        self.sections[name] = (offset, self.f.tell() - offset, typecode)
+
+    def write_section(self, name: str, data, typecode: str = "B") -> None:
+        self.begin(name, typecode)
+        if isinstance(data, array):
+            data = _native(data).tobytes()
+        self.f.write(data)
+        self.end(name)
+
+    def write_strings(self, name: str, column: _StringColumn) -> None:
+        self.write_section(f"{name}_offsets", column.offsets, "Q")
+        self.write_section(f"{name}_data", bytes(column.data))
+        self.write_section(f"{name}_present", column.present, "B")
+
+
+def write_session_file(path: str, session: Session) -> int:
+    """
+    Write a session to ``path`` (atomically, via a temporary file).
+
+    Trace bodies are streamed to disk as they are serialized; only the small
+    per-trace columns are held in memory. Returns the file size in bytes.
+    """
+    traces = session.traces
+    count = len(traces)
+
+    trace_offsets = array("Q", [0])
+    ids = _StringColumn()
+    reviewers = _StringColumn()
+    open_codes = _StringColumn()
+    axial_tags = _StringColumn()
+    reviewed = array("B")
+    pass_fail = array("B")
+    reviewed_at = array("d")
+    reviewed_at_iso = _StringColumn()
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(b"\0" * HEADER_SIZE)
+        writer = _Writer(f)
+
+        writer.begin("trace_data")
+        position = 0
+        for trace in traces:
+            body = to_json(trace)
+            f.write(body)
+            position += len(body)
+            trace_offsets.append(position)
+
+            ids.append(trace.id)
+            reviewers.append(trace.reviewer_id)
+            open_codes.append(trace.open_code)
+            axial_tags.append(_TAG_SEPARATOR.join(trace.axial_tags))
+            reviewed.append(1 if trace.reviewed else 0)
+            pass_fail.append(PASS_FAIL_CODES.get(trace.pass_fail, 0))
+            reviewed_at.append(trace.reviewed_at.timestamp() if trace.reviewed_at else float("nan"))
+            reviewed_at_iso.append(trace.reviewed_at.isoformat() if trace.reviewed_at else None)
+        writer.end("trace_data")
+
+        writer.write_section("trace_offsets", trace_offsets, "Q")
+        writer.write_strings("id", ids)
+        writer.write_strings("reviewer_id", reviewers)
+        writer.write_strings("open_code", open_codes)
+        writer.write_strings("axial_tags", axial_tags)
+        writer.write_section("reviewed", reviewed, "B")
+        writer.write_section("pass_fail", pass_fail, "B")
+        writer.write_section("reviewed_at", reviewed_at, "d")
+        writer.write_strings("reviewed_at_iso", reviewed_at_iso)
+
+        # Sorted (hash, position) pairs for ID lookups
+        order = sorted(range(count), key=lambda i: _id_hash(traces[i].id))
+        writer.write_section("id_hash", array("Q", (_id_hash(traces[i].id) for i in order)), "Q")
+        writer.write_section("id_position", array("I", order), "I")
+
+        toc = to_json({
+            "session": session.model_dump(exclude={"traces"}),
+            "sections": writer.sections,
+        })
+        toc_offset = writer._align()
+        f.write(toc)
+
+        f.seek(0)
+        f.write(_HEADER.pack(MAGIC, VERSION, 0, count, toc_offset, len(toc)))
+        f.flush()
+        os.fsync(f.fileno())
+        size = f.seek(0, os.SEEK_END)
+
+    os.replace(tmp_path, path)
+    return size
+
+
+class SessionFile:
+    """
+    Read-only, memory-mapped view of a session file.
+
+    Columns are exposed as typed memoryviews over the mapping; nothing is
+    copied or parsed until a trace is requested.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise SessionFileError(f"{os.path.basename(path)} is empty")
+        self._view = memoryview(self._mmap)
+
+        if len(self._mmap) < HEADER_SIZE:
+            self.close()
+            raise SessionFileError(f"{os.path.basename(path)} is too short to be a session file")
+        magic, version, _, count, toc_offset, toc_length = _HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self.close()
+            raise SessionFileError(f"{os.path.basename(path)} is not a session file")
+        if version != VERSION:
+            self.close()
+            raise SessionFileError(f"Unsupported session file version {version}")
+        if sys.byteorder != "little":
+            self.close()
+            raise SessionFileError("Session files can only be memory-mapped on little-endian hosts")
+
+        self.count = count
+        self._columns: Dict[str, memoryview] = {}
+        try:
+            toc = json.loads(self._mmap[toc_offset:toc_offset + toc_length])
+            self.session_meta: Dict[str, Any] = toc["session"]
+            self._sections = toc["sections"]
+            if not isinstance(self.session_meta, dict) or not isinstance(self._sections, dict):
+                raise SessionFileError("Malformed table of contents")
+
+            self.trace_offsets = self._column("trace_offsets")
+            self.trace_data = self._column("trace_data")
+            self.reviewed = self._column("reviewed")
+            self.pass_fail = self._column("pass_fail")
+            self.reviewed_at = self._column("reviewed_at")
+            self._id_hash = self._column("id_hash")
+            self._id_position = self._column("id_position")
+        except SessionFileError:
+            self.close()
+            raise
+        except (ValueError, KeyError, TypeError) as e:
+            self.close()
+            raise SessionFileError(f"Malformed table of contents: {e!r}")
+
+    def __enter__(self) -> "SessionFile":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self) -> None:
+        """
+        Release the mapping.
+
+        If views handed out by trace_json are still alive, the mapping is
+        unmapped once the last of them is garbage collected instead.
+        """
+        for view in getattr(self, "_columns", {}).values():
+            view.release()
+        self._columns = {}
+        if getattr(self, "_view", None) is not None:
+            self._view.release()
+            self._view = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass
+        self._file.close()
+
+    def _column(self, name: str) -> memoryview:
+        view = self._columns.get(name)
+        if view is None:
+            try:
+                offset, length, typecode = self._sections[name]
+                if not 0 <= offset <= offset + length <= len(self._view):
+                    raise ValueError(f"[{offset}, {offset + length}) is outside the file")
+                view = self._view[offset:offset + length]
+                if typecode != "B":
+                    view = view.cast(typecode)
+            except (ValueError, KeyError, TypeError) as e:
+                raise SessionFileError(f"Malformed section {name}: {e!r}")
+            self._columns[name] = view
+        return view
+
+    def _string(self, name: str, i: int) -> Optional[str]:
+        offsets = self._column(f"{name}_offsets")
+        data = self._column(f"{name}_data")
+        start, end = offsets[i], offsets[i + 1]
+        if end > start:
+            return bytes(data[start:end]).decode()
+        # Files written before presence flags read every empty value as None
+        if f"{name}_present" in self._sections and self._column(f"{name}_present")[i]:
+            return ""
+        return None
+
+    # Traces
+
+    def trace_json(self, i: int) -> memoryview:
+        """Trace ``i`` as JSON, as a zero-copy view into the file."""
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        return self.trace_data[self.trace_offsets[i]:self.trace_offsets[i + 1]]
+
+    def trace(self, i: int) -> Trace:
+        """Trace ``i``, parsed (copies only this trace's bytes)."""
+        return Trace.model_validate_json(bytes(self.trace_json(i)))
+
+    def trace_id(self, i: int) -> str:
+        return self._string("id", i)
+
+    def find(self, trace_id: str) -> Optional[int]:
+        """Position of a trace by ID (binary search on the hash index)."""
+        target = _id_hash(trace_id)
+        k = bisect_left(self._id_hash, target)
+        while k < self.count and self._id_hash[k] == target:
+            position = self._id_position[k]
+            if self.trace_id(position) == trace_id:
+                return position
+            k += 1
+        return None
+
+    def page_json(self, offset: int, limit: int) -> bytes:
+        """A JSON array of traces [offset, offset + limit), without parsing them."""
+        stop = min(self.count, offset + limit)
+        return b"[" + b",".join(self.trace_json(i) for i in range(offset, stop)) + b"]"
+
+    def iter_traces(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Trace]:
+        for i in range(start, self.count if stop is None else min(stop, self.count)):
+            yield self.trace(i)
+
+    # Review state (columns only)
+
+    def review(self, i: int) -> Dict[str, Any]:
+        """Review fields of trace ``i`` from the columns."""
+        if "reviewed_at_iso_offsets" in self._sections:
+            value = self._string("reviewed_at_iso", i)
+            reviewed_at = datetime.fromisoformat(value) if value is not None else None
+        else:
+            # Older files only have the timestamp column
+            timestamp = self.reviewed_at[i]
+            reviewed_at = None if timestamp != timestamp else datetime.fromtimestamp(timestamp)
+        tags = self._string("axial_tags", i)
+        return {
+            "id": self.trace_id(i),
+            "reviewed": bool(self.reviewed[i]),
+            "pass_fail": PASS_FAIL_VALUES.get(self.pass_fail[i]),
+            "open_code": self._string("open_code", i),
+            "axial_tags": tags.split(_TAG_SEPARATOR) if tags else [],
+            "reviewer_id": self._string("reviewer_id", i),
+            "reviewed_at": reviewed_at,
+        }
+
+    def counts(self) -> Dict[str, int]:
+        """Review counts, computed from the columns."""
+        pass_fail = self.pass_fail.tobytes()
+        return {
+            "total_traces": self.count,
+            "reviewed_count": self.reviewed.tobytes().count(1),
+            "passed_count": pass_fail.count(PASS_FAIL_CODES["pass"]),
+            "failed_count": pass_fail.count(PASS_FAIL_CODES["fail"]),
+            "deferred_count": pass_fail.count(PASS_FAIL_CODES["defer"]),
+        }
+
+    # Full load
+
+    def to_session(self) -> Session:
+        """Parse the whole file back into a Session (for importing)."""
+        return Session.model_validate({**self.session_meta, "traces": []}).model_copy(
+            update={"traces": list(self.iter_traces())}
+        )
+
+    def axial_tags(self) -> List[AxialTag]:
+        """The session's tag definitions."""
+        return [AxialTag.model_validate(tag) for tag in self.session_meta.get("axial_tags", [])]
@@ -0,0 +1,365 @@
+"""Step and trace latency/token distributions, split by verdict and axial tag.
+
+Every measurement is added to DDSketch quantile sketches: values fall into
+logarithmic buckets whose width is a fixed fraction of their value, so any
+quantile is returned within RELATIVE_ACCURACY of the true value whatever
+the distribution, with a few hundred buckets covering microseconds to
+hours. Sketches merge by adding bucket counts, and a value is removed by
+decrementing its bucket, which is what lets the statistics follow
+annotations without a rebuild.
+
+Measurements, per trace:
+
+- per intermediate step: latency (``latency_ms`` or ``duration_ms`` in step
+  metadata, else the gap to the next step's timestamp) and tokens
+  (``token_count``, ``tokens``, ``total_tokens`` or ``usage`` in step
+  metadata), grouped by step_type and, for steps naming a tool (``tool``,
+  ``tool_name`` or ``name`` in metadata), by tool
+- per trace: ``latency_ms`` and ``token_count`` from trace metadata
+
+Each is added to the sketches of its group for every cohort the trace is
+in: ``all``, its verdict (``pass``, ``fail``, ``defer`` or ``unreviewed``)
+and ``tag:<id>`` for each axial tag of a failure. Annotation, tag and
+import events move a trace between cohorts in O(its steps); asking which
+tools are slow in failing traces then reads a few sketches.
+"""
+
+import math
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from models import Trace
+
+RELATIVE_ACCURACY = 0.01
+
+MEASURES = ("latency_ms", "tokens")
+GROUPINGS = ("step_type", "tool", "trace")
+VERDICT_COHORTS = ("pass", "fail", "defer", "unreviewed")
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+
+_LATENCY_KEYS = ("latency_ms", "duration_ms")
+_TOKEN_KEYS = ("token_count", "tokens", "total_tokens")
+_TOOL_KEYS = ("tool", "tool_name", "name")
+
+# (grouping, group, measure, value)
+Measurement = Tuple[str, str, str, float]
+
+
+class DDSketch:
+    """Quantile sketch with relative-error guarantees (Masson et al., 2019)."""
+
+    def __init__(self, relative_accuracy: float = RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+
+    def _key(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, key: int) -> float:
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def add(self, value: float, weight: int = 1) -> None:
+        """Add a non-negative value (a negative weight removes it again)."""
+        self.add_to_bin(self._key(value) if value > 0 else None, value, weight)
+
+    def add_to_bin(self, key: Optional[int], value: float, weight: int = 1) -> None:
+        """add() with the bin already computed (None for zero), for sketches sharing an accuracy."""
+        if key is None:
+            self.zero_count += weight
+        else:
+            bins = self.bins
+            count = bins.get(key, 0) + weight
+            if count:
+                bins[key] = count
+            else:
+                del bins[key]
+        self.count += weight
+        self.sum += weight * value
+
+    def remove(self, value: float) -> None:
+        self.add(value, -1)
+
+    def merge(self, other: "DDSketch") -> None:
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+
+    def quantile(self, q: float) -> Optional[float]:
+        if self.count <= 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen > rank:
+                return self._value(key)
+        return self._value(max(self.bins))
+
+    def summary(self, quantiles: Sequence[float] = DEFAULT_QUANTILES) -> Dict[str, Any]:
+        if self.count <= 0:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean": self.sum / self.count,
+            "min": 0.0 if self.zero_count else self._value(min(self.bins)),
+            "max": self._value(max(self.bins)) if self.bins else 0.0,
+            "quantiles": {f"p{_percent(q)}": self.quantile(q) for q in quantiles}
+        }
+
+
+def _percent(q: float) -> str:
+    return f"{q * 100:g}"
+
+
+def _number(value: Any) -> Optional[float]:
+    """A finite, non-negative number as float (bools, NaN and strings are not numbers)."""
+    kind = type(value)
+    if (kind is int or kind is float) and 0 <= value < math.inf:
+        return float(value)
+    return None
+
+
+def _first_number(metadata: Dict[str, Any], keys: Sequence[str]) -> Optional[float]:
+    for key in keys:
+        if key in metadata:
+            value = _number(metadata[key])
+            if value is not None:
+                return value
+    return None
+
+
+def _step_tokens(metadata: Dict[str, Any]) -> Optional[float]:
+    tokens = _first_number(metadata, _TOKEN_KEYS)
+    if tokens is None and isinstance(metadata.get("usage"), dict):
+        usage = metadata["usage"]
+        tokens = _first_number(usage, _TOKEN_KEYS)
+        if tokens is None:
+            parts = [_number(usage.get(key)) for key in ("input_tokens", "output_tokens")]
+            if any(part is not None for part in parts):
+                tokens = sum(part or 0.0 for part in parts)
+    return tokens
+
+
+def _elapsed_ms(start: Optional[datetime], end: Optional[datetime]) -> Optional[float]:
+    if start is None or end is None:
+        return None
+    try:
+        return _number((end - start).total_seconds() * 1000)
+    except TypeError:
+        # Naive and aware timestamps in one trace
+        return None
+
+
+def measurements(trace: Trace) -> List[Measurement]:
+    """Every (grouping, group, measure, value) a trace contributes."""
+    found: List[Measurement] = []
+    metadata = trace.metadata or {}
+    for measure, key in (("latency_ms", "latency_ms"), ("tokens", "token_count")):
+        value = _number(metadata.get(key))
+        if value is not None:
+            found.append(("trace", "trace", measure, value))
+
+    steps = trace.intermediate_steps
+    for i, step in enumerate(steps):
+        step_metadata = step.metadata or {}
+        latency = _first_number(step_metadata, _LATENCY_KEYS)
+        if latency is None and i + 1 < len(steps):
+            latency = _elapsed_ms(step.timestamp, steps[i + 1].timestamp)
+        tokens = _step_tokens(step_metadata)
+
+        tool = None
+        for key in _TOOL_KEYS:
+            if isinstance(step_metadata.get(key), str):
+                tool = step_metadata[key]
+                break
+
+        for measure, value in (("latency_ms", latency), ("tokens", tokens)):
+            if value is None:
+                continue
+            found.append(("step_type", step.step_type, measure, value))
+            if tool is not None:
+                found.append(("tool", tool, measure, value))
+    return found
+
+
+def cohorts(trace: Trace) -> Tuple[str, ...]:
+    """Cohorts a trace's measurements count towards."""
+    verdict = trace.pass_fail if trace.pass_fail in ("pass", "fail", "defer") else "unreviewed"
+    tags = tuple(f"tag:{tag_id}" for tag_id in dict.fromkeys(trace.axial_tags)) if verdict == "fail" else ()
+    return ("all", verdict) + tags
+
+
+class StepAnalytics:
+    """Sketches per cohort, grouping, group and measure, kept per trace."""
+
+    def __init__(self, traces: Iterable[Trace] = (), relative_accuracy: float = RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.sketches: Dict[Tuple[str, str, str, str], DDSketch] = {}
+        # Per trace: the object measured (steps never change in place) and its cohorts
+        self._traces: Dict[str, Tuple[Trace, Tuple[str, ...]]] = {}
+        for trace in traces:
+            self.add(trace)
+
+    def __len__(self) -> int:
+        return len(self._traces)
+
+    def _apply(self, trace: Trace, trace_cohorts: Iterable[str], weight: int) -> None:
+        found = measurements(trace)
+        if not found:
+            return
+
+        # Every sketch has the same accuracy, so each value's bin is computed once
+        log_gamma = math.log((1 + self.relative_accuracy) / (1 - self.relative_accuracy))
+        binned = [
+            (grouping, group, measure, value, math.ceil(math.log(value) / log_gamma) if value > 0 else None)
+            for grouping, group, measure, value in found
+        ]
+        sketches = self.sketches
+        for cohort in trace_cohorts:
+            for grouping, group, measure, value, key in binned:
+                sketch_key = (cohort, grouping, group, measure)
+                sketch = sketches.get(sketch_key)
+                if sketch is None:
+                    sketch = sketches[sketch_key] = DDSketch(self.relative_accuracy)
+                sketch.add_to_bin(key, value, weight)
+                if sketch.count <= 0:
+                    del sketches[sketch_key]
+
+    def add(self, trace: Trace) -> None:
+        """Add a trace, or bring a known one up to date."""
+        known = self._traces.get(trace.id)
+        trace_cohorts = cohorts(trace)
+        if known is None:
+            self._apply(trace, trace_cohorts, 1)
+        elif known[0] is not trace:
+            # Replaced (re-imported): its steps may differ
+            self._apply(known[0], known[1], -1)
+            self._apply(trace, trace_cohorts, 1)
+        elif known[1] != trace_cohorts:
+            # Re-annotated: move its measurements between cohorts
+            old, new = set(known[1]), set(trace_cohorts)
+            self._apply(trace, old - new, -1)
+            self._apply(trace, new - old, 1)
+        self._traces[trace.id] = (trace, trace_cohorts)
+
+    def refresh(self, trace_id: str) -> None:
+        """Re-read the cohorts of a trace that was changed in place."""
+        known = self._traces.get(trace_id)
+        if known is not None:
+            self.add(known[0])
+
+    def remove(self, trace_id: str) -> None:
+        known = self._traces.pop(trace_id, None)
+        if known is not None:
+            self._apply(known[0], known[1], -1)
+
+    def groups(self, grouping: str) -> List[str]:
+        return sorted({group for (cohort, g, group, _) in self.sketches if cohort == "all" and g == grouping})
+
+    def sketch(self, cohort: str, grouping: str, group: str, measure: str) -> Optional[DDSketch]:
+        return self.sketches.get((cohort, grouping, group, measure))
+
+    def report(
+        self,
+        grouping: str,
+        measure: str,
+        cohort_names: Sequence[str],
+        quantiles: Sequence[float] = DEFAULT_QUANTILES,
+        compare: Tuple[str, str] = ("fail", "pass"),
+        compare_quantile: float = 0.9,
+        min_count: int = 1
+    ) -> List[Dict[str, Any]]:
+        """
+        One row per group: a summary per cohort, and how much slower (or
+        larger) compare[0] is than compare[1] at compare_quantile.
+        Sorted by that ratio, highest first.
+        """
+        rows = []
+        for group in self.groups(grouping):
+            overall = self.sketch("all", grouping, group, measure)
+            if overall is None or overall.count < min_count:
+                continue
+            summaries = {}
+            for cohort in cohort_names:
+                sketch = self.sketch(cohort, grouping, group, measure)
+                summaries[cohort] = sketch.summary(quantiles) if sketch else {"count": 0}
+
+            ratio = None
+            target, baseline = (self.sketch(name, grouping, group, measure) for name in compare)
+            if target is not None and baseline is not None:
+                target_value = target.quantile(compare_quantile)
+                baseline_value = baseline.quantile(compare_quantile)
+                if baseline_value:
+                    ratio = target_value / baseline_value
+
+            rows.append({
+                "group": group,
+                "count": overall.count,
+                "cohorts": summaries,
+                "ratio": ratio
+            })
+
+        rows.sort(key=lambda row: (row["ratio"] is None, -(row["ratio"] or 0), row["group"]))
+        return rows
+
+
+_lock = threading.RLock()
+_analytics: Optional[StepAnalytics] = None
+
+
+def reset() -> None:
+    """Drop the statistics (rebuilt from the store on the next request)."""
+    global _analytics
+    with _lock:
+        _analytics = None
+
+
+def apply_event(event: Dict[str, Any], result: Any) -> None:
+    """Keep the statistics current for an applied event (called by the event log)."""
+    event_type = event["type"]
+    data = event["data"]
+
+    with _lock:
+        if _analytics is None:
+            return
+        if event_type.startswith("annotation."):
+            if result is not None:
+                _analytics.add(result)
+        elif event_type in ("session.create", "session.update"):
+            # Forks add no traces to the store
+            if result.is_fork:
+                return
+            for trace in result.traces:
+                _analytics.add(trace)
+        elif event_type == "trace.import":
+            for trace in result:
+                _analytics.add(trace)
+        elif event_type == "trace.delete":
+            _analytics.remove(data["trace_id"])
+        elif event_type in ("tag.delete", "tag.merge"):
+            for trace_id in result:
+                _analytics.refresh(trace_id)
+
+
+def analytics_for(traces: Dict[str, Trace]) -> StepAnalytics:
+    """The live statistics, built from the store if needed."""
+    global _analytics
+    with _lock:
+        if _analytics is None:
+            _analytics = StepAnalytics(traces.values())
+        return _analytics
+
+
+def report(traces: Dict[str, Trace], grouping: str, measure: str, cohort_names: Sequence[str], **options) -> List[Dict[str, Any]]:
+    """StepAnalytics.report on the live statistics."""
+    with _lock:
+        return analytics_for(traces).report(grouping, measure, cohort_names, **options)
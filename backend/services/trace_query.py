@@ -0,0 +1,807 @@
+"""Trace query language, compiled to bitmap index lookups.
+
+Queries combine field terms with AND, OR, NOT and parentheses; juxtaposed
+terms are ANDed and a leading ``-`` negates a term::
+
+    tag:"Tone Mismatch" AND (reviewer:alice OR NOT reviewed:true)
+    pass_fail:fail reviewed_at:2024-01-01..2024-01-31 latency_ms:>2000
+    score.factuality:<0.5 -model_version:gpt-4o "refund policy"
+
+Fields:
+
+- ``reviewed`` (true/false), ``pass_fail`` / ``verdict`` (pass, fail,
+  defer, none), ``tag`` (ID or name), ``reviewer`` (ID or none),
+  ``model_version``, ``id``
+- ``reviewed_at``, ``latency_ms``, ``token_count`` and ``score.<name>``
+  (Braintrust scores in metadata["scores"]): a value, ``>``, ``>=``, ``<``,
+  ``<=`` or a range ``a..b`` (inclusive; a date covers the whole day)
+- ``metadata.<dotted.key>``: equality or comparison on any metadata value
+- ``text`` (input, output and open code), ``input``, ``output``,
+  ``open_code``: case-insensitive substring; a bare word or quoted phrase
+  searches ``text``
+
+Each trace has a row number, and the index keeps a bitmap (a Python int,
+bit i = row i) per indexed value of reviewed, pass_fail, tag, reviewer and
+model_version, plus a sorted (value, row) list per numeric field. The
+planner evaluates AND operands cheapest first (index lookups ordered by
+their cardinality, then composites, then predicates without an index) and
+narrows the candidate bitmap as it goes, so only rows that survived the
+indexed terms are ever inspected by text or metadata predicates.
+
+The index is built from the store on the first query and then kept current
+by the event log (``apply_event``) in time proportional to the traces an
+event touched.
+"""
+
+import bisect
+import math
+import re
+import threading
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from models import AxialTag, Trace
+from services import sampling
+
+NUMERIC_FIELDS = ("reviewed_at", "latency_ms", "token_count")
+TEXT_FIELDS = ("text", "input", "output", "open_code")
+FIELD_ALIASES = {"verdict": "pass_fail", "reviewer_id": "reviewer", "axial_tag": "tag"}
+
+# Rows of deleted traces are compacted away once they outnumber live ones
+COMPACT_MIN_ROWS = 1024
+
+_TOKEN = re.compile(
+    r'\s*(?:(?P<lparen>\()|(?P<rparen>\))|'
+    r'(?P<term>-?(?:[A-Za-z_][\w.]*:)?(?:"(?:[^"\\]|\\.)*"|[^\s()"]+)))'
+)
+_COMPARISON = re.compile(r"^(>=|<=|>|<|=)?(.*)$", re.S)
+
+# Bit positions set in each byte value (bitmap -> rows)
+_BYTE_BITS = [tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)]
+
+
+class QueryError(ValueError):
+    """A query that cannot be parsed or compiled."""
+
+
+def rows_to_bitmap(rows: Iterable[int]) -> int:
+    """Bitmap with the given rows set (O(rows + size / 8))."""
+    rows = list(rows)
+    if not rows:
+        return 0
+    buf = bytearray(max(rows) // 8 + 1)
+    for row in rows:
+        buf[row >> 3] |= 1 << (row & 7)
+    return int.from_bytes(buf, "little")
+
+
+def bitmap_rows(bitmap: int) -> List[int]:
+    """Rows set in a bitmap, ascending."""
+    rows = []
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+    for offset, byte in enumerate(data):
+        if byte:
+            base = offset << 3
+            rows.extend(base + bit for bit in _BYTE_BITS[byte])
+    return rows
+
+
+def _timestamp(value: datetime) -> float:
+    return value.timestamp()
+
+
+def _number(value: Any) -> Optional[float]:
+    if isinstance(value, datetime):
+        return _timestamp(value)
+    return float(value) if sampling._is_number(value) else None
+
+
+def _numeric_values(trace: Trace) -> List[Tuple[str, float]]:
+    """(field, value) pairs of a trace's range-indexed fields."""
+    values = []
+    if trace.reviewed_at is not None:
+        values.append(("reviewed_at", _timestamp(trace.reviewed_at)))
+    metadata = trace.metadata or {}
+    for field in ("latency_ms", "token_count"):
+        value = _number(metadata.get(field))
+        if value is not None:
+            values.append((field, value))
+    scores = metadata.get("scores")
+    if isinstance(scores, dict):
+        for name, score in scores.items():
+            value = _number(score)
+            if value is not None:
+                values.append((f"score.{name}", value))
+    return values
+
+
+def _hashable(value: Any) -> Any:
+    return value if value is None or isinstance(value, (str, int, float, bool)) else str(value)
+
+
+def _equality_keys(trace: Trace) -> List[Tuple[str, Any]]:
+    """(field, value) postings a trace belongs to."""
+    keys = [
+        ("reviewed", trace.reviewed),
+        ("pass_fail", trace.pass_fail),
+        ("reviewer", trace.reviewer_id),
+        ("model_version", _hashable((trace.metadata or {}).get("model_version"))),
+    ]
+    keys.extend(("tag", tag_id) for tag_id in set(trace.axial_tags))
+    return keys
+
+
+class TraceIndex:
+    """Row numbers, equality bitmaps and sorted numeric lists over traces."""
+
+    def __init__(self, traces: Iterable[Trace] = ()):
+        self._clear()
+        self.add_many(traces)
+
+    def _clear(self) -> None:
+        self.rows: List[Optional[Trace]] = []
+        self.row_of: Dict[str, int] = {}
+        self.alive = 0
+        self.postings: Dict[Tuple[str, Any], int] = {}
+        self.sorted: Dict[str, List[Tuple[float, int]]] = {}
+        self._row_keys: Dict[int, Tuple[List[Tuple[str, Any]], List[Tuple[str, float]]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.row_of)
+
+    def add_many(self, traces: Iterable[Trace]) -> None:
+        """
+        Index new traces and re-index known ones.
+
+        Bits are collected per posting and applied once per posting, so
+        indexing n traces costs O(n + postings * size / 8) rather than a
+        bitmap copy per trace and posting.
+        """
+        set_rows: Dict[Tuple[str, Any], List[int]] = {}
+        clear_rows: Dict[Tuple[str, Any], List[int]] = {}
+        sorted_removed: Dict[str, set] = {}
+        sorted_added: Dict[str, List[Tuple[float, int]]] = {}
+        alive_rows = []
+
+        # A trace listed twice is indexed once, as its last version
+        batch = {}
+        for trace in traces:
+            batch[trace.id] = trace
+
+        for trace in batch.values():
+            keys, numbers = _equality_keys(trace), _numeric_values(trace)
+            row = self.row_of.get(trace.id)
+            if row is None:
+                row = len(self.rows)
+                self.rows.append(trace)
+                self.row_of[trace.id] = row
+                alive_rows.append(row)
+                old_keys, old_numbers = [], []
+            else:
+                self.rows[row] = trace
+                old_keys, old_numbers = self._row_keys[row]
+            self._row_keys[row] = (keys, numbers)
+
+            if keys != old_keys:
+                for key in set(old_keys) - set(keys):
+                    clear_rows.setdefault(key, []).append(row)
+                for key in set(keys) - set(old_keys):
+                    set_rows.setdefault(key, []).append(row)
+            if numbers != old_numbers:
+                for field, value in old_numbers:
+                    sorted_removed.setdefault(field, set()).add((value, row))
+                for field, value in numbers:
+                    sorted_added.setdefault(field, []).append((value, row))
+
+        self.alive |= rows_to_bitmap(alive_rows)
+        for key, rows in clear_rows.items():
+            self._clear_bits(key, rows_to_bitmap(rows))
+        for key, rows in set_rows.items():
+            self.postings[key] = self.postings.get(key, 0) | rows_to_bitmap(rows)
+        for field in sorted_removed.keys() | sorted_added.keys():
+            removed = sorted_removed.get(field)
+            entries = self.sorted.get(field, [])
+            if removed:
+                entries = [entry for entry in entries if entry not in removed]
+            entries.extend(sorted_added.get(field, ()))
+            entries.sort()
+            self.sorted[field] = entries
+
+    def update(self, trace: Trace) -> None:
+        """Re-index one trace after its fields changed (e.g. an annotation)."""
+        row = self.row_of.get(trace.id)
+        if row is None:
+            self.add_many([trace])
+            return
+
+        old_keys, old_numbers = self._row_keys[row]
+        keys, numbers = _equality_keys(trace), _numeric_values(trace)
+        self.rows[row] = trace
+        self._row_keys[row] = (keys, numbers)
+
+        bit = 1 << row
+        for key in set(old_keys) - set(keys):
+            self._clear_bits(key, bit)
+        for key in set(keys) - set(old_keys):
+            self.postings[key] = self.postings.get(key, 0) | bit
+        if old_numbers != numbers:
+            for field, value in old_numbers:
+                self._remove_sorted(field, value, row)
+            for field, value in numbers:
+                bisect.insort(self.sorted.setdefault(field, []), (value, row))
+
+    def remove(self, trace_id: str) -> None:
+        row = self.row_of.pop(trace_id, None)
+        if row is None:
+            return
+
+        keys, numbers = self._row_keys.pop(row)
+        bit = 1 << row
+        self.alive &= ~bit
+        for key in set(keys):
+            self._clear_bits(key, bit)
+        for field, value in numbers:
+            self._remove_sorted(field, value, row)
+        self.rows[row] = None
+
+        if len(self.rows) > COMPACT_MIN_ROWS and len(self.rows) > 2 * len(self.row_of):
+            live = [trace for trace in self.rows if trace is not None]
+            self._clear()
+            self.add_many(live)
+
+    def _clear_bits(self, key: Tuple[str, Any], bits: int) -> None:
+        bitmap = self.postings.get(key, 0) & ~bits
+        if bitmap:
+            self.postings[key] = bitmap
+        else:
+            self.postings.pop(key, None)
+
+    def _remove_sorted(self, field: str, value: float, row: int) -> None:
+        entries = self.sorted.get(field, [])
+        i = bisect.bisect_left(entries, (value, row))
+        if i < len(entries) and entries[i] == (value, row):
+            del entries[i]
+
+    def lookup(self, field: str, value: Any) -> int:
+        return self.postings.get((field, value), 0)
+
+    def range(self, field: str, low: float, low_inclusive: bool, high: float, high_inclusive: bool) -> List[int]:
+        """Rows whose value of a numeric field is within the bounds."""
+        entries = self.sorted.get(field, [])
+        start = bisect.bisect_left(entries, (low, -1) if low_inclusive else (low, math.inf))
+        end = bisect.bisect_left(entries, (high, math.inf) if high_inclusive else (high, -1))
+        return [row for _, row in entries[start:end]]
+
+    def traces(self, bitmap: int) -> List[Trace]:
+        return [self.rows[row] for row in bitmap_rows(bitmap)]
+
+
+# Query parsing
+
+def _tokens(text: str) -> List[Tuple[str, str]]:
+    tokens = []
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if match is None or match.end() == position:
+            raise QueryError(f"Unexpected character at position {position}: {text[position:position + 10]!r}")
+        position = match.end()
+        if match.group("lparen"):
+            tokens.append(("(", "("))
+        elif match.group("rparen"):
+            tokens.append((")", ")"))
+        else:
+            term = match.group("term")
+            if term in ("AND", "OR", "NOT"):
+                tokens.append((term, term))
+            else:
+                tokens.append(("term", term))
+    return tokens
+
+
+def _unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return re.sub(r"\\(.)", r"\1", value[1:-1])
+    return value
+
+
+class _Parser:
+    """Recursive descent: or := and (OR and)*, and := not ([AND] not)*."""
+
+    def __init__(self, text: str):
+        self.tokens = _tokens(text)
+        self.position = 0
+
+    def peek(self) -> Optional[str]:
+        return self.tokens[self.position][0] if self.position < len(self.tokens) else None
+
+    def take(self) -> Tuple[str, str]:
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def parse(self) -> Tuple:
+        if not self.tokens:
+            raise QueryError("Empty query")
+        node = self.parse_or()
+        if self.position < len(self.tokens):
+            raise QueryError(f"Unexpected {self.tokens[self.position][1]!r}")
+        return node
+
+    def parse_or(self) -> Tuple:
+        operands = [self.parse_and()]
+        while self.peek() == "OR":
+            self.take()
+            operands.append(self.parse_and())
+        return operands[0] if len(operands) == 1 else ("or", operands)
+
+    def parse_and(self) -> Tuple:
+        operands = [self.parse_not()]
+        while self.peek() in ("AND", "NOT", "(", "term"):
+            if self.peek() == "AND":
+                self.take()
+            operands.append(self.parse_not())
+        return operands[0] if len(operands) == 1 else ("and", operands)
+
+    def parse_not(self) -> Tuple:
+        if self.peek() == "NOT":
+            self.take()
+            return ("not", self.parse_not())
+        return self.parse_atom()
+
+    def parse_atom(self) -> Tuple:
+        kind = self.peek()
+        if kind is None:
+            raise QueryError("Unexpected end of query")
+        if kind == "(":
+            self.take()
+            node = self.parse_or()
+            if self.peek() != ")":
+                raise QueryError("Missing closing parenthesis")
+            self.take()
+            return node
+        if kind != "term":
+            raise QueryError(f"Unexpected {self.tokens[self.position][1]!r}")
+
+        term = self.take()[1]
+        negated = term.startswith("-") and len(term) > 1
+        if negated:
+            term = term[1:]
+        field, value = "text", term
+        if not term.startswith('"'):
+            match = re.match(r"^([A-Za-z_][\w.]*):(.*)$", term, re.S)
+            if match:
+                field, value = match.group(1), match.group(2)
+        node = ("term", FIELD_ALIASES.get(field.lower(), field.lower()), value)
+        return ("not", node) if negated else node
+
+
+def parse(text: str) -> Tuple:
+    """Parse a query into a tree of ('and'|'or', [nodes]), ('not', node), ('term', field, value)."""
+    return _Parser(text).parse()
+
+
+# Compilation
+
+def _parse_bool(value: str) -> bool:
+    lowered = value.lower()
+    if lowered in ("true", "yes", "1"):
+        return True
+    if lowered in ("false", "no", "0"):
+        return False
+    raise QueryError(f"Expected true or false, got {value!r}")
+
+
+def _parse_bound(field: str, value: str) -> Tuple[float, float]:
+    """Lowest and highest value a literal stands for (a date spans its day)."""
+    if not value:
+        raise QueryError(f"Missing value for {field}")
+    if field == "reviewed_at":
+        try:
+            if re.fullmatch(r"\d{4}-\d{2}-\d{2}", value):
+                start = datetime.combine(date.fromisoformat(value), datetime.min.time())
+                end = start + timedelta(days=1)
+                return _timestamp(start), math.nextafter(_timestamp(end), -math.inf)
+            moment = _timestamp(datetime.fromisoformat(value))
+            return moment, moment
+        except ValueError:
+            raise QueryError(f"Invalid date {value!r} for reviewed_at (use YYYY-MM-DD or ISO 8601)")
+    try:
+        number = float(value)
+    except ValueError:
+        raise QueryError(f"Expected a number for {field}, got {value!r}")
+    return number, number
+
+
+def _range_bounds(field: str, value: str) -> Tuple[float, bool, float, bool]:
+    """(low, low_inclusive, high, high_inclusive) for a comparison or a..b range."""
+    if ".." in value:
+        low_text, high_text = value.split("..", 1)
+        low = _parse_bound(field, low_text)[0] if low_text else -math.inf
+        high = _parse_bound(field, high_text)[1] if high_text else math.inf
+        return low, True, high, True
+
+    op, literal = _COMPARISON.match(value).groups()
+    low, high = _parse_bound(field, literal)
+    if op == ">":
+        return high, False, math.inf, True
+    if op == ">=":
+        return low, True, math.inf, True
+    if op == "<":
+        return -math.inf, True, low, False
+    if op == "<=":
+        return -math.inf, True, high, True
+    return low, True, high, True
+
+
+class Plan:
+    """A compiled query node. Leaves with an index have a cardinality estimate."""
+
+    indexed = False
+    residual = False
+
+    def estimate(self, index: TraceIndex) -> float:
+        return math.inf
+
+    def evaluate(self, index: TraceIndex, candidates: int) -> int:
+        raise NotImplementedError
+
+    def describe(self) -> str:
+        raise NotImplementedError
+
+
+class Lookup(Plan):
+    """Union of equality postings, e.g. tag:x (several IDs for an ambiguous name)."""
+
+    indexed = True
+
+    def __init__(self, field: str, values: List[Any], label: str):
+        self.field = field
+        self.values = values
+        self.label = label
+
+    def bitmap(self, index: TraceIndex) -> int:
+        bitmap = 0
+        for value in self.values:
+            bitmap |= index.lookup(self.field, value)
+        return bitmap
+
+    def estimate(self, index: TraceIndex) -> float:
+        return self.bitmap(index).bit_count()
+
+    def evaluate(self, index: TraceIndex, candidates: int) -> int:
+        return self.bitmap(index) & candidates
+
+    def describe(self) -> str:
+        return f"index {self.field}={self.label}"
+
+
+class IdLookup(Plan):
+    indexed = True
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+
+    def estimate(self, index: TraceIndex) -> float:
+        return 1 if self.trace_id in index.row_of else 0
+
+    def evaluate(self, index: TraceIndex, candidates: int) -> int:
+        row = index.row_of.get(self.trace_id)
+        return candidates & (1 << row) if row is not None else 0
+
+    def describe(self) -> str:
+        return f"id {self.trace_id}"
+
+
+class Range(Plan):
+    indexed = True
+
+    def __init__(self, field: str, bounds: Tuple[float, bool, float, bool], label: str):
+        self.field = field
+        self.bounds = bounds
+        self.label = label
+
+    def estimate(self, index: TraceIndex) -> float:
+        return len(index.range(self.field, *self.bounds))
+
+    def evaluate(self, index: TraceIndex, candidates: int) -> int:
+        return rows_to_bitmap(index.range(self.field, *self.bounds)) & candidates
+
+    def describe(self) -> str:
+        return f"range {self.field}:{self.label}"
+
+
+class Predicate(Plan):
+    """A test without an index, run only on the rows that are still candidates."""
+
+    residual = True
+
+    def __init__(self, test: Callable[[Trace], bool], label: str):
+        self.test = test
+        self.label = label
+
+    def evaluate(self, index: TraceIndex, candidates: int) -> int:
+        rows = index.rows
+        return rows_to_bitmap(row for row in bitmap_rows(candidates) if self.test(rows[row]))
+
+    def describe(self) -> str:
+        return f"scan {self.label}"
+
+
+class And(Plan):
+    def __init__(self, operands: List[Plan]):
+        self.operands = operands
+
+    def estimate(self, index: TraceIndex) -> float:
+        return min(operand.estimate(index) for operand in self.operands)
+
+    def ordered(self, index: TraceIndex) -> List[Plan]:
+        """Index lookups by cardinality, then composites, then scans."""
+        def cost(operand: Plan) -> Tuple[int, float]:
+            if operand.indexed:
+                return (0, operand.estimate(index))
+            return (2, 0) if operand.residual else (1, 0)
+        return sorted(self.operands, key=cost)
+
+    def evaluate(self, index: TraceIndex, candidates: int) -> int:
+        for operand in self.ordered(index):
+            candidates = operand.evaluate(index, candidates)
+            if not candidates:
+                break
+        return candidates
+
+    def describe(self) -> str:
+        return "(" + " AND ".join(operand.describe() for operand in self.operands) + ")"
+
+
+class Or(Plan):
+    def __init__(self, operands: List[Plan]):
+        self.operands = operands
+
+    def estimate(self, index: TraceIndex) -> float:
+        return sum(operand.estimate(index) for operand in self.operands)
+
+    def evaluate(self, index: TraceIndex, candidates: int) -> int:
+        matched = 0
+        # Scans only look at candidates no earlier operand matched
+        for operand in sorted(self.operands, key=lambda operand: operand.residual):
+            remaining = candidates & ~matched
+            if not remaining:
+                break
+            matched |= operand.evaluate(index, remaining)
+        return matched
+
+    def describe(self) -> str:
+        return "(" + " OR ".join(operand.describe() for operand in self.operands) + ")"
+
+
+class Not(Plan):
+    def __init__(self, operand: Plan):
+        self.operand = operand
+
+    def evaluate(self, index: TraceIndex, candidates: int) -> int:
+        return candidates & ~self.operand.evaluate(index, candidates)
+
+    def describe(self) -> str:
+        return f"NOT {self.operand.describe()}"
+
+
+def _text_test(field: str, needle: str) -> Callable[[Trace], bool]:
+    needle = needle.lower()
+    if field == "input":
+        return lambda trace: needle in trace.user_input.lower()
+    if field == "output":
+        return lambda trace: needle in trace.agent_output.lower()
+    if field == "open_code":
+        return lambda trace: needle in (trace.open_code or "").lower()
+    return lambda trace: (
+        needle in trace.user_input.lower()
+        or needle in trace.agent_output.lower()
+        or needle in (trace.open_code or "").lower()
+    )
+
+
+def _metadata_test(key: str, value: str) -> Callable[[Trace], bool]:
+    op, literal = _COMPARISON.match(value).groups()
+    literal = _unquote(literal)
+    if op in (">", ">=", "<", "<="):
+        try:
+            number = float(literal)
+        except ValueError:
+            raise QueryError(f"Expected a number for metadata.{key}, got {literal!r}")
+        compare = {
+            ">": lambda x: x > number,
+            ">=": lambda x: x >= number,
+            "<": lambda x: x < number,
+            "<=": lambda x: x <= number,
+        }[op]
+
+        def test(trace: Trace) -> bool:
+            found = _number(sampling.metadata_value(trace, key))
+            return found is not None and compare(found)
+        return test
+
+    def equals(trace: Trace) -> bool:
+        found = sampling.metadata_value(trace, key)
+        if literal.lower() == "none":
+            return found is None
+        if isinstance(found, bool):
+            return str(found).lower() == literal.lower()
+        if sampling._is_number(found):
+            try:
+                return float(found) == float(literal)
+            except ValueError:
+                return False
+        return found is not None and str(found) == literal
+    return equals
+
+
+def _resolve_tags(value: str, tags: Dict[str, AxialTag]) -> List[str]:
+    if value in tags:
+        return [value]
+    lowered = value.lower()
+    matches = [tag_id for tag_id, tag in tags.items() if tag.name.lower() == lowered]
+    return matches or [value]
+
+
+def _compile_term(field: str, raw: str, tags: Dict[str, AxialTag]) -> Plan:
+    value = _unquote(raw)
+    label = f"{field}:{raw}"
+    if not value:
+        raise QueryError(f"Missing value for {field}")
+
+    if field in TEXT_FIELDS:
+        return Predicate(_text_test(field, value), label)
+    if field == "id":
+        return IdLookup(value)
+    if field == "reviewed":
+        return Lookup("reviewed", [_parse_bool(value)], value.lower())
+    if field == "pass_fail":
+        lowered = value.lower()
+        if lowered not in ("pass", "fail", "defer", "none"):
+            raise QueryError(f"pass_fail must be pass, fail, defer or none, got {value!r}")
+        return Lookup("pass_fail", [None if lowered == "none" else lowered], lowered)
+    if field == "tag":
+        return Lookup("tag", _resolve_tags(value, tags), value)
+    if field in ("reviewer", "model_version"):
+        return Lookup(field, [None if value.lower() == "none" else value], value)
+    if field in NUMERIC_FIELDS or field.startswith("score."):
+        return Range(field, _range_bounds(field, raw), raw)
+    if field.startswith("metadata.") and len(field) > len("metadata."):
+        key = field[len("metadata."):]
+        if key in ("latency_ms", "token_count"):
+            return Range(key, _range_bounds(key, raw), raw)
+        if key == "model_version" and not _COMPARISON.match(raw).group(1):
+            return Lookup("model_version", [None if value.lower() == "none" else value], value)
+        return Predicate(_metadata_test(key, raw), label)
+
+    raise QueryError(f"Unknown field {field!r}")
+
+
+def _compile(node: Tuple, tags: Dict[str, AxialTag]) -> Plan:
+    kind = node[0]
+    if kind == "term":
+        return _compile_term(node[1], node[2], tags)
+    if kind == "not":
+        return Not(_compile(node[1], tags))
+    operands = [_compile(child, tags) for child in node[1]]
+    return And(operands) if kind == "and" else Or(operands)
+
+
+def compile_query(text: str, tags: Optional[Dict[str, AxialTag]] = None) -> Plan:
+    """Parse and compile a query (QueryError if it is invalid)."""
+    return _compile(parse(text), tags or {})
+
+
+def _plan(query: Optional[str], tags: Optional[Dict[str, AxialTag]], filters: Sequence[Plan]) -> Plan:
+    """A query ANDed with plan nodes built by the caller (e.g. Lookup for API filters)."""
+    plans = [compile_query(query, tags)] if query else []
+    plans.extend(filters)
+    return plans[0] if len(plans) == 1 else And(plans)
+
+
+_lock = threading.RLock()
+_index: Optional[TraceIndex] = None
+
+
+def reset() -> None:
+    """Drop the index (rebuilt from the store on the next query)."""
+    global _index
+    with _lock:
+        _index = None
+
+
+def apply_event(event: Dict[str, Any], result: Any) -> None:
+    """Keep the index current for an applied event (called by the event log)."""
+    event_type = event["type"]
+    data = event["data"]
+
+    with _lock:
+        if _index is None:
+            return
+        if event_type.startswith("annotation."):
+            if result is not None:
+                _index.update(result)
+        elif event_type in ("session.create", "session.update"):
+            # Forks add no traces to the store
+            if result.is_fork:
+                return
+            _index.add_many(result.traces)
+        elif event_type == "trace.import":
+            _index.add_many(result)
+        elif event_type == "trace.delete":
+            _index.remove(data["trace_id"])
+        elif event_type in ("tag.delete", "tag.merge"):
+            for trace_id in result:
+                row = _index.row_of.get(trace_id)
+                if row is not None:
+                    _index.update(_index.rows[row])
+
+
+def index_for(traces: Dict[str, Trace]) -> TraceIndex:
+    """The live index, built from the store if needed."""
+    global _index
+    with _lock:
+        if _index is None:
+            _index = TraceIndex(traces.values())
+        return _index
+
+
+def select(
+    query: Optional[str],
+    traces: Dict[str, Trace],
+    tags: Optional[Dict[str, AxialTag]] = None,
+    within: Optional[Iterable[str]] = None,
+    filters: Sequence[Plan] = ()
+) -> List[Trace]:
+    """
+    Traces matching a query and filters, in store order.
+
+    within restricts the result to the given trace IDs (e.g. a session's).
+    """
+    plan = _plan(query, tags, filters)
+    with _lock:
+        index = index_for(traces)
+        candidates = index.alive
+        if within is not None:
+            candidates &= rows_to_bitmap(index.row_of[trace_id] for trace_id in within if trace_id in index.row_of)
+        return index.traces(plan.evaluate(index, candidates))
+
+
+def select_from(
+    query: Optional[str],
+    traces: Iterable[Trace],
+    tags: Optional[Dict[str, AxialTag]] = None,
+    filters: Sequence[Plan] = ()
+) -> List[Trace]:
+    """
+    Traces matching a query and filters among the given traces, in the given order.
+
+    Builds a throwaway index, for traces the live index does not describe
+    (e.g. a forked session's view of its traces, with the fork's annotations).
+    """
+    plan = _plan(query, tags, filters)
+    index = TraceIndex(traces)
+    return index.traces(plan.evaluate(index, index.alive))
+
+
+def explain(
+    query: Optional[str],
+    traces: Dict[str, Trace],
+    tags: Optional[Dict[str, AxialTag]] = None,
+    filters: Sequence[Plan] = ()
+) -> str:
+    """The compiled plan, with AND operands in evaluation order."""
+    plan = _plan(query, tags, filters)
+    with _lock:
+        index = index_for(traces)
+
+        def describe(node: Plan) -> str:
+            if isinstance(node, And):
+                return "(" + " AND ".join(describe(operand) for operand in node.ordered(index)) + ")"
+            if isinstance(node, Or):
+                return "(" + " OR ".join(describe(operand) for operand in node.operands) + ")"
+            if isinstance(node, Not):
+                return f"NOT {describe(node.operand)}"
+            return node.describe()
+        return describe(plan)
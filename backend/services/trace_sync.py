@@ -0,0 +1,174 @@
+"""Incremental re-import ("sync") of traces.
+
+A plain import replaces stored traces with the incoming ones, dropping
+their annotations, and validates every incoming trace. A sync compares
+each incoming trace with the stored one by content fingerprint first:
+
+- New traces are validated and imported.
+- Unchanged traces (same fingerprint) are skipped without being validated.
+- Changed traces are validated and replace the stored content, keeping the
+  stored annotations. If the output (agent_output or intermediate steps)
+  changed under a reviewed trace, its annotation is flagged stale
+  (metadata["sync"]["stale"]); it is cleared when the trace is annotated
+  again (see services/event_log.py).
+
+Fingerprints are hashes of the raw incoming JSON (serialized by
+pydantic-core), kept in metadata["sync"] of each synced trace, so later
+syncs only hash the incoming data. They follow the producer's key order: a
+trace re-sent with its keys reordered counts as changed (it is updated, but
+only flagged stale if its output text changed). Traces imported without
+sync carry no fingerprint; the first sync validates them and compares the
+models, then stores the fingerprint ("adopted"), so only that sync pays
+for them.
+
+Traces missing from a sync are left alone (a sync is not a mirror).
+"""
+
+import hashlib
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+from pydantic_core import to_json
+from models import Trace
+
+SYNC_KEY = "sync"
+
+ANNOTATION_FIELDS = (
+    "reviewed", "pass_fail", "open_code", "axial_tags", "reviewer_id", "reviewed_at", "adjudicated", "reviews"
+)
+
+Validate = Callable[[List[Dict[str, Any]]], List[Trace]]
+
+
+def _hash(value: Any) -> str:
+    # sha256 is hardware-accelerated on current CPUs (faster than blake2b here)
+    return hashlib.sha256(to_json(value)).hexdigest()[:32]
+
+
+def fingerprint(data: Dict[str, Any]) -> str:
+    """Content fingerprint of a trace given as JSON data (annotations excluded)."""
+    metadata = data.get("metadata") or {}
+    if SYNC_KEY in metadata:
+        metadata = {key: value for key, value in metadata.items() if key != SYNC_KEY}
+    return _hash([
+        data.get("user_input"),
+        data.get("agent_output"),
+        data.get("system_prompt"),
+        data.get("intermediate_steps") or [],
+        metadata
+    ])
+
+
+def output_fingerprint(data: Dict[str, Any]) -> str:
+    """Fingerprint of the output text only (agent_output and step contents)."""
+    steps = data.get("intermediate_steps") or []
+    return _hash([
+        data.get("agent_output"),
+        [[step.get("step_type"), step.get("content")] for step in steps if isinstance(step, dict)]
+    ])
+
+
+def stored_fingerprints(trace: Trace) -> Tuple[Optional[str], Optional[str]]:
+    """Fingerprints recorded by a previous sync (None, None if never synced)."""
+    sync = (trace.metadata or {}).get(SYNC_KEY) or {}
+    return sync.get("fingerprint"), sync.get("output_fingerprint")
+
+
+def model_fingerprints(trace: Trace) -> Tuple[str, str]:
+    """Fingerprints of a validated trace (comparable with other model fingerprints only)."""
+    data = trace.model_dump(
+        mode="json",
+        include={"user_input", "agent_output", "system_prompt", "intermediate_steps", "metadata"}
+    )
+    return fingerprint(data), output_fingerprint(data)
+
+
+def is_stale(trace: Trace) -> bool:
+    return bool(((trace.metadata or {}).get(SYNC_KEY) or {}).get("stale"))
+
+
+def clear_stale(trace: Trace) -> None:
+    """Mark a trace's annotation as current (it was just annotated)."""
+    sync = (trace.metadata or {}).get(SYNC_KEY)
+    if sync and sync.get("stale"):
+        trace.metadata[SYNC_KEY] = {**sync, "stale": False, "stale_since": None}
+
+
+def _with_sync(trace: Trace, fingerprint: str, output: str, stale: bool, stale_since: Optional[str]) -> Trace:
+    metadata = dict(trace.metadata)
+    metadata[SYNC_KEY] = {
+        "fingerprint": fingerprint,
+        "output_fingerprint": output,
+        "stale": stale,
+        "stale_since": stale_since
+    }
+    return trace.model_copy(update={"metadata": metadata})
+
+
+def plan(incoming: List[Dict[str, Any]], stored: Mapping[str, Trace], validate: Validate) -> Dict[str, Any]:
+    """
+    Compare incoming raw traces with the store.
+
+    Returns traces (to import: new, changed and adopted), and created,
+    updated, adopted, unchanged and stale counts with stale_trace_ids.
+    validate is only called on traces that are new, changed or never synced.
+    """
+    # Last occurrence of an ID wins, as with a plain import
+    by_id: Dict[str, Dict[str, Any]] = {}
+    for raw in incoming:
+        if not isinstance(raw, dict) or "id" not in raw:
+            raise ValueError("Every trace must be an object with an 'id'")
+        by_id[str(raw["id"])] = raw
+
+    to_validate: List[Dict[str, Any]] = []
+    prints: List[Tuple[str, str]] = []
+    unchanged = 0
+    for trace_id, raw in by_id.items():
+        content = fingerprint(raw)
+        existing = stored.get(trace_id)
+        if existing is not None and stored_fingerprints(existing)[0] == content:
+            unchanged += 1
+            continue
+        to_validate.append(raw)
+        prints.append((content, output_fingerprint(raw)))
+
+    now = datetime.now().isoformat()
+    traces: List[Trace] = []
+    adopted: List[Trace] = []
+    created = updated = 0
+    stale_ids = []
+    for trace, (content, output) in zip(validate(to_validate), prints):
+        existing = stored.get(trace.id)
+        if existing is None:
+            created += 1
+            traces.append(_with_sync(trace, content, output, False, None))
+            continue
+
+        previous, previous_output = stored_fingerprints(existing)
+        if previous is None:
+            # Never synced: compare the models once, then keep the raw fingerprints
+            previous, previous_output = model_fingerprints(existing)
+            if model_fingerprints(trace)[0] == previous:
+                adopted.append(_with_sync(existing, content, output, False, None))
+                continue
+
+        updated += 1
+        if existing.reviewed or existing.reviews:
+            trace = trace.model_copy(update={field: getattr(existing, field) for field in ANNOTATION_FIELDS})
+
+        stale = is_stale(existing)
+        stale_since = ((existing.metadata or {}).get(SYNC_KEY) or {}).get("stale_since")
+        if existing.reviewed and previous_output != output and not stale:
+            stale, stale_since = True, now
+        if stale:
+            stale_ids.append(trace.id)
+        traces.append(_with_sync(trace, content, output, stale, stale_since))
+
+    return {
+        "traces": traces + adopted,
+        "created": created,
+        "updated": updated,
+        "adopted": len(adopted),
+        "unchanged": unchanged,
+        "stale": len(stale_ids),
+        "stale_trace_ids": stale_ids
+    }
@@ -0,0 +1,24 @@
+"""Admin endpoints require the admin token.
+
+Run from backend/: python -m pytest tests
+"""
+
+from fastapi.testclient import TestClient
+from app import app
+
+
+def test_admin_endpoints_are_disabled_without_a_token(monkeypatch):
+    monkeypatch.delenv("ADMIN_TOKEN", raising=False)
+    with TestClient(app) as client:
+        assert client.get("/api/admin/profiles").status_code == 403
+        assert client.get("/api/admin/event-log", headers={"X-Admin-Token": ""}).status_code == 403
+        assert client.post("/api/admin/event-log/snapshot").status_code == 403
+
+
+def test_admin_endpoints_check_the_token(monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "admin-secret")
+    with TestClient(app) as client:
+        assert client.get("/api/admin/event-log", headers={"X-Admin-Token": "wrong"}).status_code == 403
+        response = client.get("/api/admin/event-log", headers={"X-Admin-Token": "admin-secret"})
+        assert response.status_code == 200
+        assert response.json()["persistent"] is False
@@ -0,0 +1,113 @@
+"""Inter-rater agreement: kappa values, and the sums kept current by annotation events.
+
+Run from backend/: python -m pytest tests
+"""
+
+import uuid
+from typing import Any, List
+import pytest
+from fastapi.testclient import TestClient
+from app import app
+from routes.sessions import sessions_db
+from routes.tags import tags_db
+from routes.traces import traces_db
+from services.agreement import SessionAgreement, cohen_kappa
+
+
+def test_cohen_kappa():
+    # 20 pass/pass, 5 pass/fail, 10 fail/pass, 15 fail/fail
+    assert cohen_kappa([20, 5, 10, 15]) == pytest.approx(0.4)
+    assert cohen_kappa([3, 0, 0, 2]) == pytest.approx(1.0)
+    # Both reviewers passed everything: chance agreement is total
+    assert cohen_kappa([4, 0, 0, 0]) is None
+    assert cohen_kappa([0, 0, 0, 0]) is None
+
+
+def _tag(client: TestClient) -> str:
+    response = client.post("/api/tags/", json={
+        "name": f"Tag {uuid.uuid4().hex[:8]}",
+        "description": "A tag for the agreement test"
+    })
+    assert response.status_code == 200
+    return response.json()["tag"]["id"]
+
+
+def _rounded(value: Any) -> Any:
+    """A report with floats rounded (running sums drift in the last digits)."""
+    if isinstance(value, float):
+        return round(value, 9)
+    if isinstance(value, dict):
+        return {key: _rounded(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_rounded(item) for item in value]
+    return value
+
+
+def _annotate(client: TestClient, trace_id: str, reviewer_id: str, pass_fail: str, tags: List[str] = ()) -> None:
+    response = client.post("/api/annotations/", json={
+        "trace_id": trace_id,
+        "pass_fail": pass_fail,
+        "axial_tags": list(tags),
+        "reviewer_id": reviewer_id
+    })
+    assert response.status_code == 200
+
+
+def test_agreement_matches_a_recomputation_after_events():
+    prefix = f"agree_{uuid.uuid4().hex[:8]}"
+    trace_ids = [f"{prefix}_{i}" for i in range(5)]
+    with TestClient(app) as client:
+        tag_a, tag_b = _tag(client), _tag(client)
+        response = client.post("/api/sessions/", json={
+            "name": "Agreement",
+            "traces": [{"id": trace_id, "user_input": f"q{i}", "agent_output": "a"} for i, trace_id in enumerate(trace_ids)]
+        })
+        session_id = response.json()["session"]["id"]
+
+        def check():
+            live = client.get(f"/api/sessions/{session_id}/agreement").json()
+            fresh = SessionAgreement(sessions_db[session_id], traces_db).report(tags_db)
+            assert _rounded(live) == _rounded({"session_id": session_id, **fresh})
+            return live
+
+        # Cached from here on, so each change below is applied to the sums
+        check()
+        t0, t1, t2, t3, t4 = trace_ids
+        _annotate(client, t0, "alice", "fail", [tag_a])
+        _annotate(client, t0, "bob", "fail", [tag_a, tag_b])
+        _annotate(client, t0, "carol", "pass")
+        _annotate(client, t1, "alice", "pass")
+        _annotate(client, t1, "bob", "pass")
+        _annotate(client, t2, "alice", "fail", [tag_b])
+        _annotate(client, t2, "bob", "pass")
+        _annotate(client, t3, "alice", "fail", [tag_a])
+        _annotate(client, t3, "carol", "fail", [tag_a])
+        _annotate(client, t4, "bob", "defer")
+        report = check()
+        assert report["multi_rated_traces"] == 4
+        assert report["disputed"] == 2
+        assert report["fleiss_kappa"] is not None
+        assert [pair["reviewers"] for pair in report["pairs"]] == [
+            ["alice", "bob"], ["alice", "carol"], ["bob", "carol"]
+        ]
+
+        # Re-rated, then undone
+        _annotate(client, t1, "bob", "fail", [tag_b])
+        check()
+        assert client.post("/api/annotations/undo", json={"trace_id": t1, "reviewer_id": "bob"}).status_code == 200
+        check()
+
+        assert client.delete(f"/api/annotations/{t0}", params={"reviewer_id": "carol"}).status_code == 200
+        check()
+
+        response = client.post(f"/api/annotations/{t2}/adjudicate", json={"adjudicator_id": "lead", "from_reviewer": "alice"})
+        assert response.status_code == 200
+        report = check()
+        assert (report["disputed"], report["adjudicated"], report["open_disputes"]) == (1, 1, [])
+
+        response = client.post("/api/tags/merge", json={"source_tag_id": tag_a, "target_tag_id": tag_b})
+        assert response.status_code == 200
+        check()
+        _annotate(client, t3, "carol", "fail", [tag_b])
+        report = check()
+        assert [row["tag_id"] for row in report["tags"]] == [tag_b]
@@ -0,0 +1,110 @@
+"""Reviewer-scoped undo of annotations, and reviewers' annotations in forks.
+
+Run from backend/: python -m pytest tests
+"""
+
+import uuid
+from typing import Tuple
+from fastapi.testclient import TestClient
+from app import app
+
+
+def _annotate(client: TestClient, trace_id: str, reviewer_id: str, pass_fail: str) -> None:
+    response = client.post("/api/annotations/", json={
+        "trace_id": trace_id,
+        "pass_fail": pass_fail,
+        "reviewer_id": reviewer_id
+    })
+    assert response.status_code == 200
+
+
+def _new_session(client: TestClient) -> Tuple[str, str]:
+    """A new session of one trace: (session ID, trace ID)."""
+    trace_id = f"trace_{uuid.uuid4().hex[:8]}"
+    response = client.post("/api/sessions/", json={
+        "name": "Undo",
+        "traces": [{"id": trace_id, "user_input": "q", "agent_output": "a"}]
+    })
+    assert response.status_code == 200
+    return response.json()["session"]["id"], trace_id
+
+
+def _new_trace(client: TestClient) -> str:
+    return _new_session(client)[1]
+
+
+def test_reviewer_undo_keeps_later_annotation_by_another_reviewer():
+    with TestClient(app) as client:
+        trace_id = _new_trace(client)
+        _annotate(client, trace_id, "A", "pass")
+        _annotate(client, trace_id, "B", "fail")
+
+        response = client.post("/api/annotations/undo", json={"trace_id": trace_id, "reviewer_id": "A"})
+        assert response.status_code == 200
+        trace = response.json()["trace"]
+        assert trace["reviewed"] is True
+        assert trace["pass_fail"] == "fail"
+        assert trace["reviewer_id"] == "B"
+        assert set(trace["reviews"]) == {"B"}
+
+        # B's own undo is not superseded and restores the state before it
+        response = client.post("/api/annotations/undo", json={"trace_id": trace_id, "reviewer_id": "B"})
+        trace = response.json()["trace"]
+        assert trace["reviewed"] is False
+        assert trace["reviews"] == {}
+
+
+def test_reviewer_undo_restores_previous_review_of_the_same_reviewer():
+    with TestClient(app) as client:
+        trace_id = _new_trace(client)
+        _annotate(client, trace_id, "A", "pass")
+        _annotate(client, trace_id, "B", "pass")
+        _annotate(client, trace_id, "A", "fail")
+        _annotate(client, trace_id, "B", "fail")
+
+        # A's latest change is superseded by B's, so only A's own label reverts
+        response = client.post("/api/annotations/undo", json={"trace_id": trace_id, "reviewer_id": "A"})
+        trace = response.json()["trace"]
+        assert trace["reviews"]["A"]["pass_fail"] == "pass"
+        assert trace["reviews"]["B"]["pass_fail"] == "fail"
+        assert (trace["reviewer_id"], trace["pass_fail"]) == ("B", "fail")
+
+
+def test_undo_of_superseded_change_without_reviewer_annotation_conflicts():
+    with TestClient(app) as client:
+        trace_id = _new_trace(client)
+        _annotate(client, trace_id, "A", "pass")
+        _annotate(client, trace_id, "B", "fail")
+        client.post(f"/api/annotations/{trace_id}/adjudicate", json={"adjudicator_id": "L", "from_reviewer": "B"})
+        _annotate(client, trace_id, "A", "defer")
+
+        response = client.post("/api/annotations/undo", json={"trace_id": trace_id, "reviewer_id": "L"})
+        assert response.status_code == 409
+        assert client.get(f"/api/traces/{trace_id}").json()["pass_fail"] == "defer"
+
+
+def test_fork_keeps_its_own_reviewer_annotations():
+    with TestClient(app) as client:
+        parent_id, trace_id = _new_session(client)
+        _annotate(client, trace_id, "A", "pass")
+        _annotate(client, trace_id, "B", "fail")
+        fork_id = client.post(f"/api/sessions/{parent_id}/fork", json={}).json()["session"]["id"]
+
+        # The fork starts without the parent's reviewers
+        assert client.get(f"/api/sessions/{fork_id}/agreement").json()["reviewers"] == {}
+
+        for reviewer_id, pass_fail in (("C", "pass"), ("D", "fail")):
+            client.post("/api/annotations/", json={
+                "trace_id": trace_id, "pass_fail": pass_fail, "reviewer_id": reviewer_id, "session_id": fork_id
+            })
+        report = client.get(f"/api/sessions/{fork_id}/agreement").json()
+        assert report["reviewers"] == {"C": 1, "D": 1}
+        assert report["disputed"] == 1
+
+        fork_trace = client.get(f"/api/sessions/{fork_id}?view=full").json()["traces"][0]
+        assert set(fork_trace["reviews"]) == {"C", "D"}
+        assert set(client.get(f"/api/traces/{trace_id}").json()["reviews"]) == {"A", "B"}
+
+        response = client.post("/api/annotations/undo", json={"reviewer_id": "C", "session_id": fork_id})
+        assert set(response.json()["trace"]["reviews"]) == {"D"}
+        assert client.get(f"/api/sessions/{fork_id}/agreement").json()["reviewers"] == {"D": 1}
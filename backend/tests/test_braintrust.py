@@ -0,0 +1,69 @@
+"""Braintrust imports with sync, and invalid Braintrust data.
+
+Run from backend/: python -m pytest tests
+"""
+
+import uuid
+from typing import Any, Dict, List
+import pytest
+import requests
+from fastapi.testclient import TestClient
+from app import app
+
+
+class _Response:
+    def __init__(self, objects: List[Dict[str, Any]]):
+        self.objects = objects
+
+    def raise_for_status(self) -> None:
+        pass
+
+    def json(self) -> Dict[str, Any]:
+        return {"objects": self.objects, "cursor": None}
+
+
+@pytest.fixture
+def braintrust(monkeypatch):
+    """Set the objects the (faked) Braintrust fetch API returns."""
+    fetched: Dict[str, List[Dict[str, Any]]] = {"objects": []}
+    monkeypatch.setattr(requests, "get", lambda *args, **kwargs: _Response(fetched["objects"]))
+    return fetched
+
+
+def _import(client: TestClient, sync: bool = True):
+    return client.post("/api/braintrust/import", json={
+        "api_key": "key", "project_id": "p", "experiment_id": "e", "sync": sync
+    })
+
+
+def test_sync_reimport_skips_unchanged_traces_and_keeps_annotations(braintrust):
+    prefix = f"bt_{uuid.uuid4().hex[:8]}"
+    braintrust["objects"] = [
+        {"id": f"{prefix}_0", "input": "q0", "output": "a0"},
+        {"id": f"{prefix}_1", "input": "q1", "output": "a1"},
+    ]
+    with TestClient(app) as client:
+        response = _import(client)
+        assert response.status_code == 200
+        assert response.json()["created"] == 2
+
+        for trace_id in (f"{prefix}_0", f"{prefix}_1"):
+            client.post("/api/annotations/", json={"trace_id": trace_id, "pass_fail": "fail"})
+
+        braintrust["objects"][1] = {"id": f"{prefix}_1", "input": "q1", "output": "a1 (rerun)"}
+        counts = _import(client).json()
+        assert (counts["created"], counts["updated"], counts["unchanged"]) == (0, 1, 1)
+        assert counts["stale_trace_ids"] == [f"{prefix}_1"]
+
+        for trace_id in (f"{prefix}_0", f"{prefix}_1"):
+            trace = client.get(f"/api/traces/{trace_id}").json()
+            assert (trace["reviewed"], trace["pass_fail"]) == (True, "fail")
+        assert client.get(f"/api/traces/{prefix}_1").json()["agent_output"] == "a1 (rerun)"
+
+
+@pytest.mark.parametrize("sync", [True, False])
+def test_invalid_braintrust_traces_are_a_bad_request(braintrust, sync):
+    braintrust["objects"] = [{"id": 42, "input": "q", "output": "a"}]
+    with TestClient(app) as client:
+        response = _import(client, sync=sync)
+        assert response.status_code == 400
@@ -0,0 +1,82 @@
+"""Parquet and Arrow export: schemas, flattened metadata, row groups and tables.
+
+Run from backend/: python -m pytest tests
+"""
+
+import io
+import uuid
+from typing import Tuple
+import pytest
+from fastapi.testclient import TestClient
+from app import app
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+def _session(client: TestClient) -> Tuple[str, str, str]:
+    """A session of five traces, the first one failed with a tag: (session ID, trace ID prefix, tag ID)."""
+    response = client.post("/api/tags/", json={
+        "name": f"Tag {uuid.uuid4().hex[:8]}",
+        "description": "A tag for the columnar export test"
+    })
+    tag_id = response.json()["tag"]["id"]
+
+    prefix = f"col_{uuid.uuid4().hex[:8]}"
+    traces = [
+        {
+            "id": f"{prefix}_{i}",
+            "user_input": f"q{i}",
+            "agent_output": "a",
+            "metadata": {"model": "v1", "latency_ms": 100 * i, "usage": {"tokens": i}},
+            "intermediate_steps": [{"step_type": "tool_call", "content": "search", "metadata": {"tool": "search"}}]
+        }
+        for i in range(5)
+    ]
+    traces[4]["metadata"]["latency_ms"] = 12.5
+    response = client.post("/api/sessions/", json={"name": "Columnar", "traces": traces})
+    session_id = response.json()["session"]["id"]
+
+    client.post("/api/annotations/", json={"trace_id": f"{prefix}_0", "pass_fail": "fail", "axial_tags": [tag_id]})
+    return session_id, prefix, tag_id
+
+
+def test_parquet_export_has_typed_flattened_columns_and_row_groups():
+    with TestClient(app) as client:
+        session_id, prefix, tag_id = _session(client)
+        response = client.get(f"/api/export/parquet/{session_id}", params={"row_group_size": 2})
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/vnd.apache.parquet"
+        assert "content-encoding" not in response.headers
+
+    parquet = pq.ParquetFile(io.BytesIO(response.content))
+    assert parquet.metadata.num_row_groups == 3
+    table = parquet.read()
+    assert table.num_rows == 5
+    assert table.schema.field("metadata.latency_ms").type == pa.float64()
+    assert table.schema.field("metadata.usage.tokens").type == pa.int64()
+    assert table.schema.field("reviewed").type == pa.bool_()
+
+    rows = table.to_pylist()
+    assert [row["id"] for row in rows] == [f"{prefix}_{i}" for i in range(5)]
+    assert [row["position"] for row in rows] == list(range(5))
+    assert rows[0]["pass_fail"] == "fail"
+    assert rows[0]["axial_tags"] == [tag_id]
+    assert rows[4]["metadata.latency_ms"] == 12.5
+    assert rows[2]["step_count"] == 1
+
+
+def test_arrow_stream_export_of_tag_and_step_tables():
+    with TestClient(app) as client:
+        session_id, prefix, tag_id = _session(client)
+        tags = client.get(f"/api/export/arrow/{session_id}", params={"table": "trace_tags"})
+        steps = client.get(f"/api/export/arrow/{session_id}", params={"table": "steps", "compression": "none"})
+        assert tags.headers["content-type"] == "application/vnd.apache.arrow.stream"
+        assert client.get("/api/export/arrow/missing").status_code == 404
+
+    rows = pa.ipc.open_stream(tags.content).read_all().to_pylist()
+    assert [(row["trace_id"], row["tag_id"]) for row in rows] == [(f"{prefix}_0", tag_id)]
+
+    table = pa.ipc.open_stream(steps.content).read_all()
+    assert table.num_rows == 5
+    assert set(table.column("metadata.tool").to_pylist()) == {"search"}
@@ -0,0 +1,107 @@
+"""Session comparison: alignment modes, unmatched traces and regression counts.
+
+Run from backend/: python -m pytest tests
+"""
+
+from typing import List, Optional
+import pytest
+from models import Session, Trace
+from services.comparison import compare_pair, compare_sessions, similarity_join
+
+
+def _trace(trace_id: str, user_input: str, pass_fail: Optional[str] = None, tags: List[str] = (), **metadata) -> Trace:
+    return Trace(
+        id=trace_id,
+        user_input=user_input,
+        agent_output="a",
+        reviewed=pass_fail is not None,
+        pass_fail=pass_fail,
+        axial_tags=list(tags),
+        metadata=metadata
+    )
+
+
+def _session(session_id: str, traces: List[Trace]) -> Session:
+    return Session(id=session_id, traces=traces)
+
+
+def test_alignment_by_braintrust_id_falls_back_to_trace_id():
+    baseline = _session("v1", [_trace("b0", "x", braintrust_trace_id="bt0"), _trace("t1", "y")])
+    candidate = _session("v2", [_trace("c0", "other", braintrust_trace_id="bt0"), _trace("t1", "z")])
+    assert compare_pair(baseline, candidate)["alignment"]["matched"] == 2
+
+
+def test_unmatched_and_duplicate_traces_are_counted():
+    baseline = _session("v1", [_trace("b0", "q0"), _trace("b1", "q1"), _trace("b2", "q1"), _trace("b3", "q3")])
+    candidate = _session("v2", [_trace("c0", "q0"), _trace("c1", "q0"), _trace("c2", "new")])
+    alignment = compare_pair(baseline, candidate, "user_input")["alignment"]
+    assert alignment == {
+        "matched": 1,
+        "baseline_only": 2,
+        "candidate_only": 1,
+        "baseline_duplicates": 1,
+        "candidate_duplicates": 1
+    }
+
+
+def test_fuzzy_alignment_matches_normalized_and_similar_inputs():
+    baseline = _session("v1", [
+        _trace("b0", "What snacks are good for a long hike?"),
+        _trace("b1", "Recommend a healthy breakfast with lots of protein"),
+        _trace("b2", "Something else entirely"),
+    ])
+    candidate = _session("v2", [
+        _trace("c0", "what snacks are GOOD for a long hike"),
+        _trace("c1", "Recommend a healthy breakfast with lots of protein please"),
+        _trace("c2", "An unrelated question about the weather"),
+    ])
+    assert compare_pair(baseline, candidate, "user_input")["alignment"]["matched"] == 0
+
+    alignment = compare_pair(baseline, candidate, "fuzzy")["alignment"]
+    assert (alignment["matched"], alignment["baseline_only"], alignment["candidate_only"]) == (2, 1, 1)
+
+
+def test_similarity_join_pairs_each_baseline_trace_once():
+    baseline = {"recommend a healthy breakfast": _trace("b0", "")}
+    candidates = [
+        ("recommend a healthy breakfast please", _trace("c0", "")),
+        ("recommend a healthy breakfasts", _trace("c1", "")),
+    ]
+    matches = similarity_join(baseline, candidates, threshold=0.7)
+    # Probe order wins: the first candidate similar enough claims the trace
+    assert [(key, candidate.id) for key, _, candidate, _ in matches] == [("recommend a healthy breakfast", "c0")]
+    assert similarity_join(baseline, candidates, threshold=0.99) == []
+
+
+def test_regression_counts():
+    baseline = _session("v1", [
+        _trace("b0", "q0", "pass"),
+        _trace("b1", "q1", "fail", ["tag_old"]),
+        _trace("b2", "q2", "pass"),
+        _trace("b3", "q3", "fail", ["tag_old"]),
+    ])
+    candidate = _session("v2", [
+        _trace("c0", "q0", "fail", ["tag_new"]),
+        _trace("c1", "q1", "pass"),
+        _trace("c2", "q2", "pass"),
+        _trace("c3", "q3", "pass"),
+    ])
+    report = compare_sessions([baseline, candidate], align_by="user_input", max_examples=1)[0]
+
+    assert report["pass_rate"]["baseline"] == 0.5
+    assert report["pass_rate"]["candidate"] == 0.75
+    assert report["pass_rate"]["delta"] == pytest.approx(0.25)
+    assert report["tags"] == {
+        "appeared": ["tag_new"],
+        "disappeared": ["tag_old"],
+        "deltas": {"tag_new": 1, "tag_old": -2}
+    }
+    assert report["flipped"]["total"] == 3
+    assert report["flipped"]["by_transition"] == {"pass->fail": 1, "fail->pass": 2}
+    assert len(report["flipped"]["examples"]) == 1
+
+
+def test_unknown_alignment_mode_is_rejected():
+    sessions = [_session("v1", []), _session("v2", [])]
+    with pytest.raises(ValueError):
+        compare_sessions(sessions, align_by="nearest")
@@ -0,0 +1,107 @@
+"""Response compression: encoding negotiation, ETag suffixes and streamed bodies.
+
+Run from backend/: python -m pytest tests
+"""
+
+import gzip
+import uuid
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from app import app
+from middleware import compression
+from middleware.compression import CompressionMiddleware, negotiate_encoding
+
+
+@pytest.fixture
+def without_brotli(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+
+
+def test_negotiation_prefers_brotli_when_installed():
+    if compression.brotli is None:
+        pytest.skip("brotli is not installed")
+    assert negotiate_encoding("gzip, deflate, br") == "br"
+    assert negotiate_encoding("gzip;q=1.0, br;q=0.5") == "gzip"
+
+
+def test_negotiation_falls_back_to_gzip(without_brotli):
+    assert negotiate_encoding("gzip, deflate, br") == "gzip"
+    assert negotiate_encoding("*") == "gzip"
+    assert negotiate_encoding("br") is None
+    assert negotiate_encoding("gzip;q=0, identity") is None
+    assert negotiate_encoding("") is None
+
+
+def _large_session(client: TestClient) -> str:
+    prefix = f"gz_{uuid.uuid4().hex[:8]}"
+    response = client.post("/api/sessions/", json={
+        "name": "Compression",
+        "traces": [
+            {"id": f"{prefix}_{i}", "user_input": "What is a good snack for a long hike?", "agent_output": "Trail mix " * 20}
+            for i in range(20)
+        ]
+    })
+    return response.json()["session"]["id"]
+
+
+def test_large_bodies_are_compressed_with_a_suffixed_etag(without_brotli):
+    with TestClient(app) as client:
+        session_id = _large_session(client)
+        url = f"/api/sessions/{session_id}?view=full"
+
+        plain = client.get(url, headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in plain.headers
+        etag = plain.headers["etag"]
+
+        compressed = client.get(url, headers={"Accept-Encoding": "gzip"})
+        assert compressed.headers["content-encoding"] == "gzip"
+        assert int(compressed.headers["content-length"]) < len(plain.content)
+        assert "Accept-Encoding" in compressed.headers["vary"]
+        assert compressed.headers["etag"] == f'{etag[:-1]}-gzip"'
+        assert compressed.json() == plain.json()
+
+        # Either validator is current
+        for validator in (etag, compressed.headers["etag"]):
+            response = client.get(url, headers={"Accept-Encoding": "gzip", "If-None-Match": validator})
+            assert response.status_code == 304
+            assert "content-encoding" not in response.headers
+
+
+def test_small_bodies_are_sent_as_is(without_brotli):
+    with TestClient(app) as client:
+        response = client.get("/health", headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == 200
+        assert "content-encoding" not in response.headers
+
+
+def test_streamed_bodies_are_compressed_chunk_by_chunk(without_brotli):
+    chunks = [b"x" * 2048, b"y" * 2048, b"z" * 10]
+    stream_app = FastAPI()
+
+    @stream_app.get("/stream")
+    async def stream():
+        return StreamingResponse(iter(chunks), media_type="text/plain")
+
+    @stream_app.get("/events")
+    async def events():
+        return StreamingResponse(iter(chunks), media_type="text/event-stream")
+
+    stream_app.add_middleware(CompressionMiddleware, minimum_size=1024)
+    with TestClient(stream_app) as client:
+        response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        assert response.content == b"".join(chunks)
+
+        # Event streams must reach the client as they are produced
+        response = client.get("/events", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+        assert response.content == b"".join(chunks)
+
+
+def test_gzip_output_is_valid():
+    compressor = compression._Compressor("gzip", gzip_level=6, brotli_quality=4)
+    body = compressor.compress(b"a" * 1000, final=False) + compressor.compress(b"b" * 1000, final=True)
+    assert gzip.decompress(body) == b"a" * 1000 + b"b" * 1000
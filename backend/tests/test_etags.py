@@ -0,0 +1,72 @@
+"""Conditional GETs: ETags, 304s, and invalidation when the state they describe changes.
+
+Run from backend/: python -m pytest tests
+"""
+
+import uuid
+from fastapi.testclient import TestClient
+from app import app
+from services.revisions import match_etag
+
+
+def test_match_etag_ignores_weakness_and_encoding_suffixes():
+    etag = '"abc"'
+    assert match_etag(None, etag) is None
+    assert match_etag('"abc"', etag) == '"abc"'
+    assert match_etag('W/"abc"', etag) == 'W/"abc"'
+    assert match_etag('"other", "abc-gzip"', etag) == '"abc-gzip"'
+    assert match_etag('"abc-br"', etag) == '"abc-br"'
+    assert match_etag("*", etag) == etag
+    assert match_etag('"abcd"', etag) is None
+
+
+def _get(client: TestClient, url: str, etag: str = None):
+    headers = {"Accept-Encoding": "identity"}
+    if etag is not None:
+        headers["If-None-Match"] = etag
+    return client.get(url, headers=headers)
+
+
+def test_session_and_trace_etags_change_with_annotations():
+    trace_id = f"etag_{uuid.uuid4().hex[:8]}"
+    with TestClient(app) as client:
+        response = client.post("/api/sessions/", json={
+            "name": "ETags",
+            "traces": [{"id": trace_id, "user_input": "q", "agent_output": "a"}]
+        })
+        session_id = response.json()["session"]["id"]
+        urls = [f"/api/sessions/{session_id}", f"/api/traces/{trace_id}", f"/api/traces/?session_id={session_id}"]
+
+        etags = {}
+        for url in urls:
+            response = _get(client, url)
+            assert response.status_code == 200
+            assert response.headers["cache-control"] == "no-cache"
+            etags[url] = response.headers["etag"]
+
+            response = _get(client, url, etags[url])
+            assert response.status_code == 304
+            assert response.content == b""
+            assert response.headers["etag"] == etags[url]
+
+        client.post("/api/annotations/", json={"trace_id": trace_id, "pass_fail": "fail"})
+        for url in urls:
+            response = _get(client, url, etags[url])
+            assert response.status_code == 200
+            assert response.headers["etag"] != etags[url]
+        assert _get(client, f"/api/traces/{trace_id}").json()["pass_fail"] == "fail"
+
+
+def test_tag_list_etag_changes_when_a_tag_is_created():
+    with TestClient(app) as client:
+        etag = _get(client, "/api/tags/").headers["etag"]
+        assert _get(client, "/api/tags/", etag).status_code == 304
+
+        response = client.post("/api/tags/", json={
+            "name": f"Tag {uuid.uuid4().hex[:8]}",
+            "description": "A tag for the conditional GET test"
+        })
+        assert response.status_code == 200
+        response = _get(client, "/api/tags/", etag)
+        assert response.status_code == 200
+        assert response.json()
@@ -0,0 +1,123 @@
+"""Event log recovery, shared-mode segment rotation, replay of session appends and tag rewrites.
+
+Run from backend/: python -m pytest tests
+"""
+
+from services.event_log import EventLog, Store
+
+
+def _import(log: EventLog, store: Store, prefix: str, count: int = 3) -> None:
+    traces = [{"id": f"{prefix}_{i}", "user_input": "q", "agent_output": "a"} for i in range(count)]
+    log.commit("trace.import", {"traces": traces}, store)
+
+
+def test_recover_reads_every_segment_after_restarts(tmp_path):
+    # Every process lifetime appends to a new segment
+    for run in range(4):
+        log = EventLog(directory=str(tmp_path))
+        store = Store()
+        log.recover(store)
+        assert len(store.traces) == 3 * run
+        assert log.seq == run
+        _import(log, store, f"run{run}")
+        log.close()
+
+    seqs = [event["seq"] for event in EventLog(directory=str(tmp_path))._read_events()]
+    assert seqs == [1, 2, 3, 4]
+
+
+def test_recover_after_snapshots(tmp_path):
+    log = EventLog(directory=str(tmp_path))
+    store = Store()
+    log.recover(store)
+    for run in range(3):
+        _import(log, store, f"run{run}")
+        log.snapshot(store)
+        _import(log, store, f"after{run}")
+    log.close()
+
+    store = Store()
+    EventLog(directory=str(tmp_path)).recover(store)
+    assert len(store.traces) == 18
+
+
+def test_shared_sync_follows_several_rotations(tmp_path):
+    writer = EventLog(directory=str(tmp_path), shared=True)
+    writer_store = Store()
+    writer.recover(writer_store)
+    reader = EventLog(directory=str(tmp_path), shared=True)
+    reader_store = Store()
+    reader.recover(reader_store)
+
+    for run in range(4):
+        _import(writer, writer_store, f"run{run}", count=1)
+        writer.snapshot(writer_store)
+
+    assert reader.sync(reader_store) == 4
+    assert reader.seq == 4
+
+    # The reader appends after the newest segment, and the writer sees it
+    _import(reader, reader_store, "reader", count=1)
+    assert writer.sync(writer_store) == 1
+    assert sorted(writer_store.traces) == sorted(reader_store.traces)
+    writer.close()
+    reader.close()
+
+
+def test_annotation_history_is_capped_per_trace():
+    log = EventLog(history_limit=5)
+    store = Store()
+    _import(log, store, "capped", count=1)
+    for i in range(12):
+        event_type = "annotation.undo" if i % 2 else "annotation.set"
+        data = {"trace_id": "capped_0", "state": {"reviewed": True, "pass_fail": "pass"}, "previous": {}}
+        if i % 2:
+            data["undo_of"] = log.seq
+        log.commit(event_type, data, store)
+
+    assert [event["seq"] for event in log.trace_history("capped_0")] == [9, 10, 11, 12, 13]
+    assert log.undone == {10, 12}
+
+
+def test_session_append_replays_ids_and_sampling_state(tmp_path):
+    log = EventLog(directory=str(tmp_path))
+    store = Store()
+    log.recover(store)
+    _import(log, store, "append", count=4)
+    sampling = {"config": {"method": "reservoir", "size": 3}, "population": 0}
+    log.commit("session.create", {"session": {"id": "s", "traces": [], "sampling": sampling}}, store)
+    log.commit("session.append", {
+        "session_id": "s", "trace_ids": ["append_0", "append_1", "append_2"], "evicted_ids": [],
+        "sampling": {**sampling, "population": 3}, "updated_at": "2025-01-15T10:00:00"
+    }, store)
+    log.commit("session.append", {
+        "session_id": "s", "trace_ids": ["append_3"], "evicted_ids": ["append_1"],
+        "sampling": {**sampling, "population": 4}, "updated_at": "2025-01-15T10:01:00"
+    }, store)
+    log.close()
+
+    recovered = Store()
+    EventLog(directory=str(tmp_path)).recover(recovered)
+    session = recovered.sessions["s"]
+    assert [trace.id for trace in session.traces] == ["append_0", "append_2", "append_3"]
+    assert session.sampling.population == 4
+    assert session.total_traces == 3
+
+
+def test_tag_merge_and_delete_replace_tag_lists():
+    log = EventLog()
+    store = Store()
+    for tag_id in ("tag_a", "tag_b"):
+        log.commit("tag.create", {"tag": {"id": tag_id, "name": tag_id, "description": "A tag for the list test"}}, store)
+    traces = [{"id": "retag_0", "user_input": "q", "agent_output": "a", "axial_tags": ["tag_a"],
+               "reviews": {"r": {"pass_fail": "fail", "axial_tags": ["tag_a"]}}}]
+    log.commit("trace.import", {"traces": traces}, store)
+    trace = store.traces["retag_0"]
+    # As captured by a snapshot being written in the background
+    captured = (trace.axial_tags, trace.reviews["r"].axial_tags)
+
+    log.commit("tag.merge", {"source_tag_id": "tag_a", "target_tag_id": "tag_b"}, store)
+    assert (trace.axial_tags, trace.reviews["r"].axial_tags) == (["tag_b"], ["tag_b"])
+    log.commit("tag.delete", {"tag_id": "tag_b"}, store)
+    assert (trace.axial_tags, trace.reviews["r"].axial_tags) == ([], [])
+    assert captured == (["tag_a"], ["tag_a"])
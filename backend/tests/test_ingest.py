@@ -0,0 +1,81 @@
+"""Trusted bulk ingest: token and schema fingerprint checks, and validation errors.
+
+Run from backend/: python -m pytest tests
+"""
+
+import gc
+import uuid
+import pytest
+from fastapi.testclient import TestClient
+from app import app
+from services import ingest
+
+
+@pytest.fixture
+def token(monkeypatch):
+    monkeypatch.setenv("TRUSTED_INGEST_TOKEN", "ingest-secret")
+    return "ingest-secret"
+
+
+def _headers(token: str, fingerprint: str = ingest.SCHEMA_FINGERPRINT):
+    return {"X-Ingest-Token": token, "X-Schema-Fingerprint": fingerprint}
+
+
+def _traces(prefix: str, count: int = 2):
+    return {"traces": [{"id": f"{prefix}_{i}", "user_input": "q", "agent_output": "a"} for i in range(count)]}
+
+
+def test_trusted_ingest_is_disabled_without_a_token(monkeypatch):
+    monkeypatch.delenv("TRUSTED_INGEST_TOKEN", raising=False)
+    with TestClient(app) as client:
+        response = client.post("/api/ingest/traces", json=_traces("off"), headers=_headers(""))
+        assert response.status_code == 403
+
+
+def test_wrong_token_and_fingerprint_are_rejected(token):
+    prefix = f"ingest_{uuid.uuid4().hex[:8]}"
+    with TestClient(app) as client:
+        assert client.get("/api/ingest/schema").json()["fingerprint"] == ingest.SCHEMA_FINGERPRINT
+
+        response = client.post("/api/ingest/traces", json=_traces(prefix), headers=_headers("wrong"))
+        assert response.status_code == 403
+        response = client.post("/api/ingest/traces", json=_traces(prefix), headers=_headers(token, "stale"))
+        assert response.status_code == 409
+        response = client.post("/api/ingest/traces", json=_traces(prefix), headers={"X-Ingest-Token": token})
+        assert response.status_code == 409
+        assert client.get(f"/api/traces/{prefix}_0").status_code == 404
+
+        response = client.post("/api/ingest/traces", json=_traces(prefix), headers=_headers(token))
+        assert response.status_code == 200
+        assert response.json()["imported_count"] == 2
+        assert client.get(f"/api/traces/{prefix}_1").json()["user_input"] == "q"
+
+
+def test_invalid_bodies_get_fastapi_validation_errors(token):
+    assert gc.isenabled()
+    with TestClient(app) as client:
+        response = client.post(
+            "/api/ingest/traces",
+            json={"traces": [{"id": "bad", "user_input": "q"}]},
+            headers=_headers(token)
+        )
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["loc"] == ["body", "traces", 0, "agent_output"]
+
+        response = client.post("/api/ingest/sessions", content=b"{not json", headers=_headers(token))
+        assert response.status_code == 422
+    # Collection is resumed after a failed validation
+    assert gc.isenabled()
+
+
+def test_trusted_session_ingest(token):
+    prefix = f"ingest_{uuid.uuid4().hex[:8]}"
+    with TestClient(app) as client:
+        response = client.post(
+            "/api/ingest/sessions",
+            json={"name": "Trusted", **_traces(prefix, 3)},
+            headers=_headers(token)
+        )
+        assert response.status_code == 200
+        session_id = response.json()["session"]["id"]
+        assert client.get(f"/api/sessions/{session_id}").json()["total_traces"] == 3
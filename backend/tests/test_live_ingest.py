@@ -0,0 +1,62 @@
+"""Live ingest flushing while requests read the store.
+
+Run from backend/: python -m pytest tests
+"""
+
+import asyncio
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from fastapi.testclient import TestClient
+from app import app
+from routes import live_ingest
+from services import ingest
+
+TOKEN = "live-test-token"
+
+
+def test_queries_run_safely_while_batches_are_flushed(monkeypatch):
+    monkeypatch.setenv("TRUSTED_INGEST_TOKEN", TOKEN)
+    monkeypatch.setattr(live_ingest.queue, "batch_size", 20)
+    # Batches must be stored on the event loop, between requests
+    sink = live_ingest.queue.sink
+    off_loop = []
+
+    def checked_sink(batch):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            off_loop.append(len(batch))
+        sink(batch)
+
+    monkeypatch.setattr(live_ingest.queue, "sink", checked_sink)
+    prefix = f"live_{uuid.uuid4().hex[:8]}"
+    headers = {"X-Ingest-Token": TOKEN, "X-Schema-Fingerprint": ingest.SCHEMA_FINGERPRINT}
+
+    with TestClient(app) as client:
+        def push(batch: int) -> int:
+            traces = [
+                {"id": f"{prefix}_{batch}_{i}", "user_input": "q", "agent_output": "a"}
+                for i in range(50)
+            ]
+            return client.post("/api/ingest/live/traces", json={"traces": traces}, headers=headers).status_code
+
+        def query(_: int) -> int:
+            status = client.get("/api/traces/", params={"q": "reviewed:false", "view": "ids"}).status_code
+            assert client.get("/api/ingest/live/status").status_code == 200
+            return status
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            pushes = pool.map(push, range(20))
+            queries = pool.map(query, range(40))
+            assert set(pushes) == {202}
+            assert set(queries) == {200}
+
+        deadline = time.monotonic() + 10
+        while live_ingest.queue.pending and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        ids = client.get("/api/traces/", params={"q": "reviewed:false", "view": "ids"}).json()
+        stored = [trace_id for trace_id in ids["trace_ids"] if trace_id.startswith(prefix)]
+        assert len(stored) == 20 * 50
+        assert off_loop == []
@@ -0,0 +1,58 @@
+"""Prometheus metrics: exposition format and per-route request instrumentation.
+
+Run from backend/: python -m pytest tests
+"""
+
+import re
+import uuid
+from typing import Dict
+from fastapi.testclient import TestClient
+from app import app
+from services import metrics
+
+
+def _samples(text: str) -> Dict[str, float]:
+    """Sample name with labels -> value, from Prometheus text exposition."""
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, _, value = line.rpartition(" ")
+            samples[name] = float(value)
+    return samples
+
+
+def test_histogram_buckets_are_cumulative(monkeypatch):
+    monkeypatch.setattr(metrics, "_registry", [])
+    histogram = metrics.Histogram("test_seconds", "Test histogram", ("op",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 5.0):
+        histogram.observe(value, op='say "hi"')
+
+    text = metrics.render()
+    assert "# TYPE test_seconds histogram" in text
+    assert _samples(text) == {
+        'test_seconds_bucket{op="say \\"hi\\"",le="0.1"}': 2,
+        'test_seconds_bucket{op="say \\"hi\\"",le="1.0"}': 3,
+        'test_seconds_bucket{op="say \\"hi\\"",le="+Inf"}': 4,
+        'test_seconds_sum{op="say \\"hi\\""}': 5.65,
+        'test_seconds_count{op="say \\"hi\\""}': 4,
+    }
+
+
+def test_requests_are_counted_by_route_template():
+    with TestClient(app) as client:
+        before = _samples(client.get("/metrics").text)
+        for _ in range(2):
+            trace_id = f"missing_{uuid.uuid4().hex[:8]}"
+            assert client.get(f"/api/traces/{trace_id}").status_code == 404
+
+        response = client.get("/metrics")
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        after = _samples(response.text)
+
+    key = 'evalswipe_http_requests_total{method="GET",route="/api/traces/{trace_id}",status="404"}'
+    assert after[key] - before.get(key, 0) == 2
+    count = 'evalswipe_http_request_duration_seconds_count{method="GET",route="/api/traces/{trace_id}"}'
+    assert after[count] - before.get(count, 0) == 2
+    # Raw paths never become labels
+    assert not any(re.search(r"missing_[0-9a-f]{8}", name) for name in after)
+    assert 'evalswipe_entities{kind="traces"}' in after
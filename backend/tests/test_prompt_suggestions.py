@@ -0,0 +1,107 @@
+"""Prompt suggestions: concurrent upstream requests and server-sent events.
+
+Run from backend/: python -m pytest tests
+"""
+
+import asyncio
+import json
+import re
+from types import SimpleNamespace
+from typing import Any, Dict, List, Tuple
+import pytest
+from fastapi.testclient import TestClient
+from app import app
+from routes import prompt_improvement
+
+NUM_SUGGESTIONS = 3
+
+
+class _Stream:
+    """Fake Anthropic message stream replying with one suggestion in chunks."""
+
+    def __init__(self, upstream: "_Upstream", version: int):
+        self.upstream = upstream
+        self.version = version
+
+    async def __aenter__(self):
+        self.upstream.started += 1
+        if self.upstream.started == NUM_SUGGESTIONS:
+            self.upstream.all_started.set()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    @property
+    async def text_stream(self):
+        # Every request is in flight before any replies
+        await asyncio.wait_for(self.upstream.all_started.wait(), timeout=5)
+        reply = json.dumps({
+            "improved_prompt": f"Prompt {self.version}",
+            "changes_made": ["Clearer"],
+            "targeted_failures": ["Tone"]
+        })[1:]
+        for start in range(0, len(reply), 10):
+            yield reply[start:start + 10]
+            await asyncio.sleep(0)
+
+    async def get_final_message(self):
+        truncated = self.version in self.upstream.truncated
+        return SimpleNamespace(stop_reason="max_tokens" if truncated else "end_turn")
+
+
+class _Upstream:
+    def __init__(self, truncated: Tuple[int, ...] = ()):
+        self.truncated = truncated
+        self.started = 0
+        self.all_started = asyncio.Event()
+        self.messages = SimpleNamespace(stream=self.stream)
+
+    def stream(self, messages: List[Dict[str, Any]], **kwargs):
+        version = int(re.search(r"variation (\d+) of", messages[0]["content"]).group(1))
+        return _Stream(self, version)
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    monkeypatch.setattr(prompt_improvement, "PARTIAL_INTERVAL", 0.0)
+    fake = _Upstream(truncated=(2,))
+    monkeypatch.setattr(prompt_improvement, "_client", lambda: fake)
+    return fake
+
+
+def _events(body: str) -> List[Tuple[str, Any]]:
+    events = []
+    for block in body.strip().split("\n\n"):
+        event, data = block.split("\n", 1)
+        events.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+_REQUEST = {"current_prompt": "Be helpful.", "target_failure_modes": [], "num_suggestions": NUM_SUGGESTIONS}
+
+
+def test_suggestions_are_requested_concurrently(upstream):
+    with TestClient(app) as client:
+        response = client.post("/api/prompt-improvement/suggest", json=_REQUEST)
+        assert response.status_code == 200
+        body = response.json()
+    assert [s["version"] for s in body["suggestions"]] == [1, 3]
+    assert body["suggestions"][0]["improved_prompt"] == "Prompt 1"
+    assert len(body["errors"]) == 1 and "cut off" in body["errors"][0]
+
+
+def test_stream_sends_each_suggestion_as_an_event(upstream):
+    with TestClient(app) as client:
+        response = client.post("/api/prompt-improvement/suggest/stream", json=_REQUEST)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert "content-encoding" not in response.headers
+        events = _events(response.text)
+
+    names = [name for name, _ in events]
+    assert names[0] == "start" and names[-1] == "done"
+    assert "partial" in names
+    assert sorted(data["version"] for name, data in events if name == "suggestion") == [1, 3]
+    assert [data["version"] for name, data in events if name == "error"] == [2]
+    assert events[-1][1]["completed"] == 2 and events[-1][1]["failed"] == 1
@@ -0,0 +1,104 @@
+"""Replay of failing traces: selection, the worker pool, caching and replay sessions.
+
+Run from backend/: python -m pytest tests
+"""
+
+import asyncio
+import uuid
+from fastapi.testclient import TestClient
+from app import app
+from models import Trace
+from services import replay
+from services.replay import ReplayBackend, ResponseCache
+
+
+def _trace(trace_id: str, user_input: str, pass_fail: str = "fail", tags=("tone",)) -> Trace:
+    return Trace(id=trace_id, user_input=user_input, agent_output="old", reviewed=True,
+                 pass_fail=pass_fail, axial_tags=list(tags))
+
+
+def test_select_traces_keeps_tagged_failures_once_per_input():
+    traces = [
+        _trace("t0", "q0"),
+        _trace("t1", "q0"),
+        _trace("t2", "q2", tags=("other",)),
+        _trace("t3", "q3", pass_fail="pass"),
+        _trace("t4", "q4"),
+    ]
+    assert [t.id for t in replay.select_traces(traces, ["tone"])] == ["t0", "t4"]
+    assert [t.id for t in replay.select_traces(traces, ["tone"], limit=1)] == ["t0"]
+    assert [t.id for t in replay.select_traces(traces, [], trace_ids=["t1", "t3"])] == ["t1", "t3"]
+
+
+class _CountingBackend(ReplayBackend):
+    name = "counting"
+
+    def __init__(self):
+        super().__init__("counting")
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def complete(self, system_prompt: str, user_input: str) -> str:
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        if user_input == "boom":
+            raise RuntimeError("upstream failed")
+        return user_input.upper()
+
+
+def test_replay_runs_a_bounded_pool_and_caches_responses():
+    traces = [_trace(f"t{i}", f"q{i}") for i in range(6)] + [_trace("bad", "boom")]
+    backend = _CountingBackend()
+    cache = ResponseCache()
+
+    results = asyncio.run(replay.replay(traces, "Be brief.", backend, concurrency=3, cache=cache))
+    assert [r["trace_id"] for r in results] == [t.id for t in traces]
+    assert results[0]["replayed_output"] == "Q0"
+    assert results[-1]["error"] == "upstream failed"
+    assert backend.max_in_flight == 3
+    assert replay.summarize(results) == {"replayed": 7, "errors": 1, "cached": 0, "changed": 6}
+
+    # Only the failed input is run again; a different prompt misses the cache
+    results = asyncio.run(replay.replay(traces, "Be brief.", backend, concurrency=3, cache=cache))
+    assert backend.calls == 8
+    assert replay.summarize(results)["cached"] == 6
+    asyncio.run(replay.replay(traces[:1], "Be verbose.", backend, cache=cache))
+    assert backend.calls == 9
+
+
+def test_replay_endpoint_with_the_stub_backend_creates_a_session():
+    prefix = f"replay_{uuid.uuid4().hex[:8]}"
+    prompt = f"Be kind ({prefix})."
+    with TestClient(app) as client:
+        tag_id = client.post("/api/tags/", json={
+            "name": f"Tag {uuid.uuid4().hex[:8]}",
+            "description": "A tag for the replay test"
+        }).json()["tag"]["id"]
+        client.post("/api/traces/import", json={"traces": [
+            {"id": f"{prefix}_{i}", "user_input": f"{prefix} q{i}", "agent_output": "old"} for i in range(3)
+        ]})
+        for i in range(2):
+            client.post("/api/annotations/", json={"trace_id": f"{prefix}_{i}", "pass_fail": "fail", "axial_tags": [tag_id]})
+
+        request = {"prompt": prompt, "target_failure_modes": [tag_id], "backend": "stub", "create_session": True}
+        response = client.post("/api/prompt-improvement/replay", json=request)
+        assert response.status_code == 200
+        body = response.json()
+        assert [r["trace_id"] for r in body["results"]] == [f"{prefix}_0", f"{prefix}_1"]
+        assert body["summary"]["changed"] == 2
+        session = client.get(f"/api/sessions/{body['session']['id']}?view=full").json()
+        assert [t["metadata"]["replay"]["source_trace_id"] for t in session["traces"]] == [f"{prefix}_0", f"{prefix}_1"]
+        assert all(not t["reviewed"] for t in session["traces"])
+
+        # The stub is deterministic, so a rerun is served from the cache
+        again = client.post("/api/prompt-improvement/replay", json={**request, "create_session": False}).json()
+        assert again["summary"]["cached"] == 2
+        assert [r["replayed_output"] for r in again["results"]] == [r["replayed_output"] for r in body["results"]]
+
+        assert client.post("/api/prompt-improvement/replay", json={**request, "backend": "nope"}).status_code == 400
+        response = client.post("/api/prompt-improvement/replay", json={"prompt": prompt, "backend": "stub"})
+        assert response.status_code == 400
@@ -0,0 +1,67 @@
+"""Review statistics: failure-rate estimates, per-tag rates and the stopping signal.
+
+Run from backend/: python -m pytest tests
+"""
+
+import uuid
+from typing import List
+from fastapi.testclient import TestClient
+from app import app
+from services.review_stats import verdicts_needed
+
+
+def test_verdicts_needed():
+    assert verdicts_needed(0.5, 0, 0.02) == 2401
+    # Finite population correction
+    assert verdicts_needed(0.5, 1000, 0.02) == 707
+    # Never more than the population, never fewer than MIN_VERDICTS
+    assert verdicts_needed(0.5, 10, 0.02) == 10
+    assert verdicts_needed(0.01, 0, 0.05) == 30
+
+
+def _annotate(client: TestClient, trace_ids: List[str], pass_fail: str, tags: List[str] = ()) -> None:
+    for trace_id in trace_ids:
+        response = client.post("/api/annotations/", json={
+            "trace_id": trace_id, "pass_fail": pass_fail, "axial_tags": list(tags)
+        })
+        assert response.status_code == 200
+
+
+def test_stopping_signal_follows_annotations():
+    prefix = f"stats_{uuid.uuid4().hex[:8]}"
+    trace_ids = [f"{prefix}_{i}" for i in range(40)]
+    with TestClient(app) as client:
+        response = client.post("/api/tags/", json={
+            "name": f"Tag {uuid.uuid4().hex[:8]}",
+            "description": "A tag for the review statistics test"
+        })
+        tag_id = response.json()["tag"]["id"]
+        response = client.post("/api/sessions/", json={
+            "name": "Stopping",
+            "traces": [{"id": trace_id, "user_input": "q", "agent_output": "a"} for trace_id in trace_ids]
+        })
+        url = f"/api/sessions/{response.json()['session']['id']}/estimates"
+
+        stopping = client.get(url).json()["stopping"]
+        assert (stopping["converged"], stopping["margin"], stopping["unreviewed"]) == (False, None, 40)
+
+        _annotate(client, trace_ids[:4], "fail", [tag_id])
+        _annotate(client, trace_ids[4:20], "pass")
+        _annotate(client, trace_ids[20:21], "defer")
+        report = client.get(url).json()
+        assert (report["reviewed"], report["failed"]) == (20, 4)
+        assert [(tag["tag_id"], tag["failures"], tag["rate"]) for tag in report["tags"]] == [(tag_id, 4, 0.2)]
+        stopping = report["stopping"]
+        # Too few verdicts to stop, however wide the target
+        assert stopping["converged"] is False
+        assert stopping["additional_verdicts"] > 0
+        assert stopping["unreviewed"] == 19
+
+        _annotate(client, trace_ids[21:], "pass")
+        stopping = client.get(url).json()["stopping"]
+        assert stopping["converged"] is True
+        assert stopping["margin"] <= stopping["target_margin"]
+        assert (stopping["additional_verdicts"], stopping["unreviewed"]) == (0, 0)
+
+        stopping = client.get(url, params={"target_margin": 0.001}).json()["stopping"]
+        assert (stopping["converged"], stopping["exhausted"]) == (False, True)
@@ -0,0 +1,117 @@
+"""Sample allocation, strata, review order, intervals and streaming into sampled sessions.
+
+Run from backend/: python -m pytest tests
+"""
+
+import uuid
+from typing import List
+import pytest
+from fastapi.testclient import TestClient
+from app import app
+from models import SamplingConfig, SamplingState, Trace
+from services import sampling
+from services.event_log import event_log
+
+
+def _traces(prefix: str, count: int, **metadata) -> List[Trace]:
+    return [
+        Trace(id=f"{prefix}_{i}", user_input="q", agent_output="a", metadata=dict(metadata))
+        for i in range(count)
+    ]
+
+
+def test_allocation_gives_every_stratum_a_trace_and_redistributes_capacity():
+    assert sampling.allocate({"a": 90, "b": 10}, 10, "proportional") == {"a": 8, "b": 2}
+    # b has only 2 traces, so equal allocation gives its share to a
+    assert sampling.allocate({"a": 100, "b": 2}, 10, "equal") == {"a": 8, "b": 2}
+    assert sampling.allocate({"a": 5, "b": 5, "c": 0}, 2, "equal") == {"a": 1, "b": 1, "c": 0}
+    assert sampling.allocate({"a": 3}, 10, "proportional") == {"a": 3}
+
+
+def test_strata_bucket_numbers_and_default_to_quartiles():
+    config = SamplingConfig(size=10, strata=["model", "latency"], buckets={"latency": [500, 1000]})
+    state = SamplingState(config=config, buckets=sampling.resolve_buckets(config, []))
+    trace = Trace(id="t", user_input="q", agent_output="a", metadata={"model": "v2", "latency": 700})
+    assert sampling.stratum_of(trace, state) == "model=v2|latency=500-1000"
+    assert sampling.stratum_of(trace.model_copy(update={"metadata": {}}), state) == "model=none|latency=none"
+
+    traces = [
+        Trace(id=f"t{i}", user_input="q", agent_output="a", metadata={"latency": i}) for i in range(100)
+    ]
+    assert sampling.resolve_buckets(SamplingConfig(size=10, strata=["latency"]), traces) == {
+        "latency": [25.0, 50.0, 75.0]
+    }
+
+
+def test_streamed_sample_matches_a_sample_of_all_traces():
+    config = SamplingConfig(method="reservoir", size=10, seed=7)
+    traces = _traces("s", 60)
+    sample, _ = sampling.create_sample(traces, config)
+
+    streamed, state = [], SamplingState(config=config)
+    for start in range(0, 60, 15):
+        streamed, state = sampling.extend_sample(streamed, traces[start:start + 15], state)
+
+    assert state.population == 60
+    assert {trace.id for trace in streamed} == {trace.id for trace in sample}
+
+
+def test_review_order_puts_reviewed_first_and_prefers_unreviewed_strata():
+    config = SamplingConfig(size=10, strata=["model"])
+    reviewed = [
+        t.model_copy(update={"reviewed": True, "pass_fail": "pass"}) for t in _traces("a", 3, model="a")
+    ]
+    traces = reviewed + _traces("a_new", 3, model="a") + _traces("b", 3, model="b")
+    state = sampling.observe(SamplingState(config=config), traces)
+
+    ordered = sampling.review_order(traces, state, include_reviewed=True)
+    assert ordered[:3] == reviewed
+    # Stratum b has no verdicts yet, so its estimate gains most from a review
+    assert ordered[3].metadata["model"] == "b"
+    assert len(sampling.review_order(traces, state)) == 6
+
+
+def test_wilson_interval():
+    assert sampling.wilson_interval(0, 0) == (0.0, 1.0)
+    low, high = sampling.wilson_interval(5, 10)
+    assert low == pytest.approx(0.2366, abs=1e-4)
+    assert high == pytest.approx(0.7634, abs=1e-4)
+    low, high = sampling.wilson_interval(0, 20)
+    assert low == 0.0
+    assert high == pytest.approx(0.1611, abs=1e-4)
+
+
+def test_streaming_logs_trace_ids_instead_of_the_session(monkeypatch):
+    committed = []
+    commit = event_log.commit
+
+    def recording_commit(event_type, data, store=None):
+        committed.append((event_type, data))
+        return commit(event_type, data, store)
+
+    prefix = f"stream_{uuid.uuid4().hex[:8]}"
+    with TestClient(app) as client:
+        response = client.post("/api/sessions/", json={
+            "name": "Stream",
+            "traces": [],
+            "config": {"sampling": {"method": "reservoir", "size": 5}}
+        })
+        session_id = response.json()["session"]["id"]
+
+        monkeypatch.setattr(event_log, "commit", recording_commit)
+        for batch in range(3):
+            traces = [
+                {"id": f"{prefix}_{batch}_{i}", "user_input": "q", "agent_output": "a"} for i in range(10)
+            ]
+            response = client.post(f"/api/sessions/{session_id}/sample", json={"traces": traces})
+            assert response.status_code == 200
+        assert response.json()["population"] == 30
+
+        assert "session.update" not in [event_type for event_type, _ in committed]
+        appends = [data for event_type, data in committed if event_type == "session.append"]
+        assert len(appends) == 3
+        assert all(len(data["trace_ids"]) <= 5 for data in appends)
+
+        session = client.get(f"/api/sessions/{session_id}?view=full").json()
+        assert session["total_traces"] == 5
+        assert session["sampling"]["population"] == 30
@@ -0,0 +1,86 @@
+"""Session file round trips, malformed files and tag mapping on import.
+
+Run from backend/: python -m pytest tests
+"""
+
+import json
+import struct
+import uuid
+from datetime import datetime, timezone
+import pytest
+from fastapi.testclient import TestClient
+from app import app
+from models import AxialTag, Session, Trace
+from services.session_file import HEADER_SIZE, SessionFile, SessionFileError, write_session_file
+
+
+def _session(traces, tags=()) -> Session:
+    return Session(id="session_file", name="File", traces=list(traces), axial_tags=list(tags))
+
+
+def test_columns_keep_empty_strings_and_reviewed_at(tmp_path):
+    reviewed_at = datetime(2025, 1, 15, 10, 35, 0, 123456, tzinfo=timezone.utc)
+    path = str(tmp_path / "s.evsession")
+    write_session_file(path, _session([
+        Trace(id="t0", user_input="q", agent_output="a", reviewed=True, pass_fail="pass",
+              open_code="", reviewer_id="r", reviewed_at=reviewed_at),
+        Trace(id="t1", user_input="q", agent_output="a"),
+    ]))
+
+    with SessionFile(path) as session_file:
+        first, second = session_file.review(0), session_file.review(1)
+    assert first["open_code"] == ""
+    assert first["reviewed_at"] == reviewed_at
+    assert second["open_code"] is None
+    assert second["reviewed_at"] is None
+
+
+def test_malformed_table_of_contents_is_a_session_file_error(tmp_path):
+    path = str(tmp_path / "s.evsession")
+    write_session_file(path, _session([Trace(id="t0", user_input="q", agent_output="a")]))
+    with open(path, "r+b") as f:
+        header = f.read(HEADER_SIZE)
+        toc_offset, toc_length = struct.unpack_from("<QQ", header, 24)
+        f.seek(toc_offset)
+        toc = json.loads(f.read(toc_length))
+        toc["sections"]["trace_offsets"][2] = "nope"
+        body = json.dumps(toc).encode()
+        f.seek(toc_offset)
+        f.write(body)
+        f.truncate()
+        f.seek(0)
+        f.write(header[:32] + struct.pack("<Q", len(body)) + header[40:])
+
+    with pytest.raises(SessionFileError):
+        SessionFile(path)
+
+
+def test_import_maps_file_tags_to_existing_tags_by_name(tmp_path):
+    suffix = uuid.uuid4().hex[:8]
+    with TestClient(app) as client:
+        existing = client.post("/api/tags/", json={
+            "name": f"Wrong tool {suffix}",
+            "description": "The agent called the wrong tool for the task"
+        }).json()
+        existing_id = existing.get("id") or existing["tag"]["id"]
+
+        file_tag = AxialTag(
+            id=f"tag_file_{suffix}",
+            name=f"wrong TOOL {suffix}",
+            description="The same tag under another ID in the file"
+        )
+        path = str(tmp_path / "s.evsession")
+        write_session_file(path, _session([
+            Trace(id=f"t_{suffix}", user_input="q", agent_output="a", reviewed=True,
+                  pass_fail="fail", axial_tags=[file_tag.id])
+        ], [file_tag]))
+
+        with open(path, "rb") as f:
+            response = client.post(
+                "/api/sessions/import-file?view=full",
+                files={"file": ("s.evsession", f, "application/octet-stream")}
+            )
+        assert response.status_code == 200
+        trace = response.json()["session"]["traces"][0]
+        assert trace["axial_tags"] == [existing_id]
+        assert file_tag.id not in [tag["id"] for tag in client.get("/api/tags/").json()["tags"]]
@@ -0,0 +1,63 @@
+"""Forking sessions.
+
+Run from backend/: python -m pytest tests
+"""
+
+import uuid
+from typing import List, Tuple
+from fastapi.testclient import TestClient
+from app import app
+
+
+def _new_session(client: TestClient, count: int) -> Tuple[str, List[str]]:
+    """A new session of count traces: (session ID, trace IDs)."""
+    trace_ids = [f"trace_{uuid.uuid4().hex[:8]}" for _ in range(count)]
+    response = client.post("/api/sessions/", json={
+        "name": "Fork",
+        "traces": [{"id": trace_id, "user_input": "q", "agent_output": "a"} for trace_id in trace_ids]
+    })
+    assert response.status_code == 200
+    return response.json()["session"]["id"], trace_ids
+
+
+def _annotate(client: TestClient, trace_id: str, pass_fail: str, session_id: str = None) -> None:
+    response = client.post("/api/annotations/", json={
+        "trace_id": trace_id, "pass_fail": pass_fail, "session_id": session_id
+    })
+    assert response.status_code == 200
+
+
+def test_fork_returns_metadata_and_shares_the_parent_traces():
+    with TestClient(app) as client:
+        parent_id, trace_ids = _new_session(client, 3)
+        _annotate(client, trace_ids[0], "fail")
+
+        response = client.post(f"/api/sessions/{parent_id}/fork", json={})
+        assert response.status_code == 200
+        fork = response.json()["session"]
+        assert "traces" not in fork
+        assert (fork["parent_id"], fork["total_traces"], fork["reviewed_count"]) == (parent_id, 3, 0)
+
+        full = client.get(f"/api/sessions/{fork['id']}?view=full").json()
+        assert [trace["id"] for trace in full["traces"]] == trace_ids
+        assert not any(trace["reviewed"] for trace in full["traces"])
+
+
+def test_fork_of_a_fork_keeps_its_annotations_and_filter():
+    with TestClient(app) as client:
+        parent_id, trace_ids = _new_session(client, 3)
+        fork_id = client.post(f"/api/sessions/{parent_id}/fork", json={}).json()["session"]["id"]
+        _annotate(client, trace_ids[0], "fail", fork_id)
+        _annotate(client, trace_ids[1], "pass", fork_id)
+
+        second = client.post(f"/api/sessions/{fork_id}/fork", json={
+            "trace_ids": [trace_ids[0], trace_ids[2], "not_in_session"],
+            "keep_annotations": True
+        }).json()["session"]
+        assert (second["total_traces"], second["reviewed_count"], second["failed_count"]) == (2, 1, 1)
+
+        # Traces outside a filtered fork cannot be annotated in it
+        response = client.post("/api/annotations/", json={
+            "trace_id": trace_ids[1], "pass_fail": "pass", "session_id": second["id"]
+        })
+        assert response.status_code == 404
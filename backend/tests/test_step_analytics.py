@@ -0,0 +1,95 @@
+"""Step analytics: measurements, quantile accuracy and the incrementally maintained sketches.
+
+Run from backend/: python -m pytest tests
+"""
+
+from datetime import datetime, timedelta
+import pytest
+from models import Trace, TraceStep
+from services import step_analytics
+from services.event_log import EventLog, Store
+from services.step_analytics import RELATIVE_ACCURACY, DDSketch, StepAnalytics, measurements
+
+
+def test_step_measurements_fall_back_to_timestamps():
+    start = datetime(2024, 1, 1, 12)
+    trace = Trace(id="t", user_input="q", agent_output="a", metadata={"latency_ms": 900}, intermediate_steps=[
+        TraceStep(step_type="tool_call", content="search", timestamp=start, metadata={"tool": "search", "token_count": 12}),
+        TraceStep(step_type="llm_call", content="answer", timestamp=start + timedelta(milliseconds=250),
+                  metadata={"latency_ms": 400}),
+    ])
+    assert sorted(measurements(trace)) == sorted([
+        ("trace", "trace", "latency_ms", 900.0),
+        ("step_type", "tool_call", "latency_ms", 250.0),
+        ("tool", "search", "latency_ms", 250.0),
+        ("step_type", "tool_call", "tokens", 12.0),
+        ("tool", "search", "tokens", 12.0),
+        ("step_type", "llm_call", "latency_ms", 400.0),
+    ])
+
+
+def test_quantiles_are_within_the_relative_accuracy():
+    sketch = DDSketch()
+    values = [float(v) for v in range(1, 1001)]
+    for value in values:
+        sketch.add(value)
+    for q in (0.5, 0.9, 0.99):
+        exact = values[int(q * (len(values) - 1))]
+        assert sketch.quantile(q) == pytest.approx(exact, rel=RELATIVE_ACCURACY)
+
+    for value in values[500:]:
+        sketch.remove(value)
+    assert sketch.count == 500
+    assert sketch.quantile(1.0) == pytest.approx(500, rel=RELATIVE_ACCURACY)
+
+
+def _sketches(analytics: StepAnalytics):
+    return {key: (sketch.count, sketch.zero_count, dict(sketch.bins), round(sketch.sum, 6))
+            for key, sketch in analytics.sketches.items()}
+
+
+@pytest.fixture
+def live_analytics():
+    """The module's live statistics, over a private store, reset afterwards."""
+    step_analytics.reset()
+    yield
+    step_analytics.reset()
+
+
+def _trace(i: int, output: str = "a"):
+    return {"id": f"s{i}", "user_input": "q", "agent_output": output, "intermediate_steps": [
+        {"step_type": "tool_call", "content": "c", "metadata": {"tool": f"tool_{i % 2}", "latency_ms": 10 * (i + 1)}},
+        {"step_type": "llm_call", "content": "c", "metadata": {"latency_ms": 100 + i, "token_count": 50 * i}},
+    ]}
+
+
+def test_sketches_match_a_rebuild_after_events(live_analytics):
+    log = EventLog()
+    store = Store()
+    for tag_id in ("tag_a", "tag_b"):
+        log.commit("tag.create", {"tag": {"id": tag_id, "name": tag_id, "description": "A tag for the analytics test"}}, store)
+    log.commit("trace.import", {"traces": [_trace(i) for i in range(6)]}, store)
+    analytics = step_analytics.analytics_for(store.traces)
+
+    def annotate(trace_id, pass_fail, tags):
+        log.commit("annotation.set", {"trace_id": trace_id, "previous": {}, "state": {
+            "reviewed": True, "pass_fail": pass_fail, "axial_tags": tags, "reviewed_at": datetime(2024, 1, 2)
+        }}, store)
+
+    annotate("s0", "fail", ["tag_a"])
+    annotate("s1", "fail", ["tag_a", "tag_b"])
+    annotate("s2", "pass", [])
+    annotate("s2", "fail", ["tag_b"])
+    log.commit("trace.delete", {"trace_id": "s3"}, store)
+    # Re-imported with different steps
+    log.commit("trace.import", {"traces": [{**_trace(10, "b"), "id": "s4"}, _trace(6)]}, store)
+    log.commit("tag.merge", {"source_tag_id": "tag_a", "target_tag_id": "tag_b"}, store)
+    annotate("s5", "fail", ["tag_b"])
+    log.commit("tag.delete", {"tag_id": "tag_b"}, store)
+    log.commit("annotation.clear", {"trace_id": "s0", "previous": {}, "state": {"reviewed": False}}, store)
+
+    assert step_analytics.analytics_for(store.traces) is analytics
+    rebuilt = StepAnalytics(store.traces.values())
+    assert _sketches(analytics) == _sketches(rebuilt)
+    for cohort in ("all", "fail", "pass", "unreviewed"):
+        assert analytics.report("tool", "latency_ms", [cohort]) == rebuilt.report("tool", "latency_ms", [cohort])
@@ -0,0 +1,121 @@
+"""Trace query parsing, ranges and errors, and the incrementally maintained index.
+
+Run from backend/: python -m pytest tests
+"""
+
+from datetime import datetime
+import pytest
+from models import Trace
+from services import trace_query
+from services.event_log import EventLog, Store
+from services.trace_query import QueryError, TraceIndex, parse, select_from
+
+
+def _term(field: str, value: str):
+    return ("term", field, value)
+
+
+def test_and_binds_tighter_than_or():
+    assert parse("a OR b c") == ("or", [_term("text", "a"), ("and", [_term("text", "b"), _term("text", "c")])])
+    assert parse("(a OR b) AND c") == ("and", [("or", [_term("text", "a"), _term("text", "b")]), _term("text", "c")])
+
+
+def test_not_and_minus_negate_one_term():
+    assert parse("NOT reviewed:true pass_fail:fail") == (
+        "and", [("not", _term("reviewed", "true")), _term("pass_fail", "fail")]
+    )
+    assert parse("-model_version:gpt-4o") == ("not", _term("model_version", "gpt-4o"))
+    assert parse("NOT NOT a") == ("not", ("not", _term("text", "a")))
+    # Field aliases and quoted values
+    assert parse('verdict:pass tag:"Tone Mismatch"') == (
+        "and", [_term("pass_fail", "pass"), _term("tag", '"Tone Mismatch"')]
+    )
+
+
+@pytest.mark.parametrize("query", [
+    "", "(a", "a)", "a OR", "NOT", "pass_fail:maybe", "reviewed:perhaps",
+    "latency_ms:abc", "reviewed_at:yesterday", "nope:1", "tag:",
+])
+def test_invalid_queries_raise_query_error(query):
+    with pytest.raises(QueryError):
+        trace_query.compile_query(query)
+
+
+def _traces():
+    return [
+        Trace(id=f"t{i}", user_input="q", agent_output="a", metadata={"latency_ms": latency},
+              reviewed=True, pass_fail="pass", reviewed_at=datetime(2024, 1, day, 12))
+        for i, (latency, day) in enumerate([(100, 1), (200, 2), (300, 2), (400, 3)])
+    ]
+
+
+@pytest.mark.parametrize("query,expected", [
+    ("latency_ms:200..300", ["t1", "t2"]),
+    ("latency_ms:>200", ["t2", "t3"]),
+    ("latency_ms:>=200", ["t1", "t2", "t3"]),
+    ("latency_ms:<200", ["t0"]),
+    ("latency_ms:..200", ["t0", "t1"]),
+    ("latency_ms:300", ["t2"]),
+    ("reviewed_at:2024-01-02", ["t1", "t2"]),
+    ("reviewed_at:>2024-01-02", ["t3"]),
+    ("reviewed_at:2024-01-01..2024-01-02", ["t0", "t1", "t2"]),
+    ("NOT latency_ms:200..300", ["t0", "t3"]),
+    ("latency_ms:<200 OR latency_ms:>300", ["t0", "t3"]),
+])
+def test_ranges(query, expected):
+    assert [trace.id for trace in select_from(query, _traces())] == expected
+
+
+def _contents(index: TraceIndex):
+    """Index contents by trace ID (row numbers differ between live and rebuilt indexes)."""
+    def ids(bitmap: int):
+        return {index.rows[row].id for row in trace_query.bitmap_rows(bitmap)}
+
+    return (
+        ids(index.alive),
+        {key: ids(bitmap) for key, bitmap in index.postings.items()},
+        {field: sorted((value, index.rows[row].id) for value, row in entries)
+         for field, entries in index.sorted.items() if entries},
+    )
+
+
+@pytest.fixture
+def live_index():
+    """The module's live index, over a private store, reset afterwards."""
+    trace_query.reset()
+    yield
+    trace_query.reset()
+
+
+def test_index_matches_a_rebuild_after_events(live_index):
+    log = EventLog()
+    store = Store()
+    for tag_id in ("tag_a", "tag_b"):
+        log.commit("tag.create", {"tag": {"id": tag_id, "name": tag_id, "description": "A tag for the index test"}}, store)
+    log.commit("trace.import", {"traces": [
+        {"id": f"q{i}", "user_input": "q", "agent_output": "a", "metadata": {"latency_ms": 100 * i}}
+        for i in range(6)
+    ]}, store)
+    index = trace_query.index_for(store.traces)
+
+    def annotate(trace_id, pass_fail, tags, reviewer_id):
+        log.commit("annotation.set", {"trace_id": trace_id, "previous": {}, "state": {
+            "reviewed": True, "pass_fail": pass_fail, "axial_tags": tags,
+            "reviewer_id": reviewer_id, "reviewed_at": datetime(2024, 1, 2)
+        }}, store)
+
+    annotate("q0", "fail", ["tag_a"], "alice")
+    annotate("q1", "fail", ["tag_a", "tag_b"], "bob")
+    annotate("q2", "pass", [], "alice")
+    annotate("q2", "defer", [], "bob")
+    log.commit("tag.merge", {"source_tag_id": "tag_a", "target_tag_id": "tag_b"}, store)
+    log.commit("trace.delete", {"trace_id": "q3"}, store)
+    log.commit("trace.import", {"traces": [
+        {"id": "q4", "user_input": "q", "agent_output": "a", "metadata": {"latency_ms": 50}}
+    ]}, store)
+    log.commit("tag.delete", {"tag_id": "tag_b"}, store)
+    annotate("q5", "fail", [], "carol")
+
+    assert trace_query.index_for(store.traces) is index
+    assert _contents(index) == _contents(TraceIndex(store.traces.values()))
+    assert [t.id for t in trace_query.select("reviewer:bob OR latency_ms:<100", store.traces)] == ["q0", "q1", "q2", "q4"]
@@ -0,0 +1,32 @@
+"""Trace listing with the legacy reviewed/pass_fail filters.
+
+Run from backend/: python -m pytest tests
+"""
+
+import uuid
+from fastapi.testclient import TestClient
+from app import app
+
+
+def test_legacy_filters_match_exact_values():
+    with TestClient(app) as client:
+        prefix = f"legacy_{uuid.uuid4().hex[:8]}"
+        response = client.post("/api/sessions/", json={
+            "name": "Legacy filters",
+            "traces": [{"id": f"{prefix}_{i}", "user_input": "q", "agent_output": "a"} for i in range(3)]
+        })
+        session_id = response.json()["session"]["id"]
+        client.post("/api/annotations/", json={"trace_id": f"{prefix}_0", "pass_fail": "pass"})
+        client.post("/api/annotations/", json={"trace_id": f"{prefix}_1", "pass_fail": "fail"})
+
+        def ids(**params):
+            response = client.get("/api/traces/", params={"session_id": session_id, "view": "ids", **params})
+            assert response.status_code == 200
+            return response.json()["trace_ids"]
+
+        assert ids(pass_fail="fail") == [f"{prefix}_1"]
+        assert ids(reviewed="false") == [f"{prefix}_2"]
+        assert ids(reviewed="true", q="pass_fail:pass") == [f"{prefix}_0"]
+        # Unknown values (and quotes) match nothing instead of failing to parse
+        assert ids(pass_fail="foo") == []
+        assert ids(pass_fail='fa"il') == []
@@ -40,8 +40,18 @@ class APIClient {
         return this.request(`/traces?${params}`);
     }
 
-    async getTrace(traceId) {
-        return this.request(`/traces/${traceId}`);
+    async getTrace(traceId, { includeSteps = true } = {}) {
+        return this.request(`/traces/${traceId}?include_steps=${includeSteps}`);
+    }
+
+    async getTraceSteps(traceId, offset = 0, limit = 50, maxContentChars = null) {
+        const params = new URLSearchParams({ offset, limit });
+        if (maxContentChars !== null) params.set('max_content_chars', maxContentChars);
+        return this.request(`/traces/${traceId}/steps?${params}`);
+    }
+
+    async getTraceStep(traceId, index) {
+        return this.request(`/traces/${traceId}/steps/${index}`);
     }
 
     async importTraces(traces, sessionConfig = {}) {
@@ -103,8 +113,8 @@ class APIClient {
         return this.request('/sessions');
     }
 
-    async getSession(sessionId) {
-        return this.request(`/sessions/${sessionId}`);
+    async getSession(sessionId, { view = 'summary' } = {}) {
+        return this.request(`/sessions/${sessionId}?view=${view}`);
     }
 
     async createSession(name, traces, config) {
@@ -121,6 +131,27 @@ class APIClient {
         });
     }
 
+    async getSessionChanges(sessionId, since = 0, instance = null) {
+        const params = new URLSearchParams({ since });
+        if (instance) params.set('instance', instance);
+        return this.request(`/sessions/${sessionId}/changes?${params}`);
+    }
+
+    async sampleTraces(sessionId, traces) {
+        return this.request(`/sessions/${sessionId}/sample`, {
+            method: 'POST',
+            body: JSON.stringify({ traces }),
+        });
+    }
+
+    async getNextTraces(sessionId, count = 10) {
+        return this.request(`/sessions/${sessionId}/next?count=${count}`);
+    }
+
+    async getEstimates(sessionId, confidence = 0.95) {
+        return this.request(`/sessions/${sessionId}/estimates?confidence=${confidence}`);
+    }
+
     // Prompt improvement
     async generatePromptSuggestions(request) {
         return this.request('/prompt-improvement/suggest', {
@@ -129,6 +160,51 @@ class APIClient {
         });
     }
 
+    /**
+     * Stream suggestions (server-sent events over a POST); calls onEvent(event, data) per event
+     */
+    async streamPromptSuggestions(request, onEvent) {
+        const response = await fetch(`${API_BASE}/prompt-improvement/suggest/stream`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(request),
+        });
+
+        if (!response.ok) {
+            const error = await response.json().catch(() => ({ detail: 'Request failed' }));
+            throw new Error(error.detail || `HTTP ${response.status}`);
+        }
+
+        const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+        let buffer = '';
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += value;
+
+            let end;
+            while ((end = buffer.indexOf('\n\n')) !== -1) {
+                const message = buffer.slice(0, end);
+                buffer = buffer.slice(end + 2);
+
+                let event = 'message';
+                let data = '';
+                message.split('\n').forEach(line => {
+                    if (line.startsWith('event: ')) event = line.slice(7);
+                    else if (line.startsWith('data: ')) data += line.slice(6);
+                });
+                onEvent(event, data ? JSON.parse(data) : null);
+            }
+        }
+    }
+
+    async replayPrompt(request) {
+        return this.request('/prompt-improvement/replay', {
+            method: 'POST',
+            body: JSON.stringify(request),
+        });
+    }
+
     // Braintrust integration
     async importFromBraintrust(request) {
         return this.request('/braintrust/import', {
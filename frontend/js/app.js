@@ -2,6 +2,17 @@
  * EvalSwipe Main Application Controller
  */
 
+// Fixed row heights for the virtualized lists (must match the CSS)
+const HISTORY_ROW_HEIGHT = 148;
+const STEP_ROW_HEIGHT = 92;
+
+// Steps are fetched in pages of previews; full contents load when opened
+const STEP_PAGE_SIZE = 50;
+const STEP_PREVIEW_CHARS = 300;
+
+// Very long step contents are rendered in chunks
+const STEP_RENDER_CHUNK = 20000;
+
 class EvalSwipeApp {
     constructor() {
         this.currentSession = null;
@@ -10,6 +21,14 @@ class EvalSwipeApp {
         this.tags = [];
         this.currentTrace = null;
         this.undoStack = [];
+        this.historyList = null;
+        this.historyQueryIds = null;
+        this.stepList = null;
+        this.stepPagesLoading = new Set();
+
+        // Server revision the local copy is in sync with (see syncSession)
+        this.revision = 0;
+        this.revisionInstance = null;
 
         this.init();
     }
@@ -23,8 +42,8 @@ class EvalSwipeApp {
         // Set up keyboard shortcuts
         this.setupKeyboardHandlers();
 
-        // Load any existing session from localStorage
-        this.loadLocalSession();
+        // Restore any existing session from IndexedDB
+        await this.loadLocalSession();
 
         console.log('EvalSwipe initialized');
     }
@@ -88,6 +107,16 @@ class EvalSwipeApp {
         document.getElementById('view-history-btn')?.addEventListener('click', () => this.showHistoryView());
         document.getElementById('history-filter')?.addEventListener('change', () => this.filterHistory());
         document.getElementById('history-sort')?.addEventListener('change', () => this.sortHistory());
+        document.getElementById('history-query')?.addEventListener('keydown', (e) => {
+            if (e.key === 'Enter') this.applyHistoryQuery(e.target.value.trim());
+        });
+
+        // Pick up annotations made elsewhere when the tab becomes visible again
+        document.addEventListener('visibilitychange', () => {
+            if (document.visibilityState === 'visible' && this.currentSession) {
+                this.syncSession();
+            }
+        });
     }
 
     setupKeyboardHandlers() {
@@ -175,20 +204,27 @@ class EvalSwipeApp {
     async startSession(name, traces, config = {}) {
         try {
             const response = await apiClient.createSession(name, traces, config);
-            this.currentSession = response.session;
-            this.traces = response.session.traces;
-            this.tags = response.session.axial_tags || [];
-            this.currentTraceIndex = 0;
-
-            this.saveLocalSession();
-            this.showReviewInterface();
-            this.loadTrace(this.currentTraceIndex);
-            this.updateProgress();
+            this.useSession(response.session, response.revision, response.instance);
         } catch (error) {
             throw new Error(`Failed to create session: ${error.message}`);
         }
     }
 
+    useSession(session, revision, instance) {
+        this.currentSession = session;
+        this.traces = session.traces;
+        this.tags = session.axial_tags || [];
+        this.currentTraceIndex = 0;
+        this.historyQueryIds = null;
+        this.revision = revision || 0;
+        this.revisionInstance = instance || null;
+
+        this.saveLocalSession({ full: true });
+        this.showReviewInterface();
+        this.loadTrace(this.currentTraceIndex);
+        this.updateProgress();
+    }
+
     loadTrace(index) {
         if (index < 0 || index >= this.traces.length) {
             this.showToast('No more traces to review', 'info');
@@ -207,29 +243,19 @@ class EvalSwipeApp {
         document.getElementById('trace-id').textContent = trace.id;
         document.getElementById('trace-number').textContent = `${this.currentTraceIndex + 1} / ${this.traces.length}`;
 
-        // Update trace content
-        document.getElementById('user-input-content').innerHTML = this.formatContent(trace.user_input);
-        document.getElementById('agent-output-content').innerHTML = this.formatContent(trace.agent_output);
-
-        // Update details
-        document.getElementById('system-prompt-content').textContent = trace.system_prompt || 'No system prompt';
-
-        // Intermediate steps
-        const stepsContent = document.getElementById('intermediate-steps-content');
-        if (trace.intermediate_steps && trace.intermediate_steps.length > 0) {
-            stepsContent.innerHTML = trace.intermediate_steps.map(step => `
-                <div class="step-item">
-                    <strong>${step.step_type}:</strong>
-                    <pre>${this.escapeHtml(step.content)}</pre>
-                </div>
-            `).join('');
-        } else {
-            stepsContent.textContent = 'No intermediate steps';
+        // Update trace content and details
+        this.renderTraceContent(trace);
+        this.renderSteps(trace);
+
+        // Summaries from the server carry previews only; fetch the rest lazily
+        if (this.needsDetails(trace)) {
+            this.ensureTraceDetails(trace)
+                .then(() => {
+                    if (this.currentTrace === trace) this.renderTraceContent(trace);
+                })
+                .catch(error => console.error('Failed to load trace details:', error));
         }
 
-        // Metadata
-        document.getElementById('metadata-content').textContent = JSON.stringify(trace.metadata, null, 2);
-
         // Reset details state
         document.getElementById('trace-details-content').classList.add('hidden');
         document.getElementById('toggle-details-btn').textContent = 'Show Details ▼';
@@ -242,6 +268,156 @@ class EvalSwipeApp {
         }, 10);
     }
 
+    renderTraceContent(trace) {
+        document.getElementById('user-input-content').innerHTML = this.formatContent(trace.user_input);
+        document.getElementById('agent-output-content').innerHTML = this.formatContent(trace.agent_output);
+
+        const detailsPending = this.needsDetails(trace);
+        document.getElementById('system-prompt-content').textContent =
+            trace.system_prompt || (detailsPending ? 'Loading...' : 'No system prompt');
+        document.getElementById('metadata-content').textContent =
+            trace.metadata ? JSON.stringify(trace.metadata, null, 2) : (detailsPending ? 'Loading...' : '{}');
+    }
+
+    renderSteps(trace) {
+        const stepsContent = document.getElementById('intermediate-steps-content');
+        const total = trace.step_count !== undefined ? trace.step_count : (trace.intermediate_steps || []).length;
+
+        if (this.stepList) {
+            this.stepList.destroy();
+            this.stepList = null;
+        }
+
+        if (total === 0) {
+            stepsContent.textContent = 'No intermediate steps';
+            return;
+        }
+
+        // Windowed list of step previews, plus a pane for the opened step
+        stepsContent.textContent = '';
+        const list = document.createElement('div');
+        list.className = 'step-list';
+        const detail = document.createElement('div');
+        detail.id = 'step-detail';
+        detail.className = 'step-detail hidden';
+        stepsContent.append(list, detail);
+
+        this.stepList = new VirtualList(list, {
+            rowHeight: STEP_ROW_HEIGHT,
+            renderRow: index => this.renderStepRow(trace, index),
+            onRangeChange: (start, end) => this.ensureSteps(trace, start, end)
+        });
+        this.stepList.setCount(total);
+    }
+
+    renderStepRow(trace, index) {
+        const step = (trace.intermediate_steps || [])[index];
+        const row = document.createElement('div');
+        row.className = 'step-item step-row';
+
+        if (!step) {
+            row.innerHTML = `<div class="step-row-header"><strong>Step ${index + 1}</strong></div>
+                <div class="step-preview">Loading...</div>`;
+            return row;
+        }
+
+        const length = step.content_length || step.content.length;
+        row.innerHTML = `
+            <div class="step-row-header">
+                <strong>${this.escapeHtml(step.step_type)}</strong>
+                <span class="step-index">#${index + 1}${length > STEP_PREVIEW_CHARS ? ` · ${length.toLocaleString()} chars` : ''}</span>
+            </div>
+            <div class="step-preview">${this.escapeHtml(step.content.slice(0, STEP_PREVIEW_CHARS))}</div>
+        `;
+        row.addEventListener('click', () => this.showStepDetail(trace, index));
+        return row;
+    }
+
+    async ensureSteps(trace, start, end) {
+        // Full traces (e.g. restored from an older local copy) have every step already
+        if (trace.step_count === undefined) return;
+
+        const steps = trace.intermediate_steps || (trace.intermediate_steps = []);
+        const firstPage = Math.floor(start / STEP_PAGE_SIZE) * STEP_PAGE_SIZE;
+
+        for (let offset = firstPage; offset < end; offset += STEP_PAGE_SIZE) {
+            const key = `${trace.id}:${offset}`;
+            const last = Math.min(offset + STEP_PAGE_SIZE, trace.step_count);
+            if (this.stepPagesLoading.has(key) || (steps[offset] && steps[last - 1])) continue;
+
+            this.stepPagesLoading.add(key);
+            try {
+                const page = await apiClient.getTraceSteps(trace.id, offset, STEP_PAGE_SIZE, STEP_PREVIEW_CHARS);
+                page.steps.forEach((step, i) => { steps[offset + i] = step; });
+                trace.step_count = page.total;
+                if (this.currentTrace === trace && this.stepList) this.stepList.refresh();
+            } catch (error) {
+                this.showToast(`Failed to load steps: ${error.message}`, 'error');
+            } finally {
+                this.stepPagesLoading.delete(key);
+            }
+        }
+    }
+
+    async showStepDetail(trace, index) {
+        const detail = document.getElementById('step-detail');
+        if (!detail) return;
+
+        let step = trace.intermediate_steps[index];
+        detail.classList.remove('hidden');
+        detail.innerHTML = `<div class="step-row-header"><strong>${this.escapeHtml(step.step_type)}</strong>
+            <span class="step-index">#${index + 1}</span></div><pre>Loading...</pre>`;
+
+        if (step.content_truncated) {
+            try {
+                step = await apiClient.getTraceStep(trace.id, index);
+                trace.intermediate_steps[index] = step;
+            } catch (error) {
+                this.showToast(`Failed to load step: ${error.message}`, 'error');
+                return;
+            }
+        }
+        if (this.currentTrace !== trace) return;
+
+        // Render long contents a chunk at a time
+        const pre = detail.querySelector('pre');
+        let shown = 0;
+        const showMore = () => {
+            const chunk = step.content.slice(shown, shown + STEP_RENDER_CHUNK);
+            pre.appendChild(document.createTextNode(chunk));
+            shown += chunk.length;
+            more.classList.toggle('hidden', shown >= step.content.length);
+            more.textContent = `Show more (${shown.toLocaleString()} / ${step.content.length.toLocaleString()} chars)`;
+        };
+        pre.textContent = '';
+        const more = document.createElement('button');
+        more.className = 'btn secondary-btn';
+        more.addEventListener('click', showMore);
+        detail.appendChild(more);
+        showMore();
+    }
+
+    needsDetails(trace) {
+        // Server summaries have step_count; full traces (and local ones) don't
+        return trace.step_count !== undefined && !trace.details_loaded;
+    }
+
+    async ensureTraceDetails(trace) {
+        if (!this.needsDetails(trace)) return trace;
+
+        const full = await apiClient.getTrace(trace.id, { includeSteps: false });
+        Object.assign(trace, {
+            user_input: full.user_input,
+            agent_output: full.agent_output,
+            system_prompt: full.system_prompt,
+            metadata: full.metadata,
+            input_truncated: false,
+            output_truncated: false,
+            details_loaded: true,
+        });
+        return trace;
+    }
+
     formatContent(text) {
         // Convert markdown-style formatting
         let formatted = this.escapeHtml(text);
@@ -273,6 +449,9 @@ class EvalSwipeApp {
         if (content.classList.contains('hidden')) {
             content.classList.remove('hidden');
             button.textContent = 'Hide Details ▲';
+
+            // The step list renders (and fetches its first page) once visible
+            if (this.stepList) this.stepList.refresh();
         } else {
             content.classList.add('hidden');
             button.textContent = 'Show Details ▼';
@@ -290,11 +469,13 @@ class EvalSwipeApp {
                 pass_fail: 'pass',
                 open_code: null,
                 axial_tags: [],
-                reviewer_id: 'current_user'
+                reviewer_id: 'current_user',
+                session_id: this.currentSession?.id
             });
 
             this.currentTrace.reviewed = true;
             this.currentTrace.pass_fail = 'pass';
+            this.saveTraceLocally(this.currentTrace);
             this.updateProgress();
 
             this.animateSwipe('right');
@@ -320,11 +501,13 @@ class EvalSwipeApp {
                 pass_fail: 'defer',
                 open_code: null,
                 axial_tags: [],
-                reviewer_id: 'current_user'
+                reviewer_id: 'current_user',
+                session_id: this.currentSession?.id
             });
 
             this.currentTrace.reviewed = true;
             this.currentTrace.pass_fail = 'defer';
+            this.saveTraceLocally(this.currentTrace);
             this.updateProgress();
 
             this.animateSwipe('up');
@@ -375,12 +558,14 @@ class EvalSwipeApp {
                 pass_fail: 'fail',
                 open_code: openCode,
                 axial_tags: [],
-                reviewer_id: 'current_user'
+                reviewer_id: 'current_user',
+                session_id: this.currentSession?.id
             });
 
             this.currentTrace.reviewed = true;
             this.currentTrace.pass_fail = 'fail';
             this.currentTrace.open_code = openCode;
+            this.saveTraceLocally(this.currentTrace);
             this.updateProgress();
 
             document.getElementById('open-coding-modal').classList.add('hidden');
@@ -491,11 +676,13 @@ class EvalSwipeApp {
                 pass_fail: 'fail',
                 open_code: this.currentTrace.open_code,
                 axial_tags: this.currentTrace.axial_tags || [],
-                reviewer_id: 'current_user'
+                reviewer_id: 'current_user',
+                session_id: this.currentSession?.id
             });
 
             this.currentTrace.reviewed = true;
             this.currentTrace.pass_fail = 'fail';
+            this.saveTraceLocally(this.currentTrace);
             this.updateProgress();
 
             document.getElementById('axial-coding-modal').classList.add('hidden');
@@ -598,21 +785,43 @@ class EvalSwipeApp {
             return;
         }
 
-        try {
-            this.showLoading('Generating suggestions with Claude...');
+        // One card per suggestion, filled in as its events arrive
+        const container = document.getElementById('suggestions-container');
+        container.classList.remove('hidden');
+        container.innerHTML = '';
+        const cards = new Map();
+        for (let version = 1; version <= numSuggestions; version++) {
+            const card = this.renderSuggestionCard({ version, improved_prompt: '', changes_made: [] }, true);
+            cards.set(version, card);
+            container.appendChild(card);
+        }
 
-            const response = await apiClient.generatePromptSuggestions({
+        const button = document.getElementById('generate-suggestions-btn');
+        button.disabled = true;
+        try {
+            await apiClient.streamPromptSuggestions({
                 current_prompt: currentPrompt,
                 target_failure_modes: selectedTags,
                 additional_context: additionalContext,
                 num_suggestions: numSuggestions
+            }, (event, data) => {
+                if (event === 'partial' || event === 'suggestion') {
+                    const suggestion = event === 'partial'
+                        ? { improved_prompt: '', changes_made: [], ...data.suggestion, version: data.version }
+                        : data;
+                    const card = this.renderSuggestionCard(suggestion, event === 'partial');
+                    cards.get(suggestion.version)?.replaceWith(card);
+                    cards.set(suggestion.version, card);
+                } else if (event === 'error') {
+                    cards.get(data.version)?.remove();
+                    cards.delete(data.version);
+                    this.showToast(`Suggestion ${data.version} failed: ${data.detail}`, 'error');
+                }
             });
-
-            this.renderPromptSuggestions(response.suggestions);
-            this.hideLoading();
         } catch (error) {
-            this.hideLoading();
             this.showToast(`Failed to generate suggestions: ${error.message}`, 'error');
+        } finally {
+            button.disabled = false;
         }
     }
 
@@ -621,28 +830,71 @@ class EvalSwipeApp {
         container.classList.remove('hidden');
         container.innerHTML = '';
 
-        suggestions.forEach(suggestion => {
-            const card = document.createElement('div');
-            card.className = 'suggestion-card';
-            card.innerHTML = `
-                <div class="suggestion-header">
-                    <h3>Suggestion ${suggestion.version}</h3>
-                    <div class="suggestion-actions">
-                        <button class="btn secondary-btn" onclick="navigator.clipboard.writeText(\`${this.escapeHtml(suggestion.improved_prompt)}\`)">
-                            Copy
-                        </button>
-                    </div>
-                </div>
-                <div class="improved-prompt">${this.escapeHtml(suggestion.improved_prompt)}</div>
-                <div class="changes-list">
-                    <h4>Changes Made:</h4>
-                    <ul>
-                        ${suggestion.changes_made.map(change => `<li>${this.escapeHtml(change)}</li>`).join('')}
-                    </ul>
+        suggestions.forEach(suggestion => container.appendChild(this.renderSuggestionCard(suggestion)));
+    }
+
+    renderSuggestionCard(suggestion, pending = false) {
+        const card = document.createElement('div');
+        card.className = pending ? 'suggestion-card pending' : 'suggestion-card';
+        card.innerHTML = `
+            <div class="suggestion-header">
+                <h3>Suggestion ${suggestion.version}${pending ? ' (generating...)' : ''}</h3>
+                <div class="suggestion-actions">
+                    <button class="btn secondary-btn copy-btn" ${pending ? 'disabled' : ''}>
+                        Copy
+                    </button>
+                    <button class="btn secondary-btn replay-btn" ${pending ? 'disabled' : ''}
+                        title="Re-run the failing traces with this prompt and review the results as a new session">
+                        Replay Failures
+                    </button>
                 </div>
-            `;
-            container.appendChild(card);
+            </div>
+            <div class="improved-prompt">${this.escapeHtml(suggestion.improved_prompt || '')}</div>
+            <div class="changes-list">
+                <h4>Changes Made:</h4>
+                <ul>
+                    ${(suggestion.changes_made || []).map(change => `<li>${this.escapeHtml(change)}</li>`).join('')}
+                </ul>
+            </div>
+        `;
+        card.querySelector('.copy-btn').addEventListener('click', () => {
+            navigator.clipboard.writeText(suggestion.improved_prompt);
         });
+        card.querySelector('.replay-btn').addEventListener('click', () => this.handleReplaySuggestion(suggestion));
+        return card;
+    }
+
+    async handleReplaySuggestion(suggestion) {
+        const selectedTags = Array.from(document.querySelectorAll('#failure-modes-list .tag-chip.selected'))
+            .map(chip => chip.dataset.tagId);
+
+        try {
+            this.showLoading('Replaying failing traces with the suggested prompt...');
+
+            const response = await apiClient.replayPrompt({
+                prompt: suggestion.improved_prompt,
+                target_failure_modes: selectedTags,
+                create_session: true,
+                session_name: `Replay of suggestion ${suggestion.version}`
+            });
+            const { replayed, changed, errors } = response.summary;
+            if (!response.session) {
+                throw new Error(`All ${errors} replays failed`);
+            }
+
+            const session = await apiClient.getSession(response.session.id);
+            this.useSession(session, response.revision, response.instance);
+            document.getElementById('prompt-improvement-modal').classList.add('hidden');
+
+            this.hideLoading();
+            this.showToast(
+                `Replayed ${replayed} traces (${changed} responses changed${errors ? `, ${errors} failed` : ''})`,
+                errors ? 'warning' : 'success'
+            );
+        } catch (error) {
+            this.hideLoading();
+            this.showToast(`Failed to replay traces: ${error.message}`, 'error');
+        }
     }
 
     navigateToPrevious() {
@@ -718,46 +970,124 @@ class EvalSwipeApp {
 
         const previous = this.undoStack.pop();
         this.traces[previous.traceIndex] = previous.trace;
+        this.saveTraceLocally(previous.trace);
         this.loadTrace(previous.traceIndex);
         this.updateProgress();
         this.showToast('Action undone', 'info');
     }
 
-    saveLocalSession() {
+    saveLocalSession({ full = false } = {}) {
         if (!this.currentSession) return;
 
-        try {
-            const sessionData = {
+        // Traces are written one record at a time as they change
+        // (saveTraceLocally); a full write is only needed for a new session
+        const write = full
+            ? localStore.saveSession({
                 session: this.currentSession,
                 traces: this.traces,
                 tags: this.tags,
-                currentTraceIndex: this.currentTraceIndex
-            };
-            localStorage.setItem('evalswipe_session', JSON.stringify(sessionData));
+                currentTraceIndex: this.currentTraceIndex,
+                revision: this.revision,
+                instance: this.revisionInstance
+            })
+            : localStore.saveState(this.currentSession.id, {
+                tags: this.tags,
+                current_trace_index: this.currentTraceIndex
+            });
+
+        write.catch(error => console.error('Failed to save session locally:', error));
+    }
+
+    saveTraceLocally(trace) {
+        if (!this.currentSession) return;
+
+        localStore.saveTraces(this.currentSession.id, [trace])
+            .catch(error => console.error('Failed to save trace locally:', error));
+    }
+
+    async loadLocalSession() {
+        try {
+            const record = await localStore.loadCurrentSession();
+            if (!record) return;
+
+            const traces = await localStore.loadTraces(record);
+            if (this.currentSession || traces.length === 0) return;
+
+            this.currentSession = record.session;
+            this.traces = traces;
+            this.tags = record.tags || [];
+            this.currentTraceIndex = Math.min(record.current_trace_index || 0, traces.length - 1);
+            this.revision = record.revision || 0;
+            this.revisionInstance = record.instance;
+
+            this.showReviewInterface();
+            this.loadTrace(this.currentTraceIndex);
+            this.updateProgress();
+            this.showToast('Session restored from previous session', 'info');
+
+            await this.syncSession();
         } catch (error) {
-            console.error('Failed to save session to localStorage:', error);
+            console.error('Failed to restore local session:', error);
         }
     }
 
-    loadLocalSession() {
+    async syncSession() {
+        const session = this.currentSession;
+        if (!session || this.syncing) return;
+
+        this.syncing = true;
         try {
-            const saved = localStorage.getItem('evalswipe_session');
-            if (saved) {
-                const data = JSON.parse(saved);
-                this.currentSession = data.session;
-                this.traces = data.traces;
-                this.tags = data.tags || [];
-                this.currentTraceIndex = data.currentTraceIndex || 0;
-
-                if (this.traces.length > 0) {
-                    this.showReviewInterface();
+            const changes = await apiClient.getSessionChanges(session.id, this.revision, this.revisionInstance);
+            if (this.currentSession !== session) return;
+
+            const byId = new Map(this.traces.map(trace => [trace.id, trace]));
+            const changed = [];
+            changes.traces.forEach(remote => {
+                const local = byId.get(remote.id);
+                if (local) {
+                    ANNOTATION_FIELDS.forEach(field => { local[field] = remote[field]; });
+                    changed.push(local);
+                } else {
+                    byId.set(remote.id, remote);
+                    changed.push(remote);
+                }
+            });
+
+            const state = { revision: changes.revision, instance: changes.instance };
+            if (changes.trace_ids) {
+                const currentId = this.currentTrace && this.currentTrace.id;
+                this.traces = changes.trace_ids.map(id => byId.get(id)).filter(Boolean);
+                const index = this.traces.findIndex(trace => trace.id === currentId);
+                this.currentTraceIndex = index >= 0 ? index : Math.min(this.currentTraceIndex, this.traces.length - 1);
+                state.trace_ids = this.traces.map(trace => trace.id);
+                state.current_trace_index = this.currentTraceIndex;
+            }
+            if (changes.session) {
+                this.currentSession = { ...session, ...changes.session };
+                state.session = changes.session;
+            }
+            if (changes.tags) {
+                this.tags = changes.tags;
+                state.tags = changes.tags;
+            }
+            this.revision = changes.revision;
+            this.revisionInstance = changes.instance;
+
+            await localStore.saveTraces(session.id, changed);
+            await localStore.saveState(session.id, state);
+
+            if (changed.length > 0 || changes.trace_ids) {
+                this.updateProgress();
+                const current = this.traces[this.currentTraceIndex];
+                if (current && (changes.trace_ids || changed.includes(current))) {
                     this.loadTrace(this.currentTraceIndex);
-                    this.updateProgress();
-                    this.showToast('Session restored from previous session', 'info');
                 }
             }
         } catch (error) {
-            console.error('Failed to load session from localStorage:', error);
+            // Keep working from the local copy (e.g. the server has restarted without it)
+            console.warn('Session sync failed:', error);
+        } finally {
+            this.syncing = false;
         }
     }
 
@@ -840,7 +1170,7 @@ class EvalSwipeApp {
 
     clearSession() {
         if (confirm('Are you sure you want to clear the current session? This cannot be undone.')) {
-            localStorage.removeItem('evalswipe_session');
+            localStore.clear().catch(error => console.error('Failed to clear local session:', error));
             this.currentSession = null;
             this.traces = [];
             this.tags = [];
@@ -851,15 +1181,27 @@ class EvalSwipeApp {
         }
     }
 
-    exportCurrentSession() {
+    async exportCurrentSession() {
         if (!this.currentSession) {
             this.showToast('No session to export', 'warning');
             return;
         }
 
+        // Loaded traces are summaries (previews, no steps); export the full ones
+        let session = { ...this.currentSession, traces: this.traces };
+        try {
+            session = await apiClient.getSession(this.currentSession.id, { view: 'full' });
+        } catch (error) {
+            // A local-only session has nothing on the server; its own traces are full
+            if (this.traces.some(trace => trace.step_count !== undefined)) {
+                this.showToast(`Failed to export session: ${error.message}`, 'error');
+                return;
+            }
+        }
+
         const sessionData = {
-            session: this.currentSession,
-            traces: this.traces,
+            session,
+            traces: session.traces,
             tags: this.tags,
             exported_at: new Date().toISOString()
         };
@@ -882,10 +1224,11 @@ class EvalSwipeApp {
             return;
         }
 
+        // Show the modal first: the virtualized list renders what is visible
+        document.getElementById('history-view').classList.remove('hidden');
+
         this.renderHistoryStats();
         this.renderHistoryList();
-
-        document.getElementById('history-view').classList.remove('hidden');
     }
 
     renderHistoryStats() {
@@ -929,79 +1272,102 @@ class EvalSwipeApp {
         const filter = document.getElementById('history-filter').value;
         const sort = document.getElementById('history-sort').value;
 
-        let filteredTraces = [...this.traces];
+        // Work on indices into this.traces, so rows know their trace position
+        let indices = this.traces.map((_, index) => index);
 
-        // Apply filter
-        if (filter === 'pass') {
-            filteredTraces = filteredTraces.filter(t => t.pass_fail === 'pass');
-        } else if (filter === 'fail') {
-            filteredTraces = filteredTraces.filter(t => t.pass_fail === 'fail');
-        } else if (filter === 'defer') {
-            filteredTraces = filteredTraces.filter(t => t.pass_fail === 'defer');
+        // Apply query (evaluated by the server), then filter
+        if (this.historyQueryIds) {
+            indices = indices.filter(i => this.historyQueryIds.has(this.traces[i].id));
+        }
+        if (filter === 'pass' || filter === 'fail' || filter === 'defer') {
+            indices = indices.filter(i => this.traces[i].pass_fail === filter);
         } else if (filter === 'unreviewed') {
-            filteredTraces = filteredTraces.filter(t => !t.reviewed);
+            indices = indices.filter(i => !this.traces[i].reviewed);
         }
 
         // Apply sort
         if (sort === 'recent') {
-            filteredTraces.sort((a, b) => {
-                if (!a.reviewed_at) return 1;
-                if (!b.reviewed_at) return -1;
-                return new Date(b.reviewed_at) - new Date(a.reviewed_at);
-            });
+            const reviewedAt = i => this.traces[i].reviewed_at ? new Date(this.traces[i].reviewed_at).getTime() : -Infinity;
+            const times = new Map(indices.map(i => [i, reviewedAt(i)]));
+            indices.sort((a, b) => times.get(b) - times.get(a));
         } else if (sort === 'status') {
             const statusOrder = { fail: 0, defer: 1, pass: 2, unreviewed: 3 };
-            filteredTraces.sort((a, b) => {
-                const aStatus = a.pass_fail || 'unreviewed';
-                const bStatus = b.pass_fail || 'unreviewed';
+            indices.sort((a, b) => {
+                const aStatus = this.traces[a].pass_fail || 'unreviewed';
+                const bStatus = this.traces[b].pass_fail || 'unreviewed';
                 return statusOrder[aStatus] - statusOrder[bStatus];
             });
         }
 
         const listContainer = document.getElementById('history-list');
 
-        if (filteredTraces.length === 0) {
+        if (this.historyList) {
+            this.historyList.destroy();
+            this.historyList = null;
+        }
+
+        if (indices.length === 0) {
             listContainer.innerHTML = '<p style="text-align: center; color: var(--color-text-light);">No traces match the selected filter.</p>';
             return;
         }
 
-        listContainer.innerHTML = filteredTraces.map((trace, idx) => {
-            const originalIndex = this.traces.indexOf(trace);
-            const status = trace.reviewed ? trace.pass_fail : 'unreviewed';
-            const statusLabel = status === 'unreviewed' ? 'Not Reviewed' : status.charAt(0).toUpperCase() + status.slice(1);
-
-            // Get tag names
-            const tagNames = (trace.axial_tags || []).map(tagId => {
-                const tag = this.tags.find(t => t.id === tagId);
-                return tag ? tag.name : tagId;
-            });
+        const tagNames = new Map(this.tags.map(tag => [tag.id, tag.name]));
+        this.historyList = new VirtualList(listContainer, {
+            rowHeight: HISTORY_ROW_HEIGHT,
+            renderRow: row => this.renderHistoryItem(indices[row], tagNames)
+        });
+        this.historyList.setCount(indices.length);
+    }
 
-            return `
-                <div class="history-item" onclick="window.evalSwipeApp.jumpToTrace(${originalIndex})">
-                    <div class="history-item-header">
-                        <span class="history-item-id">${trace.id}</span>
-                        <span class="history-item-status ${status}">${statusLabel}</span>
+    renderHistoryItem(index, tagNames) {
+        const trace = this.traces[index];
+        const status = trace.reviewed ? trace.pass_fail : 'unreviewed';
+        const statusLabel = status === 'unreviewed' ? 'Not Reviewed' : status.charAt(0).toUpperCase() + status.slice(1);
+        const names = (trace.axial_tags || []).map(tagId => tagNames.get(tagId) || tagId);
+
+        const item = document.createElement('div');
+        item.className = 'history-item';
+        item.innerHTML = `
+            <div class="history-item-header">
+                <span class="history-item-id">${this.escapeHtml(trace.id)}</span>
+                <span class="history-item-status ${status}">${statusLabel}</span>
+            </div>
+            <div class="history-item-content">
+                <div class="history-item-input">
+                    <strong>Input:</strong> ${this.escapeHtml(trace.user_input)}
+                </div>
+                ${trace.open_code ? `
+                    <div class="history-item-open-code">
+                        <strong>Note:</strong> ${this.escapeHtml(trace.open_code)}
                     </div>
-                    <div class="history-item-content">
-                        <div class="history-item-input">
-                            <strong>Input:</strong> ${this.escapeHtml(trace.user_input)}
-                        </div>
-                        ${trace.open_code ? `
-                            <div class="history-item-open-code">
-                                <strong>Note:</strong> ${this.escapeHtml(trace.open_code)}
-                            </div>
-                        ` : ''}
-                        ${tagNames.length > 0 ? `
-                            <div class="history-item-tags">
-                                ${tagNames.map(name => `
-                                    <span class="tag-chip">${this.escapeHtml(name)}</span>
-                                `).join('')}
-                            </div>
-                        ` : ''}
+                ` : ''}
+                ${names.length > 0 ? `
+                    <div class="history-item-tags">
+                        ${names.map(name => `
+                            <span class="tag-chip">${this.escapeHtml(name)}</span>
+                        `).join('')}
                     </div>
-                </div>
-            `;
-        }).join('');
+                ` : ''}
+            </div>
+        `;
+        item.addEventListener('click', () => this.jumpToTrace(index));
+        return item;
+    }
+
+    async applyHistoryQuery(query) {
+        if (!query) {
+            this.historyQueryIds = null;
+            this.renderHistoryList();
+            return;
+        }
+
+        try {
+            const response = await apiClient.getTraces({ q: query, session_id: this.currentSession.id, view: 'ids' });
+            this.historyQueryIds = new Set(response.trace_ids);
+            this.renderHistoryList();
+        } catch (error) {
+            this.showToast(error.message, 'error');
+        }
     }
 
     filterHistory() {
@@ -1,7 +1,216 @@
 /**
- * Session Manager - handles session persistence and resume
- * Note: Core functionality implemented in app.js
- * This module can be extended for additional session features
+ * Session Manager - local session persistence in IndexedDB
+ *
+ * Each trace is stored as its own record, so saving an annotation writes one
+ * small record instead of serializing the whole session, and restoring reads
+ * traces in batches without holding up the UI. Stores:
+ * - sessions: session fields, trace order, tags, position and sync revision
+ * - traces: one record per trace, keyed by [session_id, id]
+ * - meta: the current session ID
  */
 
-// Placeholder for future session management features
+const DB_NAME = 'evalswipe';
+const DB_VERSION = 1;
+const RESTORE_BATCH_SIZE = 500;
+const LEGACY_SESSION_KEY = 'evalswipe_session';
+
+// Annotation fields merged from the server on sync
+const ANNOTATION_FIELDS = ['reviewed', 'pass_fail', 'open_code', 'axial_tags', 'reviewer_id', 'reviewed_at'];
+
+class LocalStore {
+    constructor() {
+        this.dbPromise = null;
+    }
+
+    /**
+     * Open (and create or upgrade) the database once
+     */
+    open() {
+        if (!this.dbPromise) {
+            this.dbPromise = new Promise((resolve, reject) => {
+                if (!window.indexedDB) {
+                    reject(new Error('IndexedDB is not available'));
+                    return;
+                }
+
+                const request = indexedDB.open(DB_NAME, DB_VERSION);
+                request.onupgradeneeded = () => {
+                    const db = request.result;
+                    db.createObjectStore('sessions', { keyPath: 'id' });
+                    db.createObjectStore('traces', { keyPath: ['session_id', 'id'] });
+                    db.createObjectStore('meta');
+                };
+                request.onsuccess = () => resolve(request.result);
+                request.onerror = () => reject(request.error);
+            });
+        }
+        return this.dbPromise;
+    }
+
+    /**
+     * Run fn(stores) in one transaction; resolves with fn's result when it commits
+     */
+    async transaction(storeNames, mode, fn) {
+        const db = await this.open();
+        return new Promise((resolve, reject) => {
+            const tx = db.transaction(storeNames, mode);
+            const stores = Object.fromEntries(storeNames.map(name => [name, tx.objectStore(name)]));
+            let result;
+            tx.oncomplete = () => resolve(result);
+            tx.onerror = () => reject(tx.error);
+            tx.onabort = () => reject(tx.error || new Error('Transaction aborted'));
+            result = fn(stores);
+        });
+    }
+
+    static request(idbRequest) {
+        return new Promise((resolve, reject) => {
+            idbRequest.onsuccess = () => resolve(idbRequest.result);
+            idbRequest.onerror = () => reject(idbRequest.error);
+        });
+    }
+
+    static traceRange(sessionId, afterId = null) {
+        // Array keys sort after strings, so [sessionId, []] bounds every trace ID
+        return afterId === null
+            ? IDBKeyRange.bound([sessionId, ''], [sessionId, []])
+            : IDBKeyRange.bound([sessionId, afterId], [sessionId, []], true, false);
+    }
+
+    /**
+     * Replace everything stored for a session and make it the current one
+     */
+    async saveSession({ session, traces, tags, currentTraceIndex, revision, instance }) {
+        const { traces: _, ...fields } = session;
+        return this.transaction(['sessions', 'traces', 'meta'], 'readwrite', ({ sessions, traces: traceStore, meta }) => {
+            traceStore.delete(LocalStore.traceRange(session.id));
+            traces.forEach(trace => traceStore.put({ ...trace, session_id: session.id }));
+            sessions.put({
+                id: session.id,
+                session: fields,
+                trace_ids: traces.map(trace => trace.id),
+                tags,
+                current_trace_index: currentTraceIndex,
+                revision: revision || 0,
+                instance: instance || null
+            });
+            meta.put(session.id, 'current_session_id');
+        });
+    }
+
+    /**
+     * Write only the given traces (e.g. the one just annotated)
+     */
+    async saveTraces(sessionId, traces) {
+        if (traces.length === 0) return;
+        return this.transaction(['traces'], 'readwrite', ({ traces: traceStore }) => {
+            traces.forEach(trace => traceStore.put({ ...trace, session_id: sessionId }));
+        });
+    }
+
+    /**
+     * Update session-level fields (position, tags, revision, trace order)
+     */
+    async saveState(sessionId, changes) {
+        return this.transaction(['sessions', 'traces'], 'readwrite', ({ sessions, traces: traceStore }) => {
+            const get = sessions.get(sessionId);
+            get.onsuccess = () => {
+                if (!get.result) return;
+                const record = { ...get.result, ...changes };
+                sessions.put(record);
+
+                // Drop traces that are no longer part of the session
+                if (changes.trace_ids) {
+                    const keep = new Set(changes.trace_ids);
+                    const ids = traceStore.getAllKeys(LocalStore.traceRange(sessionId));
+                    ids.onsuccess = () => ids.result
+                        .filter(([, traceId]) => !keep.has(traceId))
+                        .forEach(key => traceStore.delete(key));
+                }
+            };
+        });
+    }
+
+    /**
+     * Session record of the current session, or null
+     */
+    async loadCurrentSession() {
+        await this.migrateLegacySession();
+
+        const db = await this.open();
+        const tx = db.transaction(['sessions', 'meta'], 'readonly');
+        const sessionId = await LocalStore.request(tx.objectStore('meta').get('current_session_id'));
+        if (!sessionId) return null;
+        return (await LocalStore.request(tx.objectStore('sessions').get(sessionId))) || null;
+    }
+
+    /**
+     * Load a session's traces in batches (one short transaction each) and
+     * return them in session order. onProgress(loaded) is called per batch.
+     */
+    async loadTraces(record, onProgress = () => {}) {
+        const db = await this.open();
+        const byId = new Map();
+        let afterId = null;
+
+        while (true) {
+            const store = db.transaction('traces', 'readonly').objectStore('traces');
+            const batch = await LocalStore.request(
+                store.getAll(LocalStore.traceRange(record.id, afterId), RESTORE_BATCH_SIZE)
+            );
+            batch.forEach(({ session_id: _, ...trace }) => byId.set(trace.id, trace));
+            onProgress(byId.size);
+
+            if (batch.length < RESTORE_BATCH_SIZE) break;
+            afterId = batch[batch.length - 1].id;
+        }
+
+        return record.trace_ids.map(id => byId.get(id)).filter(Boolean);
+    }
+
+    /**
+     * Forget the current session (its records are deleted)
+     */
+    async clear() {
+        return this.transaction(['sessions', 'traces', 'meta'], 'readwrite', ({ sessions, traces, meta }) => {
+            const get = meta.get('current_session_id');
+            get.onsuccess = () => {
+                if (!get.result) return;
+                sessions.delete(get.result);
+                traces.delete(LocalStore.traceRange(get.result));
+                meta.delete('current_session_id');
+            };
+        });
+    }
+
+    /**
+     * Move a session saved by earlier versions (one localStorage snapshot) into IndexedDB
+     */
+    async migrateLegacySession() {
+        let saved;
+        try {
+            saved = localStorage.getItem(LEGACY_SESSION_KEY);
+        } catch (error) {
+            return;
+        }
+        if (!saved) return;
+
+        try {
+            const data = JSON.parse(saved);
+            if (data.session && Array.isArray(data.traces)) {
+                await this.saveSession({
+                    session: data.session,
+                    traces: data.traces,
+                    tags: data.tags || [],
+                    currentTraceIndex: data.currentTraceIndex || 0
+                });
+            }
+        } catch (error) {
+            console.error('Failed to migrate saved session:', error);
+        }
+        localStorage.removeItem(LEGACY_SESSION_KEY);
+    }
+}
+
+// Create singleton instance
+const localStore = new LocalStore();
@@ -1,7 +1,115 @@
 /**
- * UI Controller - handles UI state management
- * Note: Core functionality implemented in app.js
- * This module can be extended for additional UI features
+ * UI Controller - shared UI components
+ *
+ * VirtualList renders only the rows of a long list that are in (or near) the
+ * viewport. Rows have a fixed height, so the position of any row is known
+ * without measuring, and scrolling only adds the rows that come into view and
+ * removes the ones that leave it (at most once per animation frame). Rows
+ * that are not loaded yet can be rendered as placeholders; onRangeChange
+ * tells the caller which rows are visible so it can fetch them.
  */
 
-// Placeholder for future UI management features
+class VirtualList {
+    /**
+     * @param {HTMLElement} container - Scrollable element (needs a height / max-height)
+     * @param {Object} options
+     * @param {number} options.rowHeight - Height of every row in pixels
+     * @param {Function} options.renderRow - (index) => HTMLElement
+     * @param {number} [options.overscan] - Extra rows rendered above and below the viewport
+     * @param {Function} [options.onRangeChange] - (start, end) called when the visible rows change
+     */
+    constructor(container, { rowHeight, renderRow, overscan = 8, onRangeChange = null }) {
+        this.container = container;
+        this.rowHeight = rowHeight;
+        this.renderRow = renderRow;
+        this.overscan = overscan;
+        this.onRangeChange = onRangeChange;
+
+        this.count = 0;
+        this.rows = new Map();
+        this.range = { start: 0, end: 0 };
+        this.frame = null;
+
+        this.spacer = document.createElement('div');
+        this.spacer.className = 'virtual-list-spacer';
+        this.spacer.style.position = 'relative';
+        this.container.textContent = '';
+        this.container.appendChild(this.spacer);
+
+        this.onScroll = () => this.schedule();
+        this.container.addEventListener('scroll', this.onScroll, { passive: true });
+        window.addEventListener('resize', this.onScroll);
+    }
+
+    setCount(count) {
+        this.count = count;
+        this.spacer.style.height = `${count * this.rowHeight}px`;
+        this.refresh();
+    }
+
+    /**
+     * Re-render the visible rows (e.g. after their data was loaded)
+     */
+    refresh() {
+        this.rows.forEach(row => row.remove());
+        this.rows.clear();
+        this.range = { start: 0, end: 0 };
+        this.update();
+    }
+
+    scrollToIndex(index) {
+        this.container.scrollTop = index * this.rowHeight;
+        this.update();
+    }
+
+    schedule() {
+        if (this.frame !== null) return;
+        this.frame = requestAnimationFrame(() => {
+            this.frame = null;
+            this.update();
+        });
+    }
+
+    update() {
+        const height = this.container.clientHeight;
+        if (height === 0) return;  // Hidden: render once shown (refresh)
+
+        const top = this.container.scrollTop;
+        const start = Math.max(0, Math.floor(top / this.rowHeight) - this.overscan);
+        const end = Math.min(this.count, Math.ceil((top + height) / this.rowHeight) + this.overscan);
+
+        // Drop rows that left the window, then add the ones that entered it
+        this.rows.forEach((row, index) => {
+            if (index < start || index >= end) {
+                row.remove();
+                this.rows.delete(index);
+            }
+        });
+
+        const fragment = document.createDocumentFragment();
+        for (let index = start; index < end; index++) {
+            if (this.rows.has(index)) continue;
+            const row = this.renderRow(index);
+            row.style.position = 'absolute';
+            row.style.top = `${index * this.rowHeight}px`;
+            row.style.left = '0';
+            row.style.right = '0';
+            this.rows.set(index, row);
+            fragment.appendChild(row);
+        }
+        this.spacer.appendChild(fragment);
+
+        if (start !== this.range.start || end !== this.range.end) {
+            this.range = { start, end };
+            if (this.onRangeChange) this.onRangeChange(start, end);
+        }
+    }
+
+    destroy() {
+        if (this.frame !== null) cancelAnimationFrame(this.frame);
+        this.container.removeEventListener('scroll', this.onScroll);
+        window.removeEventListener('resize', this.onScroll);
+        this.container.textContent = '';
+        this.rows.clear();
+    }
+}